@@ -4,16 +4,27 @@ from openai import OpenAI
 import re
 
 from prompts.prompt_loader import SimplePromptLoader
-from config import get_openai_client, DEFAULT_MODEL, MAX_IMAGES_PER_REQUEST, get_current_model
+from config import get_openai_client, DEFAULT_MODEL, MAX_IMAGES_PER_REQUEST
+from llm.cancellation import CallCancelled
+from llm.model_routing import (
+    MODEL_TUNING_PARAMS, ModelRoute, escalation_reason, escalation_route, request_options, resolve_route
+)
+from llm.pipeline import create_response_steps, invalidate_cached_response, run_steps
+from llm.response_cache import make_cache_key
+from telemetry.log import fields, get_logger
+from telemetry.tracing import current_span, traced
+
+logger = get_logger(__name__)
 
 
 class DRGeneratorAgent:
     """디자인 참조 생성 에이전트 (Responses API + file_search 연동)"""
 
-    def __init__(self, agent_type: str, vector_store_id: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(self, agent_type: str, vector_store_id: Optional[str] = None, api_key: Optional[str] = None,
+                 client: Optional[Any] = None):
         self.agent_type = agent_type
         self.vector_store_id = vector_store_id  # file_search용 벡터스토어 ID
-        self.client = get_openai_client(api_key)
+        self.client = client if client is not None else get_openai_client(api_key)
         
         # 프롬프트 로더 초기화
         self.prompt_loader = SimplePromptLoader()
@@ -27,125 +38,76 @@ class DRGeneratorAgent:
     # ----------------------
     # Public methods
     # ----------------------
-    def extract_json(self, base64_images: List[str], user_feedback: str = "") -> Dict[str, Any]:
+    def extract_json(self, base64_images: List[str], user_feedback: str = "", use_cache: bool = True) -> Dict[str, Any]:
         """
         이미지에서 JSON 데이터 추출 (Responses API 기반)
         - base64_images: 'data:image/png;base64,AAAA...' 형식의 data URL 리스트 (최대 10장)
         - user_feedback: 후속 턴에서 JSON 업데이트용 피드백(텍스트)
+        - use_cache: False면 응답 캐시를 건너뛰고 항상 새로 호출
         """
-        try:
-            # 시스템 프롬프트 로드
-            system_prompt = self.prompt_loader.load_prompt("dr_generator", self.agent_type)
-
-            # 입력 메시지 배열
-            input_messages: List[Dict[str, Any]] = []
-
-            # 1) 시스템 메시지
-            input_messages.append({
-                "role": "system",
-                "content": [{"type": "input_text", "text": system_prompt}]
-            })
-
-            # 2) 기존 대화 히스토리 재사용
-            if self.conversation_history:
-                input_messages.extend(self.conversation_history)
-
-            # 3) 현재 사용자 메시지 구성
-            if not user_feedback:
-                # 첫 호출 - 이미지들과 분석 요청
-                max_images = min(len(base64_images), MAX_IMAGES_PER_REQUEST)
-                if len(base64_images) > MAX_IMAGES_PER_REQUEST:
-                    print(f"경고: 최대 {MAX_IMAGES_PER_REQUEST}개 이미지만 처리 ({len(base64_images)}개 중 {max_images}개)")
-
-                # 유효한 data URL만 필터링
-                valid_images = [
-                    img for img in base64_images[:max_images]
-                    if isinstance(img, str) and img.startswith("data:image/")
-                ]
-                
-                print(f"디버그: 전체 이미지 개수: {len(base64_images)}")
-                print(f"디버그: 유효 이미지 개수: {len(valid_images)}")
-                if base64_images:
-                    print(f"디버그: 첫 번째 이미지 시작: {base64_images[0][:50] if base64_images[0] else 'None'}...")
-                
-                if not valid_images:
-                    raise Exception("유효한 이미지(data URL)가 없습니다. 형식: data:image/png;base64,AAAA...")
-
-                # 사용자 콘텐츠(이미지 + 텍스트)
-                user_content: List[Dict[str, Any]] = []
-                for img in valid_images:
-                    # Responses API는 data URL을 그대로 image_url로 받습니다.
-                    user_content.append({
-                        "type": "input_image",
-                        "image_url": img,
-                        # 필요 시 "detail": "high" 가능
-                    })
-
-                user_content.append({
-                    "type": "input_text",
-                    "text": "Analyze the screenshots and return ONLY the JSON in the schema specified by the system prompt. No extra text."
-                })
+        return run_steps(self.extract_json_steps(base64_images, user_feedback, use_cache))
 
-                print(f"이미지 분석 시작: {len(valid_images)}개 이미지")
-
-            else:
-                # 피드백 턴 - 텍스트만
-                user_content = [{
-                    "type": "input_text",
-                    "text": f"User feedback: {user_feedback}\n\nPlease update the JSON based on this feedback. Respond with JSON only."
-                }]
-                print(f"피드백 처리: {user_feedback[:50]}...")
-
-            # 4) 현재 사용자 메시지 추가
-            current_message = {"role": "user", "content": user_content}
-            input_messages.append(current_message)
+    @traced("dr_generation")
+    def extract_json_steps(self, base64_images: List[str], user_feedback: str = "", use_cache: bool = True):
+        """extract_json의 단계 generator 버전 (백그라운드 응답을 기다릴 때 BackgroundHandle을 yield)"""
+        current_span().set(module=self.agent_type, feedback_turn=bool(user_feedback))
+        cache_key = None
+        try:
+            system_prompt, input_messages, current_message, valid_images = self._build_turn(base64_images, user_feedback)
 
             # 5) Responses API 호출 (file_search 활성화 - 벡터스토어가 있을 때만)
-            current_model = get_current_model()
-            kwargs = dict(model=current_model, input=input_messages)
-            if self.vector_store_id:
-                kwargs["tools"] = [{"type": "file_search", "vector_store_ids": [self.vector_store_id]}]
-
-            response = self.client.responses.create(**kwargs)
-            print(f"🤖 DR Generation - 사용 모델: {current_model}")
+            route = resolve_route("dr_generation", self.agent_type)
+            response, response_content, cache_key = yield from self._call(
+                route, input_messages, system_prompt, valid_images, user_feedback, use_cache
+            )
 
-            # 6) 텍스트 추출
-            response_content = getattr(response, "output_text", None)
-            if response_content is None:
-                response_content = str(response)
+            # 6) JSON 파싱
+            parsed_result = self._parse_json_response(response_content)
 
-            # 7) 대화 히스토리에 현재 턴 추가 (assistant 응답도 저장)
+            # 7) 파싱 실패/응답 잘림이면 상위 경로로 한 번 더 (MODEL_CASCADE_ENABLED)
+            escalation = escalation_route("dr_generation", route)
+            reason = escalation_reason(response, parsed_result) if escalation else None
+            if reason:
+                logger.info("⬆️ DR Generation 상향: %s → %s (%s)", route.describe(), escalation.describe(), reason)
+                invalidate_cached_response(cache_key)
+                response, response_content, cache_key = yield from self._call(
+                    escalation, input_messages, system_prompt, valid_images, user_feedback, use_cache
+                )
+                parsed_result = self._parse_json_response(response_content)
+
+            # 8) 대화 히스토리에 현재 턴 추가 (assistant 응답도 저장)
             self.conversation_history.append(current_message)
             self.conversation_history.append({
                 "role": "assistant",
                 "content": [{"type": "output_text", "text": response_content}]
             })
 
-            # 8) JSON 파싱
-            parsed_result = self._parse_json_response(response_content)
-
             # 9) 파싱 성공 여부 확인
             if parsed_result.get("status") not in ["json_parse_error", "text_only", "error"]:
                 # 유효한 JSON이면 저장하고 반환
                 self.last_valid_json = parsed_result
-                print(f"새 JSON 생성 성공 ({self.agent_type})")
+                logger.info("새 JSON 생성 성공 (%s)", self.agent_type)
                 return parsed_result
             else:
-                # 파싱 실패 → 기존 JSON 유지
+                # 파싱 실패 → 캐시된 응답 무효화 후 기존 JSON 유지
+                invalidate_cached_response(cache_key)
                 if self.last_valid_json:
-                    print(f"JSON 파싱 실패, 기존 JSON 유지 ({self.agent_type})")
+                    logger.warning("JSON 파싱 실패, 기존 JSON 유지 (%s)", self.agent_type)
                     return self.last_valid_json
                 else:
                     # 첫 호출에서 실패한 경우
-                    print(f"첫 JSON 생성 실패 ({self.agent_type})")
+                    logger.warning("첫 JSON 생성 실패 (%s)", self.agent_type)
                     return parsed_result
 
+        except CallCancelled:
+            # 취소/마감 초과는 기존 JSON으로 가리지 않고 호출자에게 그대로 전달
+            raise
         except Exception as e:
-            print(f"DR Generator 실행 오류: {e}")
+            logger.error("DR Generator 실행 오류: %s", e)
 
             # 기존 유효한 JSON이 있으면 반환, 없으면 에러
             if self.last_valid_json:
-                print(f"에러 발생, 기존 JSON 유지 ({self.agent_type})")
+                logger.warning("에러 발생, 기존 JSON 유지 (%s)", self.agent_type)
                 return self.last_valid_json
             else:
                 return {
@@ -154,6 +116,18 @@ class DRGeneratorAgent:
                     "status": "error"
                 }
 
+    def build_request(self, base64_images: List[str]) -> Dict[str, Any]:
+        """
+        첫 턴 Responses API 요청 본문 생성 (호출하지 않음, 일괄 제출 파일용)
+        - 대화 히스토리는 바꾸지 않음
+        """
+        _, input_messages, _, _ = self._build_turn(base64_images, "")
+        return self._request_kwargs(input_messages)
+
+    def parse_response_text(self, response_content: str) -> Dict[str, Any]:
+        """응답 텍스트를 DR JSON으로 파싱 (실패 시 status 필드에 원인)"""
+        return self._parse_json_response(response_content)
+
     def reset_conversation(self):
         """대화 히스토리 초기화 (기존 JSON 유지)"""
         self.conversation_history.clear()
@@ -168,6 +142,105 @@ class DRGeneratorAgent:
     # ----------------------
     # Private helpers
     # ----------------------
+    @traced("request.build", stage="dr_generation")
+    def _build_turn(self, base64_images: List[str], user_feedback: str):
+        """이번 턴 입력 구성 → (시스템 프롬프트, 입력 메시지, 현재 사용자 메시지, 유효 이미지)"""
+        # 시스템 프롬프트 로드
+        system_prompt = self.prompt_loader.load_prompt("dr_generator", self.agent_type)
+
+        # 입력 메시지 배열
+        input_messages: List[Dict[str, Any]] = []
+
+        # 1) 시스템 메시지
+        input_messages.append({
+            "role": "system",
+            "content": [{"type": "input_text", "text": system_prompt}]
+        })
+
+        # 2) 기존 대화 히스토리 재사용
+        if self.conversation_history:
+            input_messages.extend(self.conversation_history)
+
+        # 3) 현재 사용자 메시지 구성
+        valid_images: List[str] = []
+        if not user_feedback:
+            # 첫 호출 - 이미지들과 분석 요청
+            max_images = min(len(base64_images), MAX_IMAGES_PER_REQUEST)
+            if len(base64_images) > MAX_IMAGES_PER_REQUEST:
+                logger.warning("최대 %d개 이미지만 처리 (%d개 중 %d개)", MAX_IMAGES_PER_REQUEST, len(base64_images), max_images)
+
+            # 유효한 data URL만 필터링
+            valid_images = [
+                img for img in base64_images[:max_images]
+                if isinstance(img, str) and img.startswith("data:image/")
+            ]
+            
+            logger.debug("이미지 확인", extra=fields(
+                total_images=len(base64_images), valid_images=len(valid_images),
+                first_image_prefix=(base64_images[0][:50] if base64_images and base64_images[0] else None)
+            ))
+            
+            if not valid_images:
+                raise Exception("유효한 이미지(data URL)가 없습니다. 형식: data:image/png;base64,AAAA...")
+
+            # 사용자 콘텐츠(이미지 + 텍스트)
+            user_content: List[Dict[str, Any]] = []
+            for img in valid_images:
+                # Responses API는 data URL을 그대로 image_url로 받습니다.
+                user_content.append({
+                    "type": "input_image",
+                    "image_url": img,
+                    # 필요 시 "detail": "high" 가능
+                })
+
+            user_content.append({
+                "type": "input_text",
+                "text": "Analyze the screenshots and return ONLY the JSON in the schema specified by the system prompt. No extra text."
+            })
+
+            logger.debug("이미지 분석 시작: %d개 이미지", len(valid_images))
+
+        else:
+            # 피드백 턴 - 텍스트만
+            user_content = [{
+                "type": "input_text",
+                "text": f"User feedback: {user_feedback}\n\nPlease update the JSON based on this feedback. Respond with JSON only."
+            }]
+            logger.debug("피드백 처리: %s...", user_feedback[:50])
+
+        # 4) 현재 사용자 메시지 추가
+        current_message = {"role": "user", "content": user_content}
+        input_messages.append(current_message)
+        current_span().set(images=len(valid_images), history_messages=len(self.conversation_history))
+        return system_prompt, input_messages, current_message, valid_images
+
+    def _call(self, route: ModelRoute, input_messages: List[Dict[str, Any]], system_prompt: str,
+              valid_images: List[str], user_feedback: str, use_cache: bool):
+        """경로의 모델로 호출 → (응답, 응답 텍스트, 캐시 키) (단계 generator)"""
+        kwargs = self._request_kwargs(input_messages, route)
+        tuning = {name: kwargs[name] for name in MODEL_TUNING_PARAMS if name in kwargs}
+        cache_key = make_cache_key(
+            kwargs["model"], system_prompt, valid_images, self.conversation_history, user_feedback,
+            extra={"agent": "dr_generator", "agent_type": self.agent_type, "tools": kwargs.get("tools"), **tuning}
+        )
+        response = yield from create_response_steps(self.client, kwargs, cache_key=cache_key, use_cache=use_cache,
+                                                    stage="dr_generation", module=self.agent_type)
+        logger.info("🤖 DR Generation - 사용 모델: %s", route.describe(), extra=fields(module=self.agent_type))
+
+        response_content = getattr(response, "output_text", None)
+        if response_content is None:
+            response_content = str(response)
+        return response, response_content, cache_key
+
+    def _request_kwargs(self, input_messages: List[Dict[str, Any]], route: Optional[ModelRoute] = None) -> Dict[str, Any]:
+        """Responses API 요청 인자 (단계/모듈 경로의 모델 + 벡터스토어가 있으면 file_search)"""
+        route = route or resolve_route("dr_generation", self.agent_type)
+        kwargs = dict(request_options(route), input=input_messages)
+        if self.vector_store_id:
+            kwargs["tools"] = [{"type": "file_search", "vector_store_ids": [self.vector_store_id]}]
+        return kwargs
+
+    @traced("json.parse", stage="dr_generation")
     def _parse_json_response(self, response_content: str) -> Dict[str, Any]:
         """응답에서 JSON 파싱(견고성 보강)"""
         # 1) 직접 파싱
@@ -216,6 +289,7 @@ class DRGeneratorAgent:
             }
 
 
-def create_dr_generator_agent(agent_type: str, vector_store_id: Optional[str] = None, api_key: Optional[str] = None) -> DRGeneratorAgent:
-    """디자인 참조 생성 에이전트 생성"""
-    return DRGeneratorAgent(agent_type, vector_store_id=vector_store_id, api_key=api_key)
+def create_dr_generator_agent(agent_type: str, vector_store_id: Optional[str] = None, api_key: Optional[str] = None,
+                              client: Optional[Any] = None) -> DRGeneratorAgent:
+    """디자인 참조 생성 에이전트 생성 (client를 주면 그 클라이언트로 호출)"""
+    return DRGeneratorAgent(agent_type, vector_store_id=vector_store_id, api_key=api_key, client=client)
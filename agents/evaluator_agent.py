@@ -4,16 +4,27 @@ from openai import OpenAI
 import re
 
 from prompts.prompt_loader import SimplePromptLoader
-from config import get_openai_client, DEFAULT_MODEL, get_current_model
+from config import get_openai_client, DEFAULT_MODEL, HEDGE_EVALUATION_ENABLED
+from llm.cancellation import CallCancelled
+from llm.model_routing import (
+    MODEL_TUNING_PARAMS, ModelRoute, escalation_reason, escalation_route, request_options, resolve_route
+)
+from llm.pipeline import create_response_steps, invalidate_cached_response, run_steps
+from llm.response_cache import make_cache_key
+from telemetry.log import fields, get_logger
+from telemetry.tracing import current_span, traced
+
+logger = get_logger(__name__)
 
 
 class EvaluatorAgent:
     """평가 에이전트 (Responses API + file_search 연동)"""
 
-    def __init__(self, agent_type: str, vector_store_id: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(self, agent_type: str, vector_store_id: Optional[str] = None, api_key: Optional[str] = None,
+                 client: Optional[Any] = None):
         self.agent_type = agent_type
         self.vector_store_id = vector_store_id  # file_search용 벡터스토어 ID
-        self.client = get_openai_client(api_key)
+        self.client = client if client is not None else get_openai_client(api_key)
         
         # 프롬프트 로더 초기화
         self.prompt_loader = SimplePromptLoader()
@@ -24,131 +35,200 @@ class EvaluatorAgent:
 
         print(f"Evaluator Agent 초기화 완료: {self.agent_type} (vector_store_id={self.vector_store_id})")
 
-    def generate_guidelines(self, base64_images: List[str], json_data: Dict[str, Any], user_feedback: str = "") -> str:
-        """평가 가이드라인 생성 (Responses API 기반, JSON 출력)"""
+    def generate_guidelines(self, base64_images: List[str], json_data: Dict[str, Any], user_feedback: str = "",
+                            use_cache: bool = True, hedge: Optional[bool] = None) -> str:
+        """
+        평가 가이드라인 생성 (Responses API 기반, JSON 출력)
+        - use_cache: False면 응답 캐시를 건너뛰고 항상 새로 호출
+        - hedge: 헤지 요청 사용 여부 (None이면 HEDGE_EVALUATION_ENABLED 설정 따름)
+        """
+        return run_steps(self.generate_guidelines_steps(base64_images, json_data, user_feedback, use_cache, hedge))
+
+    @traced("evaluation")
+    def generate_guidelines_steps(self, base64_images: List[str], json_data: Dict[str, Any], user_feedback: str = "",
+                                  use_cache: bool = True, hedge: Optional[bool] = None):
+        """generate_guidelines의 단계 generator 버전 (Gradio 핸들러는 run_steps_async로 실행)"""
+        current_span().set(module=self.agent_type, feedback_turn=bool(user_feedback))
+        cache_key = None
         try:
-            # 시스템 프롬프트 로드
-            system_prompt = self.prompt_loader.load_prompt("evaluator", self.agent_type)
-
-            # 입력 메시지 구성 시작
-            input_messages: List[Dict[str, Any]] = []
-
-            # 1) 시스템 메시지 (Responses API: input_text)
-            input_messages.append({
-                "role": "system",
-                "content": [{"type": "input_text", "text": system_prompt}]
-            })
-
-            # 2) 기존 대화 히스토리 포함
-            if self.conversation_history:
-                input_messages.extend(self.conversation_history)
-
-            # 3) 이번 턴 user 컨텐츠 구성
-            if not user_feedback:
-                # 첫 호출 - JSON 데이터 + 이미지들
-                json_str = json.dumps(json_data, ensure_ascii=False, separators=(',', ':'))
-
-                user_content: List[Dict[str, Any]] = []
-                # (a) JSON 텍스트 먼저
-                user_content.append({
-                    "type": "input_text",
-                    "text": f"JSON Data:\n{json_str}\n\nPlease generate/return the evaluation strictly in JSON format only."
-                })
-
-                # (b) 이미지 (최대 9장: 텍스트 1 + 이미지 9 = 총 10 파트 안전)
-                max_images = min(len(base64_images), 9)
-                if len(base64_images) > 9:
-                    print(f"경고: 최대 9개 이미지만 처리 ({len(base64_images)}개 중 {max_images}개)")
-
-                valid_images = [
-                    img for img in base64_images[:max_images]
-                    if img and isinstance(img, str) and img.startswith("data:image/")
-                ]
-
-                for img in valid_images:
-                    # data URL을 그대로 image_url에 전달 (Responses API 규격)
-                    user_content.append({
-                        "type": "input_image",
-                        "image_url": img
-                        # 필요 시 "detail": "high" 추가 가능
-                    })
-
-                print(f"평가 시작: JSON 데이터 + {len(valid_images)}개 이미지")
-
-            else:
-                # 피드백 턴 - 텍스트만 (영문화)
-                user_content = [{
-                    "type": "input_text",
-                    "text": f"User feedback: {user_feedback}\n\nPlease update the evaluation JSON strictly in the same JSON schema only, with no additional explanations."
-                }]
-                print(f"피드백 처리: {user_feedback[:50]}...")
-
-            # 4) 현재 user 메시지 push
-            current_message = {"role": "user", "content": user_content}
-            input_messages.append(current_message)
+            system_prompt, input_messages, current_message, valid_images = self._build_turn(base64_images, json_data, user_feedback)
 
             # 5) Responses API 호출 (file_search 활성화 - 벡터스토어가 있을 때만)
-            current_model = get_current_model()
-            kwargs = dict(model=current_model, input=input_messages)
-            if self.vector_store_id:
-                kwargs["tools"] = [{"type": "file_search", "vector_store_ids": [self.vector_store_id]}]
+            use_hedge = HEDGE_EVALUATION_ENABLED if hedge is None else hedge
+            route = resolve_route("evaluation", self.agent_type)
+            response, response_content, cache_key = yield from self._call(
+                route, input_messages, system_prompt, valid_images, json_data, user_feedback, use_cache, use_hedge
+            )
 
-            response = self.client.responses.create(**kwargs)
-            print(f"🤖 Evaluation - 사용 모델: {current_model}")
-
-            # 6) 응답 텍스트 추출
-            response_content = getattr(response, "output_text", None)
-            if response_content is None:
-                response_content = str(response)
+            # 6) JSON 파싱
+            parsed_result = self._parse_json_response(response_content)
 
-            # 7) 히스토리에 user/assistant 저장 (assistant는 output_text 타입)
+            # 7) 파싱 실패/응답 잘림이면 상위 경로로 한 번 더 (MODEL_CASCADE_ENABLED)
+            escalation = escalation_route("evaluation", route)
+            reason = escalation_reason(response, parsed_result) if escalation else None
+            if reason:
+                logger.info("⬆️ Evaluation 상향: %s → %s (%s)", route.describe(), escalation.describe(), reason)
+                invalidate_cached_response(cache_key)
+                response, response_content, cache_key = yield from self._call(
+                    escalation, input_messages, system_prompt, valid_images, json_data, user_feedback, use_cache,
+                    use_hedge
+                )
+                parsed_result = self._parse_json_response(response_content)
+
+            # 8) 히스토리에 user/assistant 저장 (assistant는 output_text 타입)
             self.conversation_history.append(current_message)
             self.conversation_history.append({
                 "role": "assistant",
                 "content": [{"type": "output_text", "text": response_content}]
             })
 
-            # 8) JSON 파싱
-            parsed_result = self._parse_json_response(response_content)
-
             # 9) 성공/실패 처리
             if parsed_result.get("status") not in ["json_parse_error", "text_only", "error"]:
                 self.last_valid_json = parsed_result
                 json_output = json.dumps(parsed_result, ensure_ascii=False, indent=2)
-                print(f"새 평가 JSON 생성 성공 ({self.agent_type})")
+                logger.info("새 평가 JSON 생성 성공 (%s)", self.agent_type)
                 return json_output
             else:
-                # 파싱 실패 → 원인 분석 후 기존 캐시 유지 반환
+                # 파싱 실패 → 캐시된 응답 무효화, 원인 분석 후 기존 캐시 유지 반환
+                invalidate_cached_response(cache_key)
                 failure_reason = parsed_result.get("status", "unknown")
-                print(f"JSON 파싱 실패 원인: {failure_reason} ({self.agent_type})")
+                logger.warning("JSON 파싱 실패 원인: %s (%s)", failure_reason, self.agent_type)
                 if failure_reason == "json_parse_error":
-                    print(f"JSON 오류 상세: {parsed_result.get('json_error', 'N/A')}")
-                    print(f"원본 응답 길이: {len(response_content)} 문자")
-                    print(f"원본 응답 일부: {response_content[:200]}...")
+                    logger.debug("JSON 오류 상세: %s", parsed_result.get('json_error', 'N/A'), extra=fields(
+                        response_chars=len(response_content), response_head=response_content[:200]
+                    ))
                 elif failure_reason == "text_only":
-                    print(f"AI가 텍스트로만 응답 (JSON 없음)")
-                    print(f"응답 내용: {response_content[:200]}...")
+                    logger.debug("AI가 텍스트로만 응답 (JSON 없음)", extra=fields(response_head=response_content[:200]))
                 
                 if self.last_valid_json:
-                    print(f"기존 캐시된 JSON 유지 ({self.agent_type})")
+                    logger.info("기존 캐시된 JSON 유지 (%s)", self.agent_type)
                     return json.dumps(self.last_valid_json, ensure_ascii=False, indent=2)
                 else:
-                    print(f"첫 평가 JSON 생성 실패 - 재시도 권장 ({self.agent_type})")
+                    logger.warning("첫 평가 JSON 생성 실패 - 재시도 권장 (%s)", self.agent_type)
                     return f"❌ {self.agent_type} 평가 생성에 실패했습니다. (원인: {failure_reason}) 재시도해보세요."
 
+        except CallCancelled:
+            # 취소/마감 초과는 기존 JSON으로 가리지 않고 호출자에게 그대로 전달
+            raise
         except Exception as e:
-            print(f"Evaluator 실행 오류: {e}")
-            import traceback
-            print(f"상세 오류: {traceback.format_exc()}")
+            logger.error("Evaluator 실행 오류: %s", e, exc_info=True)
             if self.last_valid_json:
-                print(f"에러 발생, 기존 JSON 유지 ({self.agent_type})")
+                logger.warning("에러 발생, 기존 JSON 유지 (%s)", self.agent_type)
                 return json.dumps(self.last_valid_json, ensure_ascii=False, indent=2)
             else:
                 return f"❌ {self.agent_type} 평가 생성 중 오류가 발생했습니다: {str(e)}"
 
+    def build_request(self, base64_images: List[str], json_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        첫 턴 Responses API 요청 본문 생성 (호출하지 않음, 일괄 제출 파일용)
+        - 대화 히스토리는 바꾸지 않음
+        """
+        _, input_messages, _, _ = self._build_turn(base64_images, json_data, "")
+        return self._request_kwargs(input_messages)
+
+    def parse_response_text(self, response_content: str) -> Dict[str, Any]:
+        """응답 텍스트를 평가 JSON으로 파싱 (실패 시 status 필드에 원인)"""
+        return self._parse_json_response(response_content)
+
     # ----------------------
     # Private helpers
     # ----------------------
+    @traced("request.build", stage="evaluation")
+    def _build_turn(self, base64_images: List[str], json_data: Dict[str, Any], user_feedback: str):
+        """이번 턴 입력 구성 → (시스템 프롬프트, 입력 메시지, 현재 user 메시지, 유효 이미지)"""
+        # 시스템 프롬프트 로드
+        system_prompt = self.prompt_loader.load_prompt("evaluator", self.agent_type)
+
+        # 입력 메시지 구성 시작
+        input_messages: List[Dict[str, Any]] = []
+
+        # 1) 시스템 메시지 (Responses API: input_text)
+        input_messages.append({
+            "role": "system",
+            "content": [{"type": "input_text", "text": system_prompt}]
+        })
+
+        # 2) 기존 대화 히스토리 포함
+        if self.conversation_history:
+            input_messages.extend(self.conversation_history)
+
+        # 3) 이번 턴 user 컨텐츠 구성
+        valid_images: List[str] = []
+        if not user_feedback:
+            # 첫 호출 - JSON 데이터 + 이미지들
+            json_str = json.dumps(json_data, ensure_ascii=False, separators=(',', ':'))
+
+            user_content: List[Dict[str, Any]] = []
+            # (a) JSON 텍스트 먼저
+            user_content.append({
+                "type": "input_text",
+                "text": f"JSON Data:\n{json_str}\n\nPlease generate/return the evaluation strictly in JSON format only."
+            })
+
+            # (b) 이미지 (최대 9장: 텍스트 1 + 이미지 9 = 총 10 파트 안전)
+            max_images = min(len(base64_images), 9)
+            if len(base64_images) > 9:
+                logger.warning("최대 9개 이미지만 처리 (%d개 중 %d개)", len(base64_images), max_images)
+
+            valid_images = [
+                img for img in base64_images[:max_images]
+                if img and isinstance(img, str) and img.startswith("data:image/")
+            ]
+
+            for img in valid_images:
+                # data URL을 그대로 image_url에 전달 (Responses API 규격)
+                user_content.append({
+                    "type": "input_image",
+                    "image_url": img
+                    # 필요 시 "detail": "high" 추가 가능
+                })
+
+            logger.debug("평가 시작: JSON 데이터 + %d개 이미지", len(valid_images))
+
+        else:
+            # 피드백 턴 - 텍스트만 (영문화)
+            user_content = [{
+                "type": "input_text",
+                "text": f"User feedback: {user_feedback}\n\nPlease update the evaluation JSON strictly in the same JSON schema only, with no additional explanations."
+            }]
+            logger.debug("피드백 처리: %s...", user_feedback[:50])
+
+        # 4) 현재 user 메시지 push
+        current_message = {"role": "user", "content": user_content}
+        input_messages.append(current_message)
+        current_span().set(images=len(valid_images), history_messages=len(self.conversation_history))
+        return system_prompt, input_messages, current_message, valid_images
+
+    def _call(self, route: ModelRoute, input_messages: List[Dict[str, Any]], system_prompt: str,
+              valid_images: List[str], json_data: Dict[str, Any], user_feedback: str, use_cache: bool, hedge: bool):
+        """경로의 모델로 호출 → (응답, 응답 텍스트, 캐시 키) (단계 generator)"""
+        kwargs = self._request_kwargs(input_messages, route)
+        tuning = {name: kwargs[name] for name in MODEL_TUNING_PARAMS if name in kwargs}
+        cache_key = make_cache_key(
+            kwargs["model"], system_prompt, valid_images, self.conversation_history, user_feedback,
+            extra={
+                "agent": "evaluator", "agent_type": self.agent_type, "tools": kwargs.get("tools"),
+                "json_data": json_data if not user_feedback else None, **tuning
+            }
+        )
+        response = yield from create_response_steps(self.client, kwargs, cache_key=cache_key, use_cache=use_cache,
+                                                    hedge=hedge, stage="evaluation", module=self.agent_type)
+        logger.info("🤖 Evaluation - 사용 모델: %s", route.describe(), extra=fields(module=self.agent_type))
+
+        response_content = getattr(response, "output_text", None)
+        if response_content is None:
+            response_content = str(response)
+        return response, response_content, cache_key
+
+    def _request_kwargs(self, input_messages: List[Dict[str, Any]], route: Optional[ModelRoute] = None) -> Dict[str, Any]:
+        """Responses API 요청 인자 (단계/모듈 경로의 모델 + 벡터스토어가 있으면 file_search)"""
+        route = route or resolve_route("evaluation", self.agent_type)
+        kwargs = dict(request_options(route), input=input_messages)
+        if self.vector_store_id:
+            kwargs["tools"] = [{"type": "file_search", "vector_store_ids": [self.vector_store_id]}]
+        return kwargs
+
+    @traced("json.parse", stage="evaluation")
     def _parse_json_response(self, response_content: str) -> Dict[str, Any]:
         """응답에서 JSON 파싱(견고성 보강)"""
         # 1) 직접 파싱
@@ -211,6 +291,7 @@ class EvaluatorAgent:
         print(f"Evaluator JSON 캐시 초기화 ({self.agent_type})")
 
 
-def create_evaluator_agent(agent_type: str, vector_store_id: Optional[str] = None, api_key: Optional[str] = None) -> EvaluatorAgent:
-    """평가 에이전트 생성"""
-    return EvaluatorAgent(agent_type, vector_store_id=vector_store_id, api_key=api_key)
+def create_evaluator_agent(agent_type: str, vector_store_id: Optional[str] = None, api_key: Optional[str] = None,
+                           client: Optional[Any] = None) -> EvaluatorAgent:
+    """평가 에이전트 생성 (client를 주면 그 클라이언트로 호출)"""
+    return EvaluatorAgent(agent_type, vector_store_id=vector_store_id, api_key=api_key, client=client)
@@ -8,14 +8,17 @@ from typing import List, Dict, Any, Optional
 import datetime
 from openai import OpenAI
 
-from config import get_openai_client, DEFAULT_MODEL, VECTOR_INDEXING_WAIT_TIME, get_current_model
+from config import get_openai_client, DEFAULT_MODEL, VECTOR_INDEXING_WAIT_TIME
+from llm.model_routing import request_options, resolve_route
+from llm.pipeline import create_response_steps, run_steps
+from telemetry.tracing import span, traced
 
 
 class FinalReportAgent:
     """최종 레포트 생성 에이전트 - 모든 평가 결과를 AI가 분석하고 통합 (멀티턴 대화형)"""
 
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = get_openai_client(api_key)
+    def __init__(self, api_key: Optional[str] = None, client: Optional[Any] = None):
+        self.client = client if client is not None else get_openai_client(api_key)
         self.model = DEFAULT_MODEL
         self.final_report_cache_file = Path(".final_report_vector_cache.json")
         
@@ -102,29 +105,32 @@ class FinalReportAgent:
                 # 새 벡터스토어 생성
                 print("=== 평가 결과 벡터스토어 생성 시작 ===")
                 
-                # 파일 업로드
-                uploaded_files = []
-                for file_path in valid_files:
-                    with open(file_path, "rb") as f:
-                        uploaded_file = self.client.files.create(
-                            file=f,
-                            purpose="assistants"
-                        )
-                        uploaded_files.append(uploaded_file.id)
-                        print(f"파일 업로드 완료: {os.path.basename(file_path)} (ID: {uploaded_file.id})")
-
-                # 벡터스토어 생성 후 파일 추가
-                vs = self.client.vector_stores.create(name="Final Report Evaluation Data")
-                self.vector_store_id = vs.id
-                for file_id in uploaded_files:
-                    self.client.vector_stores.files.create(vector_store_id=self.vector_store_id, file_id=file_id)
-                print(f"벡터스토어 생성 완료: {self.vector_store_id}")
+                with span("vector_store.create", files=len(valid_files)):
+                    # 파일 업로드
+                    uploaded_files = []
+                    for file_path in valid_files:
+                        with span("vector_store.upload", file=os.path.basename(file_path),
+                                  bytes=os.path.getsize(file_path)), open(file_path, "rb") as f:
+                            uploaded_file = self.client.files.create(
+                                file=f,
+                                purpose="assistants"
+                            )
+                            uploaded_files.append(uploaded_file.id)
+                            print(f"파일 업로드 완료: {os.path.basename(file_path)} (ID: {uploaded_file.id})")
+
+                    # 벡터스토어 생성 후 파일 추가
+                    vs = self.client.vector_stores.create(name="Final Report Evaluation Data")
+                    self.vector_store_id = vs.id
+                    for file_id in uploaded_files:
+                        self.client.vector_stores.files.create(vector_store_id=self.vector_store_id, file_id=file_id)
+                    print(f"벡터스토어 생성 완료: {self.vector_store_id}")
 
                 # 캐시 저장
                 self._save_vector_cache(files_hash, self.vector_store_id)
                 
                 # 인덱싱 대기
-                time.sleep(VECTOR_INDEXING_WAIT_TIME)
+                with span("vector_store.indexing_wait", seconds=VECTOR_INDEXING_WAIT_TIME):
+                    time.sleep(VECTOR_INDEXING_WAIT_TIME)
 
             self.is_initialized = True
             file_list = ", ".join([os.path.basename(f) for f in valid_files])
@@ -136,6 +142,11 @@ class FinalReportAgent:
 
     def chat(self, user_message: str) -> str:
         """사용자와의 멀티턴 대화 처리"""
+        return run_steps(self.chat_steps(user_message))
+
+    @traced("final_report")
+    def chat_steps(self, user_message: str):
+        """chat의 단계 generator 버전"""
         if not self.is_initialized:
             return "❌ 먼저 평가 파일들을 로드해주세요."
         
@@ -173,16 +184,15 @@ class FinalReportAgent:
             }
             input_messages.append(current_message)
 
-            # Responses API 호출 (file_search 활성화) - 현재 선택된 모델 사용
-            current_model = get_current_model()
-            response = self.client.responses.create(
-                model=current_model,
+            # Responses API 호출 (file_search 활성화) - 선택한 모델/프로필의 final_report 경로 사용
+            response = yield from create_response_steps(self.client, dict(
+                request_options(resolve_route("final_report")),
                 input=input_messages,
                 tools=[{
                     "type": "file_search",
                     "vector_store_ids": [self.vector_store_id]
                 }]
-            )
+            ), stage="final_report")
 
             ai_response = response.output_text
             
@@ -233,6 +243,7 @@ class FinalReportAgent:
         except json.JSONDecodeError:
             return {"raw_response": response}
 
+    @traced("file.save", target="final_report")
     def save_report(self, report: Dict[str, Any], output_dir: str = "output") -> str:
         """최종 레포트를 파일로 저장"""
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -7,19 +7,37 @@ warnings.filterwarnings("ignore", category=UserWarning, module="gradio")
 import os
 import gradio as gr
 from prompts.prompt_loader import SimplePromptLoader
-from config import validate_api_key, AVAILABLE_MODELS
+from config import (
+    validate_api_key, MODEL_SELECTIONS, DEFAULT_MODEL, EVENT_CONCURRENCY,
+    LLM_QUEUE_MAX_WAITING, UI_MAX_THREADS, GRADIO_QUEUE_MAX_SIZE, JOB_API_ENABLED, METRICS_ENABLED,
+    PROFILING_ENABLED
+)
 
 # UI 모듈 임포트
 from ui.components import (
     create_image_upload_section, create_agent_selector, create_control_buttons,
-    create_cache_status_display, create_clear_confirm_dialog,
+    create_performance_panel, create_clear_confirm_dialog,
     create_evaluation_mode, create_final_report_mode, update_image_preview
 )
 from ui.business_logic import (
     set_vector_store_id, run_dr_generation, confirm_dr_generation, 
-    generate_evaluation, get_cache_status, switch_to_final_report_mode,
+    generate_evaluation, get_performance_panel, switch_to_final_report_mode,
     switch_to_evaluation_mode, send_final_report_message, clear_final_report_chat,
-    download_evaluation_json, save_discussion_dialog, ensure_vector_store_with_api_key
+    download_evaluation_json, save_discussion_dialog, ensure_vector_store_with_api_key,
+    cancel_pending_calls, get_session_state, get_vector_store_id
+)
+from ui.admission import admission_controlled
+
+# 🚦 LLM 호출 이벤트: 동시 실행 한도 안에서 순서대로 실행, 대기 중에는 순서 표시
+queued_dr_generation = admission_controlled(run_dr_generation)
+queued_evaluation = admission_controlled(generate_evaluation)
+queued_final_report_message = admission_controlled(
+    send_final_report_message,
+    status_output=lambda message, args: (list(args[1] or []) + [(args[0], message)], args[0])
+)
+queued_final_report_mode = admission_controlled(
+    switch_to_final_report_mode,
+    status_output=lambda message, args: (message,) + (gr.update(),) * 7
 )
 
 # 벡터 스토어 초기화 (캐시에서 직접 로드)
@@ -46,13 +64,15 @@ except Exception as e:
     vector_store_id = None
 
 # 버튼 상태 관리 함수들
-def get_button_states():
+def get_button_states(state):
     """현재 단계에 따른 버튼 상태 반환"""
-    from ui.business_logic import current_step, is_model_locked, get_current_model
+    from ui.business_logic import is_model_locked, get_current_model
+    
+    current_step = state.current_step
     
     # 🤖 모델 잠금 상태 반영
-    model_locked = is_model_locked()
-    current_model = get_current_model()
+    model_locked = is_model_locked(state)
+    current_model = get_current_model(state)
     
     # 모델 드롭다운 라벨 동적 변경
     if model_locked:
@@ -98,9 +118,9 @@ def get_button_states():
             "download_btn": False
         }
 
-def update_button_states():
+def update_button_states(request: gr.Request = None):
     """버튼 상태 업데이트"""
-    states = get_button_states()
+    states = get_button_states(get_session_state(request))
     return (
         gr.update(interactive=states["agent_dropdown"]), 
         gr.update(interactive=states["initial_extract_btn"]),
@@ -123,75 +143,68 @@ def show_clear_confirm():
 def hide_clear_confirm():
     return gr.update(visible=False)
 
-def clear_conversation():
+def clear_conversation(request: gr.Request = None):
     """대화 기록 초기화"""
-    from ui.business_logic import (
-        current_dr_agent, current_eval_agent, current_images, current_json_data,
-        current_base64_images, current_json_output, current_evaluation_output,
-        current_step
-    )
-    
-    # 에이전트 정리
-    if current_dr_agent:
-        try:
-            current_dr_agent.clear_json_cache()
-        except Exception as e:
-            print(f"DR 에이전트 완전 정리 오류: {e}")
-            
-    if current_eval_agent:
-        try:
-            current_eval_agent.clear_json_cache()
-        except Exception as e:
-            print(f"Evaluator 에이전트 완전 정리 오류: {e}")
-    
-    # 전역 변수들 초기화
+    # ⏹ 진행 중인 에이전트 호출을 먼저 취소 (HTTP 요청 중단, 워커 즉시 반환)
+    cancel_pending_calls(request)
+
     import ui.business_logic as bl
-    bl.current_images = None
-    bl.current_json_data = None
-    bl.current_base64_images = None
-    bl.current_json_output = None
-    bl.current_evaluation_output = None
-    bl.current_dr_agent = None
-    bl.current_eval_agent = None
-    bl.current_step = "initial"
-    
-    # 🔒 보안: API key 완전 초기화 (Hugging Face 등 공유 환경에서 중요)
-    bl.clear_api_key()
+    state = get_session_state(request)
+    
+    with state.lock:
+        # 에이전트 정리
+        if state.current_dr_agent:
+            try:
+                state.current_dr_agent.clear_json_cache()
+            except Exception as e:
+                print(f"DR 에이전트 완전 정리 오류: {e}")
+                
+        if state.current_eval_agent:
+            try:
+                state.current_eval_agent.clear_json_cache()
+            except Exception as e:
+                print(f"Evaluator 에이전트 완전 정리 오류: {e}")
+        
+        # 세션 상태 초기화
+        state.reset_work()
+        
+        # 🔒 보안: API key 완전 초기화 (Hugging Face 등 공유 환경에서 중요)
+        bl.clear_api_key(state)
+        bl.persist_session(state)
     
     print("=== 모든 캐시 및 API key 완전 초기화 (보안) ===")
     return "", [], "", "", "", gr.update(visible=False), gr.update(interactive=True)
 
-def on_agent_change(selected_agent):
+def on_agent_change(selected_agent, request: gr.Request = None):
     """에이전트 변경 시 필요한 초기화"""
-    import ui.business_logic as bl
+    state = get_session_state(request)
     
     # 에이전트가 실제로 변경된 경우만 초기화
-    if bl.current_agent_name != selected_agent:
-        print(f"=== 에이전트 변경: {bl.current_agent_name} → {selected_agent} ===")
+    if state.current_agent_name != selected_agent:
+        print(f"=== 에이전트 변경: {state.current_agent_name} → {selected_agent} ===")
         
         # 기존 에이전트 완전 정리
-        if bl.current_dr_agent:
+        if state.current_dr_agent:
             try:
-                bl.current_dr_agent.reset_conversation()
-                del bl.current_dr_agent
+                state.current_dr_agent.reset_conversation()
             except Exception as e:
                 print(f"DR 에이전트 리소스 정리 오류: {e}")
                 
-        if bl.current_eval_agent:
+        if state.current_eval_agent:
             try:
-                bl.current_eval_agent.reset_conversation()
-                del bl.current_eval_agent
+                state.current_eval_agent.reset_conversation()
             except Exception as e:
                 print(f"Evaluator 에이전트 리소스 정리 오류: {e}")
         
         # 상태 변수 완전 초기화
-        bl.current_agent_name = selected_agent
-        bl.current_json_output = None
-        bl.current_evaluation_output = None
-        bl.current_dr_agent = None
-        bl.current_eval_agent = None
-        bl.current_step = "initial"
-        bl.current_json_data = None  # JSON 데이터도 초기화
+        state.current_agent_name = selected_agent
+        state.current_json_output = None
+        state.current_evaluation_output = None
+        state.current_dr_agent = None
+        state.current_eval_agent = None
+        state.current_step = "initial"
+        state.current_json_data = None  # JSON 데이터도 초기화
+        bl.persist_session(state)
         
         print(f"=== 에이전트 변경 완료: {selected_agent} (이미지 캐시 유지) ===")
     else:
@@ -203,25 +216,26 @@ def after_download_reset():
     print("=== 다운로드 완료 - agent_dropdown 활성화 ===")
     return gr.update(interactive=True)
 
-def check_final_report_btn():
-    from ui.business_logic import downloaded_files
-    has_files = len(downloaded_files) > 0
+def check_final_report_btn(request: gr.Request = None):
+    state = get_session_state(request)
+    has_files = len(state.downloaded_files) > 0
     return gr.update(interactive=has_files)
 
-def validate_and_update_api_key(api_key):
+def validate_and_update_api_key(api_key, request: gr.Request = None):
     """API 키 유효성 검증 및 상태 업데이트"""
     import ui.business_logic as bl
+    state = get_session_state(request)
     
     if not api_key.strip():
         # 🔒 보안: 빈 키 입력 시 기존 API 키 완전 정리
-        bl.clear_api_key()
+        bl.clear_api_key(state)
         return gr.update(interactive=False)
     
     is_valid, message = validate_api_key(api_key.strip())
     
     if is_valid:
         # 🔒 보안: API 키를 안전하게 저장 (타임스탬프와 함께)
-        bl.set_api_key(api_key.strip())
+        bl.set_api_key(api_key.strip(), state)
         
         # 벡터스토어 확인 및 필요시 생성
         vs_id = ensure_vector_store_with_api_key(api_key.strip())
@@ -234,15 +248,22 @@ def validate_and_update_api_key(api_key):
     else:
         # 🔒 보안: 잘못된 키 입력 시 기존 API 키 완전 정리
         print(f"❌ API 키 검증 실패: {message}")
-        bl.clear_api_key()
+        bl.clear_api_key(state)
         return gr.update(interactive=False)
 
-def get_system_status():
+def get_system_status(request: gr.Request = None):
     """📊 종합 시스템 상태 반환 (API + 캐시 + 모드)"""
-    from ui.business_logic import current_images, current_base64_images, current_mode, current_api_key, api_key_timestamp, is_model_locked, get_current_model
+    from ui.business_logic import is_model_locked, get_current_model, is_key_pool_enabled
     import time
     import datetime
     
+    state = get_session_state(request)
+    current_images = state.current_images
+    current_base64_images = state.current_base64_images
+    current_mode = state.current_mode
+    current_api_key = state.current_api_key
+    api_key_timestamp = state.api_key_timestamp
+    
     # API 키 상태 체크 (조용한 확인)
     if current_api_key:
         print(f"✅ API 키 활성: {current_api_key[:10]}... ({datetime.datetime.fromtimestamp(api_key_timestamp).strftime('%H:%M:%S')})")
@@ -261,12 +282,14 @@ def get_system_status():
             api_status = f"✅ 인증됨 ({2 - elapsed_hours:.1f}시간 남음)"
         else:
             api_status = "⏰ 타임아웃됨"
+    elif is_key_pool_enabled():
+        api_status = "🔑 서버 키 풀 사용"
     else:
         api_status = "❌ 미인증"
     
     # 모델 상태
-    current_model = get_current_model()
-    if is_model_locked():
+    current_model = get_current_model(state)
+    if is_model_locked(state):
         model_status = f"🔒 {current_model} (잠금됨)"
     else:
         model_status = f"🤖 {current_model}"
@@ -282,11 +305,12 @@ def get_system_status():
     
     return status_text
 
-def update_model_selection(selected_model):
+def update_model_selection(selected_model, request: gr.Request = None):
     """🤖 모델 선택 업데이트"""
     import ui.business_logic as bl
+    state = get_session_state(request)
     
-    success, message = bl.set_current_model(selected_model)
+    success, message = bl.set_current_model(selected_model, state)
     
     if success:
         print(f"🤖 {message}")
@@ -294,7 +318,7 @@ def update_model_selection(selected_model):
     else:
         print(f"⚠️ {message}")
         # 잠금된 경우 이전 모델로 되돌리기
-        current = bl.get_current_model()
+        current = bl.get_current_model(state)
         return gr.update(value=current)
 
 # 🔒 보안: Hugging Face Spaces에서 앱 시작 시 모든 상태 초기화
@@ -321,8 +345,8 @@ with demo:
 
         with gr.Column(scale=1):
             model_dropdown = gr.Dropdown(
-                choices=AVAILABLE_MODELS,
-                value="gpt-4o",
+                choices=MODEL_SELECTIONS,  # 모델 하나 또는 단계/모듈별 프로필 (profile:fast 등)
+                value=DEFAULT_MODEL,
                 label="🤖 모델 선택",
                 interactive=True
             )
@@ -344,6 +368,9 @@ with demo:
             
             # 초기화 확인 다이얼로그
             clear_confirm_row, clear_confirm_text, clear_confirm_btn, clear_cancel_btn = create_clear_confirm_dialog()            
+
+            # ⚡ 세션 성능 패널 (마지막 실행의 구간별 시간, 토큰/예상 비용, 캐시 적중)
+            perf_panel, perf_refresh_btn = create_performance_panel()
             
             # 이미지 업로드 및 에이전트 선택
             images_input, image_preview = create_image_upload_section()
@@ -352,6 +379,9 @@ with demo:
             # DR 생성 버튼
             initial_extract_btn = gr.Button("📋 DR 생성", variant="primary", interactive=False)
             
+            # 진행 중인 요청 중지 버튼
+            cancel_request_btn = gr.Button("⏹ 요청 중지", variant="stop")
+            
 
 
         # 메인 작업 영역
@@ -370,195 +400,306 @@ with demo:
             # 최종 논의 시작 버튼 (모든 평가 완료 후)
             final_report_btn = gr.Button("🚀 종합 챗봇과 대화 시작", variant="primary", interactive=False, size="lg")
 
-    # 이벤트 연결
+    # 이벤트 연결 (LLM 호출이 없는 가벼운 이벤트는 queue=False로 대기열을 거치지 않음)
+    # api_name: 부하 테스트(load_test.py)가 /config에서 이벤트를 찾는 이름
     # API 키 검증 (시스템 상태 및 버튼 상태 업데이트)
     api_key_input.change(
         fn=validate_and_update_api_key,
         inputs=[api_key_input],
-        outputs=[initial_extract_btn]
+        outputs=[initial_extract_btn],
+        queue=False,
+        api_name="validate_api_key"
     ).then(
         fn=update_button_states,
-        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, clear_btn, model_dropdown]
+        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, clear_btn, model_dropdown],
+        queue=False
     ).then(
         fn=get_system_status,
-        outputs=[system_status]
+        outputs=[system_status],
+        queue=False
     )
     
     # 🤖 모델 선택 (잠금 시 이전 값으로 되돌림)
     model_dropdown.change(
         fn=update_model_selection,
         inputs=[model_dropdown],
-        outputs=[model_dropdown]
+        outputs=[model_dropdown],
+        queue=False
     )
     
     # 이미지 업로드
     images_input.change(
         fn=update_image_preview,
         inputs=[images_input],
-        outputs=[image_preview]
+        outputs=[image_preview],
+        queue=False,
+        api_name="image_preview"
     )
     
     # DR 생성
     initial_extract_btn.click(
-        fn=run_dr_generation,
+        fn=queued_dr_generation,
         inputs=[images_input, agent_dropdown],
-        outputs=[json_output]
+        outputs=[json_output],
+        api_name="dr_generation"
     ).then(
         fn=update_button_states,
-        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown]
+        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown],
+        queue=False
+    ).then(
+        fn=get_performance_panel,
+        outputs=[perf_panel],
+        queue=False
     )
     
     # DR 피드백 반영
     feedback_extract_btn.click(
-        fn=run_dr_generation,
+        fn=queued_dr_generation,
         inputs=[images_input, agent_dropdown, user_feedback],
         outputs=[json_output]
     ).then(
         fn=lambda: "",
-        outputs=[user_feedback]
+        outputs=[user_feedback],
+        queue=False
     ).then(
         fn=update_button_states,
-        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown]
+        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown],
+        queue=False
+    ).then(
+        fn=get_performance_panel,
+        outputs=[perf_panel],
+        queue=False
     )
     
     # DR 확정 및 평가 생성
     confirm_dr_btn.click(
         fn=confirm_dr_generation,
         inputs=[images_input, agent_dropdown, user_feedback, json_output],
-        outputs=[json_output, json_output]
+        outputs=[json_output, json_output],
+        queue=False,
+        api_name="confirm_dr"
     ).then(
-        fn=generate_evaluation,
+        fn=queued_evaluation,
         inputs=[images_input, json_output, agent_dropdown],
-        outputs=[guideline_output]
+        outputs=[guideline_output],
+        api_name="evaluation"
     ).then(
         fn=update_button_states,
-        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown]
+        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown],
+        queue=False
+    ).then(
+        fn=get_performance_panel,
+        outputs=[perf_panel],
+        queue=False
     )
     
     # 평가 피드백 반영
     evaluation_feedback_btn.click(
-        fn=generate_evaluation,
+        fn=queued_evaluation,
         inputs=[images_input, json_output, agent_dropdown, evaluation_feedback],
         outputs=[guideline_output]
     ).then(
         fn=lambda: "",
-        outputs=[evaluation_feedback]
+        outputs=[evaluation_feedback],
+        queue=False
     ).then(
         fn=update_button_states,
-        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown]
+        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown],
+        queue=False
+    ).then(
+        fn=get_performance_panel,
+        outputs=[perf_panel],
+        queue=False
     )
     
     # 다운로드
     download_btn.click(
         fn=download_evaluation_json,
-        outputs=[gr.File(label="평가 모듈별 UX 문제 다운로드", file_count="multiple")]
+        outputs=[gr.File(label="평가 모듈별 UX 문제 다운로드", file_count="multiple")],
+        queue=False,
+        api_name="download"
     ).then(
         fn=after_download_reset,
-        outputs=[agent_dropdown]
+        outputs=[agent_dropdown],
+        queue=False
     ).then(
         fn=check_final_report_btn,
-        outputs=[final_report_btn]
+        outputs=[final_report_btn],
+        queue=False
     )
     
     # 에이전트 변경
     agent_dropdown.change(
         fn=on_agent_change,
         inputs=[agent_dropdown],
-        outputs=[json_output, guideline_output]
+        outputs=[json_output, guideline_output],
+        queue=False,
+        api_name="select_module"
     ).then(
         fn=update_button_states,
-        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown]
+        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, model_dropdown],
+        queue=False
     )
     
     # JSON 변경 시 DR 확정 버튼 업데이트
     json_output.change(
         fn=check_json_and_update_confirm_btn,
         inputs=[json_output],
-        outputs=[confirm_dr_btn]
+        outputs=[confirm_dr_btn],
+        queue=False
     )
     
     # 초기화 관련
-    clear_btn.click(fn=show_clear_confirm, outputs=[clear_confirm_row])
+    clear_btn.click(fn=show_clear_confirm, outputs=[clear_confirm_row], queue=False)
     clear_confirm_btn.click(
         fn=clear_conversation,
-        outputs=[json_output, image_preview, user_feedback, guideline_output, evaluation_feedback, clear_confirm_row, json_output]
+        outputs=[json_output, image_preview, user_feedback, guideline_output, evaluation_feedback, clear_confirm_row, json_output],
+        queue=False
     ).then(
         fn=update_button_states,
-        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, clear_btn, model_dropdown]
+        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, clear_btn, model_dropdown],
+        queue=False
     ).then(
         fn=get_system_status,
-        outputs=[system_status]
+        outputs=[system_status],
+        queue=False
     )
-    clear_cancel_btn.click(fn=hide_clear_confirm, outputs=[clear_confirm_row])
+    clear_cancel_btn.click(fn=hide_clear_confirm, outputs=[clear_confirm_row], queue=False)
+    
+    # ⏹ 진행 중인 요청 중지
+    cancel_request_btn.click(fn=cancel_pending_calls, outputs=[system_status], queue=False)
     
     # 📊 시스템 상태 새로고침
-    cache_status_btn.click(fn=get_system_status, outputs=[system_status])
+    cache_status_btn.click(fn=get_system_status, outputs=[system_status], queue=False)
+    
+    # ⚡ 세션 성능 패널 새로고침
+    perf_refresh_btn.click(fn=get_performance_panel, outputs=[perf_panel], queue=False)
     
     # Final Report 모드 전환
     final_report_btn.click(
-        fn=switch_to_final_report_mode,
-        outputs=[system_status, evaluation_mode, final_report_mode, final_report_chat, final_report_input, final_report_send_btn, back_to_evaluation_btn, save_discussion_btn]
+        fn=queued_final_report_mode,
+        outputs=[system_status, evaluation_mode, final_report_mode, final_report_chat, final_report_input, final_report_send_btn, back_to_evaluation_btn, save_discussion_btn],
+        api_name="final_report_start"
+    ).then(
+        fn=get_performance_panel,
+        outputs=[perf_panel],
+        queue=False
     )
     
     # Final Report 메시지 전송
     final_report_send_btn.click(
-        fn=send_final_report_message,
+        fn=queued_final_report_message,
         inputs=[final_report_input, final_report_chat],
-        outputs=[final_report_chat, final_report_input]
+        outputs=[final_report_chat, final_report_input],
+        api_name="final_report_message"
+    ).then(
+        fn=get_performance_panel,
+        outputs=[perf_panel],
+        queue=False
     )
     final_report_input.submit(
-        fn=send_final_report_message,
+        fn=queued_final_report_message,
         inputs=[final_report_input, final_report_chat],
         outputs=[final_report_chat, final_report_input]
+    ).then(
+        fn=get_performance_panel,
+        outputs=[perf_panel],
+        queue=False
     )
     
     # 🌟 대화 내용 저장 (HF Spaces 호환)
     save_discussion_btn.click(
         fn=save_discussion_dialog,
-        outputs=[system_status, gr.File(label="종합 챗봇 대화 내용 다운로드")]
+        outputs=[system_status, gr.File(label="종합 챗봇 대화 내용 다운로드")],
+        queue=False
     )
     
     # 평가 모드로 돌아가기
     back_to_evaluation_btn.click(
         fn=switch_to_evaluation_mode,
-        outputs=[system_status, evaluation_mode, final_report_mode, final_report_chat, final_report_input, final_report_send_btn, back_to_evaluation_btn, save_discussion_btn]
+        outputs=[system_status, evaluation_mode, final_report_mode, final_report_chat, final_report_input, final_report_send_btn, back_to_evaluation_btn, save_discussion_btn],
+        queue=False
     )
     
     # 대화 초기화
     clear_chat_btn.click(
         fn=clear_final_report_chat,
-        outputs=[final_report_chat, system_status]
+        outputs=[final_report_chat, system_status],
+        queue=False
     )
     
     # 초기 상태 설정
-    demo.load(fn=get_system_status, outputs=[system_status])
+    demo.load(fn=get_system_status, outputs=[system_status], queue=False)
+    demo.load(fn=get_performance_panel, outputs=[perf_panel], queue=False)
     demo.load(
         fn=update_button_states,
-        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, clear_btn, model_dropdown]
+        outputs=[agent_dropdown, initial_extract_btn, feedback_extract_btn, confirm_dr_btn, evaluation_feedback_btn, download_btn, clear_btn, model_dropdown],
+        queue=False
     )
     
     # 🔒 보안: 브라우저 새로고침 시 API 키 정리 (F5 보안 문제 해결)
     # 주의: 너무 자주 호출되지 않도록 조건부 정리
+    def clear_session_api_key_on_load(request: gr.Request = None):
+        state = get_session_state(request)
+        if state.current_api_key:
+            bl.clear_api_key(state)
+
     demo.load(
-        fn=lambda: bl.clear_api_key() if bl.current_api_key else None,
-        outputs=[]
+        fn=clear_session_api_key_on_load,
+        outputs=[],
+        queue=False
     )
 
     
     # 드롭다운 기본값과 current_agent_name 동기화
     demo.load(
         fn=lambda: "Text Legibility",  # 드롭다운 기본값 명시적 설정
-        outputs=[agent_dropdown]
+        outputs=[agent_dropdown],
+        queue=False
     )
 
+# 🚦 대기열 설정: LLM 이벤트는 실행 중 + 대기 중 요청 모두 워커를 가져야 대기 순서를 표시할 수 있음
+LLM_QUEUE_WORKERS = EVENT_CONCURRENCY["llm"] + LLM_QUEUE_MAX_WAITING
+demo.queue(
+    concurrency_count=LLM_QUEUE_WORKERS,
+    max_size=GRADIO_QUEUE_MAX_SIZE,
+    api_open=False
+)
+
 # 애플리케이션 실행
 if __name__ == "__main__":
-    demo.launch(
+    server_app, _, _ = demo.launch(
         server_name="0.0.0.0",  # 허깅페이스 스페이스용
         server_port=7860,
         share=False,  # 허깅페이스에서는 share=False
         debug=False,
         show_error=True,
         quiet=True,
-        max_threads=4
-    )
\ No newline at end of file
+        # 동기 핸들러와 LLM 이벤트의 각 단계는 같은 스레드 풀을 쓰므로 LLM 워커 외에 UI 이벤트용 여유분을 더함
+        # (LLM 이벤트는 async라 백그라운드 응답을 기다리는 동안에는 스레드를 잡지 않음)
+        max_threads=LLM_QUEUE_WORKERS + UI_MAX_THREADS,
+        # 작업 API를 서버 앱에 붙인 뒤 직접 대기
+        prevent_thread_lock=True
+    )
+
+    # 🧵 HTTP 작업 API (/jobs) + 작업 워커 - Gradio와 같은 서버에서 실행 (JOB_API_TOKEN 필수)
+    if JOB_API_ENABLED:
+        from jobs import start_job_workers
+        from jobs.api import register_job_api
+        if register_job_api(server_app):
+            start_job_workers(vector_store_id=get_vector_store_id)
+            print("🧵 작업 API 사용: POST /jobs, GET /jobs/{job_id}, GET /jobs/{job_id}/result, POST /jobs/{job_id}/cancel")
+
+    # 📈 Prometheus/OpenMetrics 지표 (/metrics, METRICS_TOKEN 필수)
+    if METRICS_ENABLED:
+        from telemetry.metrics_api import register_metrics_api
+        if register_metrics_api(server_app):
+            print("📈 지표 엔드포인트 사용: GET /metrics")
+
+    # 🩺 관리자 전용 프로파일링 (/debug/profile, PROFILING_TOKEN 필수)
+    if PROFILING_ENABLED:
+        from telemetry.profiling_api import register_profiling_api
+        if register_profiling_api(server_app):
+            print("🩺 프로파일링 엔드포인트 사용: /debug/profile/memory, /debug/profile/objects, POST /debug/profile/cpu")
+
+    demo.block_thread()
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+헤드리스 일괄 평가 모듈
+
+Gradio UI 없이 스크린샷 세트 디렉터리를 DR 생성 → 평가 파이프라인으로 처리한다.
+- runner: 바로 호출하는 동기 실행기 (제한된 병렬도)
+- deferred: Batch API로 제출하고 나중에 결과를 반영하는 지연 실행기
+"""
+from batch.checkpoint import BatchCheckpoint, split_task_key, task_key
+from batch.runner import (
+    BatchRunner, BatchTaskError, ScreenshotSet,
+    discover_screenshot_sets, load_cached_vector_store_id, run_module
+)
+from batch.batch_api import BatchBackend, LocalBatchBackend, OpenAIBatchBackend, get_batch_backend
+from batch.deferred import DeferredBatchRun
@@ -0,0 +1,228 @@
+"""
+일괄 제출 백엔드 (Batch API / 로컬 대체 구현)
+
+Responses 형식 JSONL 요청 파일을 제출하고 상태/결과 파일을 가져온다.
+- openai: OpenAI Batch API (/v1/responses, 완료 기한 DEFERRED_COMPLETION_WINDOW)
+- local: 같은 파일 형식과 상태 전이를 흉내 내는 로컬 구현 (테스트용, 업스트림 호출 없음)
+
+상태 조회 결과는 {"id", "status", "output_file_id", "error_file_id", "request_counts"} 딕셔너리로 통일한다.
+"""
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from batch.checkpoint import write_json_atomic
+from config import DEFERRED_BATCH_BACKEND, DEFERRED_COMPLETION_WINDOW, DEFERRED_LOCAL_DIR, get_openai_client
+
+RESPONSES_ENDPOINT = "/v1/responses"
+
+# 더 이상 바뀌지 않는 배치 상태 (완료 전에 끝난 경우에도 처리된 요청의 결과 파일은 있을 수 있음)
+FINAL_BATCH_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchBackend:
+    """일괄 제출 백엔드 인터페이스"""
+
+    name = "base"
+
+    def upload_requests(self, path: str) -> str:
+        """JSONL 요청 파일 업로드 → 파일 ID"""
+        raise NotImplementedError
+
+    def create_batch(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def retrieve_batch(self, batch_id: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def cancel_batch(self, batch_id: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def download_file(self, file_id: str) -> str:
+        """결과/오류 파일 내용 (JSONL 문자열)"""
+        raise NotImplementedError
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API"""
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None):
+        # 키 풀이 있으면 대표 키 사용 (파일/배치는 업로드한 프로젝트에서만 보임)
+        self.client = get_openai_client(api_key)
+
+    def upload_requests(self, path: str) -> str:
+        with open(path, "rb") as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    def create_batch(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=RESPONSES_ENDPOINT,
+            completion_window=DEFERRED_COMPLETION_WINDOW,
+            metadata=metadata or None,
+        )
+        return self._to_dict(batch)
+
+    def retrieve_batch(self, batch_id: str) -> Dict[str, Any]:
+        return self._to_dict(self.client.batches.retrieve(batch_id))
+
+    def cancel_batch(self, batch_id: str) -> Dict[str, Any]:
+        return self._to_dict(self.client.batches.cancel(batch_id))
+
+    def download_file(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+    @staticmethod
+    def _to_dict(batch) -> Dict[str, Any]:
+        counts = getattr(batch, "request_counts", None)
+        return {
+            "id": batch.id,
+            "status": batch.status,
+            "output_file_id": getattr(batch, "output_file_id", None),
+            "error_file_id": getattr(batch, "error_file_id", None),
+            "request_counts": {
+                "total": getattr(counts, "total", 0),
+                "completed": getattr(counts, "completed", 0),
+                "failed": getattr(counts, "failed", 0),
+            },
+        }
+
+
+def canned_responder(custom_id: str, body: Dict[str, Any]) -> str:
+    """로컬 대체 구현의 기본 응답 (요청 정보를 담은 고정 JSON)"""
+    return json.dumps({"local_batch": True, "custom_id": custom_id, "model": body.get("model")}, ensure_ascii=False)
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Batch API 로컬 대체 구현 (테스트용)
+
+    파일/배치를 DEFERRED_LOCAL_DIR 아래에 저장하고, 조회할 때마다
+    validating → in_progress → completed 순으로 상태를 넘긴다.
+    completed로 넘어갈 때 responder(custom_id, body) → 응답 텍스트로 결과 파일을 만든다.
+    responder가 예외를 내면 그 요청은 오류 파일에 기록된다.
+    """
+
+    name = "local"
+
+    def __init__(self, root_dir: str = DEFERRED_LOCAL_DIR,
+                 responder: Optional[Callable[[str, Dict[str, Any]], str]] = None):
+        self.root_dir = root_dir
+        self.responder = responder or canned_responder
+        os.makedirs(os.path.join(root_dir, "files"), exist_ok=True)
+        os.makedirs(os.path.join(root_dir, "batches"), exist_ok=True)
+
+    def _file_path(self, file_id: str) -> str:
+        return os.path.join(self.root_dir, "files", f"{file_id}.jsonl")
+
+    def _batch_path(self, batch_id: str) -> str:
+        return os.path.join(self.root_dir, "batches", f"{batch_id}.json")
+
+    def _write_file(self, content: str) -> str:
+        file_id = f"file-local-{uuid.uuid4().hex[:16]}"
+        with open(self._file_path(file_id), "w", encoding="utf-8") as f:
+            f.write(content)
+        return file_id
+
+    def upload_requests(self, path: str) -> str:
+        with open(path, "r", encoding="utf-8") as f:
+            return self._write_file(f.read())
+
+    def create_batch(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        with open(self._file_path(input_file_id), "r", encoding="utf-8") as f:
+            total = sum(1 for line in f if line.strip())
+        batch = {
+            "id": f"batch-local-{uuid.uuid4().hex[:16]}",
+            "status": "validating",
+            "input_file_id": input_file_id,
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": total, "completed": 0, "failed": 0},
+            "metadata": metadata or {},
+            "created_at": time.time(),
+        }
+        write_json_atomic(self._batch_path(batch["id"]), batch)
+        return self._public(batch)
+
+    def retrieve_batch(self, batch_id: str) -> Dict[str, Any]:
+        with open(self._batch_path(batch_id), "r", encoding="utf-8") as f:
+            batch = json.load(f)
+
+        if batch["status"] == "validating":
+            batch["status"] = "in_progress"
+        elif batch["status"] == "in_progress":
+            self._process(batch)
+            batch["status"] = "completed"
+        write_json_atomic(self._batch_path(batch_id), batch)
+        return self._public(batch)
+
+    def cancel_batch(self, batch_id: str) -> Dict[str, Any]:
+        with open(self._batch_path(batch_id), "r", encoding="utf-8") as f:
+            batch = json.load(f)
+        if batch["status"] not in FINAL_BATCH_STATUSES:
+            batch["status"] = "cancelled"
+            write_json_atomic(self._batch_path(batch_id), batch)
+        return self._public(batch)
+
+    def download_file(self, file_id: str) -> str:
+        with open(self._file_path(file_id), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _process(self, batch: Dict[str, Any]) -> None:
+        """요청마다 responder를 실행해 Batch API와 같은 형식의 결과/오류 파일 생성"""
+        outputs, errors = [], []
+        with open(self._file_path(batch["input_file_id"]), "r", encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                custom_id = request["custom_id"]
+                try:
+                    text = self.responder(custom_id, request["body"])
+                except Exception as e:
+                    errors.append({"id": f"batch_req_{index}", "custom_id": custom_id, "response": None,
+                                   "error": {"code": "local_responder_error", "message": str(e)}})
+                    continue
+                outputs.append({
+                    "id": f"batch_req_{index}",
+                    "custom_id": custom_id,
+                    "response": {
+                        "status_code": 200,
+                        "request_id": f"req_local_{index}",
+                        "body": {
+                            "id": f"resp_local_{uuid.uuid4().hex[:12]}",
+                            "object": "response",
+                            "status": "completed",
+                            "model": request["body"].get("model"),
+                            "output": [{
+                                "type": "message",
+                                "role": "assistant",
+                                "content": [{"type": "output_text", "text": text}],
+                            }],
+                        },
+                    },
+                    "error": None,
+                })
+
+        if outputs:
+            batch["output_file_id"] = self._write_file("".join(json.dumps(o, ensure_ascii=False) + "\n" for o in outputs))
+        if errors:
+            batch["error_file_id"] = self._write_file("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in errors))
+        batch["request_counts"].update(completed=len(outputs), failed=len(errors))
+
+    @staticmethod
+    def _public(batch: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: batch[key] for key in ("id", "status", "output_file_id", "error_file_id", "request_counts")}
+
+
+def get_batch_backend(name: str = DEFERRED_BATCH_BACKEND) -> BatchBackend:
+    """설정에 맞는 일괄 제출 백엔드 생성"""
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "local":
+        return LocalBatchBackend()
+    raise ValueError(f"알 수 없는 일괄 제출 백엔드: {name}")
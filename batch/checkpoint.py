@@ -0,0 +1,89 @@
+"""
+일괄 평가 진행 기록 (checkpoint)
+
+(스크린샷 세트, 모듈) 작업의 단계별 완료 결과 파일을 JSON 파일 하나에 기록한다.
+- 단계(dr_generation/evaluation)가 끝날 때마다 임시 파일 작성 후 교체 (중단되어도 기록이 깨지지 않음)
+- 다시 실행하면 같은 모델로 끝난 단계는 결과 파일을 그대로 재사용
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+CHECKPOINT_VERSION = 1
+
+
+def task_key(set_id: str, module: str) -> str:
+    """진행 기록에서 작업을 구분하는 키"""
+    return f"{set_id}::{module}"
+
+
+def split_task_key(key: str) -> Tuple[str, str]:
+    """작업 키 → (세트 ID, 모듈)"""
+    set_id, _, module = key.rpartition("::")
+    return set_id, module
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """임시 파일 작성 후 교체 (중단되어도 기존 파일이 깨지지 않음)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class BatchCheckpoint:
+    """작업별 단계 완료 기록"""
+
+    def __init__(self, path: str, resume: bool = True):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {"version": CHECKPOINT_VERSION, "tasks": {}}
+
+        if resume and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CHECKPOINT_VERSION:
+                    self._data = data
+                    print(f"📌 진행 기록 불러옴: {path} ({len(self._data['tasks'])}개 작업)")
+                else:
+                    print(f"⚠️ 진행 기록 버전이 달라 새로 시작: {path}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 진행 기록 읽기 실패, 새로 시작: {e}")
+
+    def completed_stage(self, key: str, stage: str, model: str) -> Optional[str]:
+        """같은 모델로 끝난 단계의 결과 파일 경로 (없거나 파일이 사라졌으면 None)"""
+        with self._lock:
+            entry = self._data["tasks"].get(key, {}).get(stage)
+        if not entry or entry.get("model") != model:
+            return None
+        path = entry.get("path")
+        if not path or not os.path.exists(path):
+            return None
+        return path
+
+    def record_stage(self, key: str, stage: str, model: str, path: str) -> None:
+        with self._lock:
+            task = self._data["tasks"].setdefault(key, {})
+            task[stage] = {"model": model, "path": path, "completed_at": time.time()}
+            task.pop("error", None)
+            self._write_locked()
+
+    def record_error(self, key: str, stage: str, error: str) -> None:
+        with self._lock:
+            task = self._data["tasks"].setdefault(key, {})
+            task["error"] = {"stage": stage, "message": error, "failed_at": time.time()}
+            self._write_locked()
+
+    def _write_locked(self) -> None:
+        write_json_atomic(self.path, self._data)
@@ -0,0 +1,281 @@
+"""
+지연 일괄 평가 (Batch API)
+
+응답 지연이 중요하지 않은 야간 회귀 평가를 Batch API로 제출해 비용을 줄이고 처리량을 높인다.
+대화형 워커나 호출 슬롯을 점유하지 않는다.
+- advance() 한 번이 한 단계씩 진행: 제출된 배치 상태 확인 → 끝난 배치 결과 반영 → 남은 요청 제출
+- 평가는 DR 결과가 필요하므로 DR이 반영된 작업부터 평가 요청을 다음 배치로 제출
+- 결과는 동기 실행기와 같은 진행 기록/결과 파일 형식으로 저장 (두 방식을 섞어 이어서 실행 가능)
+- 제출 상태는 <출력 디렉터리>/deferred_state.json에 남으므로 프로세스를 끝냈다가 나중에 다시 실행해도 됨
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from agents.dr_generator_agent import create_dr_generator_agent
+from agents.evaluator_agent import create_evaluator_agent
+from batch.batch_api import BatchBackend, FINAL_BATCH_STATUSES, RESPONSES_ENDPOINT
+from batch.checkpoint import BatchCheckpoint, split_task_key, task_key, write_json_atomic
+from batch.runner import (
+    CHECKPOINT_FILENAME, ScreenshotSet, discover_screenshot_sets,
+    read_result_file, write_result_file
+)
+from config import (
+    DEFAULT_MODEL, MAX_IMAGES_PER_REQUEST, DEFERRED_MAX_FILE_BYTES,
+    DEFERRED_MAX_REQUESTS_PER_FILE, DEFERRED_POLL_INTERVAL, DEFERRED_MAX_ATTEMPTS
+)
+from ui.session_store import SessionState, use_session
+from utils import encode_image_file_to_base64
+
+STATE_FILENAME = "deferred_state.json"
+STATE_VERSION = 1
+STAGES = ("dr_generation", "evaluation")
+
+# 파싱 실패로 보는 에이전트 결과 상태
+FAILED_PARSE_STATUSES = ("json_parse_error", "text_only", "error")
+
+# 요청 본문만 만들 때 에이전트에 넘기는 자리표시 클라이언트 (호출하지 않으므로 API 키 없이 생성)
+_REQUEST_BUILDER_CLIENT = object()
+
+
+def response_output_text(body: Dict[str, Any]) -> str:
+    """Responses API 응답 본문(JSON)에서 output_text 이어 붙이기"""
+    if isinstance(body.get("output_text"), str):
+        return body["output_text"]
+    texts = []
+    for item in body.get("output") or []:
+        if item.get("type") != "message":
+            continue
+        for part in item.get("content") or []:
+            if part.get("type") == "output_text":
+                texts.append(part.get("text", ""))
+    return "".join(texts)
+
+
+class DeferredBatchRun:
+    """스크린샷 세트 × 모듈 평가를 Batch API로 나눠 제출하고 결과를 반영"""
+
+    def __init__(self, input_dir: str, modules: List[str], output_dir: str, backend: BatchBackend,
+                 model: str = DEFAULT_MODEL, vector_store_id: Optional[str] = None, resume: bool = True,
+                 checkpoint_path: Optional[str] = None, max_attempts: int = DEFERRED_MAX_ATTEMPTS):
+        self.input_dir = input_dir
+        self.modules = modules
+        self.output_dir = output_dir
+        self.backend = backend
+        self.model = model
+        self.vector_store_id = vector_store_id
+        self.max_attempts = max(1, max_attempts)
+        self.checkpoint = BatchCheckpoint(checkpoint_path or os.path.join(output_dir, CHECKPOINT_FILENAME), resume=resume)
+        self.state_path = os.path.join(output_dir, STATE_FILENAME)
+        self.request_dir = os.path.join(output_dir, "deferred_requests")
+        self.state = self._load_state(resume)
+        self._agents: Dict[Tuple[str, str], Any] = {}
+
+    # ----------------------
+    # 진행
+    # ----------------------
+
+    def advance(self) -> Dict[str, Any]:
+        """제출된 배치 확인/반영 후 남은 요청 제출, 현재 요약 반환"""
+        sets = {screenshot_set.set_id: screenshot_set for screenshot_set in discover_screenshot_sets(self.input_dir)}
+        keys = [task_key(set_id, module) for set_id in sets for module in self.modules]
+
+        # 1) 제출된 배치 상태 확인 및 끝난 배치 반영
+        for batch_id, info in self.state["batches"].items():
+            if info["reconciled"]:
+                continue
+            batch = self.backend.retrieve_batch(batch_id)
+            info["status"] = batch["status"]
+            info["request_counts"] = batch["request_counts"]
+            if batch["status"] in FINAL_BATCH_STATUSES:
+                self._reconcile(info, batch)
+                info["reconciled"] = True
+                print(f"📬 배치 {batch_id} ({info['stage']}) {batch['status']}: "
+                      f"성공 {batch['request_counts']['completed']}, 실패 {batch['request_counts']['failed']}")
+            self._save_state()
+
+        # 2) 제출 중이 아니고 아직 끝나지 않은 단계 모으기
+        in_flight = self._in_flight()
+        pending: Dict[str, List[str]] = {stage: [] for stage in STAGES}
+        exhausted = []
+        for key in keys:
+            stage = self._next_stage(key)
+            if stage is None or (stage, key) in in_flight:
+                continue
+            if self.state["attempts"].get(f"{stage}|{key}", 0) >= self.max_attempts:
+                exhausted.append(key)
+                continue
+            pending[stage].append(key)
+
+        # 3) 단계별로 요청 파일 작성 및 제출
+        for stage in STAGES:
+            if pending[stage]:
+                self._submit(stage, pending[stage], sets)
+
+        in_flight = self._in_flight()
+        summary = {
+            "total": len(keys),
+            "completed": sum(1 for key in keys if self._next_stage(key) is None),
+            "in_flight": len(in_flight),
+            "submitted": sum(len(stage_keys) for stage_keys in pending.values()),
+            "failed": len(exhausted),
+            "batches": {batch_id: info["status"] for batch_id, info in self.state["batches"].items()
+                        if not info["reconciled"]},
+        }
+        summary["finished"] = summary["in_flight"] == 0 and summary["completed"] + summary["failed"] == summary["total"]
+        return summary
+
+    def run(self, wait: bool = False, poll_interval: float = DEFERRED_POLL_INTERVAL) -> Dict[str, Any]:
+        """advance 한 번 (wait=True면 모두 끝날 때까지 poll_interval마다 반복)"""
+        while True:
+            summary = self.advance()
+            print(f"🌙 지연 일괄 평가: 완료 {summary['completed']}/{summary['total']}, "
+                  f"진행 중 {summary['in_flight']}, 이번에 제출 {summary['submitted']}, 실패 {summary['failed']}")
+            if summary["finished"] or not wait:
+                return summary
+            time.sleep(poll_interval)
+
+    # ----------------------
+    # 제출
+    # ----------------------
+
+    def _next_stage(self, key: str) -> Optional[str]:
+        """다음에 실행할 단계 (모두 끝났으면 None)"""
+        if self.checkpoint.completed_stage(key, "evaluation", self.model):
+            return None
+        if self.checkpoint.completed_stage(key, "dr_generation", self.model):
+            return "evaluation"
+        return "dr_generation"
+
+    def _in_flight(self) -> Set[Tuple[str, str]]:
+        return {
+            (info["stage"], key)
+            for info in self.state["batches"].values() if not info["reconciled"]
+            for key in info["custom_ids"].values()
+        }
+
+    def _agent(self, stage: str, module: str):
+        """요청 생성/응답 파싱용 에이전트 (호출하지 않음)"""
+        if (stage, module) not in self._agents:
+            factory = create_dr_generator_agent if stage == "dr_generation" else create_evaluator_agent
+            self._agents[(stage, module)] = factory(module, vector_store_id=self.vector_store_id,
+                                                    client=_REQUEST_BUILDER_CLIENT)
+        return self._agents[(stage, module)]
+
+    def _build_body(self, stage: str, key: str, sets: Dict[str, ScreenshotSet]) -> Dict[str, Any]:
+        set_id, module = split_task_key(key)
+        images = [encode_image_file_to_base64(path) for path in sets[set_id].image_paths[:MAX_IMAGES_PER_REQUEST]]
+        agent = self._agent(stage, module)
+        if stage == "dr_generation":
+            return agent.build_request(images)
+        json_data = read_result_file(self.checkpoint.completed_stage(key, "dr_generation", self.model))
+        return agent.build_request(images, json_data)
+
+    def _submit(self, stage: str, keys: List[str], sets: Dict[str, ScreenshotSet]) -> None:
+        """요청을 크기/개수 한도에 맞춰 여러 JSONL 파일로 나눠 제출"""
+        os.makedirs(self.request_dir, exist_ok=True)
+        state = SessionState("deferred_batch")
+        state.current_model = self.model
+
+        # Batch API 파일 하나에는 모델 하나만 허용 (프로필의 모듈별 경로로 모델이 섞일 수 있음)
+        chunks: Dict[str, Dict[str, Any]] = {}
+        with use_session(state):
+            for key in keys:
+                custom_id = f"{stage}-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}"
+                body = self._build_body(stage, key, sets)
+                line = json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": RESPONSES_ENDPOINT,
+                    "body": body,
+                }, ensure_ascii=False) + "\n"
+                size = len(line.encode("utf-8"))
+
+                chunk = chunks.setdefault(body["model"], {"keys": [], "lines": [], "bytes": 0})
+                if chunk["keys"] and (chunk["bytes"] + size > DEFERRED_MAX_FILE_BYTES
+                                      or len(chunk["keys"]) >= DEFERRED_MAX_REQUESTS_PER_FILE):
+                    self._submit_chunk(stage, chunk["keys"], chunk["lines"])
+                    chunk.update(keys=[], lines=[], bytes=0)
+                chunk["keys"].append(key)
+                chunk["lines"].append(line)
+                chunk["bytes"] += size
+
+            for chunk in chunks.values():
+                if chunk["keys"]:
+                    self._submit_chunk(stage, chunk["keys"], chunk["lines"])
+
+    def _submit_chunk(self, stage: str, keys: List[str], lines: List[str]) -> None:
+        path = os.path.join(self.request_dir, f"{stage}_{time.strftime('%Y%m%d_%H%M%S')}_{len(self.state['batches'])}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+        file_id = self.backend.upload_requests(path)
+        batch = self.backend.create_batch(file_id, metadata={"stage": stage, "model": self.model})
+        self.state["batches"][batch["id"]] = {
+            "stage": stage,
+            "status": batch["status"],
+            "input_file_id": file_id,
+            "request_file": path,
+            "custom_ids": {json.loads(line)["custom_id"]: key for line, key in zip(lines, keys)},
+            "request_counts": batch["request_counts"],
+            "submitted_at": time.time(),
+            "reconciled": False,
+        }
+        for key in keys:
+            attempt_key = f"{stage}|{key}"
+            self.state["attempts"][attempt_key] = self.state["attempts"].get(attempt_key, 0) + 1
+        self._save_state()
+        print(f"📤 배치 제출: {batch['id']} ({stage}, 요청 {len(keys)}개, {self.backend.name})")
+
+    # ----------------------
+    # 결과 반영
+    # ----------------------
+
+    def _reconcile(self, info: Dict[str, Any], batch: Dict[str, Any]) -> None:
+        """결과/오류 파일을 custom_id로 작업에 매칭해 결과 파일과 진행 기록에 반영"""
+        stage = info["stage"]
+        lines: List[Dict[str, Any]] = []
+        for file_id in (batch.get("output_file_id"), batch.get("error_file_id")):
+            if file_id:
+                lines.extend(json.loads(line) for line in self.backend.download_file(file_id).splitlines() if line.strip())
+
+        for entry in lines:
+            key = info["custom_ids"].get(entry.get("custom_id"))
+            if key is None:
+                continue
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                error = entry.get("error") or (response.get("body") or {}).get("error") or {}
+                self.checkpoint.record_error(key, stage, f"{error.get('code', response.get('status_code'))}: {error.get('message', '')}")
+                continue
+            self._apply_result(stage, key, response_output_text(response.get("body") or {}))
+
+    def _apply_result(self, stage: str, key: str, text: str) -> None:
+        set_id, module = split_task_key(key)
+        parsed = self._agent(stage, module).parse_response_text(text)
+        if parsed.get("status") in FAILED_PARSE_STATUSES:
+            self.checkpoint.record_error(key, stage, f"응답 파싱 실패: {parsed.get('status')}")
+            return
+        path = write_result_file(os.path.join(self.output_dir, set_id), parsed, stage, module)
+        self.checkpoint.record_stage(key, stage, self.model, path)
+
+    # ----------------------
+    # 상태 파일
+    # ----------------------
+
+    def _load_state(self, resume: bool) -> Dict[str, Any]:
+        if resume and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                if state.get("version") == STATE_VERSION and state.get("backend") == self.backend.name:
+                    return state
+                print(f"⚠️ 지연 일괄 평가 상태가 현재 설정과 달라 새로 시작: {self.state_path}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 지연 일괄 평가 상태 읽기 실패, 새로 시작: {e}")
+        return {"version": STATE_VERSION, "backend": self.backend.name, "batches": {}, "attempts": {}}
+
+    def _save_state(self) -> None:
+        write_json_atomic(self.state_path, self.state)
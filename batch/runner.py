@@ -0,0 +1,259 @@
+"""
+헤드리스 일괄 평가 실행기
+
+스크린샷 세트 디렉터리 트리를 받아 선택한 모듈별로 DR 생성 → 평가를 실행한다.
+- 이미지 파일을 직접 담고 있는 디렉터리 하나가 스크린샷 세트 하나 (입력 루트 기준 상대 경로가 세트 ID)
+- (세트, 모듈) 작업을 BATCH_MAX_WORKERS개까지 동시에 실행 (업스트림 호출은 호출량 조절기/공정 스케줄러가 추가로 제한)
+- 결과는 save_result_to_file과 같은 JSON 구조로 <출력 디렉터리>/<세트 ID>/ 아래에 저장
+- 단계가 끝날 때마다 진행 기록을 남겨 중단 후 다시 실행하면 끝난 단계는 건너뜀
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from agents.dr_generator_agent import create_dr_generator_agent
+from agents.evaluator_agent import create_evaluator_agent
+from batch.checkpoint import BatchCheckpoint, task_key
+from config import (
+    DEFAULT_MODEL, MAX_IMAGES_PER_REQUEST, BATCH_MAX_WORKERS,
+    BATCH_OUTPUT_DIR, BATCH_IMAGE_EXTENSIONS
+)
+from llm.cancellation import CallCancelled, call_scope, cancel_session_calls
+from llm.scheduler import call_priority
+from telemetry.tracing import traced
+from ui.session_store import SessionState, use_session
+from utils import encode_image_file_to_base64, build_result_record
+
+CHECKPOINT_FILENAME = "checkpoint.json"
+VECTOR_STORE_CACHE_FILE = ".vector_store_cache.json"
+
+
+class ScreenshotSet(NamedTuple):
+    """스크린샷 세트 (세트 ID + 정렬된 이미지 경로)"""
+    set_id: str
+    image_paths: List[str]
+
+
+class BatchTaskError(Exception):
+    """에이전트가 오류 결과를 반환함 (다음 실행에서 다시 시도)"""
+
+    def __init__(self, stage: str, message: str):
+        self.stage = stage
+        super().__init__(message)
+
+
+def discover_screenshot_sets(root_dir: str) -> List[ScreenshotSet]:
+    """입력 루트 아래에서 이미지 파일을 직접 담고 있는 디렉터리를 세트로 수집"""
+    root_dir = os.path.abspath(root_dir)
+    sets: List[ScreenshotSet] = []
+    for directory, dirnames, filenames in os.walk(root_dir):
+        dirnames.sort()
+        images = sorted(
+            name for name in filenames
+            if not name.startswith(".") and os.path.splitext(name)[1].lower() in BATCH_IMAGE_EXTENSIONS
+        )
+        if not images:
+            continue
+        set_id = os.path.relpath(directory, root_dir).replace(os.sep, "/")
+        if set_id == ".":
+            set_id = os.path.basename(root_dir)
+        sets.append(ScreenshotSet(set_id, [os.path.join(directory, name) for name in images]))
+    return sets
+
+
+def load_cached_vector_store_id(cache_path: str = VECTOR_STORE_CACHE_FILE) -> Optional[str]:
+    """UI가 만든 참조 문서 벡터스토어 ID (없으면 None)"""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("vector_store_id")
+    except (OSError, ValueError):
+        return None
+
+
+@traced("file.save", target="batch")
+def write_result_file(output_dir: str, result_data: Any, result_type: str, agent_name: str) -> str:
+    """save_result_to_file과 같은 이름/구조로 결과 파일 저장"""
+    os.makedirs(output_dir, exist_ok=True)
+    record = build_result_record(result_data, agent_name)
+    filename = f"{result_type}_{agent_name.replace(' ', '_')}_{record['timestamp']}.json"
+    file_path = os.path.join(output_dir, filename)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    return file_path
+
+
+def read_result_file(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["result"]
+
+
+def _parse_evaluation(result: str) -> Any:
+    """평가 결과 문자열이 JSON이면 객체로 (UI 다운로드와 동일)"""
+    text = result.strip()
+    if text.startswith("{") and text.endswith("}"):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return result
+
+
+def run_module(screenshot_set: ScreenshotSet, module: str, model: str, output_dir: str,
+               checkpoint: Optional[BatchCheckpoint] = None, vector_store_id: Optional[str] = None,
+               session_id: Optional[str] = None, priority: str = "batch") -> Dict[str, Any]:
+    """
+    스크린샷 세트 하나에 대해 한 모듈의 DR 생성 → 평가 실행
+
+    Args:
+        screenshot_set (ScreenshotSet): 평가할 세트
+        module (str): 평가 모듈 이름
+        model (str): 사용할 모델
+        output_dir (str): 결과 파일 디렉터리
+        checkpoint (BatchCheckpoint, optional): 진행 기록 (끝난 단계 재사용)
+        vector_store_id (str, optional): 참조 문서 벡터스토어 ID
+        session_id (str, optional): 취소/공정 분배 단위 (기본 batch:<세트 ID>)
+        priority (str): 업스트림 호출 우선순위 (기본 batch)
+
+    Returns:
+        dict: 단계별 결과 파일 경로와 재사용 여부
+
+    Raises:
+        BatchTaskError: 에이전트가 오류 결과를 반환한 경우
+        CallCancelled: 취소되거나 마감 시간을 넘긴 경우
+    """
+    key = task_key(screenshot_set.set_id, module)
+    session_id = session_id or f"batch:{screenshot_set.set_id}"
+
+    # 에이전트가 읽는 모델 선택(모델 또는 profile:<이름>)을 작업 단위로 지정
+    state = SessionState(session_id)
+    state.current_model = model
+    state.current_agent_name = module
+
+    dr_path = checkpoint.completed_stage(key, "dr_generation", model) if checkpoint else None
+    eval_path = checkpoint.completed_stage(key, "evaluation", model) if checkpoint else None
+    outcome = {"set_id": screenshot_set.set_id, "module": module, "dr_generation": dr_path,
+               "evaluation": eval_path, "resumed": bool(dr_path and eval_path)}
+    if outcome["resumed"]:
+        return outcome
+
+    images = [encode_image_file_to_base64(path) for path in screenshot_set.image_paths[:MAX_IMAGES_PER_REQUEST]]
+
+    with use_session(state), call_priority(priority):
+        # 1) DR 생성 (이미 끝났으면 저장된 결과 사용)
+        if dr_path:
+            json_data = read_result_file(dr_path)
+        else:
+            dr_agent = create_dr_generator_agent(module, vector_store_id=vector_store_id)
+            with call_scope(session_id, "dr_generation"):
+                json_data = dr_agent.extract_json(images)
+            if not isinstance(json_data, dict) or json_data.get("status") in ("json_parse_error", "text_only", "error"):
+                message = (json_data.get("error") or json_data.get("status")) if isinstance(json_data, dict) else str(json_data)
+                raise BatchTaskError("dr_generation", f"DR 생성 실패: {message}")
+            dr_path = write_result_file(output_dir, json_data, "dr_generation", module)
+            if checkpoint:
+                checkpoint.record_stage(key, "dr_generation", model, dr_path)
+            outcome["dr_generation"] = dr_path
+
+        # 2) 평가
+        eval_agent = create_evaluator_agent(module, vector_store_id=vector_store_id)
+        with call_scope(session_id, "evaluation"):
+            result = eval_agent.generate_guidelines(images, json_data)
+        if not result or result.startswith("❌"):
+            raise BatchTaskError("evaluation", result or "평가 결과가 비어 있습니다.")
+        eval_path = write_result_file(output_dir, _parse_evaluation(result), "evaluation", module)
+        if checkpoint:
+            checkpoint.record_stage(key, "evaluation", model, eval_path)
+        outcome["evaluation"] = eval_path
+
+    return outcome
+
+
+class BatchRunner:
+    """스크린샷 세트 × 모듈 작업을 제한된 병렬도로 실행"""
+
+    def __init__(self, input_dir: str, modules: List[str], output_dir: str = BATCH_OUTPUT_DIR,
+                 model: str = DEFAULT_MODEL, max_workers: int = BATCH_MAX_WORKERS,
+                 vector_store_id: Optional[str] = None, resume: bool = True,
+                 checkpoint_path: Optional[str] = None):
+        self.input_dir = input_dir
+        self.modules = modules
+        self.output_dir = output_dir
+        self.model = model
+        self.max_workers = max(1, max_workers)
+        self.vector_store_id = vector_store_id
+        self.checkpoint = BatchCheckpoint(checkpoint_path or os.path.join(output_dir, CHECKPOINT_FILENAME), resume=resume)
+        self._stopping = threading.Event()
+
+    def run(self) -> Dict[str, Any]:
+        """모든 작업 실행 후 요약 반환 (Ctrl+C 시 진행 중 호출을 취소하고 지금까지의 요약 반환)"""
+        sets = discover_screenshot_sets(self.input_dir)
+        tasks = [(screenshot_set, module) for screenshot_set in sets for module in self.modules]
+        print(f"📦 일괄 평가 시작: 세트 {len(sets)}개 × 모듈 {len(self.modules)}개 = 작업 {len(tasks)}개 "
+              f"(동시 {self.max_workers}개, 모델 {self.model})")
+
+        summary: Dict[str, Any] = {"total": len(tasks), "completed": 0, "resumed": 0, "failed": 0,
+                                   "cancelled": 0, "failures": []}
+        started_at = time.monotonic()
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch")
+        futures = {executor.submit(self._run_task, screenshot_set, module): (screenshot_set, module)
+                   for screenshot_set, module in tasks}
+        try:
+            for future in as_completed(futures):
+                screenshot_set, module = futures[future]
+                self._collect(summary, screenshot_set, module, future)
+        except KeyboardInterrupt:
+            print("⏹ 중단 요청 - 대기 중 작업 취소, 진행 중 호출 취소 (끝난 단계는 진행 기록에 남아 있음)")
+            self._stopping.set()
+            for future in futures:
+                future.cancel()
+            for screenshot_set in sets:
+                cancel_session_calls(f"batch:{screenshot_set.set_id}", "interrupted")
+            summary["cancelled"] = summary["total"] - summary["completed"] - summary["resumed"] - summary["failed"]
+        finally:
+            executor.shutdown(wait=True)
+
+        summary["elapsed_seconds"] = round(time.monotonic() - started_at, 1)
+        print(f"📦 일괄 평가 종료: 완료 {summary['completed']}, 재사용 {summary['resumed']}, "
+              f"실패 {summary['failed']}, 취소 {summary['cancelled']} ({summary['elapsed_seconds']}초)")
+        return summary
+
+    def _run_task(self, screenshot_set: ScreenshotSet, module: str) -> Dict[str, Any]:
+        if self._stopping.is_set():
+            raise CallCancelled("interrupted")
+        return run_module(
+            screenshot_set, module, self.model,
+            os.path.join(self.output_dir, screenshot_set.set_id),
+            checkpoint=self.checkpoint, vector_store_id=self.vector_store_id,
+        )
+
+    def _collect(self, summary: Dict[str, Any], screenshot_set: ScreenshotSet, module: str, future) -> None:
+        key = task_key(screenshot_set.set_id, module)
+        try:
+            outcome = future.result()
+        except CallCancelled as e:
+            summary["cancelled"] += 1
+            print(f"⏹ {key}: 취소됨 ({e})")
+            return
+        except BatchTaskError as e:
+            self._record_failure(summary, key, e.stage, str(e))
+            return
+        except Exception as e:
+            self._record_failure(summary, key, "setup", f"{type(e).__name__}: {e}")
+            return
+
+        if outcome["resumed"]:
+            summary["resumed"] += 1
+            print(f"⏭ {key}: 이전 실행 결과 재사용")
+        else:
+            summary["completed"] += 1
+            print(f"✅ {key}: {outcome['evaluation']}")
+
+    def _record_failure(self, summary: Dict[str, Any], key: str, stage: str, message: str) -> None:
+        summary["failed"] += 1
+        summary["failures"].append({"task": key, "stage": stage, "error": message})
+        self.checkpoint.record_error(key, stage, message)
+        print(f"❌ {key} ({stage}): {message}")
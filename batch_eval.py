@@ -0,0 +1,97 @@
+"""
+헤드리스 일괄 평가 CLI
+
+스크린샷 세트 디렉터리 트리를 선택한 모듈로 평가하고 결과를 JSON 파일로 저장한다.
+이미지 파일(png/jpg/jpeg/webp)을 직접 담고 있는 디렉터리 하나가 세트 하나이다.
+
+사용 예:
+    python batch_eval.py screenshots/release_3.2
+    python batch_eval.py screenshots --modules "Text Legibility" "Information Architecture" --workers 8
+    python batch_eval.py screenshots --model gpt-5-mini --output output/batch/gpt5mini
+    python batch_eval.py screenshots --model profile:fast   # 단계/모듈별 모델 라우팅 프로필
+    python batch_eval.py screenshots --fresh   # 진행 기록을 무시하고 처음부터
+    python batch_eval.py screenshots --deferred          # Batch API로 제출 (다시 실행하면 상태 확인/결과 반영/다음 단계 제출)
+    python batch_eval.py screenshots --deferred --wait   # 모두 끝날 때까지 주기적으로 확인
+
+API 키는 OPENAI_API_KEY 환경변수 또는 서버 키 풀(OPENAI_API_KEY_POOL)에서 가져온다.
+중단(Ctrl+C) 후 같은 명령을 다시 실행하면 끝난 단계는 건너뛰고 이어서 진행한다.
+--deferred는 응답 지연 대신 비용/처리량을 우선하는 야간 회귀 평가용이다 (완료 기한 DEFERRED_COMPLETION_WINDOW).
+"""
+import argparse
+import os
+import sys
+
+from config import (
+    MODEL_SELECTIONS, DEFAULT_MODEL, EVALUATION_MODULES,
+    BATCH_MAX_WORKERS, BATCH_OUTPUT_DIR, DEFERRED_BATCH_BACKEND, DEFERRED_POLL_INTERVAL
+)
+from batch import BatchRunner, DeferredBatchRun, get_batch_backend, load_cached_vector_store_id
+from llm.key_pool import is_key_pool_enabled
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="스크린샷 세트 일괄 UX 평가 (DR 생성 → 평가)")
+    parser.add_argument("input_dir", help="스크린샷 세트 디렉터리 트리의 루트")
+    parser.add_argument("--modules", nargs="+", choices=EVALUATION_MODULES, default=EVALUATION_MODULES,
+                        help="실행할 평가 모듈 (기본: 전체)")
+    parser.add_argument("--output", default=BATCH_OUTPUT_DIR, help=f"결과 디렉터리 (기본: {BATCH_OUTPUT_DIR})")
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS,
+                        help=f"동시에 실행할 (세트, 모듈) 작업 수 (기본: {BATCH_MAX_WORKERS})")
+    parser.add_argument("--model", choices=MODEL_SELECTIONS, default=DEFAULT_MODEL,
+                        help=f"사용할 모델 또는 profile:<이름> 라우팅 프로필 (기본: {DEFAULT_MODEL})")
+    parser.add_argument("--vector-store-id", default=None,
+                        help="참조 문서 벡터스토어 ID (기본: .vector_store_cache.json)")
+    parser.add_argument("--checkpoint", default=None, help="진행 기록 파일 (기본: <output>/checkpoint.json)")
+    parser.add_argument("--fresh", action="store_true", help="진행 기록을 무시하고 처음부터 실행")
+    parser.add_argument("--deferred", action="store_true", help="Batch API로 제출하는 지연 모드 (저비용, 비대화형)")
+    parser.add_argument("--wait", action="store_true", help="지연 모드에서 모두 끝날 때까지 대기")
+    parser.add_argument("--poll-interval", type=float, default=DEFERRED_POLL_INTERVAL,
+                        help=f"지연 모드 상태 확인 주기 (초, 기본: {DEFERRED_POLL_INTERVAL:g})")
+    parser.add_argument("--batch-backend", choices=["openai", "local"], default=DEFERRED_BATCH_BACKEND,
+                        help=f"지연 모드 제출 백엔드 (local: 업스트림 호출 없는 테스트용, 기본: {DEFERRED_BATCH_BACKEND})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        print(f"❌ 입력 디렉터리가 없습니다: {args.input_dir}")
+        return 2
+    needs_api_key = not (args.deferred and args.batch_backend == "local")
+    if needs_api_key and not (os.getenv("OPENAI_API_KEY") or is_key_pool_enabled()):
+        print("❌ OPENAI_API_KEY 환경변수 또는 OPENAI_API_KEY_POOL 설정이 필요합니다.")
+        return 2
+
+    vector_store_id = args.vector_store_id or load_cached_vector_store_id()
+    if not vector_store_id:
+        print("⚠️ 벡터스토어 없음 - 참조 문서 검색(file_search) 없이 실행")
+
+    if args.deferred:
+        deferred = DeferredBatchRun(
+            args.input_dir, args.modules, args.output, get_batch_backend(args.batch_backend),
+            model=args.model, vector_store_id=vector_store_id,
+            resume=not args.fresh, checkpoint_path=args.checkpoint,
+        )
+        summary = deferred.run(wait=args.wait, poll_interval=args.poll_interval)
+        if not summary["finished"]:
+            print("⏳ 제출된 배치가 남아 있습니다. 같은 명령을 다시 실행하면 상태를 확인하고 결과를 반영합니다.")
+            return 0
+        return 1 if summary["failed"] else 0
+
+    runner = BatchRunner(
+        args.input_dir, args.modules, output_dir=args.output, model=args.model,
+        max_workers=args.workers, vector_store_id=vector_store_id,
+        resume=not args.fresh, checkpoint_path=args.checkpoint,
+    )
+    summary = runner.run()
+
+    for failure in summary["failures"]:
+        print(f"  - {failure['task']} ({failure['stage']}): {failure['error']}")
+    if summary["cancelled"]:
+        return 130
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
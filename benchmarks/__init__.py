@@ -0,0 +1,12 @@
+"""
+마이크로 벤치마크 모듈 (요청마다 네트워크 호출 전에 쓰는 CPU 시간 측정)
+
+- runner: 호출 횟수 보정, 반복 측정, JSON 결과 저장/비교
+- cases: 이미지 인코딩/변환, 응답 JSON 파싱, 요청 메시지 구성, 프롬프트 로더 생성
+
+실행과 결과 비교는 run_benchmarks.py 로 한다.
+"""
+from benchmarks.runner import (
+    Benchmark, BenchmarkSkipped, compare_results, format_seconds, load_results, run_benchmarks, save_results
+)
+from benchmarks.cases import Fixtures, collect_benchmarks
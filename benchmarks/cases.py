@@ -0,0 +1,331 @@
+"""
+벤치마크 대상 (네트워크 호출 전 요청마다 반복되는 CPU 작업)
+
+- images: encode_image_to_base64 / encode_images_to_base64 (캐시 적중/미적중, 이미지 크기별),
+  convert_files_to_images, update_image_preview
+- parsing: _parse_json_response (정상/코드 블록/앞뒤 설명/꼬리 콤마/괄호 누락/JSON 없음), extract_json_from_result
+- messages: extract_json / generate_guidelines 의 요청 구성 (_build_turn + _request_kwargs + make_cache_key)
+- prompts: SimplePromptLoader 생성
+
+모든 입력은 고정 시드로 만들어 실행마다 같다. 이미지 벤치마크는 PIL이 필요하고,
+convert_files_to_images / update_image_preview 는 gradio가 설치된 환경에서만 실행된다 (없으면 건너뜀).
+"""
+import base64
+import json
+import os
+import random
+import shutil
+import tempfile
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.runner import Benchmark
+
+# 이름 → (가로, 세로): 저해상도, FHD+ 휴대폰, QHD+ 휴대폰
+IMAGE_SIZES = {
+    "small": (360, 780),
+    "medium": (1080, 2340),
+    "large": (1440, 3200),
+}
+# 여러 장 벤치마크의 이미지 수 (한 세트의 일반적인 스크린샷 수)
+IMAGE_SET_SIZE = 5
+# 요청 구성 벤치마크의 data URL 하나 크기 (FHD+ 스크린샷 PNG 정도)
+DATA_URL_BYTES = 300 * 1024
+BENCH_AGENT = "Text Legibility"
+BENCH_VECTOR_STORE_ID = "vs_benchmark"
+
+
+class Fixtures:
+    """벤치마크 입력 (필요할 때 만들고 재사용, 끝나면 임시 파일 삭제)"""
+
+    def __init__(self):
+        self._dir: Optional[str] = None
+        self._images: Dict[str, Any] = {}
+        self._files: Dict[str, List[str]] = {}
+
+    @property
+    def directory(self) -> str:
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="benchmarks_")
+        return self._dir
+
+    def screenshot(self, size: str, seed: int = 0):
+        """스크린샷 비슷한 PIL 이미지 (단색 카드 + 글자 줄)"""
+        key = f"{size}:{seed}"
+        if key not in self._images:
+            from PIL import Image, ImageDraw
+
+            width, height = IMAGE_SIZES[size]
+            rng = random.Random(seed)
+            image = Image.new("RGB", (width, height), (246, 246, 246))
+            draw = ImageDraw.Draw(image)
+            y = 0
+            while y < height:
+                card_height = rng.randint(height // 30, height // 8)
+                left, right = rng.randint(0, width // 12), width - rng.randint(0, width // 12)
+                color = tuple(rng.randint(180, 255) for _ in range(3))
+                draw.rectangle([left, y, right, y + card_height], fill=color)
+                for line_y in range(y + 8, y + card_height - 12, 18):
+                    text = " ".join(rng.choice(("Settings", "Wi-Fi", "Battery", "Display", "Sound", "알림", "보안"))
+                                    for _ in range(rng.randint(2, 6)))
+                    draw.text((left + 12, line_y), text, fill=(rng.randint(0, 80),) * 3)
+                y += card_height + rng.randint(6, 40)
+            self._images[key] = image
+        return self._images[key]
+
+    def screenshots(self, size: str, count: int) -> List[Any]:
+        return [self.screenshot(size, seed) for seed in range(count)]
+
+    def screenshot_files(self, size: str, count: int) -> List[str]:
+        """PNG 파일 경로 (Gradio 업로드 임시 파일 대신)"""
+        key = f"{size}:{count}"
+        if key not in self._files:
+            paths = []
+            for seed, image in enumerate(self.screenshots(size, count)):
+                path = os.path.join(self.directory, f"{size}_{seed}.png")
+                image.save(path, format="PNG")
+                paths.append(path)
+            self._files[key] = paths
+        return self._files[key]
+
+    def cleanup(self) -> None:
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+
+def data_urls(count: int, size_bytes: int = DATA_URL_BYTES) -> List[str]:
+    """크기가 실제 스크린샷과 비슷한 data URL (내용은 고정 난수)"""
+    urls = []
+    for seed in range(count):
+        payload = random.Random(seed).getrandbits(size_bytes * 8).to_bytes(size_bytes, "little")
+        urls.append("data:image/png;base64," + base64.b64encode(payload).decode("ascii"))
+    return urls
+
+
+def sample_dr_json(elements: int = 40) -> Dict[str, Any]:
+    """DR 생성 결과와 비슷한 구조/크기의 JSON"""
+    rng = random.Random(7)
+    return {
+        "analysis_type": BENCH_AGENT,
+        "screens": [
+            {
+                "screen_id": f"screen_{screen + 1}",
+                "elements": [
+                    {
+                        "id": f"s{screen + 1}_e{index + 1}",
+                        "type": rng.choice(["title", "body", "label", "button", "caption"]),
+                        "text": "설정 화면의 항목 설명 텍스트 " * rng.randint(1, 4),
+                        "font_size_pt": rng.choice([10, 12, 14, 16, 20]),
+                        "contrast_ratio": round(rng.uniform(2.0, 12.0), 2),
+                        "bbox": [rng.randint(0, 1080) for _ in range(4)],
+                    }
+                    for index in range(elements // IMAGE_SET_SIZE)
+                ],
+            }
+            for screen in range(IMAGE_SET_SIZE)
+        ],
+        "summary": "Mock design reference for benchmarking. " * 5,
+    }
+
+
+def _response_variants() -> Dict[str, str]:
+    """모델 응답 텍스트 형태별 입력"""
+    clean = json.dumps(sample_dr_json(), ensure_ascii=False, indent=2)
+    trailing_commas = clean.replace('"\n', '",\n').replace("]\n", "],\n")
+    return {
+        "clean": clean,
+        "fenced": f"```json\n{clean}\n```",
+        "prose_wrapped": f"다음은 분석 결과입니다.\n\n{clean}\n\n추가 질문이 있으면 알려주세요.",
+        "trailing_commas": trailing_commas,
+        "unbalanced": clean.rstrip().rstrip("}").rstrip() + "\n    ]\n  }\n",
+        "text_only": "죄송하지만 이미지를 분석할 수 없습니다. " * 20,
+    }
+
+
+def _setup_encode_one(fixtures: Fixtures, size: str, hit: bool) -> Callable[[], Any]:
+    from utils import clear_image_cache, encode_image_to_base64
+
+    image = fixtures.screenshot(size)
+    clear_image_cache()
+    if hit:
+        encode_image_to_base64(image)
+        return lambda: encode_image_to_base64(image)
+
+    def miss():
+        clear_image_cache()
+        return encode_image_to_base64(image)
+    return miss
+
+
+def _setup_encode_many(fixtures: Fixtures, size: str, hit: bool) -> Callable[[], Any]:
+    from utils import clear_image_cache, encode_images_to_base64
+
+    images = fixtures.screenshots(size, IMAGE_SET_SIZE)
+    clear_image_cache()
+    if hit:
+        encode_images_to_base64(images)
+        return lambda: encode_images_to_base64(images)
+
+    def miss():
+        clear_image_cache()
+        return encode_images_to_base64(images)
+    return miss
+
+
+def _uploaded_files(fixtures: Fixtures, size: str) -> List[Any]:
+    # Gradio 3.x 는 .name 에 임시 파일 경로가 있는 파일 객체를 넘김
+    return [SimpleNamespace(name=path) for path in fixtures.screenshot_files(size, IMAGE_SET_SIZE)]
+
+
+def _setup_convert_files(fixtures: Fixtures, size: str) -> Callable[[], Any]:
+    from ui.business_logic import convert_files_to_images
+
+    files = _uploaded_files(fixtures, size)
+    return lambda: convert_files_to_images(files)
+
+
+def _setup_image_preview(fixtures: Fixtures, size: str) -> Callable[[], Any]:
+    from ui.components import update_image_preview
+
+    files = _uploaded_files(fixtures, size)
+    return lambda: update_image_preview(files)
+
+
+def _bench_agent(kind: str):
+    """네트워크를 쓰지 않는 에이전트 (client 자리에 아무 객체, 요청 구성/파싱만 호출)"""
+    if kind == "dr":
+        from agents.dr_generator_agent import DRGeneratorAgent
+        return DRGeneratorAgent(BENCH_AGENT, vector_store_id=BENCH_VECTOR_STORE_ID, client=object())
+    from agents.evaluator_agent import EvaluatorAgent
+    return EvaluatorAgent(BENCH_AGENT, vector_store_id=BENCH_VECTOR_STORE_ID, client=object())
+
+
+def _setup_parse(kind: str, variant: str) -> Callable[[], Any]:
+    agent = _bench_agent(kind)
+    text = _response_variants()[variant]
+    return lambda: agent._parse_json_response(text)
+
+
+def _setup_extract_json_from_result(variant: str) -> Callable[[], Any]:
+    from ui.business_logic import extract_json_from_result
+
+    text = _response_variants()[variant]
+    return lambda: extract_json_from_result(text)
+
+
+def _setup_dr_request(images: int, feedback: bool) -> Callable[[], Any]:
+    """extract_json 이 create_response 전에 하는 일 (프롬프트 로드 + 메시지 구성 + 캐시 키)"""
+    from llm.response_cache import make_cache_key
+
+    agent = _bench_agent("dr")
+    urls = data_urls(images)
+    user_feedback = ""
+    if feedback:
+        # 이전 턴(이미지 포함)이 히스토리에 있는 피드백 턴
+        _, _, first_message, _ = agent._build_turn(urls, "")
+        agent.conversation_history = [
+            first_message,
+            {"role": "assistant", "content": [{"type": "output_text", "text": _response_variants()["clean"]}]},
+        ]
+        user_feedback = "버튼 라벨의 대비가 낮은 항목을 추가로 확인해주세요."
+
+    def build():
+        system_prompt, input_messages, _, valid_images = agent._build_turn(urls, user_feedback)
+        kwargs = agent._request_kwargs(input_messages)
+        return make_cache_key(
+            kwargs["model"], system_prompt, valid_images, agent.conversation_history, user_feedback,
+            extra={"agent": "dr_generator", "agent_type": agent.agent_type, "tools": kwargs.get("tools")}
+        )
+    return build
+
+
+def _setup_evaluation_request(images: int) -> Callable[[], Any]:
+    """generate_guidelines 가 create_response 전에 하는 일"""
+    from llm.response_cache import make_cache_key
+
+    agent = _bench_agent("evaluator")
+    urls = data_urls(images)
+    json_data = sample_dr_json()
+
+    def build():
+        system_prompt, input_messages, _, valid_images = agent._build_turn(urls, json_data, "")
+        kwargs = agent._request_kwargs(input_messages)
+        return make_cache_key(
+            kwargs["model"], system_prompt, valid_images, agent.conversation_history, "",
+            extra={"agent": "evaluator", "agent_type": agent.agent_type, "tools": kwargs.get("tools"),
+                   "json_data": json_data}
+        )
+    return build
+
+
+def _setup_prompt_loader() -> Callable[[], Any]:
+    from prompts.prompt_loader import SimplePromptLoader
+    return SimplePromptLoader
+
+
+def collect_benchmarks(fixtures: Fixtures) -> List[Benchmark]:
+    """전체 벤치마크 목록 (이름 순서가 곧 실행 순서)"""
+    benchmarks: List[Benchmark] = []
+
+    for size in IMAGE_SIZES:
+        for hit in (False, True):
+            cache = "hit" if hit else "miss"
+            benchmarks.append(Benchmark(
+                f"images.encode_image_to_base64[{size},{cache}]", "images",
+                lambda size=size, hit=hit: _setup_encode_one(fixtures, size, hit),
+                {"size": size, "cache": cache},
+            ))
+    for hit in (False, True):
+        cache = "hit" if hit else "miss"
+        benchmarks.append(Benchmark(
+            f"images.encode_images_to_base64[medium×{IMAGE_SET_SIZE},{cache}]", "images",
+            lambda hit=hit: _setup_encode_many(fixtures, "medium", hit),
+            {"size": "medium", "count": IMAGE_SET_SIZE, "cache": cache},
+        ))
+    for size in ("medium", "large"):
+        benchmarks.append(Benchmark(
+            f"images.convert_files_to_images[{size}×{IMAGE_SET_SIZE}]", "images",
+            lambda size=size: _setup_convert_files(fixtures, size),
+            {"size": size, "count": IMAGE_SET_SIZE},
+        ))
+        benchmarks.append(Benchmark(
+            f"images.update_image_preview[{size}×{IMAGE_SET_SIZE}]", "images",
+            lambda size=size: _setup_image_preview(fixtures, size),
+            {"size": size, "count": IMAGE_SET_SIZE},
+        ))
+
+    for kind in ("dr", "evaluator"):
+        for variant in _response_variants():
+            benchmarks.append(Benchmark(
+                f"parsing.{kind}._parse_json_response[{variant}]", "parsing",
+                lambda kind=kind, variant=variant: _setup_parse(kind, variant),
+                {"agent": kind, "input": variant},
+            ))
+    for variant in ("clean", "prose_wrapped", "text_only"):
+        benchmarks.append(Benchmark(
+            f"parsing.extract_json_from_result[{variant}]", "parsing",
+            lambda variant=variant: _setup_extract_json_from_result(variant),
+            {"input": variant},
+        ))
+
+    for images in (1, IMAGE_SET_SIZE, 10):
+        benchmarks.append(Benchmark(
+            f"messages.extract_json[images={images}]", "messages",
+            lambda images=images: _setup_dr_request(images, feedback=False),
+            {"images": images, "turn": "first"},
+        ))
+    benchmarks.append(Benchmark(
+        f"messages.extract_json[feedback,history_images={IMAGE_SET_SIZE}]", "messages",
+        lambda: _setup_dr_request(IMAGE_SET_SIZE, feedback=True),
+        {"images": IMAGE_SET_SIZE, "turn": "feedback"},
+    ))
+    for images in (1, IMAGE_SET_SIZE, 9):
+        benchmarks.append(Benchmark(
+            f"messages.generate_guidelines[images={images}]", "messages",
+            lambda images=images: _setup_evaluation_request(images),
+            {"images": images, "turn": "first"},
+        ))
+
+    benchmarks.append(Benchmark("prompts.SimplePromptLoader()", "prompts", _setup_prompt_loader, {}))
+    return benchmarks
@@ -0,0 +1,205 @@
+"""
+벤치마크 실행기 (호출 횟수 보정 + 반복 측정 + JSON 결과)
+
+- 호출 횟수: 반복 1회가 min_time 이상 걸리도록 자동 보정 (짧은 함수도 타이머 해상도 영향 없음)
+- 반복: 워밍업 1회 후 repeats회 측정, 각 반복 동안 GC 중지 (GC 타이밍에 따른 흔들림 제거)
+- 출력: 대상 함수의 print는 버림 (포맷팅 비용은 포함, 터미널 I/O는 제외)
+- 결과: 호출 1회당 초 단위 min/median/mean/stdev/IQR
+"""
+import contextlib
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+RESULTS_SCHEMA_VERSION = 1
+# 보정 중 호출 횟수 상한 (아주 빠른 함수가 너무 오래 돌지 않게)
+MAX_LOOPS = 1_000_000
+
+
+class BenchmarkSkipped(Exception):
+    """준비 단계에서 실행할 수 없음 (선택 의존성 없음 등)"""
+
+
+class Benchmark(NamedTuple):
+    """벤치마크 하나 (setup은 준비 후 측정할 인자 없는 호출을 반환)"""
+    name: str
+    group: str
+    setup: Callable[[], Callable[[], Any]]
+    params: Dict[str, Any] = {}
+
+
+class _NullWriter:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def _silenced():
+    return contextlib.redirect_stdout(_NullWriter())
+
+
+def _time_loops(fn: Callable[[], Any], loops: int) -> float:
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        return time.perf_counter() - started
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def calibrate(fn: Callable[[], Any], min_time: float) -> int:
+    """반복 1회가 min_time 이상이 되는 호출 횟수"""
+    loops = 1
+    while True:
+        elapsed = _time_loops(fn, loops)
+        if elapsed >= min_time or loops >= MAX_LOOPS:
+            return loops
+        if elapsed <= 0:
+            loops *= 10
+        else:
+            # 목표보다 약간 넘게 잡아 한 번에 수렴
+            loops = min(MAX_LOOPS, max(loops * 2, int(math.ceil(loops * min_time * 1.2 / elapsed))))
+
+
+def measure(fn: Callable[[], Any], min_time: float, repeats: int) -> Dict[str, Any]:
+    """호출 1회당 시간 통계 (초)"""
+    loops = calibrate(fn, min_time)
+    _time_loops(fn, loops)  # 워밍업
+    samples = []
+    for _ in range(max(1, repeats)):
+        gc.collect()
+        samples.append(_time_loops(fn, loops) / loops)
+
+    ordered = sorted(samples)
+    quartiles = statistics.quantiles(ordered, n=4) if len(ordered) >= 2 else [ordered[0]] * 3
+    return {
+        "loops": loops,
+        "repeats": len(samples),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.mean(ordered),
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "iqr": quartiles[2] - quartiles[0],
+        "samples": samples,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        return output.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info() -> Dict[str, Any]:
+    """결과 비교 시 확인할 실행 환경"""
+    packages = {}
+    for module_name in ("PIL", "numpy", "gradio", "openai"):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            packages[module_name] = getattr(module, "__version__", "unknown")
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+        "packages": packages,
+    }
+
+
+def run_benchmarks(benchmarks: List[Benchmark], min_time: float, repeats: int) -> Dict[str, Any]:
+    """벤치마크 목록 실행 → 결과 dict (JSON 저장용)"""
+    results: Dict[str, Dict[str, Any]] = {}
+    for benchmark in benchmarks:
+        entry: Dict[str, Any] = {"group": benchmark.group, "params": benchmark.params}
+        try:
+            with _silenced():
+                fn = benchmark.setup()
+                stats = measure(fn, min_time, repeats)
+            entry.update(status="ok", unit="s", **stats)
+            print(f"   ⏱️ {benchmark.name:<62} {format_seconds(stats['median']):>10} "
+                  f"(±{format_seconds(stats['iqr'])}, {stats['loops']}회 × {stats['repeats']})")
+        except (BenchmarkSkipped, ImportError) as e:
+            entry.update(status="skipped", reason=str(e))
+            print(f"   ⏭️ {benchmark.name:<62} 건너뜀: {e}")
+        except Exception as e:
+            entry.update(status="error", reason=f"{type(e).__name__}: {e}")
+            print(f"   ❌ {benchmark.name:<62} 오류: {type(e).__name__}: {e}")
+        results[benchmark.name] = entry
+
+    return {
+        "schema_version": RESULTS_SCHEMA_VERSION,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "settings": {"min_time": min_time, "repeats": repeats},
+        "benchmarks": results,
+    }
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"💾 결과 저장: {path}")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("schema_version") != RESULTS_SCHEMA_VERSION:
+        raise ValueError(f"지원하지 않는 결과 형식 (schema_version={results.get('schema_version')}): {path}")
+    return results
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    tolerance: float) -> List[Tuple[str, float, float, float, str]]:
+    """
+    공통 벤치마크의 중앙값 비교 → (이름, 기준, 현재, 비율, 판정) 목록
+
+    두 실행의 사분위 범위를 합친 것보다 작은 차이는 잡음으로 보고 "same"으로 판정한다.
+    """
+    rows = []
+    for name, entry in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if entry.get("status") != "ok" or not base or base.get("status") != "ok":
+            continue
+        old, new = base["median"], entry["median"]
+        ratio = new / old if old > 0 else float("inf")
+        noise = entry.get("iqr", 0.0) + base.get("iqr", 0.0)
+        if abs(new - old) <= noise:
+            verdict = "same"
+        elif ratio > 1 + tolerance:
+            verdict = "slower"
+        elif ratio < 1 - tolerance:
+            verdict = "faster"
+        else:
+            verdict = "same"
+        rows.append((name, old, new, ratio, verdict))
+    return rows
@@ -0,0 +1,128 @@
+"""
+모델 지연 시간/품질 비교 CLI
+
+고정 골든 세트를 모듈 × 모델 조합마다 반복 평가해 지연 시간(p50/p95), 입력/출력/캐시 토큰,
+JSON 파싱 성공률, 기준 평가와의 일치도를 비교 보고서로 남긴다 (골든 세트 구조는 model_compare/golden.py).
+
+사용 예:
+    python compare_models.py golden                                      # 전체 모듈 × AVAILABLE_MODELS
+    python compare_models.py golden --models gpt-5 gpt-5-mini --repeats 5
+    python compare_models.py golden --models gpt-5 profile:fast profile:balanced     # 라우팅 프로필 비교
+    python compare_models.py golden --reference-model gpt-5              # 기준 평가 파일이 없으면 gpt-5 결과를 기준으로
+
+녹화/재생 (CI):
+    python compare_models.py golden --record output/model_compare/recordings.jsonl   # 실제 API 응답 녹화
+    python mock_server.py --recordings output/model_compare/recordings.jsonl &
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-mock \\
+        python compare_models.py golden --replay output/model_compare/recordings.jsonl
+
+재생 모드는 모의 서버가 녹화된 응답/지연 시간/토큰 사용량을 그대로 돌려주므로 API 비용 없이 같은 보고서를 만든다.
+녹화에 없는 요청(프롬프트나 골든 세트가 바뀐 경우)이 하나라도 있으면 종료 코드 1로 끝난다.
+"""
+import argparse
+import os
+import sys
+
+from config import (
+    AVAILABLE_MODELS, MODEL_SELECTIONS, EVALUATION_MODULES, OPENAI_BASE_URL, get_openai_client,
+    MODEL_COMPARE_OUTPUT_DIR, MODEL_COMPARE_REPEATS, MODEL_COMPARE_WORKERS
+)
+from batch import load_cached_vector_store_id
+from llm.key_pool import is_key_pool_enabled
+from model_compare import (
+    CallRecorder, ModelMatrix, build_report, load_golden_set, load_recordings, print_report, save_report
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="모듈 × 모델 지연 시간/품질 비교")
+    parser.add_argument("golden_dir", help="골든 세트 디렉터리 (세트마다 스크린샷 + references/<모듈>.json)")
+    parser.add_argument("--modules", nargs="+", choices=EVALUATION_MODULES, default=EVALUATION_MODULES,
+                        help="비교할 평가 모듈 (기본: 전체)")
+    parser.add_argument("--models", nargs="+", choices=MODEL_SELECTIONS, default=AVAILABLE_MODELS,
+                        help=f"비교할 모델 또는 profile:<이름> (기본: {' '.join(AVAILABLE_MODELS)})")
+    parser.add_argument("--repeats", type=int, default=MODEL_COMPARE_REPEATS,
+                        help=f"조합마다 반복 횟수 (기본: {MODEL_COMPARE_REPEATS})")
+    parser.add_argument("--workers", type=int, default=MODEL_COMPARE_WORKERS,
+                        help=f"동시에 실행할 조합 수 (기본: {MODEL_COMPARE_WORKERS})")
+    parser.add_argument("--output", default=MODEL_COMPARE_OUTPUT_DIR,
+                        help=f"보고서 디렉터리 (기본: {MODEL_COMPARE_OUTPUT_DIR})")
+    parser.add_argument("--reference-model", default=None,
+                        help="기준 평가 파일이 없는 (세트, 모듈)에서 기준으로 삼을 모델")
+    parser.add_argument("--vector-store-id", default=None,
+                        help="참조 문서 벡터스토어 ID (기본: .vector_store_cache.json, 재생 모드는 모의 서버에 새로 만듦)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", default=None, metavar="FILE", help="호출 응답을 모의 서버 녹화 JSONL로 저장")
+    mode.add_argument("--replay", default=None, metavar="FILE",
+                      help="녹화 파일로 재생 (OPENAI_BASE_URL이 같은 파일을 읽은 모의 서버를 가리켜야 함)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if not os.path.isdir(args.golden_dir):
+        print(f"❌ 골든 세트 디렉터리가 없습니다: {args.golden_dir}")
+        return 2
+    if args.reference_model and args.reference_model not in args.models:
+        print(f"❌ 기준 모델 {args.reference_model} 이(가) --models 에 없습니다")
+        return 2
+    if not (os.getenv("OPENAI_API_KEY") or is_key_pool_enabled()):
+        print("❌ OPENAI_API_KEY 환경변수 또는 OPENAI_API_KEY_POOL 설정이 필요합니다.")
+        return 2
+
+    cases = load_golden_set(args.golden_dir, args.modules)
+    if not cases:
+        print(f"❌ 스크린샷 세트가 없습니다: {args.golden_dir}")
+        return 2
+    references = sum(len(case.references) for case in cases)
+    print(f"📂 골든 세트 {len(cases)}개, 기준 평가 {references}개")
+
+    replay_fingerprints = None
+    vector_store_id = args.vector_store_id
+    if args.replay:
+        if not OPENAI_BASE_URL:
+            print("❌ 재생 모드는 OPENAI_BASE_URL이 모의 서버(mock_server.py --recordings ...)를 가리켜야 합니다.")
+            return 2
+        replay_fingerprints, recorded_file_search = load_recordings(args.replay)
+        print(f"📼 재생 모드: 녹화 {len(replay_fingerprints)}개 ({args.replay}) → {OPENAI_BASE_URL}")
+        if vector_store_id is None and recorded_file_search:
+            # 실제 벡터스토어 ID는 모의 서버에 없으므로 새로 만듦 (녹화 지문은 벡터스토어 ID와 무관)
+            vector_store_id = get_openai_client().vector_stores.create(name="model-compare-replay").id
+    elif vector_store_id is None:
+        vector_store_id = load_cached_vector_store_id()
+    if not vector_store_id:
+        print("⚠️ 벡터스토어 없음 - 참조 문서 검색(file_search) 없이 실행")
+
+    recorder = CallRecorder(args.record) if args.record else None
+    matrix = ModelMatrix(
+        cases, args.modules, args.models, repeats=args.repeats, max_workers=args.workers,
+        vector_store_id=vector_store_id, reference_model=args.reference_model,
+        recorder=recorder, replay_fingerprints=replay_fingerprints,
+    )
+    trials = matrix.run()
+
+    settings = {
+        "golden_dir": args.golden_dir,
+        "sets": len(cases),
+        "modules": args.modules,
+        "models": args.models,
+        "repeats": args.repeats,
+        "workers": args.workers,
+        "reference_model": args.reference_model,
+        "mode": "replay" if args.replay else ("record" if args.record else "live"),
+    }
+    report = build_report(trials, settings)
+    print_report(report)
+    save_report(report, args.output)
+
+    if recorder is not None:
+        print(f"📼 새로 녹화한 응답 {recorder.written}개 → {args.record}")
+    if args.replay and matrix.replay_misses:
+        print(f"❌ 녹화에 없는 요청 {matrix.replay_misses}개 - 프롬프트/골든 세트가 바뀌었으면 --record 로 다시 녹화하세요")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,16 +5,254 @@ import os
 from openai import OpenAI
 
 # 기타 설정들
-DEFAULT_MODEL = "gpt-4o"
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gpt-4o")  # 모델 이름 또는 "profile:<이름>"
 MAX_IMAGES_PER_REQUEST = 10
 VECTOR_INDEXING_WAIT_TIME = 3  # 초
 
+# 응답 캐시 설정 (동일 입력 재실행 시 API 재호출 방지)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", ".response_cache.sqlite3")
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # 7일
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))  # 200MB
+
+# OpenAI API 주소 (비우면 기본값, 부하 테스트 시 mock_server.py 주소 예: http://127.0.0.1:8765/v1)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "") or None
+
+# 호출량 조절기 설정
+# 조절기를 거치는 Responses 호출은 조절기가 재시도하므로 시도마다 SDK 재시도를 이 값으로 덮어씀
+# (벡터스토어 생성/파일 업로드, 백그라운드 폴링 등 나머지 호출은 SDK 기본 재시도 유지)
+OPENAI_CLIENT_MAX_RETRIES = int(os.getenv("OPENAI_CLIENT_MAX_RETRIES", "0"))
+GOVERNOR_MAX_RETRIES = int(os.getenv("GOVERNOR_MAX_RETRIES", "4"))
+GOVERNOR_BASE_DELAY = float(os.getenv("GOVERNOR_BASE_DELAY", "1.0"))  # 초
+GOVERNOR_MAX_DELAY = float(os.getenv("GOVERNOR_MAX_DELAY", "30.0"))  # 초
+# 동시 실행/속도 한도는 API 키마다 따로 적용 (서버 키 풀을 쓰면 풀의 키마다, 나머지 호출은 하나를 공유)
+GOVERNOR_MIN_CONCURRENCY = int(os.getenv("GOVERNOR_MIN_CONCURRENCY", "1"))
+GOVERNOR_MAX_CONCURRENCY = int(os.getenv("GOVERNOR_MAX_CONCURRENCY", "8"))
+GOVERNOR_REQUESTS_PER_SECOND = float(os.getenv("GOVERNOR_REQUESTS_PER_SECOND", "5"))
+# 남은 한도가 적을 때 줄이는 속도의 하한 (초기 속도 대비 비율, 서버 한도가 더 낮으면 서버 한도)
+GOVERNOR_MIN_RATE_FRACTION = float(os.getenv("GOVERNOR_MIN_RATE_FRACTION", "0.2"))
+
+# 헤지 요청 설정 (평가 호출 꼬리 지연 단축, 기본 비활성)
+HEDGE_EVALUATION_ENABLED = os.getenv("HEDGE_EVALUATION_ENABLED", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))  # 이 백분위수 지연을 넘으면 헤지
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))  # 기록이 이보다 적으면 헤지 안함
+HEDGE_MAX_RATE = float(os.getenv("HEDGE_MAX_RATE", "0.1"))  # 최근 호출 중 헤지 비율 상한
+HEDGE_HISTORY_SIZE = int(os.getenv("HEDGE_HISTORY_SIZE", "200"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "5.0"))  # 초
+HEDGE_MAX_WORKERS = int(os.getenv("HEDGE_MAX_WORKERS", "8"))
+
+# 백그라운드 응답 (추론이 긴 모델은 background=True로 제출 후 폴링, HTTP 연결/작업 스레드를 잡지 않음)
+BACKGROUND_RESPONSES_ENABLED = os.getenv("BACKGROUND_RESPONSES_ENABLED", "1") == "1"
+BACKGROUND_MODELS = [m.strip() for m in os.getenv("BACKGROUND_MODELS", "gpt-5").split(",") if m.strip()]
+BACKGROUND_POLL_INTERVAL = float(os.getenv("BACKGROUND_POLL_INTERVAL", "2.0"))  # 첫 상태 조회까지 (초, 이후 점점 늘림)
+BACKGROUND_POLL_MAX_INTERVAL = float(os.getenv("BACKGROUND_POLL_MAX_INTERVAL", "15.0"))  # 초
+BACKGROUND_POLL_MAX_ERRORS = int(os.getenv("BACKGROUND_POLL_MAX_ERRORS", "5"))  # 연속 조회 실패 시 호출 실패 처리
+
+# LLM 백엔드 (OpenAI 외에 llama.cpp/vLLM 등 OpenAI 호환 로컬 서버로 단계별 라우팅)
+# 예: LOCAL_LLM_BASE_URL=http://localhost:8080/v1 LOCAL_LLM_MODEL=qwen2.5-vl-7b LLM_STAGE_BACKENDS=dr_generation=local
+LOCAL_LLM_BASE_URL = os.getenv("LOCAL_LLM_BASE_URL", "")
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "")
+LOCAL_LLM_API_KEY = os.getenv("LOCAL_LLM_API_KEY", "not-needed")
+LOCAL_LLM_API = os.getenv("LOCAL_LLM_API", "chat")  # chat: /chat/completions, responses: /responses 지원 서버
+LOCAL_LLM_CAPABILITIES = [c.strip() for c in os.getenv("LOCAL_LLM_CAPABILITIES", "").split(",") if c.strip()]  # vision,file_search,streaming
+LLM_STAGE_BACKENDS = {
+    stage.strip(): backend.strip()
+    for stage, _, backend in (item.partition("=") for item in os.getenv("LLM_STAGE_BACKENDS", "").split(","))
+    if backend.strip()
+}  # 단계=백엔드 (지정하지 않은 단계는 openai)
+LLM_BACKEND_FALLBACK = os.getenv("LLM_BACKEND_FALLBACK", "1") == "1"  # 로컬 서버 오류/기능 부족 시 openai로 재시도
+
+# 모델 라우팅 프로필 (llm/model_routing.py, 모델 선택에서 "profile:<이름>"으로 사용)
+# 단계(dr_generation, evaluation, final_report) 또는 "단계/모듈"마다 "모델[:추론 노력[:응답 길이]]"
+# 추론 노력(minimal/low/medium/high)과 응답 길이(low/medium/high)는 gpt-5 계열에만 적용, "escalate[/단계]"는 단계적 상향 대상
+MODEL_PROFILES = {
+    "fast": {
+        "dr_generation": "gpt-5-nano:minimal:low",
+        "evaluation": "gpt-5-mini:minimal:low",
+        "final_report": "gpt-5-mini:low:medium",
+        "escalate": "gpt-5-mini:low",
+    },
+    "balanced": {
+        "dr_generation": "gpt-5-mini:minimal:low",
+        "evaluation": "gpt-5-mini:low:medium",
+        "evaluation/Information Architecture": "gpt-5:low:medium",  # 여러 화면의 구조를 함께 봐야 함
+        "final_report": "gpt-5-mini:medium:medium",
+        "escalate": "gpt-5:medium",
+    },
+    "thorough": {
+        "dr_generation": "gpt-5:low:medium",
+        "evaluation": "gpt-5:medium:medium",
+        "final_report": "gpt-5:medium:high",
+        "escalate": "gpt-5:high",
+    },
+}
+MODEL_PROFILE_PREFIX = "profile:"
+# 모든 프로필에 덮어쓸 경로 (예: MODEL_ROUTES="dr_generation=gpt-5-mini:minimal,evaluation/Icon Representativeness=gpt-5")
+MODEL_ROUTES = {
+    target.strip(): route.strip()
+    for target, _, route in (item.partition("=") for item in os.getenv("MODEL_ROUTES", "").split(","))
+    if route.strip()
+}
+MODEL_CASCADE_ENABLED = os.getenv("MODEL_CASCADE_ENABLED", "0") == "1"  # JSON 파싱 실패/응답 잘림이면 escalate 모델로 한 번 더
+
+# 구간 추적 (telemetry/tracing.py, 이미지 변환 → 요청 구성 → 모델 호출 → 파싱 → 저장 구간을 JSONL로 기록)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "0") == "1"
+TRACE_FILE = os.getenv("TRACE_FILE", "output/traces/spans.jsonl")
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(20 * 1024 * 1024)))  # 넘으면 spans.jsonl.1 ... 로 순환
+TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "5"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))  # 기록 대기 구간 상한 (가득 차면 버림, 요청은 막지 않음)
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")  # 예: http://127.0.0.1:4318/v1/traces (OTLP/HTTP JSON)
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "snu-cxi-ux-eval")
+
+# Prometheus/OpenMetrics 지표 (telemetry/metrics.py, 앱 서버의 GET /metrics)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # 필수 - 없으면 엔드포인트를 등록하지 않음 (Authorization: Bearer <토큰>)
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "uxeval")
+# 단계 지연 시간 히스토그램 구간 (초)
+METRICS_LATENCY_BUCKETS = [
+    float(bound) for bound in os.getenv("METRICS_LATENCY_BUCKETS", "0.5,1,2,5,10,20,30,60,120,300").split(",") if bound.strip()
+]
+
+# 세션 성능 패널 (ui/perf_panel.py, 최근 실행의 구간별 시간, 토큰, 예상 비용)
+PERF_PANEL_HISTORY = int(os.getenv("PERF_PANEL_HISTORY", "5"))  # 세션마다 보관하는 최근 실행 수
+# 모델별 100만 토큰당 가격 (USD: 입력, 캐시된 입력, 출력) - 예상 비용 표시용
+# 덮어쓰기 예: MODEL_PRICES="gpt-5=1.25/0.125/10,qwen2.5-vl-7b=0/0/0"
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-5": (1.25, 0.125, 10.00),
+    "gpt-5-mini": (0.25, 0.025, 2.00),
+    "gpt-5-nano": (0.05, 0.005, 0.40),
+}
+MODEL_PRICES.update({
+    model.strip(): tuple(float(price) for price in prices.split("/"))
+    for model, _, prices in (item.partition("=") for item in os.getenv("MODEL_PRICES", "").split(","))
+    if prices.strip()
+})
+
+# 운영 중 프로파일링 (telemetry/profiling.py, 관리자 전용 /debug/profile/*)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # 필수: 비어 있으면 엔드포인트를 등록하지 않음 (Authorization: Bearer <토큰>)
+PROFILING_TRACEMALLOC_FRAMES = int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "10"))  # 할당 위치마다 기록하는 호출 스택 깊이
+PROFILING_MAX_SNAPSHOTS = int(os.getenv("PROFILING_MAX_SNAPSHOTS", "5"))  # 보관하는 tracemalloc 스냅샷 수 (오래된 것부터 버림)
+PROFILING_MAX_CPU_SECONDS = float(os.getenv("PROFILING_MAX_CPU_SECONDS", "60"))
+PROFILING_SAMPLE_INTERVAL = float(os.getenv("PROFILING_SAMPLE_INTERVAL", "0.005"))  # CPU 샘플링 간격 (초)
+
+# 구조화 로그 (telemetry/log.py, 요청 경로는 큐에 넣기만 하고 별도 스레드가 출력)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # DEBUG면 이미지별/호출별 상세 진단까지
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text / json (한 줄 JSON)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # 출력 대기 로그 상한 (가득 차면 버림, 요청은 막지 않음)
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "20"))  # 빈번한 이벤트는 같은 종류 N번에 한 번만 (1이면 모두)
+
+# 단계별 마감 시간 (초, 0이면 마감 없음) 및 취소 가능 호출 작업 스레드 수
+STAGE_DEADLINES = {
+    "dr_generation": float(os.getenv("DEADLINE_DR_GENERATION", "300")),
+    "evaluation": float(os.getenv("DEADLINE_EVALUATION", "600")),
+    "final_report": float(os.getenv("DEADLINE_FINAL_REPORT", "300")),
+}
+CANCELLABLE_CALL_WORKERS = int(os.getenv("CANCELLABLE_CALL_WORKERS", "16"))
+ABORTABLE_HTTP_CLIENTS = int(os.getenv("ABORTABLE_HTTP_CLIENTS", "16"))  # 취소 가능한 호출용 HTTP 클라이언트 재사용 상한 (keep-alive 유지)
+SINGLEFLIGHT_POLL_SECONDS = float(os.getenv("SINGLEFLIGHT_POLL_SECONDS", "0.5"))  # 병합된 follower가 취소/마감을 확인하는 간격
+
+# 세션 상태 설정 (한 프로세스에서 여러 리뷰어 동시 지원)
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(2 * 3600)))  # 마지막 접근 후 2시간
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))  # 세션당 256MB
+SESSION_SWEEP_INTERVAL = int(os.getenv("SESSION_SWEEP_INTERVAL", "60"))  # 초
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "200"))
+
+# 세션/산출물 외부 저장소 (여러 워커/프로세스에서 세션 이어받기)
+# memory: 프로세스 메모리만 사용 (기본), sqlite: SQLite + 파일시스템 공유 저장소
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", ".session_store.sqlite3")
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", ".artifacts")
+
+# 이벤트 종류별 동시 실행 및 대기열 설정
+# llm: DR 생성/평가/종합 챗봇처럼 LLM 호출이 있는 이벤트 (Gradio 큐 + 입장 제어)
+# ui: 상태 표시, 이미지 미리보기 등 가벼운 이벤트 (큐를 거치지 않고 스레드 풀에서 즉시 실행)
+EVENT_CONCURRENCY = {
+    "llm": int(os.getenv("LLM_EVENT_CONCURRENCY", "4")),
+}
+LLM_QUEUE_MAX_WAITING = int(os.getenv("LLM_QUEUE_MAX_WAITING", "16"))  # 초과 시 재시도 안내와 함께 거절
+LLM_QUEUE_STATUS_INTERVAL = float(os.getenv("LLM_QUEUE_STATUS_INTERVAL", "2.0"))  # 대기 순서 표시 갱신 주기 (초)
+LLM_EVENT_DEFAULT_SECONDS = float(os.getenv("LLM_EVENT_DEFAULT_SECONDS", "60"))  # 처리 시간 기록 전 예상값 (초)
+UI_MAX_THREADS = int(os.getenv("UI_MAX_THREADS", "16"))  # 큐를 거치지 않는 이벤트용 스레드 수
+GRADIO_QUEUE_MAX_SIZE = int(os.getenv("GRADIO_QUEUE_MAX_SIZE", "64"))
+
+# 업스트림 호출 공정 스케줄러 (API key → 세션 2단계 가중 공정 큐)
+# 가중치가 클수록 같은 시간에 더 많은 호출 슬롯을 받음 (피드백 턴 > 일반 > 일괄 작업)
+SCHEDULER_PRIORITY_WEIGHTS = {
+    "interactive": float(os.getenv("SCHEDULER_WEIGHT_INTERACTIVE", "4")),
+    "standard": float(os.getenv("SCHEDULER_WEIGHT_STANDARD", "2")),
+    "batch": float(os.getenv("SCHEDULER_WEIGHT_BATCH", "1")),
+}
+SCHEDULER_WAIT_HISTORY = int(os.getenv("SCHEDULER_WAIT_HISTORY", "500"))
+
+# 서버 측 API key 풀 (선택, 사용자가 키를 입력하지 않은 세션의 호출을 여러 키에 분산)
+OPENAI_API_KEY_POOL = os.getenv("OPENAI_API_KEY_POOL", "")  # 쉼표로 구분한 키 목록
+OPENAI_API_KEY_POOL_FILE = os.getenv("OPENAI_API_KEY_POOL_FILE", "")  # 한 줄에 키 하나 (# 주석 허용)
+KEY_POOL_SHARE_VECTOR_STORES = os.getenv("KEY_POOL_SHARE_VECTOR_STORES", "0") == "1"  # 모든 키가 같은 프로젝트의 벡터스토어를 볼 수 있는 경우
+KEY_POOL_RATE_LIMIT_COOLDOWN = float(os.getenv("KEY_POOL_RATE_LIMIT_COOLDOWN", "30"))  # 429 후 순환 제외 시간 (초, retry-after가 없을 때)
+KEY_POOL_QUOTA_COOLDOWN = float(os.getenv("KEY_POOL_QUOTA_COOLDOWN", "3600"))  # 할당량 소진(insufficient_quota) 후 제외 시간 (초)
+
+# 헤드리스 일괄 평가 (batch_eval.py)
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))  # 동시에 처리하는 (스크린샷 세트, 모듈) 작업 수
+BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "output/batch")
+BATCH_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+# 지연 일괄 처리 (batch_eval.py --deferred, Batch API로 제출해 비용 절감 - 결과는 최대 완료 기한 내 도착)
+DEFERRED_BATCH_BACKEND = os.getenv("DEFERRED_BATCH_BACKEND", "openai")  # openai: Batch API, local: 로컬 대체 구현 (테스트용)
+DEFERRED_COMPLETION_WINDOW = os.getenv("DEFERRED_COMPLETION_WINDOW", "24h")
+DEFERRED_MAX_FILE_BYTES = int(os.getenv("DEFERRED_MAX_FILE_BYTES", str(190 * 1024 * 1024)))  # 제출 파일 하나의 크기 상한 (API 한도 200MB)
+DEFERRED_MAX_REQUESTS_PER_FILE = int(os.getenv("DEFERRED_MAX_REQUESTS_PER_FILE", "50000"))
+DEFERRED_POLL_INTERVAL = float(os.getenv("DEFERRED_POLL_INTERVAL", "60"))  # --wait 상태 확인 주기 (초)
+DEFERRED_MAX_ATTEMPTS = int(os.getenv("DEFERRED_MAX_ATTEMPTS", "3"))  # 요청별 제출 횟수 상한
+DEFERRED_LOCAL_DIR = os.getenv("DEFERRED_LOCAL_DIR", ".local_batches")
+
+# 모의 Responses API 서버 (mock_server.py)
+MOCK_LLM_HOST = os.getenv("MOCK_LLM_HOST", "127.0.0.1")
+MOCK_LLM_PORT = int(os.getenv("MOCK_LLM_PORT", "8765"))
+MOCK_LLM_LATENCY = os.getenv("MOCK_LLM_LATENCY", "lognormal:1500,0.5")  # 응답 생성 지연 분포 (ms)
+MOCK_LLM_FILE_LATENCY = os.getenv("MOCK_LLM_FILE_LATENCY", "fixed:50")  # 파일/벡터스토어/모델 엔드포인트 지연 (ms)
+MOCK_LLM_ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))  # 응답 요청 중 오류로 응답할 비율
+MOCK_LLM_ERROR_CODES = [int(c) for c in os.getenv("MOCK_LLM_ERROR_CODES", "429,500,503").split(",") if c.strip()]
+MOCK_LLM_RECORDINGS = os.getenv("MOCK_LLM_RECORDINGS", "")  # 녹화된 응답 JSONL (요청 지문 → 응답 텍스트)
+MOCK_LLM_OUTPUT_CHARS = int(os.getenv("MOCK_LLM_OUTPUT_CHARS", "2000"))  # 기본 응답 크기 (실제 평가 JSON과 비슷하게)
+
+# 동시 세션 부하 테스트 (load_test.py)
+LOADTEST_APP_URL = os.getenv("LOADTEST_APP_URL", "http://127.0.0.1:7860")
+LOADTEST_SESSIONS = int(os.getenv("LOADTEST_SESSIONS", "8"))  # 동시 세션 수
+LOADTEST_EVENT_TIMEOUT = float(os.getenv("LOADTEST_EVENT_TIMEOUT", "600"))  # 이벤트 하나의 응답 대기 상한 (초)
+LOADTEST_RSS_INTERVAL = float(os.getenv("LOADTEST_RSS_INTERVAL", "0.5"))  # 서버 메모리 측정 주기 (초)
+
+# 마이크로 벤치마크 (run_benchmarks.py)
+BENCH_MIN_TIME = float(os.getenv("BENCH_MIN_TIME", "0.2"))  # 반복 1회의 최소 측정 시간 (초, 호출 횟수를 여기에 맞춤)
+BENCH_REPEATS = int(os.getenv("BENCH_REPEATS", "7"))  # 반복 횟수 (중앙값/사분위 범위 계산용)
+BENCH_OUTPUT_DIR = os.getenv("BENCH_OUTPUT_DIR", "output/benchmarks")
+
+# 모델 비교 (compare_models.py)
+MODEL_COMPARE_OUTPUT_DIR = os.getenv("MODEL_COMPARE_OUTPUT_DIR", "output/model_compare")
+MODEL_COMPARE_REPEATS = int(os.getenv("MODEL_COMPARE_REPEATS", "3"))  # 조합마다 반복 횟수 (지연 시간 분포/파싱 성공률용)
+MODEL_COMPARE_WORKERS = int(os.getenv("MODEL_COMPARE_WORKERS", "1"))  # 동시에 실행할 조합 수 (1이면 조합 간 간섭 없음)
+
+# HTTP 작업 API (/jobs, CI 등에서 브라우저 없이 평가 제출/조회)
+# 작업은 SQLite 대기열에 저장되고 서버 키(OPENAI_API_KEY 또는 키 풀)로 실행됨
+# 서버 키를 쓰므로 기본은 꺼져 있고, 켜더라도 토큰이 없으면 등록하지 않음
+JOB_API_ENABLED = os.getenv("JOB_API_ENABLED", "0") == "1"
+JOB_API_TOKEN = os.getenv("JOB_API_TOKEN", "")  # 필수: Authorization: Bearer <토큰>
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", ".jobs.sqlite3")
+JOB_DATA_DIR = os.getenv("JOB_DATA_DIR", ".jobs")  # 작업별 업로드 이미지/결과/진행 기록
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 동시에 실행하는 작업 수
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))  # 초
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))  # 하트비트가 이보다 오래 없으면 다른 워커가 이어받음 (재시작 포함)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # 워커가 죽어 이어받은 횟수 상한
+JOB_MAX_UPLOAD_BYTES = int(os.getenv("JOB_MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))  # 작업당 이미지 합계
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))  # 끝난 작업 보관 기간
+
 def get_openai_client(api_key=None):
     """
     OpenAI 클라이언트 생성
     
     Args:
-        api_key (str, optional): 사용자가 입력한 API 키. 없으면 환경변수에서 가져옴
+        api_key (str, optional): 사용자가 입력한 API 키. 없으면 서버 키 풀, 환경변수 순으로 사용
     
     Returns:
         OpenAI: OpenAI 클라이언트 객체
@@ -23,22 +261,37 @@ def get_openai_client(api_key=None):
         ValueError: API 키가 제공되지 않은 경우
     """
     if api_key:
-        return OpenAI(api_key=api_key)
+        return OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL)
+    
+    # 서버 측 키 풀이 설정되어 있으면 호출마다 풀에서 키를 골라 사용
+    from llm.key_pool import get_key_pool
+    key_pool = get_key_pool()
+    if key_pool is not None:
+        return key_pool.create_client()
     
     # 환경변수에서 API 키 확인 (로컬 개발용)
     env_api_key = os.getenv("OPENAI_API_KEY")
     if env_api_key:
-        return OpenAI(api_key=env_api_key)
+        return OpenAI(api_key=env_api_key, base_url=OPENAI_BASE_URL)
     
     raise ValueError("OpenAI API 키가 필요합니다. API 키를 입력해주세요.")
 
 def get_current_model():
-    """현재 선택된 모델 반환 (business_logic에서 가져옴)"""
+    """현재 선택된 모델 반환 (요청/작업에 연결된 세션 기준, 프로필이면 "profile:<이름>" - 단계별 모델은 llm.model_routing)"""
     try:
-        from ui.business_logic import get_current_model
-        return get_current_model()
+        from ui.session_store import get_active_session
     except ImportError:
         return DEFAULT_MODEL
+    state = get_active_session()
+    return state.current_model if state is not None else DEFAULT_MODEL
+
+# 평가 모듈 목록
+EVALUATION_MODULES = [
+    "Text Legibility",
+    "Information Architecture",
+    "Icon Representativeness",
+    "User Task Suitability"
+]
 
 # 사용 가능한 모델 목록
 AVAILABLE_MODELS = [
@@ -48,6 +301,9 @@ AVAILABLE_MODELS = [
     "gpt-5-nano"
 ]
 
+# 모델 선택지 (모델 하나로 모든 단계 또는 단계/모듈별 라우팅 프로필)
+MODEL_SELECTIONS = AVAILABLE_MODELS + [MODEL_PROFILE_PREFIX + name for name in MODEL_PROFILES]
+
 def validate_api_key(api_key):
     """
     API 키 유효성 검증
@@ -65,7 +321,7 @@ def validate_api_key(api_key):
         return False, "유효하지 않은 API 키 형식입니다. 'sk-'로 시작해야 합니다."
     
     try:
-        client = OpenAI(api_key=api_key)
+        client = OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL)
         # 간단한 API 호출로 키 유효성 확인
         client.models.list()
         return True, "API 키가 유효합니다."
@@ -0,0 +1,42 @@
+"""
+HTTP 작업 API 모듈
+
+CI 등에서 브라우저 없이 스크린샷을 제출하고 평가 결과를 조회한다.
+- job_queue: SQLite 작업 대기열 (재시작 후에도 유지)
+- worker: 대기열을 비우는 워커 풀
+- api: Gradio 서버에 붙이는 /jobs 엔드포인트
+"""
+import threading
+from typing import Callable, Optional
+
+from jobs.job_queue import JobQueue
+from jobs.worker import JobWorkerPool
+
+_job_queue: Optional[JobQueue] = None
+_worker_pool: Optional[JobWorkerPool] = None
+_jobs_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """공용 작업 대기열 반환 (최초 호출 시 생성)"""
+    global _job_queue
+    with _jobs_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
+
+
+def start_job_workers(vector_store_id: Optional[Callable[[], Optional[str]]] = None) -> JobWorkerPool:
+    """공용 워커 풀 시작 (이미 시작했으면 그대로 반환)"""
+    global _worker_pool
+    queue = get_job_queue()
+    with _jobs_lock:
+        if _worker_pool is None:
+            _worker_pool = JobWorkerPool(queue, vector_store_id=vector_store_id)
+            _worker_pool.start()
+        return _worker_pool
+
+
+def get_job_worker_pool() -> Optional[JobWorkerPool]:
+    """이 프로세스의 워커 풀 (시작하지 않았으면 None)"""
+    return _worker_pool
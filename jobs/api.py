@@ -0,0 +1,177 @@
+"""
+HTTP 작업 API (/jobs)
+
+Gradio 서버(FastAPI)에 JSON 엔드포인트를 추가한다.
+- POST /jobs                 : 작업 제출 {"images": [data URL 또는 base64], "modules": [...], "model": "..."}
+- GET  /jobs/{job_id}        : 상태/모듈별 진행/대기 순서
+- GET  /jobs/{job_id}/result : 모듈별 DR/평가 결과 (save_result_to_file과 같은 구조)
+- POST /jobs/{job_id}/cancel : 취소 (대기 중이면 즉시, 실행 중이면 진행 중 호출 중단)
+
+JOB_API_ENABLED=1이고 JOB_API_TOKEN이 설정된 경우에만 등록되며, 모든 요청에 Authorization: Bearer <토큰>이 필요하다.
+"""
+import base64
+import binascii
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from pydantic import BaseModel
+
+from config import (
+    DEFAULT_MODEL, MODEL_SELECTIONS, EVALUATION_MODULES,
+    MAX_IMAGES_PER_REQUEST, JOB_API_TOKEN, JOB_MAX_UPLOAD_BYTES
+)
+from batch.checkpoint import split_task_key
+from jobs import get_job_queue, get_job_worker_pool
+from jobs.job_queue import TERMINAL_STATUSES
+from llm.key_pool import is_key_pool_enabled
+from telemetry.api_auth import bearer_token_guard
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class JobSubmission(BaseModel):
+    images: List[str]
+    modules: Optional[List[str]] = None
+    model: Optional[str] = None
+
+
+_require_token = bearer_token_guard(JOB_API_TOKEN, "유효한 API 토큰이 필요합니다.")
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], dependencies=[Depends(_require_token)])
+
+
+def _decode_image(encoded: str) -> Tuple[bytes, str]:
+    """data URL 또는 base64 문자열을 (바이트, 확장자)로 변환 (PNG/JPEG/WEBP만 허용)"""
+    if encoded.startswith("data:"):
+        encoded = encoded.split(",", 1)[-1]
+    try:
+        data = base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="이미지가 올바른 base64 형식이 아닙니다.")
+
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return data, ".png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return data, ".jpg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return data, ".webp"
+    raise HTTPException(status_code=400, detail="PNG, JPEG, WEBP 이미지만 지원합니다.")
+
+
+def _get_job_or_404(job_id: str) -> Dict[str, Any]:
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return job
+
+
+def _job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    status = {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "modules": job["modules"],
+        "model": job["model"],
+        "image_count": job["image_count"],
+        "progress": job["progress"],
+        "attempts": job["attempts"],
+        "cancel_requested": job["cancel_requested"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "error": job["error"],
+    }
+    if job["status"] == "queued":
+        status["queue_position"] = get_job_queue().queue_position(job["job_id"])
+    return status
+
+
+@router.post("", status_code=202)
+def submit_job(submission: JobSubmission) -> Dict[str, Any]:
+    if not (os.getenv("OPENAI_API_KEY") or is_key_pool_enabled()):
+        raise HTTPException(status_code=503, detail="서버에 API 키가 설정되어 있지 않아 작업을 실행할 수 없습니다.")
+
+    modules = submission.modules or EVALUATION_MODULES
+    unknown = [module for module in modules if module not in EVALUATION_MODULES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 평가 모듈: {', '.join(unknown)}")
+    model = submission.model or DEFAULT_MODEL
+    if model not in MODEL_SELECTIONS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 모델: {model}")
+    if not submission.images:
+        raise HTTPException(status_code=400, detail="이미지를 1개 이상 보내주세요.")
+    if len(submission.images) > MAX_IMAGES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"이미지는 최대 {MAX_IMAGES_PER_REQUEST}개까지 보낼 수 있습니다.")
+
+    images = [_decode_image(encoded) for encoded in submission.images]
+    if sum(len(data) for data, _ in images) > JOB_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"이미지 합계가 {JOB_MAX_UPLOAD_BYTES // (1024 * 1024)}MB를 넘습니다.")
+
+    job_id = get_job_queue().submit(images, list(dict.fromkeys(modules)), model)
+    pool = get_job_worker_pool()
+    if pool is not None:
+        pool.notify()
+    logger.info("📥 작업 제출: %s (이미지 %s개, 모듈 %s개)", job_id, len(images), len(modules))
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result",
+    }
+
+
+@router.get("/{job_id}")
+def get_job_status(job_id: str) -> Dict[str, Any]:
+    return _job_status(_get_job_or_404(job_id))
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str) -> Dict[str, Any]:
+    job = _get_job_or_404(job_id)
+    if job["status"] not in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"작업이 아직 끝나지 않았습니다 (상태: {job['status']}).")
+
+    # 진행 기록에 남은 단계별 결과 파일을 모듈별로 모음 (실패/취소된 작업도 끝난 모듈은 반환)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(get_job_queue().checkpoint_path(job_id), "r", encoding="utf-8") as f:
+            tasks = json.load(f).get("tasks", {})
+    except (OSError, ValueError):
+        tasks = {}
+    for key, stages in tasks.items():
+        _, module = split_task_key(key)
+        for stage in ("dr_generation", "evaluation"):
+            path = (stages.get(stage) or {}).get("path")
+            if path and os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    results.setdefault(module, {})[stage] = json.load(f)
+
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "error": job["error"],
+        "progress": job["progress"],
+        "results": results,
+    }
+
+
+@router.post("/{job_id}/cancel", status_code=202)
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    _get_job_or_404(job_id)
+    status = get_job_queue().request_cancel(job_id)
+    pool = get_job_worker_pool()
+    if pool is not None:
+        pool.cancel(job_id)
+    logger.info("⏹ 작업 취소 요청: %s (%s)", job_id, status)
+    return _job_status(_get_job_or_404(job_id))
+
+
+def register_job_api(app: FastAPI) -> bool:
+    """Gradio 서버 앱에 /jobs 엔드포인트 추가 (토큰이 없으면 등록하지 않음)"""
+    if not JOB_API_TOKEN:
+        logger.warning("⚠️ JOB_API_ENABLED=1이지만 JOB_API_TOKEN이 없어 작업 API를 등록하지 않습니다.")
+        return False
+    app.include_router(router)
+    return True
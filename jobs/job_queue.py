@@ -0,0 +1,259 @@
+"""
+평가 작업 대기열 (SQLite)
+
+HTTP 작업 API로 제출된 평가 작업을 저장하고 워커에 나눠준다.
+- 상태: queued → running → succeeded / failed / cancelled
+- 실행 중 작업은 워커가 주기적으로 하트비트를 남기고, JOB_LEASE_SECONDS 동안 없으면
+  (프로세스 재시작/종료) 다른 워커가 이어받음 - 끝난 단계는 작업별 진행 기록으로 건너뜀
+- 업로드 이미지/결과 파일은 JOB_DATA_DIR/<작업 ID>/ 아래에 저장
+"""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import JOB_DB_PATH, JOB_DATA_DIR, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobQueue:
+    """SQLite 기반 작업 대기열"""
+
+    def __init__(self, db_path: str = JOB_DB_PATH, data_dir: str = JOB_DATA_DIR,
+                 lease_seconds: float = JOB_LEASE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.data_dir = data_dir
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                modules TEXT NOT NULL,
+                model TEXT NOT NULL,
+                image_count INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                heartbeat_at REAL,
+                owner TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                progress TEXT NOT NULL DEFAULT '{}',
+                error TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self._conn.commit()
+
+    # ----------------------
+    # 작업 디렉터리
+    # ----------------------
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.data_dir, job_id)
+
+    def image_paths(self, job_id: str) -> List[str]:
+        directory = os.path.join(self.job_dir(job_id), "images")
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))]
+
+    def results_dir(self, job_id: str) -> str:
+        return os.path.join(self.job_dir(job_id), "results")
+
+    def checkpoint_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir(job_id), "checkpoint.json")
+
+    # ----------------------
+    # 제출/조회
+    # ----------------------
+
+    def submit(self, images: List[Tuple[bytes, str]], modules: List[str], model: str) -> str:
+        """
+        작업 등록
+
+        Args:
+            images: (이미지 바이트, 확장자) 목록 - 순서대로 저장
+            modules: 평가 모듈 목록
+            model: 사용할 모델
+
+        Returns:
+            str: 작업 ID
+        """
+        job_id = uuid.uuid4().hex
+        image_dir = os.path.join(self.job_dir(job_id), "images")
+        os.makedirs(image_dir, exist_ok=True)
+        for index, (data, extension) in enumerate(images, start=1):
+            with open(os.path.join(image_dir, f"{index:02d}{extension}"), "wb") as f:
+                f.write(data)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, modules, model, image_count, created_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, json.dumps(modules, ensure_ascii=False), model, len(images), time.time())
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def queue_position(self, job_id: str) -> int:
+        """대기 순서 (1부터, 대기 중이 아니면 0)"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT COUNT(*) FROM jobs
+                WHERE status = 'queued' AND created_at <= (SELECT created_at FROM jobs WHERE job_id = ? AND status = 'queued')
+                """,
+                (job_id,)
+            ).fetchone()
+        return row[0] or 0
+
+    # ----------------------
+    # 워커
+    # ----------------------
+
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """대기 중이거나 하트비트가 끊긴 작업 하나를 가져와 실행 상태로 표시"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        """
+                        SELECT * FROM jobs
+                        WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?)
+                        ORDER BY created_at LIMIT 1
+                        """,
+                        (now - self.lease_seconds,)
+                    ).fetchone()
+                    if row is None:
+                        self._conn.commit()
+                        return None
+
+                    # 이어받을 작업이 이미 취소 요청됐거나 워커를 계속 죽이는 작업이면 종료 처리
+                    if row["status"] == "running" and (row["cancel_requested"] or row["attempts"] >= self.max_attempts):
+                        status, error = (("cancelled", None) if row["cancel_requested"]
+                                         else ("failed", f"최대 시도 횟수({self.max_attempts}회) 초과"))
+                        self._conn.execute(
+                            "UPDATE jobs SET status = ?, error = ?, finished_at = ?, owner = NULL WHERE job_id = ?",
+                            (status, error, now, row["job_id"])
+                        )
+                        continue
+
+                    if row["status"] == "running":
+                        print(f"♻️ 하트비트가 끊긴 작업 이어받음: {row['job_id']} (이전 워커 {row['owner']})")
+                    self._conn.execute(
+                        """
+                        UPDATE jobs SET status = 'running', owner = ?, heartbeat_at = ?,
+                            started_at = COALESCE(started_at, ?), attempts = attempts + 1
+                        WHERE job_id = ?
+                        """,
+                        (owner, now, now, row["job_id"])
+                    )
+                    self._conn.commit()
+                    job = self._row_to_job(row)
+                    job.update(status="running", owner=owner, attempts=row["attempts"] + 1)
+                    return job
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def heartbeat(self, job_ids: List[str], owner: str) -> Set[str]:
+        """실행 중 작업의 하트비트 갱신, 그중 취소 요청된 작업 ID 반환"""
+        if not job_ids:
+            return set()
+        placeholders = ",".join("?" for _ in job_ids)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running' AND job_id IN ({placeholders})",
+                [time.time(), owner] + list(job_ids)
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                f"SELECT job_id FROM jobs WHERE cancel_requested = 1 AND job_id IN ({placeholders})",
+                list(job_ids)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ? WHERE job_id = ?",
+                (json.dumps(progress, ensure_ascii=False), job_id)
+            )
+            self._conn.commit()
+
+    def finish(self, job_id: str, owner: str, status: str, error: Optional[str] = None) -> bool:
+        """실행 결과 기록 (다른 워커가 이미 이어받았으면 False)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, error = ?, finished_at = ?, owner = NULL
+                WHERE job_id = ? AND owner = ? AND status = 'running'
+                """,
+                (status, error, time.time(), job_id, owner)
+            )
+            self._conn.commit()
+        return bool(cursor.rowcount)
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """취소 요청 (대기 중이면 바로 취소, 실행 중이면 워커가 중단). 바뀐 뒤 상태 반환"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+            self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status = 'running'", (job_id,)
+            )
+            self._conn.commit()
+            row = self._conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def purge_finished(self, retention_seconds: float) -> int:
+        """보관 기간이 지난 끝난 작업과 파일 삭제"""
+        if not retention_seconds:
+            return 0
+        cutoff = time.time() - retention_seconds
+        placeholders = ",".join("?" for _ in TERMINAL_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT job_id FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                list(TERMINAL_STATUSES) + [cutoff]
+            ).fetchall()
+            job_ids = [row[0] for row in rows]
+            self._conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in job_ids])
+            self._conn.commit()
+        for job_id in job_ids:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return len(job_ids)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["modules"] = json.loads(job["modules"])
+        job["progress"] = json.loads(job["progress"] or "{}")
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
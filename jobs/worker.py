@@ -0,0 +1,192 @@
+"""
+평가 작업 워커 풀
+
+작업 대기열에서 작업을 가져와 일괄 평가 실행기(run_module)로 모듈별 DR 생성 → 평가를 실행한다.
+- JOB_WORKERS개 스레드가 동시에 작업 하나씩 실행
+- 하트비트 스레드가 실행 중 작업의 임대를 갱신하고, 다른 프로세스에서 들어온 취소 요청을 반영
+- 작업별 진행 기록을 사용하므로 재시작 후 이어받으면 끝난 단계는 다시 호출하지 않음
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from batch import BatchCheckpoint, BatchTaskError, ScreenshotSet, run_module
+from config import JOB_WORKERS, JOB_POLL_INTERVAL, JOB_RETENTION_SECONDS
+from jobs.job_queue import JobQueue
+from llm.cancellation import CallCancelled, cancel_session_calls
+
+# 끝난 작업 정리 주기 (초)
+PURGE_INTERVAL = 3600
+
+
+def job_session_id(job_id: str) -> str:
+    """작업의 취소/공정 분배 단위"""
+    return f"job:{job_id}"
+
+
+class JobWorkerPool:
+    """작업 대기열을 비우는 워커 스레드 묶음"""
+
+    def __init__(self, queue: JobQueue, workers: int = JOB_WORKERS,
+                 vector_store_id: Optional[Callable[[], Optional[str]]] = None,
+                 poll_interval: float = JOB_POLL_INTERVAL):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self._vector_store_id = vector_store_id or (lambda: None)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._running_lock = threading.Lock()
+        self._running: Dict[str, bool] = {}  # 실행 중 작업 ID → 취소 요청 여부
+
+    # ----------------------
+    # 시작/종료
+    # ----------------------
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{index + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        print(f"🧵 작업 워커 시작: {self.workers}개 ({self.owner})")
+
+    def stop(self) -> None:
+        """새 작업을 받지 않고 진행 중 호출 취소 (작업은 임대가 끊기면 다른 워커가 이어받음)"""
+        self._stopping.set()
+        self._wake.set()
+        with self._running_lock:
+            job_ids = list(self._running)
+        for job_id in job_ids:
+            cancel_session_calls(job_session_id(job_id), "shutdown")
+
+    def notify(self) -> None:
+        """새 작업 제출 알림 (대기 중 워커를 바로 깨움)"""
+        self._wake.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """이 프로세스에서 실행 중인 작업이면 바로 중단"""
+        with self._running_lock:
+            if job_id not in self._running:
+                return False
+            self._running[job_id] = True
+        cancel_session_calls(job_session_id(job_id), "job_cancelled")
+        return True
+
+    # ----------------------
+    # 워커 루프
+    # ----------------------
+
+    def _worker_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.claim(self.owner)
+            except Exception as e:
+                print(f"⚠️ 작업 가져오기 실패: {e}")
+                job = None
+
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            with self._running_lock:
+                self._running[job["job_id"]] = job["cancel_requested"]
+            try:
+                self._run_job(job)
+            except Exception as e:
+                print(f"❌ 작업 실행 오류: {job['job_id']} - {e}")
+                self.queue.finish(job["job_id"], self.owner, "failed", f"{type(e).__name__}: {e}")
+            finally:
+                with self._running_lock:
+                    self._running.pop(job["job_id"], None)
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._running_lock:
+            return self._running.get(job_id, False)
+
+    def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id = job["job_id"]
+        session_id = job_session_id(job_id)
+        screenshot_set = ScreenshotSet(job_id, self.queue.image_paths(job_id))
+        checkpoint = BatchCheckpoint(self.queue.checkpoint_path(job_id))
+        progress: Dict[str, Any] = dict(job["progress"])
+        print(f"▶️ 작업 시작: {job_id} (모듈 {len(job['modules'])}개, 모델 {job['model']}, 시도 {job['attempts']})")
+
+        for module in job["modules"]:
+            if self._stopping.is_set():
+                # 종료 중 - 상태를 바꾸지 않고 두면 임대가 끊긴 뒤 다른 워커가 이어받음
+                return
+            if self._cancel_requested(job_id):
+                break
+            if progress.get(module, {}).get("status") == "succeeded":
+                continue
+
+            progress[module] = {"status": "running"}
+            self.queue.update_progress(job_id, progress)
+            try:
+                run_module(
+                    screenshot_set, module, job["model"], self.queue.results_dir(job_id),
+                    checkpoint=checkpoint, vector_store_id=self._vector_store_id(),
+                    session_id=session_id, priority="standard",
+                )
+                progress[module] = {"status": "succeeded"}
+            except CallCancelled as e:
+                if self._stopping.is_set():
+                    return
+                if self._cancel_requested(job_id):
+                    progress[module] = {"status": "cancelled"}
+                    break
+                progress[module] = {"status": "failed", "error": str(e)}
+            except BatchTaskError as e:
+                progress[module] = {"status": "failed", "stage": e.stage, "error": str(e)}
+            except Exception as e:
+                progress[module] = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+            self.queue.update_progress(job_id, progress)
+
+        self.queue.update_progress(job_id, progress)
+        failed = [module for module, entry in progress.items() if entry.get("status") == "failed"]
+        if self._cancel_requested(job_id):
+            status, error = "cancelled", None
+        elif failed:
+            status, error = "failed", f"실패한 모듈: {', '.join(failed)}"
+        else:
+            status, error = "succeeded", None
+        if self.queue.finish(job_id, self.owner, status, error):
+            print(f"🏁 작업 종료: {job_id} ({status})")
+        else:
+            print(f"⚠️ 작업 {job_id}: 임대가 만료되어 다른 워커가 이어받음 - 결과 기록 생략")
+
+    # ----------------------
+    # 하트비트/정리
+    # ----------------------
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        last_purge = 0.0
+        while not self._stopping.wait(interval):
+            with self._running_lock:
+                job_ids = list(self._running)
+            try:
+                for job_id in self.queue.heartbeat(job_ids, self.owner):
+                    if not self._cancel_requested(job_id):
+                        print(f"⏹ 작업 취소 요청 반영: {job_id}")
+                        self.cancel(job_id)
+
+                if time.monotonic() - last_purge > PURGE_INTERVAL:
+                    last_purge = time.monotonic()
+                    purged = self.queue.purge_finished(JOB_RETENTION_SECONDS)
+                    if purged:
+                        print(f"🧹 보관 기간이 지난 작업 정리: {purged}개")
+            except Exception as e:
+                print(f"⚠️ 작업 하트비트 오류: {e}")
@@ -0,0 +1,3 @@
+"""
+LLM 호출 경로 모듈 (응답 캐시 등)
+"""
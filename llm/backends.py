@@ -0,0 +1,300 @@
+"""
+LLM 백엔드 (OpenAI / OpenAI 호환 로컬 서버)
+
+에이전트 요청(Responses API 형식)을 단계별로 설정된 백엔드에 보낸다.
+- 백엔드마다 기능 플래그(vision, file_search, streaming)를 선언
+- 요청에 필요한 기능이 없으면: 생략 가능한 기능(DR 초안의 file_search 등)은 빼고 보내고,
+  그 외에는 기본 백엔드(openai)로 대체
+- /responses를 지원하지 않는 서버(llama.cpp 등)는 /chat/completions로 변환해 호출
+
+LLM_STAGE_BACKENDS=dr_generation=local 처럼 단계별로 지정하며, 지정하지 않은 단계는 openai를 사용한다.
+"""
+import hashlib
+from types import SimpleNamespace
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from config import (
+    LOCAL_LLM_BASE_URL, LOCAL_LLM_MODEL, LOCAL_LLM_API_KEY, LOCAL_LLM_API, LOCAL_LLM_CAPABILITIES,
+    LLM_STAGE_BACKENDS
+)
+from llm.model_routing import MODEL_TUNING_PARAMS
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_BACKEND = "openai"
+
+# 기능 플래그
+VISION = "vision"
+FILE_SEARCH = "file_search"
+STREAMING = "streaming"
+
+# 단계별로 없어도 되는 기능 (빼고 보내도 결과가 나오는 경우)
+# DR 초안은 참고 문서(file_search) 없이도 스크린샷만으로 생성 가능
+DEGRADABLE_CAPABILITIES: Dict[str, Tuple[str, ...]] = {
+    "dr_generation": (FILE_SEARCH,),
+}
+
+
+class BackendCapabilities(NamedTuple):
+    vision: bool = False
+    file_search: bool = False
+    streaming: bool = False
+
+    def has(self, capability: str) -> bool:
+        return bool(getattr(self, capability, False))
+
+    @classmethod
+    def from_names(cls, names: List[str]) -> "BackendCapabilities":
+        unknown = [name for name in names if name not in cls._fields]
+        if unknown:
+            logger.warning("⚠️ 알 수 없는 백엔드 기능 무시: %s", ', '.join(unknown))
+        return cls(**{name: True for name in names if name in cls._fields})
+
+
+def required_capabilities(request_kwargs: Dict[str, Any]) -> Set[str]:
+    """요청에 필요한 기능 (이미지 입력 → vision, file_search 도구, stream=True)"""
+    required = set()
+    for message in request_kwargs.get("input") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, list) and any(part.get("type") == "input_image" for part in content):
+            required.add(VISION)
+            break
+    if any(tool.get("type") == FILE_SEARCH for tool in request_kwargs.get("tools") or []):
+        required.add(FILE_SEARCH)
+    if request_kwargs.get("stream"):
+        required.add(STREAMING)
+    return required
+
+
+def without_capability(request_kwargs: Dict[str, Any], capability: str) -> Dict[str, Any]:
+    """요청에서 기능 제거 (현재는 file_search 도구만 제거 가능)"""
+    kwargs = dict(request_kwargs)
+    if capability == FILE_SEARCH:
+        tools = [tool for tool in kwargs.get("tools") or [] if tool.get("type") != FILE_SEARCH]
+        if tools:
+            kwargs["tools"] = tools
+        else:
+            kwargs.pop("tools", None)
+            kwargs.pop("tool_choice", None)
+    return kwargs
+
+
+class LLMBackend:
+    """LLM 백엔드 인터페이스"""
+
+    name = "base"
+    capabilities = BackendCapabilities()
+    # 요청 모델을 이 모델로 바꿔 보냄 (None이면 에이전트가 고른 모델 그대로)
+    model: Optional[str] = None
+
+    def create_client(self, api_key: Optional[str] = None):
+        """responses.create를 제공하는 클라이언트"""
+        raise NotImplementedError
+
+    def prepare_request(self, request_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if self.model:
+            # 추론 노력/응답 길이는 원래 모델용이라 모델을 바꾸면 뺌
+            kwargs = {key: value for key, value in request_kwargs.items() if key not in MODEL_TUNING_PARAMS}
+            return {**kwargs, "model": self.model}
+        return request_kwargs
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI Responses API (사용자 키 → 서버 키 풀 → 환경변수 순)"""
+
+    name = "openai"
+    capabilities = BackendCapabilities(vision=True, file_search=True, streaming=True)
+
+    def create_client(self, api_key: Optional[str] = None):
+        from config import get_openai_client
+        return get_openai_client(api_key)
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """OpenAI 호환 서버 (llama.cpp, vLLM 등)"""
+
+    def __init__(self, name: str, base_url: str, model: str, api_key: str = "not-needed",
+                 capabilities: BackendCapabilities = BackendCapabilities(), api: str = "chat"):
+        if api not in ("chat", "responses"):
+            raise ValueError(f"지원하지 않는 호출 방식: {api} (chat 또는 responses)")
+        self.name = name
+        self.base_url = base_url
+        self.model = model
+        self.api_key = api_key
+        self.capabilities = capabilities
+        self.api = api
+        self._client = None
+
+    def create_client(self, api_key: Optional[str] = None):
+        # 로컬 서버 키는 사용자 키와 무관 (클라이언트 하나를 재사용)
+        if self._client is None:
+            from openai import OpenAI
+            client = OpenAI(base_url=self.base_url, api_key=self.api_key)
+            self._client = client if self.api == "responses" else ChatCompletionsClient(client)
+        return self._client
+
+
+class _ChatResponses:
+    """responses.create 호출을 chat.completions.create로 변환"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, **kwargs):
+        messages = _to_chat_messages(kwargs.get("input"), kwargs.get("instructions"))
+        chat_kwargs: Dict[str, Any] = {"model": kwargs["model"], "messages": messages}
+        if kwargs.get("max_output_tokens") is not None:
+            chat_kwargs["max_tokens"] = kwargs["max_output_tokens"]
+        for name in ("temperature", "top_p", "timeout"):
+            if kwargs.get(name) is not None:
+                chat_kwargs[name] = kwargs[name]
+
+        completion = self._client.chat.completions.create(**chat_kwargs)
+        choice = completion.choices[0]
+        usage = getattr(completion, "usage", None)
+        return SimpleNamespace(
+            id=getattr(completion, "id", None),
+            model=getattr(completion, "model", kwargs["model"]),
+            status="completed" if getattr(choice, "finish_reason", "stop") != "length" else "incomplete",
+            output_text=choice.message.content or "",
+            usage=SimpleNamespace(
+                input_tokens=getattr(usage, "prompt_tokens", 0),
+                output_tokens=getattr(usage, "completion_tokens", 0),
+                total_tokens=getattr(usage, "total_tokens", 0),
+            ) if usage is not None else None,
+        )
+
+
+class ChatCompletionsClient:
+    """/chat/completions만 지원하는 서버를 Responses API 클라이언트처럼 감싼 것"""
+
+    def __init__(self, client):
+        self._client = client
+        self.responses = _ChatResponses(client)
+
+    @property
+    def api_key(self):
+        return self._client.api_key
+
+    def with_options(self, **options):
+        return ChatCompletionsClient(self._client.with_options(**options))
+
+
+def _to_chat_messages(input_messages, instructions: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Responses 입력(input_text/output_text/input_image) → chat 메시지"""
+    messages: List[Dict[str, Any]] = []
+    if instructions:
+        messages.append({"role": "system", "content": instructions})
+    if isinstance(input_messages, str):
+        messages.append({"role": "user", "content": input_messages})
+        return messages
+
+    for message in input_messages or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            messages.append({"role": message["role"], "content": content})
+            continue
+
+        parts = []
+        for part in content or []:
+            if part.get("type") in ("input_text", "output_text"):
+                parts.append({"type": "text", "text": part.get("text", "")})
+            elif part.get("type") == "input_image":
+                parts.append({"type": "image_url", "image_url": {"url": part.get("image_url")}})
+        # 텍스트만 있으면 문자열로 (멀티파트 content를 받지 않는 서버 호환)
+        if all(part["type"] == "text" for part in parts):
+            messages.append({"role": message["role"], "content": "\n\n".join(part["text"] for part in parts)})
+        else:
+            messages.append({"role": message["role"], "content": parts})
+    return messages
+
+
+class BackendRoute(NamedTuple):
+    """단계 요청을 보낼 백엔드와 변환된 요청"""
+    backend: LLMBackend
+    request_kwargs: Dict[str, Any]
+    dropped: Tuple[str, ...]
+
+
+class BackendRegistry:
+    """설정된 백엔드 목록 + 단계별 라우팅"""
+
+    def __init__(self, stage_backends: Optional[Dict[str, str]] = None):
+        self.backends: Dict[str, LLMBackend] = {DEFAULT_BACKEND: OpenAIBackend()}
+        self.stage_backends = dict(stage_backends or {})
+        self._warned: Set[Tuple[str, str, str]] = set()
+
+    def register(self, backend: LLMBackend) -> None:
+        self.backends[backend.name] = backend
+
+    def get(self, name: str) -> LLMBackend:
+        if name not in self.backends:
+            raise ValueError(f"알 수 없는 LLM 백엔드: {name} (설정된 백엔드: {', '.join(self.backends)})")
+        return self.backends[name]
+
+    def route(self, stage: str, request_kwargs: Dict[str, Any]) -> Optional[BackendRoute]:
+        """
+        단계에 지정된 백엔드로 보낼 요청 (기본 백엔드 단계거나 기능이 부족해 대체되면 None)
+        """
+        name = self.stage_backends.get(stage, DEFAULT_BACKEND)
+        if name == DEFAULT_BACKEND or name not in self.backends:
+            return None
+        backend = self.backends[name]
+
+        kwargs = request_kwargs
+        dropped = []
+        for capability in sorted(required_capabilities(request_kwargs)):
+            if backend.capabilities.has(capability):
+                continue
+            if capability in DEGRADABLE_CAPABILITIES.get(stage, ()):
+                kwargs = without_capability(kwargs, capability)
+                dropped.append(capability)
+                continue
+            self._warn_once(stage, name, f"'{capability}' 기능이 없어 {DEFAULT_BACKEND}로 대체")
+            return None
+
+        if dropped:
+            self._warn_once(stage, name, f"지원하지 않는 기능 제외하고 호출: {', '.join(dropped)}")
+        return BackendRoute(backend, backend.prepare_request(kwargs), tuple(dropped))
+
+    def _warn_once(self, stage: str, name: str, message: str) -> None:
+        if (stage, name, message) not in self._warned:
+            self._warned.add((stage, name, message))
+            logger.warning("⚠️ LLM 백엔드 %s (%s): %s", name, stage, message)
+
+
+def routed_cache_key(cache_key: Optional[str], route: BackendRoute) -> Optional[str]:
+    """다른 백엔드/모델의 응답이 같은 캐시 항목을 쓰지 않도록 키 분리"""
+    if not cache_key:
+        return None
+    payload = f"{cache_key}|{route.backend.name}|{route.request_kwargs.get('model')}|{','.join(route.dropped)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _build_registry() -> BackendRegistry:
+    registry = BackendRegistry(LLM_STAGE_BACKENDS)
+    if LOCAL_LLM_BASE_URL:
+        if not LOCAL_LLM_MODEL:
+            logger.warning("⚠️ LOCAL_LLM_MODEL이 없어 로컬 LLM 백엔드를 사용하지 않습니다.")
+        else:
+            registry.register(OpenAICompatibleBackend(
+                "local", LOCAL_LLM_BASE_URL, LOCAL_LLM_MODEL, api_key=LOCAL_LLM_API_KEY,
+                capabilities=BackendCapabilities.from_names(LOCAL_LLM_CAPABILITIES), api=LOCAL_LLM_API,
+            ))
+            logger.info("🔌 로컬 LLM 백엔드: %s (%s, %s)", LOCAL_LLM_BASE_URL, LOCAL_LLM_MODEL, LOCAL_LLM_API)
+
+    for stage, name in registry.stage_backends.items():
+        if name not in registry.backends:
+            logger.warning("⚠️ %s 단계의 LLM 백엔드 '%s'가 설정되어 있지 않아 %s를 사용합니다.", stage, name, DEFAULT_BACKEND)
+    return registry
+
+
+# 프로세스 공용 백엔드 목록
+backend_registry = _build_registry()
+
+
+def get_llm_client(backend: str = DEFAULT_BACKEND, api_key: Optional[str] = None):
+    """백엔드 이름으로 클라이언트 생성 (openai면 get_openai_client와 같음)"""
+    return backend_registry.get(backend).create_client(api_key)
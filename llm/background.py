@@ -0,0 +1,315 @@
+"""
+백그라운드 응답 (background mode) 폴링
+
+추론이 긴 모델(gpt-5 등)의 호출은 background=True로 제출해 응답 ID만 받고,
+가벼운 폴러 스레드 하나가 모든 진행 중 응답의 상태를 주기적으로 조회한다.
+- 제출 직후 업스트림 호출 슬롯/HTTP 연결/에이전트 호출 작업 스레드를 반환 (긴 호출이 프록시·HTTP 타임아웃에 걸리지 않음)
+- 조회 요청이 끊겨도 다음 주기에 다시 조회 (연결이 끊겨도 응답은 서버에서 계속 진행)
+- 기다리는 쪽은 BackgroundHandle.wait(취소 토큰 반영)로 완료를 기다림
+  (Gradio 핸들러는 wait_async로 이벤트 루프에서 기다리므로 대기 중에는 작업 스레드를 잡지 않음, pipeline.run_steps_async)
+- 기다리던 호출이 모두 취소되면 서버 쪽 응답도 취소
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from llm.cancellation import CallCancelled, get_current_token
+from config import (
+    BACKGROUND_RESPONSES_ENABLED, BACKGROUND_MODELS, BACKGROUND_POLL_INTERVAL,
+    BACKGROUND_POLL_MAX_INTERVAL, BACKGROUND_POLL_MAX_ERRORS
+)
+
+# 진행 중 상태 (이 외에는 끝난 상태)
+PENDING_STATUSES = ("queued", "in_progress")
+
+# 주기를 늘려가는 배율 (짧은 응답은 빨리, 긴 응답은 드물게 조회)
+POLL_BACKOFF = 1.5
+
+
+class BackgroundResponseFailed(Exception):
+    """백그라운드 응답이 실패 상태로 끝남"""
+
+    def __init__(self, response_id: str, message: str):
+        self.response_id = response_id
+        super().__init__(f"백그라운드 응답 실패 ({response_id}): {message}")
+
+
+class BackgroundHandle:
+    """진행 중 백그라운드 응답 하나 (여러 호출이 같은 응답을 기다릴 수 있음)"""
+
+    def __init__(self, client, response_id: str, key: Optional[str] = None):
+        self.client = client
+        self.response_id = response_id
+        self.key = key
+        self.future: Future = Future()
+        self.submitted_at = time.monotonic()
+        self.next_poll_at = self.submitted_at + BACKGROUND_POLL_INTERVAL
+        self.interval = BACKGROUND_POLL_INTERVAL
+        self.errors = 0
+        self.status = "queued"
+        self._waiters = 0
+        self._lock = threading.Lock()
+
+    def add_done_callback(self, fn) -> None:
+        """완료 시 응답 객체로 fn 호출 (실패/취소 시 호출 안함)"""
+        def callback(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                fn(future.result())
+        self.future.add_done_callback(callback)
+
+    def wait(self, token=None):
+        """완료까지 대기 (취소 토큰이 취소/마감되면 CallCancelled, 마지막 대기자면 서버 응답도 취소)"""
+        token = token if token is not None else get_current_token()
+        with self._lock:
+            self._waiters += 1
+        wake = threading.Event()
+        self.future.add_done_callback(lambda _: wake.set())
+        if token is not None:
+            token.add_abort(wake.set)
+        try:
+            while not self.future.done():
+                if token is not None:
+                    try:
+                        token.raise_if_cancelled()
+                    except CallCancelled:
+                        self._leave(cancel_upstream=True)
+                        raise
+                wake.wait(token.remaining() if token is not None else None)
+        finally:
+            if token is not None:
+                token.remove_abort(wake.set)
+        self._leave(cancel_upstream=False)
+        return self.future.result()
+
+    async def wait_async(self, token=None):
+        """wait의 asyncio 버전 (스레드를 잡지 않고 이벤트 루프에서 대기, 작업이 취소되어도 대기에서 빠짐)"""
+        token = token if token is not None else get_current_token()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._waiters += 1
+        wake = asyncio.Event()
+
+        def _wake(*_):
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # 이벤트 루프가 이미 닫힘
+
+        self.future.add_done_callback(_wake)
+        if token is not None:
+            token.add_abort(_wake)
+        try:
+            while not self.future.done():
+                if token is not None:
+                    try:
+                        token.raise_if_cancelled()
+                    except CallCancelled:
+                        loop.run_in_executor(None, self._leave, True)
+                        raise
+                try:
+                    await asyncio.wait_for(wake.wait(), token.remaining() if token is not None else None)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+        except asyncio.CancelledError:
+            # 서버 쪽 취소 요청은 이벤트 루프를 막지 않도록 작업 스레드에서
+            loop.run_in_executor(None, self._leave, True)
+            raise
+        finally:
+            if token is not None:
+                token.remove_abort(_wake)
+        self._leave(cancel_upstream=False)
+        return self.future.result()
+
+    def _leave(self, cancel_upstream: bool) -> None:
+        with self._lock:
+            self._waiters -= 1
+            last = self._waiters <= 0
+        if cancel_upstream and last and not self.future.done():
+            background_poller.cancel(self)
+
+
+class BackgroundPoller:
+    """진행 중 백그라운드 응답을 한 스레드에서 조회"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending: Dict[str, BackgroundHandle] = {}
+        self._by_key: Dict[str, BackgroundHandle] = {}
+        self._thread: Optional[threading.Thread] = None
+        self.disabled_reason: Optional[str] = None
+
+        # 지표
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.poll_errors = 0
+        self._durations: List[float] = []
+
+    # ----------------------
+    # 사용 여부
+    # ----------------------
+
+    def should_use(self, request_kwargs: Dict[str, Any]) -> bool:
+        """이 요청을 백그라운드로 보낼지 (설정된 모델 + 비활성화되지 않음)"""
+        if not BACKGROUND_RESPONSES_ENABLED or self.disabled_reason is not None:
+            return False
+        if request_kwargs.get("stream"):
+            return False
+        return request_kwargs.get("model") in BACKGROUND_MODELS
+
+    def disable(self, reason: str) -> None:
+        """조직 설정 등으로 백그라운드 모드를 쓸 수 없을 때 프로세스 전체에서 끔"""
+        if self.disabled_reason is None:
+            self.disabled_reason = reason
+            print(f"⚠️ 백그라운드 응답 비활성화 (일반 호출로 전환): {reason}")
+
+    # ----------------------
+    # 등록/조회
+    # ----------------------
+
+    def find(self, key: Optional[str]) -> Optional[BackgroundHandle]:
+        """같은 내용으로 진행 중인 백그라운드 응답 (있으면 새로 제출하지 않고 함께 대기)"""
+        if not key:
+            return None
+        with self._lock:
+            return self._by_key.get(key)
+
+    def track(self, client, response, key: Optional[str] = None) -> BackgroundHandle:
+        """제출된 응답 등록 (이미 끝난 응답이면 바로 완료 처리)"""
+        handle = BackgroundHandle(client, response.id, key)
+        with self._lock:
+            self.submitted += 1
+        if not self._settle(handle, response):
+            with self._lock:
+                self._pending[handle.response_id] = handle
+                if key:
+                    self._by_key[key] = handle
+            self._ensure_thread()
+            self._wake.set()
+        return handle
+
+    def cancel(self, handle: BackgroundHandle) -> None:
+        """서버 쪽 응답 취소 후 대기 목록에서 제거"""
+        self._forget(handle)
+        try:
+            handle.client.responses.cancel(handle.response_id)
+        except Exception as e:
+            print(f"⚠️ 백그라운드 응답 취소 실패 ({handle.response_id}): {e}")
+        if not handle.future.done():
+            handle.future.set_exception(CallCancelled())
+        with self._lock:
+            self.cancelled += 1
+        print(f"⏹ 백그라운드 응답 취소: {handle.response_id}")
+
+    # ----------------------
+    # 폴러 스레드
+    # ----------------------
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._poll_loop, name="background-poller", daemon=True)
+                self._thread.start()
+
+    def _poll_loop(self) -> None:
+        while True:
+            with self._lock:
+                handles = list(self._pending.values())
+            if not handles:
+                self._wake.wait(60)
+                self._wake.clear()
+                continue
+
+            now = time.monotonic()
+            for handle in handles:
+                if handle.next_poll_at <= now and not handle.future.done():
+                    self._poll(handle)
+
+            with self._lock:
+                next_at = min((h.next_poll_at for h in self._pending.values()), default=None)
+            if next_at is not None:
+                self._wake.wait(max(0.05, next_at - time.monotonic()))
+                self._wake.clear()
+
+    def _poll(self, handle: BackgroundHandle) -> None:
+        try:
+            response = handle.client.responses.retrieve(handle.response_id)
+        except Exception as e:
+            # 조회 실패는 다음 주기에 재시도 (연속 실패가 많으면 포기)
+            handle.errors += 1
+            with self._lock:
+                self.poll_errors += 1
+            if handle.errors >= BACKGROUND_POLL_MAX_ERRORS:
+                self._forget(handle)
+                handle.future.set_exception(e)
+                with self._lock:
+                    self.failed += 1
+                print(f"❌ 백그라운드 응답 조회 {handle.errors}회 연속 실패: {handle.response_id} - {e}")
+                return
+        else:
+            handle.errors = 0
+            if self._settle(handle, response):
+                self._forget(handle)
+                return
+        handle.interval = min(handle.interval * POLL_BACKOFF, BACKGROUND_POLL_MAX_INTERVAL)
+        handle.next_poll_at = time.monotonic() + handle.interval
+
+    def _settle(self, handle: BackgroundHandle, response) -> bool:
+        """끝난 상태면 결과를 넘기고 True"""
+        status = getattr(response, "status", None) or "completed"
+        handle.status = status
+        if status in PENDING_STATUSES:
+            return False
+
+        elapsed = time.monotonic() - handle.submitted_at
+        if status in ("completed", "incomplete"):
+            if status == "incomplete":
+                reason = getattr(getattr(response, "incomplete_details", None), "reason", None)
+                print(f"⚠️ 백그라운드 응답 일부만 완료 ({handle.response_id}): {reason}")
+            with self._lock:
+                self.completed += 1
+                self._durations = (self._durations + [elapsed])[-200:]
+            handle.future.set_result(response)
+        elif status == "cancelled":
+            with self._lock:
+                self.cancelled += 1
+            handle.future.set_exception(CallCancelled())
+        else:
+            error = getattr(response, "error", None)
+            message = getattr(error, "message", None) or str(error or status)
+            with self._lock:
+                self.failed += 1
+            handle.future.set_exception(BackgroundResponseFailed(handle.response_id, message))
+        return True
+
+    def _forget(self, handle: BackgroundHandle) -> None:
+        with self._lock:
+            self._pending.pop(handle.response_id, None)
+            if handle.key and self._by_key.get(handle.key) is handle:
+                del self._by_key[handle.key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            durations = sorted(self._durations)
+            return {
+                "enabled": BACKGROUND_RESPONSES_ENABLED and self.disabled_reason is None,
+                "models": list(BACKGROUND_MODELS),
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "poll_errors": self.poll_errors,
+                "avg_seconds": round(sum(durations) / len(durations), 1) if durations else 0.0,
+                "max_seconds": round(durations[-1], 1) if durations else 0.0,
+                "disabled_reason": self.disabled_reason,
+            }
+
+
+# 프로세스 공용 폴러
+background_poller = BackgroundPoller()
@@ -0,0 +1,107 @@
+"""
+호출 기록 (모델 비교/녹화용)
+
+record_calls() 범위 안에서 create_response 가 끝날 때마다 단계, 모델, 백엔드, 지연 시간,
+토큰 사용량을 CallRecord 로 남긴다. 범위 밖에서는 아무것도 하지 않는다.
+기록은 contextvars 로 전달되므로 같은 컨텍스트(및 call_scope 작업 스레드)의 호출만 모인다.
+"""
+import contextvars
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class CallRecord(NamedTuple):
+    """create_response 호출 한 번"""
+    stage: str
+    backend: str
+    model: Optional[str]
+    latency: float              # 초 (캐시 적중이면 거의 0)
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    reasoning_tokens: int
+    from_cache: bool
+    request: Dict[str, Any]     # 실제 보낸 요청 인자 (녹화 지문 계산용, 복사하지 않음)
+    output_text: Optional[str]
+    error: str = ""
+
+
+_recorders: contextvars.ContextVar = contextvars.ContextVar("call_recorders", default=())
+
+
+def request_fingerprint(body: Dict[str, Any]) -> str:
+    """
+    요청 지문 (모델 + 입력 + 지시문 + 도구, 녹화/재생 매칭용)
+
+    벡터스토어 ID는 실행 환경(실제 OpenAI ↔ 모의 서버)마다 달라서 지문에서 뺀다.
+    """
+    tools = [
+        {key: value for key, value in tool.items() if key != "vector_store_ids"} if isinstance(tool, dict) else tool
+        for tool in body.get("tools") or []
+    ]
+    payload = {
+        "model": body.get("model"),
+        "input": body.get("input"),
+        "instructions": body.get("instructions"),
+        "tools": tools or None,
+    }
+    serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def usage_counts(response: Any) -> Tuple[int, int, int, int]:
+    """응답의 (입력, 출력, 캐시된 입력, 추론) 토큰 수 (usage가 없으면 0)"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0, 0, 0
+    input_details = getattr(usage, "input_tokens_details", None)
+    output_details = getattr(usage, "output_tokens_details", None)
+    return (
+        getattr(usage, "input_tokens", 0) or 0,
+        getattr(usage, "output_tokens", 0) or 0,
+        getattr(input_details, "cached_tokens", 0) or 0,
+        getattr(output_details, "reasoning_tokens", 0) or 0,
+    )
+
+
+@contextmanager
+def record_calls() -> Iterator[List[CallRecord]]:
+    """범위 안의 create_response 호출 기록 목록 (중첩 가능, 바깥 범위에도 함께 기록)"""
+    records: List[CallRecord] = []
+    reset = _recorders.set(_recorders.get() + (records,))
+    try:
+        yield records
+    finally:
+        _recorders.reset(reset)
+
+
+def is_recording() -> bool:
+    return bool(_recorders.get())
+
+
+def log_call(stage: str, backend: str, request_kwargs: Dict[str, Any], started: float,
+             response: Any = None, error: Optional[BaseException] = None) -> None:
+    """호출 결과 기록 (record_calls 범위 밖이면 무시)"""
+    recorders = _recorders.get()
+    if not recorders:
+        return
+    input_tokens, output_tokens, cached_tokens, reasoning_tokens = usage_counts(response)
+    record = CallRecord(
+        stage=stage,
+        backend=backend,
+        model=request_kwargs.get("model"),
+        latency=time.monotonic() - started,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cached_tokens=cached_tokens,
+        reasoning_tokens=reasoning_tokens,
+        from_cache=bool(getattr(response, "from_cache", False)),
+        request=request_kwargs,
+        output_text=getattr(response, "output_text", None) if response is not None else None,
+        error=f"{type(error).__name__}: {error}" if error is not None else "",
+    )
+    for records in recorders:
+        records.append(record)
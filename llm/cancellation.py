@@ -0,0 +1,221 @@
+"""
+에이전트 호출 취소 및 단계별 마감 시간(deadline)
+
+- CancelToken: 취소/마감 상태와 HTTP 요청 중단 콜백을 보관
+- call_scope: 세션/단계 단위로 토큰을 만들어 현재 컨텍스트에 설정
+- cancel_session_calls: 세션의 진행 중 호출을 모두 취소 (초기화, 중지 버튼)
+
+토큰이 설정된 호출은 별도 작업 스레드에서 실행되고, 호출한 스레드(Gradio 워커)는
+취소나 마감 시간 초과 시 즉시 반환된다.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from config import STAGE_DEADLINES, CANCELLABLE_CALL_WORKERS
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class CallCancelled(Exception):
+    """사용자 취소 또는 세션 초기화로 호출이 중단됨"""
+
+    def __init__(self, message: str = "⏹ 요청이 취소되었습니다."):
+        super().__init__(message)
+
+
+class DeadlineExceeded(CallCancelled):
+    """단계별 마감 시간 초과로 호출이 중단됨"""
+
+    def __init__(self, message: str = "⏰ 요청 시간이 초과되어 중단되었습니다."):
+        super().__init__(message)
+
+
+class CancelToken:
+    """호출 취소 토큰 (부모가 취소되면 자식도 취소됨)"""
+
+    def __init__(self, session_id: Optional[str] = None, stage: str = "default",
+                 timeout: Optional[float] = None, parent: Optional["CancelToken"] = None):
+        self.session_id = session_id if session_id is not None else (parent.session_id if parent else None)
+        self.stage = stage
+        self.deadline = (time.monotonic() + timeout) if timeout else None
+        self.parent = parent
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._abort_callbacks: List[Callable[[], Any]] = []
+        self._children: List["CancelToken"] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """취소 표시 후 등록된 중단 콜백 실행 (자식 토큰까지 전파)"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._abort_callbacks)
+            children = list(self._children)
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning("⚠️ 요청 중단 콜백 오류: %s", e)
+        for child in children:
+            child.cancel(reason)
+
+    def add_abort(self, callback: Callable[[], Any]) -> None:
+        """취소 시 호출할 콜백 등록 (이미 취소됐으면 즉시 호출)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._abort_callbacks.append(callback)
+                return
+        callback()
+
+    def remove_abort(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            if callback in self._abort_callbacks:
+                self._abort_callbacks.remove(callback)
+
+    def child(self, stage: Optional[str] = None) -> "CancelToken":
+        """자식 토큰 생성 (헤지 요청 등 개별 시도 단위 취소용)"""
+        token = CancelToken(stage=stage or self.stage, parent=self)
+        with self._lock:
+            if not self._event.is_set():
+                self._children.append(token)
+                return token
+        token.cancel(self.reason or "cancelled")
+        return token
+
+    def remaining(self) -> Optional[float]:
+        """마감까지 남은 시간(초), 마감이 없으면 None (부모 마감 포함)"""
+        values = []
+        if self.deadline is not None:
+            values.append(self.deadline - time.monotonic())
+        if self.parent is not None:
+            parent_remaining = self.parent.remaining()
+            if parent_remaining is not None:
+                values.append(parent_remaining)
+        return max(0.0, min(values)) if values else None
+
+    def raise_if_cancelled(self) -> None:
+        """취소되었거나 마감이 지났으면 예외 발생"""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self.cancel("deadline")
+        if self.cancelled:
+            if self.reason == "deadline":
+                raise DeadlineExceeded()
+            raise CallCancelled()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """취소될 때까지 최대 timeout초 대기 (취소되면 True)"""
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return self._event.wait(timeout)
+
+    def run(self, fn: Callable[[], Any]) -> Any:
+        """
+        fn을 작업 스레드에서 실행하고 완료/취소/마감 중 먼저 일어난 것을 처리
+
+        취소나 마감 시 호출 스레드는 즉시 예외로 반환되며,
+        작업 스레드는 중단 콜백(HTTP 연결 종료)으로 곧 정리된다.
+        """
+        self.raise_if_cancelled()
+        context = contextvars.copy_context()
+        future = _call_executor.submit(context.run, fn)
+
+        # 완료 또는 취소 시 대기 중인 호출 스레드를 깨움
+        wake = threading.Event()
+        future.add_done_callback(lambda _: wake.set())
+        self.add_abort(wake.set)
+        try:
+            while True:
+                if future.done():
+                    return future.result()
+                self.raise_if_cancelled()
+                wake.wait(self.remaining())
+        finally:
+            self.remove_abort(wake.set)
+
+
+# 취소 가능한 호출을 실행하는 작업 스레드 풀
+_call_executor = ThreadPoolExecutor(max_workers=CANCELLABLE_CALL_WORKERS, thread_name_prefix="agent-call")
+
+# 현재 컨텍스트의 취소 토큰
+_current_token: contextvars.ContextVar = contextvars.ContextVar("agent_cancel_token", default=None)
+
+# 세션별 진행 중 토큰
+_session_tokens: Dict[str, Set[CancelToken]] = {}
+_session_lock = threading.Lock()
+
+
+def get_current_token() -> Optional[CancelToken]:
+    """현재 컨텍스트의 취소 토큰 반환 (없으면 None)"""
+    return _current_token.get()
+
+
+def run_with_token(token: CancelToken, fn: Callable[[], Any]) -> Any:
+    """token을 현재 토큰으로 설정한 상태에서 fn 실행 (작업 스레드용)"""
+    reset = _current_token.set(token)
+    try:
+        return fn()
+    finally:
+        _current_token.reset(reset)
+
+
+@contextmanager
+def call_scope(session_id: str, stage: str, timeout: Optional[float] = None):
+    """
+    세션/단계 단위 취소 범위
+
+    Args:
+        session_id (str): 세션 식별자 (cancel_session_calls 대상)
+        stage (str): 단계 이름 (STAGE_DEADLINES 키: dr_generation, evaluation, final_report)
+        timeout (float, optional): 마감 시간(초). 없으면 단계 기본값 사용
+    """
+    if timeout is None:
+        timeout = STAGE_DEADLINES.get(stage)
+    token = CancelToken(session_id=session_id, stage=stage, timeout=timeout)
+
+    with _session_lock:
+        _session_tokens.setdefault(session_id, set()).add(token)
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+        with _session_lock:
+            tokens = _session_tokens.get(session_id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del _session_tokens[session_id]
+
+
+def cancel_session_calls(session_id: str, reason: str = "cancelled") -> int:
+    """세션의 진행 중 호출을 모두 취소하고 취소한 개수 반환"""
+    with _session_lock:
+        tokens = list(_session_tokens.get(session_id, ()))
+    for token in tokens:
+        token.cancel(reason)
+    if tokens:
+        logger.info("⏹ 세션 호출 취소: %s (%s건)", session_id, len(tokens))
+    return len(tokens)
+
+
+def count_pending_calls(session_id: Optional[str] = None) -> int:
+    """진행 중 호출 수 (session_id가 없으면 전체)"""
+    with _session_lock:
+        if session_id is not None:
+            return len(_session_tokens.get(session_id, ()))
+        return sum(len(tokens) for tokens in _session_tokens.values())
@@ -0,0 +1,345 @@
+"""
+적응형 호출량 조절기 (rate-limit governor)
+
+모든 에이전트가 공유하며 다음을 담당한다.
+- 429 / 일시적 5xx / 연결 오류 시 지터가 적용된 지수 백오프 재시도
+- x-ratelimit-remaining-* 응답 헤더를 읽어 동시 실행 한도와 토큰 버킷 속도를 조절
+- 동시 실행 슬롯은 FairScheduler가 API key/세션 단위로 공정하게 분배
+- 서버 키 풀을 쓰면 키마다 동시 실행 한도/속도/헤더 상태를 따로 둠 (키 수만큼 처리량 증가)
+- 재시도 횟수, 대기(throttle) 시간 지표 제공
+"""
+import random
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from llm.cancellation import CallCancelled, get_current_token
+from llm.key_pool import ApiKeyPool, KeyPoolExhausted, PooledKey
+from llm.scheduler import FairScheduler, scheduling_key, summarize_schedulers
+from telemetry.log import get_logger
+from config import (
+    GOVERNOR_MAX_RETRIES, GOVERNOR_BASE_DELAY, GOVERNOR_MAX_DELAY,
+    GOVERNOR_MIN_CONCURRENCY, GOVERNOR_MAX_CONCURRENCY, GOVERNOR_REQUESTS_PER_SECOND, GOVERNOR_MIN_RATE_FRACTION
+)
+
+logger = get_logger(__name__)
+
+# 재시도 대상 HTTP 상태 코드
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# 남은 한도 비율 기준 (이하면 축소, 이상이면 확대)
+LOW_REMAINING_RATIO = 0.1
+HIGH_REMAINING_RATIO = 0.5
+
+# 키 풀을 거치지 않는 호출(기본 키, 사용자 키)이 함께 쓰는 한도
+DEFAULT_LANE = "default"
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지는 토큰 버킷 (capacity까지 버스트 허용)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = max(rate, 0.01)
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, token=None) -> float:
+        """토큰 하나를 얻을 때까지 대기하고 대기한 시간(초)을 반환 (취소 토큰이 취소/마감되면 CallCancelled)"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill_locked(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            if token is not None:
+                token.wait(delay)
+                token.raise_if_cancelled()
+            else:
+                time.sleep(delay)
+            waited += delay
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            self.rate = max(rate, 0.01)
+            self.capacity = max(1.0, self.rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+
+def _get_status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status
+
+
+def _get_error_headers(error: Exception):
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """재시도할 만한 오류인지 판별 (429, 일시적 5xx, 연결/타임아웃)"""
+    status = _get_status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+
+    # 상태 코드 없는 연결/타임아웃 오류 (openai.APIConnectionError, APITimeoutError 등)
+    name = type(error).__name__
+    return name in ("APIConnectionError", "APITimeoutError") or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _parse_retry_after(headers) -> Optional[float]:
+    """retry-after-ms / retry-after 헤더 해석 (초)"""
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return float(value) / 1000
+        value = headers.get("retry-after")
+        if value is not None:
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def _parse_int_header(headers, name: str) -> Optional[int]:
+    try:
+        value = headers.get(name)
+        return int(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class _Lane:
+    """API 키 하나의 동시 실행 한도, 토큰 버킷 속도, 최근 x-ratelimit-* 상태"""
+
+    def __init__(self, min_concurrency: int, max_concurrency: int, requests_per_second: float):
+        self.limiter = FairScheduler(max_concurrency, min_concurrency, max_concurrency)
+        self.bucket = TokenBucket(requests_per_second)
+        self.max_rate = requests_per_second
+        # 남은 한도가 적을 때 절반씩 줄이되 이 아래로는 내리지 않음 (대기가 끝없이 길어지지 않도록)
+        self.min_rate = max(requests_per_second * GOVERNOR_MIN_RATE_FRACTION, 0.01)
+        self.last_remaining_requests: Optional[int] = None
+        self.last_remaining_tokens: Optional[int] = None
+
+    def observe_headers(self, headers) -> None:
+        """x-ratelimit-* 헤더를 보고 동시성 한도와 토큰 버킷 속도 조절"""
+        if not headers:
+            return
+
+        remaining_requests = _parse_int_header(headers, "x-ratelimit-remaining-requests")
+        limit_requests = _parse_int_header(headers, "x-ratelimit-limit-requests")
+        remaining_tokens = _parse_int_header(headers, "x-ratelimit-remaining-tokens")
+        limit_tokens = _parse_int_header(headers, "x-ratelimit-limit-tokens")
+
+        self.last_remaining_requests = remaining_requests
+        self.last_remaining_tokens = remaining_tokens
+
+        ratios = []
+        if remaining_requests is not None and limit_requests:
+            ratios.append(remaining_requests / limit_requests)
+            # 분당 요청 한도를 초당 속도로 환산해 상한으로 사용
+            self.max_rate = max(limit_requests / 60.0, 0.01)
+        if remaining_tokens is not None and limit_tokens:
+            ratios.append(remaining_tokens / limit_tokens)
+
+        if not ratios:
+            return
+
+        ratio = min(ratios)
+        if ratio <= LOW_REMAINING_RATIO:
+            self.limiter.shrink()
+            self.bucket.set_rate(max(self.bucket.rate / 2, min(self.min_rate, self.max_rate)))
+        elif ratio >= HIGH_REMAINING_RATIO:
+            self.limiter.grow()
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate * 1.25))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": self.limiter.limit,
+            "active": self.limiter.active,
+            "requests_per_second": round(self.bucket.rate, 3),
+            "last_remaining_requests": self.last_remaining_requests,
+            "last_remaining_tokens": self.last_remaining_tokens,
+        }
+
+
+class RateLimitGovernor:
+    """재시도 + 헤더 기반 동시성/속도 조절기"""
+
+    def __init__(self,
+                 max_retries: int = GOVERNOR_MAX_RETRIES,
+                 base_delay: float = GOVERNOR_BASE_DELAY,
+                 max_delay: float = GOVERNOR_MAX_DELAY,
+                 min_concurrency: int = GOVERNOR_MIN_CONCURRENCY,
+                 max_concurrency: int = GOVERNOR_MAX_CONCURRENCY,
+                 requests_per_second: float = GOVERNOR_REQUESTS_PER_SECOND):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self._lanes: Dict[str, _Lane] = {DEFAULT_LANE: _Lane(min_concurrency, max_concurrency, requests_per_second)}
+        self._lanes_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # 지표
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttle_seconds = 0.0
+
+    def lane(self, lane_id: str = DEFAULT_LANE) -> _Lane:
+        """키별 한도 (처음 쓰는 키면 초기 한도로 생성)"""
+        with self._lanes_lock:
+            lane = self._lanes.get(lane_id)
+            if lane is None:
+                lane = _Lane(self.min_concurrency, self.max_concurrency, self.requests_per_second)
+                self._lanes[lane_id] = lane
+            return lane
+
+    @property
+    def limiter(self) -> FairScheduler:
+        """기본 한도의 동시 실행 제한기"""
+        return self.lane().limiter
+
+    @property
+    def bucket(self) -> TokenBucket:
+        """기본 한도의 토큰 버킷"""
+        return self.lane().bucket
+
+    def observe_headers(self, headers, lane_id: str = DEFAULT_LANE) -> None:
+        """응답을 보낸 키의 한도에만 x-ratelimit-* 헤더 반영"""
+        self.lane(lane_id).observe_headers(headers)
+
+    def _add_throttle(self, seconds: float) -> None:
+        if seconds > 0:
+            with self._stats_lock:
+                self.throttle_seconds += seconds
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """full jitter 지수 백오프 (retry-after가 있으면 그 이상 대기)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def call(self, send: Callable[[Optional[PooledKey]], Tuple[Any, Any]],
+             key_pool: Optional[ApiKeyPool] = None, pinned: bool = False) -> Any:
+        """
+        재시도/조절을 적용해 요청 실행
+
+        Args:
+            send: 이번 시도에 쓸 풀 키(풀을 쓰지 않으면 None)를 받아 (응답, 응답 헤더)를 반환하는 호출 함수
+            key_pool: 서버 키 풀 (있으면 시도마다 키를 고르고 그 키의 한도 안에서 호출)
+            pinned: True면 기본 키만 사용 (벡터스토어를 참조하는 요청)
+
+        Returns:
+            응답 객체 (재시도가 모두 실패하면 마지막 예외를 그대로 발생)
+        """
+        with self._stats_lock:
+            self.calls += 1
+
+        token = get_current_token()
+        attempt = 0
+        while True:
+            if token is not None:
+                token.raise_if_cancelled()
+            pooled_key: Optional[PooledKey] = None
+            lane_id = DEFAULT_LANE
+            slot = None
+            try:
+                # 서버 키 풀: 시도마다 가장 한가한 키를 먼저 고르고 (재시도 시 다른 키로 넘어감) 그 키의 한도 안에서 대기
+                if key_pool is not None:
+                    pooled_key = key_pool.acquire(pinned=pinned)
+                    lane_id = pooled_key.key_id
+                lane = self.lane(lane_id)
+                # 호출 슬롯은 API key → 세션 순으로 공정 분배
+                with scheduling_key(pooled_key.api_key) if pooled_key is not None else nullcontext():
+                    self._add_throttle(lane.bucket.acquire(token))
+                    self._add_throttle(lane.limiter.acquire())
+                slot = lane.limiter
+                response, headers = send(pooled_key)
+            except Exception as e:
+                if slot is not None:
+                    slot.release()
+                headers = _get_error_headers(e)
+                if pooled_key is not None:
+                    key_pool.release(pooled_key, error=None if isinstance(e, CallCancelled) else e)
+
+                # 취소로 연결이 끊긴 경우 재시도하지 않음
+                if token is not None and token.cancelled:
+                    token.raise_if_cancelled()
+
+                self.observe_headers(headers, lane_id)
+
+                # 서버 키 풀 소진은 로컬 상태이므로 업스트림 동시 실행 한도는 그대로 둠
+                if _get_status_code(e) == 429 and not isinstance(e, KeyPoolExhausted):
+                    self.lane(lane_id).limiter.shrink()
+
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    with self._stats_lock:
+                        self.failures += 1
+                    raise
+
+                delay = self._backoff_delay(attempt, _parse_retry_after(headers))
+                attempt += 1
+                with self._stats_lock:
+                    self.retries += 1
+                logger.warning("⏳ 일시적 오류로 재시도 %d/%d (%.1f초 후): %s", attempt, self.max_retries, delay, e)
+                if token is not None:
+                    token.wait(delay)
+                    token.raise_if_cancelled()
+                else:
+                    time.sleep(delay)
+                self._add_throttle(delay)
+                continue
+
+            slot.release()
+            if pooled_key is not None:
+                key_pool.release(pooled_key, headers=headers)
+            self.observe_headers(headers, lane_id)
+            return response
+
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """모든 키의 호출 슬롯 대기열 지표 합계"""
+        with self._lanes_lock:
+            limiters = [lane.limiter for lane in self._lanes.values()]
+        return summarize_schedulers(limiters)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """재시도/대기 지표 반환 (동시 실행 한도/속도는 키별 합계, lanes에 키별 상세)"""
+        with self._lanes_lock:
+            lanes = {lane_id: lane.get_stats() for lane_id, lane in self._lanes.items()}
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "throttle_seconds": round(self.throttle_seconds, 3),
+            "concurrency_limit": sum(lane["concurrency_limit"] for lane in lanes.values()),
+            "active": sum(lane["active"] for lane in lanes.values()),
+            "requests_per_second": round(sum(lane["requests_per_second"] for lane in lanes.values()), 3),
+            "last_remaining_requests": lanes[DEFAULT_LANE]["last_remaining_requests"],
+            "last_remaining_tokens": lanes[DEFAULT_LANE]["last_remaining_tokens"],
+            "lanes": lanes,
+        }
+
+
+# 모든 에이전트가 공유하는 조절기
+rate_governor = RateLimitGovernor()
@@ -0,0 +1,185 @@
+"""
+헤지 요청 (hedged requests)
+
+최근 지연 시간 분포의 특정 백분위수까지 응답이 없으면 같은 요청을 한 번 더 보내고
+먼저 끝난 쪽의 결과를 사용한다. 비용이 무한정 늘지 않도록 최근 호출 대비
+헤지 비율에 상한을 둔다. 각 시도는 개별 취소 토큰으로 실행되어
+진 쪽 요청은 HTTP 연결까지 끊긴다.
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from llm.cancellation import CancelToken, get_current_token, run_with_token
+from config import (
+    HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MAX_RATE,
+    HEDGE_HISTORY_SIZE, HEDGE_MIN_DELAY, HEDGE_MAX_WORKERS
+)
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class LatencyTracker:
+    """최근 지연 시간(초) 기록 및 백분위수 계산"""
+
+    def __init__(self, history_size: int = HEDGE_HISTORY_SIZE):
+        self._samples: Deque[float] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """pct 백분위수 (샘플이 없으면 None)"""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+class Hedger:
+    """백분위수 기반 헤지 실행기 (헤지 비율 상한 포함)"""
+
+    def __init__(self,
+                 percentile: float = HEDGE_PERCENTILE,
+                 min_samples: int = HEDGE_MIN_SAMPLES,
+                 max_hedge_rate: float = HEDGE_MAX_RATE,
+                 history_size: int = HEDGE_HISTORY_SIZE,
+                 min_delay: float = HEDGE_MIN_DELAY,
+                 max_workers: int = HEDGE_MAX_WORKERS):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.min_delay = min_delay
+        self.history_size = history_size
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._recent_hedged: Deque[bool] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+        # 지표
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _tracker(self, latency_key: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self._trackers.get(latency_key)
+            if tracker is None:
+                tracker = LatencyTracker(self.history_size)
+                self._trackers[latency_key] = tracker
+            return tracker
+
+    def hedge_delay(self, latency_key: str) -> Optional[float]:
+        """헤지를 보낼 대기 시간 (기록이 부족하면 None → 헤지 안함)"""
+        tracker = self._tracker(latency_key)
+        if tracker.count() < self.min_samples:
+            return None
+        value = tracker.percentile(self.percentile)
+        return max(self.min_delay, value) if value is not None else None
+
+    def _reserve_hedge(self) -> bool:
+        """헤지 비율 상한 내에서 헤지 1회 예약"""
+        with self._lock:
+            # 현재 호출은 call()에서 이미 False로 기록되어 있음
+            recent = len(self._recent_hedged)
+            hedged = sum(self._recent_hedged)
+            if not recent or (hedged + 1) / recent > self.max_hedge_rate:
+                return False
+            self._recent_hedged[-1] = True
+            self.hedges += 1
+            return True
+
+    def _timed(self, fn: Callable[[], Any], tracker: LatencyTracker) -> Callable[[], Any]:
+        def run():
+            start = time.monotonic()
+            result = fn()
+            tracker.record(time.monotonic() - start)
+            return result
+        return run
+
+    def call(self, fn: Callable[[], Any], latency_key: str = "default") -> Any:
+        """
+        헤지를 적용해 fn 실행
+
+        Args:
+            fn: 실제 요청 함수 (여러 번 호출될 수 있으므로 부작용이 없어야 함)
+            latency_key (str): 지연 시간 기록 구분 키 (예: 단계/모델)
+
+        Returns:
+            먼저 성공한 요청의 결과
+        """
+        tracker = self._tracker(latency_key)
+        with self._lock:
+            self.calls += 1
+            self._recent_hedged.append(False)
+
+        delay = self.hedge_delay(latency_key)
+        timed_fn = self._timed(fn, tracker)
+        if delay is None:
+            return timed_fn()
+
+        parent = get_current_token()
+
+        def submit_attempt():
+            attempt_token = parent.child() if parent is not None else CancelToken(stage="hedge")
+            context = contextvars.copy_context()
+            future = self._executor.submit(context.run, run_with_token, attempt_token, timed_fn)
+            return future, attempt_token
+
+        primary, primary_token = submit_attempt()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._reserve_hedge():
+            return primary.result()
+
+        logger.debug("🪁 헤지 요청 발송 (%s, %.1f초 초과)", latency_key, delay)
+        hedge, hedge_token = submit_attempt()
+        tokens = {primary: primary_token, hedge: hedge_token}
+        pending = {primary, hedge}
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    last_error = error
+                    continue
+
+                # 먼저 성공한 결과 사용, 나머지 요청은 취소 (실행 중이면 연결을 끊음)
+                for other in pending:
+                    other.cancel()
+                    tokens[other].cancel("hedge_lost")
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return future.result()
+
+        raise last_error
+
+    def get_stats(self) -> Dict[str, Any]:
+        """헤지 지표 반환"""
+        with self._lock:
+            keys = list(self._trackers.keys())
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": (self.hedges / self.calls) if self.calls else 0.0,
+            "thresholds": {key: self.hedge_delay(key) for key in keys},
+        }
+
+
+# 평가 호출용 공용 헤지 실행기
+request_hedger = Hedger()
@@ -0,0 +1,307 @@
+"""
+서버 측 API key 풀
+
+여러 조직 키를 등록해 두고 호출(시도)마다 가장 한가한 키를 골라 쓴다.
+- 키별 진행 중 호출 수와 x-ratelimit-* 헤더로 남은 한도를 추적
+- 429는 retry-after(또는 기본 쿨다운)만큼, 할당량 소진은 KEY_POOL_QUOTA_COOLDOWN만큼 순환에서 제외
+- 인증 실패(401/403) 키는 프로세스가 끝날 때까지 제외
+- 사용자가 직접 입력한 키는 풀을 거치지 않음 (config.get_openai_client 참고)
+
+벡터스토어는 만든 키의 프로젝트에서만 보이므로 file_search 요청은 기본 키로 고정한다.
+(KEY_POOL_SHARE_VECTOR_STORES=1이면 모든 키로 분산)
+"""
+import hashlib
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from config import (
+    OPENAI_API_KEY_POOL, OPENAI_API_KEY_POOL_FILE, OPENAI_BASE_URL,
+    KEY_POOL_SHARE_VECTOR_STORES, KEY_POOL_RATE_LIMIT_COOLDOWN, KEY_POOL_QUOTA_COOLDOWN
+)
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+# 풀 클라이언트 표시 속성 (pipeline에서 호출마다 키를 바꿀지 판단)
+POOL_CLIENT_ATTR = "_uses_key_pool"
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class KeyPoolExhausted(Exception):
+    """순환 가능한 키가 없음 (모두 쿨다운 중이거나 비활성)"""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        # 호출량 조절기가 일반 429처럼 retry-after만큼 기다렸다가 재시도하도록 응답 형태를 맞춤
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after": str(retry_after)})
+        super().__init__(f"사용 가능한 API 키가 없습니다. 약 {int(retry_after) + 1}초 후 다시 시도합니다.")
+
+
+def _parse_duration(value) -> Optional[float]:
+    """x-ratelimit-reset-* 형식 시간 (예: "1s", "6m0s", "250ms") → 초"""
+    if not value:
+        return None
+    matches = _DURATION_PATTERN.findall(str(value))
+    if not matches:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in matches)
+
+
+def _header_int(headers, name: str) -> Optional[int]:
+    try:
+        value = headers.get(name)
+        return int(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _error_code(error: Exception) -> Optional[str]:
+    """OpenAI 오류 본문의 code (예: insufficient_quota)"""
+    code = getattr(error, "code", None)
+    if code:
+        return code
+    body = getattr(error, "body", None)
+    if isinstance(body, dict):
+        return body.get("code") or (body.get("error") or {}).get("code")
+    return None
+
+
+def load_pool_keys(env_value: str = OPENAI_API_KEY_POOL, file_path: str = OPENAI_API_KEY_POOL_FILE) -> List[str]:
+    """환경변수(쉼표 구분)와 파일(한 줄에 하나)에서 키 목록 로드 (중복 제거, 순서 유지)"""
+    keys = [key.strip() for key in (env_value or "").split(",")]
+    if file_path:
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                keys.extend(line.strip() for line in f if not line.strip().startswith("#"))
+        except OSError as e:
+            logger.warning("⚠️ API 키 풀 파일을 읽을 수 없습니다 (%s): %s", file_path, e)
+
+    seen = set()
+    result = []
+    for key in keys:
+        if key and key not in seen:
+            seen.add(key)
+            result.append(key)
+    return result
+
+
+class PooledKey:
+    """풀에 등록된 키 하나의 상태"""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.cooldown_until = 0.0
+        self.disabled = False
+        self.last_reason: Optional[str] = None
+        self.remaining_requests: Optional[int] = None
+        self.limit_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.limit_tokens: Optional[int] = None
+        self.last_used = 0.0
+
+    def available(self, now: float) -> bool:
+        return not self.disabled and now >= self.cooldown_until
+
+    def remaining_ratio(self) -> float:
+        """남은 요청/토큰 한도 비율 중 작은 값 (헤더를 못 봤으면 1.0)"""
+        ratios = []
+        if self.remaining_requests is not None and self.limit_requests:
+            ratios.append(self.remaining_requests / self.limit_requests)
+        if self.remaining_tokens is not None and self.limit_tokens:
+            ratios.append(self.remaining_tokens / self.limit_tokens)
+        return min(ratios) if ratios else 1.0
+
+
+class ApiKeyPool:
+    """최소 부하 키 선택 + 소진 키 자동 제외"""
+
+    def __init__(self, api_keys: List[str], share_vector_stores: bool = KEY_POOL_SHARE_VECTOR_STORES,
+                 rate_limit_cooldown: float = KEY_POOL_RATE_LIMIT_COOLDOWN,
+                 quota_cooldown: float = KEY_POOL_QUOTA_COOLDOWN):
+        if not api_keys:
+            raise ValueError("API 키 풀이 비어 있습니다.")
+        self.keys = [PooledKey(key) for key in api_keys]
+        self.share_vector_stores = share_vector_stores
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.quota_cooldown = quota_cooldown
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self) -> PooledKey:
+        """기본 키 (파일 업로드, 벡터스토어 생성 등 풀을 거치지 않는 호출에 사용)"""
+        return self.keys[0]
+
+    def create_client(self):
+        """풀 클라이언트 생성 (Responses 호출은 pipeline에서 시도마다 키를 바꿈)"""
+        from openai import OpenAI
+        client = OpenAI(api_key=self.primary.api_key, base_url=OPENAI_BASE_URL)
+        setattr(client, POOL_CLIENT_ATTR, True)
+        return client
+
+    def acquire(self, pinned: bool = False) -> PooledKey:
+        """
+        호출에 사용할 키 선택 (진행 중 호출이 적고 남은 한도가 큰 키 우선)
+
+        Args:
+            pinned (bool): True면 기본 키만 사용 (벡터스토어를 참조하는 요청)
+
+        Raises:
+            KeyPoolExhausted: 사용할 수 있는 키가 없을 때
+        """
+        now = time.time()
+        with self._lock:
+            candidates = [self.primary] if pinned else self.keys
+            available = [key for key in candidates if key.available(now)]
+            if not available:
+                waits = [key.cooldown_until - now for key in candidates if not key.disabled]
+                raise KeyPoolExhausted(max(1.0, min(waits)) if waits else self.quota_cooldown)
+
+            chosen = min(available, key=lambda key: (key.in_flight, -key.remaining_ratio(), key.last_used))
+            chosen.in_flight += 1
+            chosen.requests += 1
+            chosen.last_used = now
+            return chosen
+
+    def release(self, key: PooledKey, headers=None, error: Optional[Exception] = None) -> None:
+        """호출 결과로 키 상태 갱신 (헤더의 남은 한도, 429/할당량/인증 오류)"""
+        now = time.time()
+        if error is not None and headers is None:
+            headers = getattr(getattr(error, "response", None), "headers", None)
+
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            if headers:
+                self._observe_headers_locked(key, headers, now)
+            if error is not None:
+                key.errors += 1
+                self._observe_error_locked(key, error, headers, now)
+
+    def _observe_headers_locked(self, key: PooledKey, headers, now: float) -> None:
+        remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+        if remaining_requests is not None:
+            key.remaining_requests = remaining_requests
+            key.limit_requests = _header_int(headers, "x-ratelimit-limit-requests") or key.limit_requests
+        if remaining_tokens is not None:
+            key.remaining_tokens = remaining_tokens
+            key.limit_tokens = _header_int(headers, "x-ratelimit-limit-tokens") or key.limit_tokens
+
+        # 한도를 다 쓴 키는 초기화 시각까지 순환에서 제외
+        resets = []
+        if remaining_requests == 0:
+            resets.append(_parse_duration(headers.get("x-ratelimit-reset-requests")))
+        if remaining_tokens == 0:
+            resets.append(_parse_duration(headers.get("x-ratelimit-reset-tokens")))
+        resets = [seconds for seconds in resets if seconds]
+        if resets:
+            self._cool_down_locked(key, max(resets), "rate_limit_exhausted", now)
+
+    def _observe_error_locked(self, key: PooledKey, error: Exception, headers, now: float) -> None:
+        status = getattr(error, "status_code", None)
+        if status in (401, 403):
+            key.disabled = True
+            key.last_reason = f"auth_error_{status}"
+            logger.warning("🔑 API 키 풀: 인증 실패로 키 제외 (%s)", key.key_id)
+            return
+        if status != 429:
+            return
+
+        if _error_code(error) == "insufficient_quota":
+            self._cool_down_locked(key, self.quota_cooldown, "insufficient_quota", now)
+            return
+
+        retry_after = None
+        if headers:
+            try:
+                if headers.get("retry-after-ms") is not None:
+                    retry_after = float(headers.get("retry-after-ms")) / 1000
+                elif headers.get("retry-after") is not None:
+                    retry_after = float(headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        self._cool_down_locked(key, retry_after or self.rate_limit_cooldown, "rate_limited", now)
+
+    def _cool_down_locked(self, key: PooledKey, seconds: float, reason: str, now: float) -> None:
+        key.cooldown_until = max(key.cooldown_until, now + seconds)
+        key.last_reason = reason
+        logger.info("🔑 API 키 풀: %s 순환 제외 %.0f초 (%s)", key.key_id, seconds, reason)
+
+    def available_count(self) -> int:
+        now = time.time()
+        with self._lock:
+            return sum(1 for key in self.keys if key.available(now))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """키별 상태 (키 원문 대신 해시 ID 사용)"""
+        now = time.time()
+        with self._lock:
+            keys = [
+                {
+                    "key_id": key.key_id,
+                    "available": key.available(now),
+                    "in_flight": key.in_flight,
+                    "requests": key.requests,
+                    "errors": key.errors,
+                    "cooldown_seconds": round(max(0.0, key.cooldown_until - now), 1),
+                    "disabled": key.disabled,
+                    "last_reason": key.last_reason,
+                    "remaining_requests": key.remaining_requests,
+                    "remaining_tokens": key.remaining_tokens,
+                }
+                for key in self.keys
+            ]
+        return {
+            "size": len(keys),
+            "available": sum(1 for key in keys if key["available"]),
+            "share_vector_stores": self.share_vector_stores,
+            "keys": keys,
+        }
+
+
+def uses_vector_store(request_kwargs: Dict[str, Any]) -> bool:
+    """요청이 file_search로 벡터스토어를 참조하는지"""
+    return any(
+        isinstance(tool, dict) and tool.get("type") == "file_search"
+        for tool in request_kwargs.get("tools") or []
+    )
+
+
+def get_client_key_pool(client) -> Optional[ApiKeyPool]:
+    """풀 클라이언트면 공용 키 풀 반환 (사용자 키 클라이언트면 None)"""
+    if not getattr(client, POOL_CLIENT_ATTR, False):
+        return None
+    return get_key_pool()
+
+
+_key_pool: Optional[ApiKeyPool] = None
+_key_pool_loaded = False
+_key_pool_lock = threading.Lock()
+
+
+def get_key_pool() -> Optional[ApiKeyPool]:
+    """공용 키 풀 반환 (설정된 키가 없으면 None)"""
+    global _key_pool, _key_pool_loaded
+    with _key_pool_lock:
+        if not _key_pool_loaded:
+            _key_pool_loaded = True
+            keys = load_pool_keys()
+            if keys:
+                _key_pool = ApiKeyPool(keys)
+                logger.info("🔑 API 키 풀 사용: %s개 키", len(keys))
+        return _key_pool
+
+
+def is_key_pool_enabled() -> bool:
+    return get_key_pool() is not None
@@ -0,0 +1,140 @@
+"""
+단계/모듈별 모델 라우팅
+
+세션의 모델 선택이 모델 이름이면 모든 단계가 그 모델을 쓰고 (기존 동작),
+"profile:<이름>"이면 MODEL_PROFILES에서 단계/모듈마다 모델, 추론 노력, 응답 길이를 고른다.
+- 조회 순서: MODEL_ROUTES "단계/모듈" → 프로필 "단계/모듈" → MODEL_ROUTES "단계" → 프로필 "단계"
+- 추론 노력(reasoning.effort)과 응답 길이(text.verbosity)는 gpt-5 계열 요청에만 넣음
+- MODEL_CASCADE_ENABLED면 JSON 파싱 실패, 응답 잘림일 때 프로필의 "escalate[/단계]" 경로로 한 번 더 호출
+"""
+from typing import Any, Dict, NamedTuple, Optional
+
+from config import (
+    AVAILABLE_MODELS, DEFAULT_MODEL, MODEL_PROFILES, MODEL_PROFILE_PREFIX, MODEL_ROUTES,
+    MODEL_CASCADE_ENABLED
+)
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+ESCALATE = "escalate"
+# 프로필을 찾을 수 없을 때 (DEFAULT_MODEL도 프로필일 수 있어 모델 목록의 첫 모델)
+FALLBACK_MODEL = AVAILABLE_MODELS[0]
+TUNABLE_MODEL_PREFIX = "gpt-5"
+PARSE_FAILURE_STATUSES = ("json_parse_error", "text_only", "error")
+# gpt-5 계열 요청 옵션 (다른 모델로 바꿔 보낼 때는 뺌)
+MODEL_TUNING_PARAMS = ("reasoning", "text")
+# 단계적 상향은 더 강한 경로로만 (모델 등급 → 추론 노력 순으로 비교, 목록에 없는 모델은 중간 등급)
+MODEL_TIERS = {"gpt-5-nano": 0, "gpt-5-mini": 1, "gpt-4o": 1, "gpt-5": 2}
+REASONING_EFFORTS = ("minimal", "low", "medium", "high")
+
+
+class ModelRoute(NamedTuple):
+    """단계 호출에 쓸 모델과 gpt-5 계열 옵션"""
+    model: str
+    reasoning_effort: Optional[str] = None
+    verbosity: Optional[str] = None
+
+    def describe(self) -> str:
+        options = [value for value in (self.reasoning_effort, self.verbosity) if value]
+        return f"{self.model} ({', '.join(options)})" if options else self.model
+
+
+def parse_route(spec: str) -> ModelRoute:
+    """"모델[:추론 노력[:응답 길이]]" → ModelRoute"""
+    model, _, rest = spec.strip().partition(":")
+    effort, _, verbosity = rest.partition(":")
+    return ModelRoute(model.strip(), effort.strip() or None, verbosity.strip() or None)
+
+
+def profile_name(selection: Optional[str]) -> Optional[str]:
+    """모델 선택이 프로필이면 프로필 이름 (아니면 None)"""
+    if selection and selection.startswith(MODEL_PROFILE_PREFIX):
+        return selection[len(MODEL_PROFILE_PREFIX):]
+    return None
+
+
+def is_valid_selection(selection: str) -> bool:
+    name = profile_name(selection)
+    return name is None or name in MODEL_PROFILES
+
+
+def _current_selection() -> str:
+    """요청을 처리 중인 세션의 모델 선택 (세션이 없으면 DEFAULT_MODEL)"""
+    try:
+        from ui.session_store import get_active_session
+    except ImportError:
+        return DEFAULT_MODEL
+    state = get_active_session()
+    return state.current_model if state is not None else DEFAULT_MODEL
+
+
+def resolve_route(stage: str, module: Optional[str] = None, selection: Optional[str] = None) -> ModelRoute:
+    """
+    단계 호출 경로 결정
+
+    Args:
+        stage (str): dr_generation / evaluation / final_report
+        module (str, optional): 평가 모듈 이름
+        selection (str, optional): 모델 선택 (없으면 현재 세션의 선택)
+    """
+    selection = selection or _current_selection()
+    name = profile_name(selection)
+    if name is None:
+        return ModelRoute(selection)
+    profile = MODEL_PROFILES.get(name)
+    if profile is None:
+        logger.warning("⚠️ 알 수 없는 모델 프로필 '%s' - %s 사용", name, FALLBACK_MODEL)
+        return ModelRoute(FALLBACK_MODEL)
+
+    spec = None
+    if module:
+        spec = MODEL_ROUTES.get(f"{stage}/{module}") or profile.get(f"{stage}/{module}")
+    spec = spec or MODEL_ROUTES.get(stage) or profile.get(stage)
+    if spec is None:
+        # 프로필에 없는 단계는 상향 대상 모델
+        spec = profile.get(ESCALATE) or FALLBACK_MODEL
+    return parse_route(spec)
+
+
+def _strength(route: ModelRoute):
+    effort = REASONING_EFFORTS.index(route.reasoning_effort) if route.reasoning_effort in REASONING_EFFORTS else 2
+    return MODEL_TIERS.get(route.model, 1), effort
+
+
+def escalation_route(stage: str, current: ModelRoute, selection: Optional[str] = None) -> Optional[ModelRoute]:
+    """단계적 상향 대상 (꺼져 있거나 프로필이 아니거나 현재 경로보다 강하지 않으면 None)"""
+    if not MODEL_CASCADE_ENABLED:
+        return None
+    name = profile_name(selection or _current_selection())
+    if name not in MODEL_PROFILES:
+        return None
+    profile = MODEL_PROFILES[name]
+    spec = (MODEL_ROUTES.get(f"{ESCALATE}/{stage}") or profile.get(f"{ESCALATE}/{stage}")
+            or MODEL_ROUTES.get(ESCALATE) or profile.get(ESCALATE))
+    if not spec:
+        return None
+    route = parse_route(spec)
+    return route if _strength(route) > _strength(current) else None
+
+
+def request_options(route: ModelRoute) -> Dict[str, Any]:
+    """responses.create 인자 (모델 + gpt-5 계열이면 추론 노력/응답 길이)"""
+    options: Dict[str, Any] = {"model": route.model}
+    if route.model.startswith(TUNABLE_MODEL_PREFIX):
+        if route.reasoning_effort:
+            options["reasoning"] = {"effort": route.reasoning_effort}
+        if route.verbosity:
+            options["text"] = {"verbosity": route.verbosity}
+    return options
+
+
+def escalation_reason(response: Any, parsed: Dict[str, Any]) -> Optional[str]:
+    """상향이 필요한 이유 (필요 없으면 None)"""
+    status = parsed.get("status") if isinstance(parsed, dict) else "error"
+    if status in PARSE_FAILURE_STATUSES:
+        return status
+    if getattr(response, "status", None) == "incomplete":
+        return "incomplete"
+    return None
@@ -0,0 +1,479 @@
+"""
+Responses API 호출 공통 경로
+
+에이전트는 client.responses.create를 직접 호출하는 대신 이 모듈을 거쳐
+응답 캐시, 동일 요청 병합, 재시도/호출량 조절, 취소/마감 시간 등 공통 처리를 적용받는다.
+BACKGROUND_MODELS 모델은 백그라운드 응답으로 제출하고 완료를 폴링으로 기다린다 (llm/background.py).
+호출 경로는 단계 generator(create_response_steps)로도 쓸 수 있다: 백그라운드 응답을 기다려야 할 때
+BackgroundHandle을 yield하며, run_steps는 현재 스레드에서, run_steps_async는 이벤트 루프에서 기다린다.
+LLM_STAGE_BACKENDS로 단계를 로컬 서버 등 다른 백엔드에 보낼 수 있다 (llm/backends.py).
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from types import SimpleNamespace
+from typing import Dict, Any, Callable, Generator, List, Optional
+
+from anyio import to_thread
+
+from llm.background import BackgroundHandle, background_poller
+from llm.backends import DEFAULT_BACKEND, backend_registry, routed_cache_key
+from llm.call_log import log_call, usage_counts
+from llm.cancellation import CallCancelled, get_current_token
+from llm.governor import rate_governor, _get_status_code
+from llm.hedging import request_hedger
+from llm.key_pool import get_client_key_pool, get_key_pool, uses_vector_store
+from llm.response_cache import get_response_cache
+from llm.scheduler import scheduling_key
+from llm.singleflight import agent_call_flight
+from config import ABORTABLE_HTTP_CLIENTS, LLM_BACKEND_FALLBACK, OPENAI_CLIENT_MAX_RETRIES
+from telemetry.log import fields, get_logger
+from telemetry.metrics import observe_llm_call
+from telemetry.tracing import span
+
+logger = get_logger(__name__)
+
+
+class _AbortableHttpClients:
+    """
+    취소 가능한 호출용 HTTP 클라이언트 재사용 풀
+
+    취소 시 그 호출의 연결만 끊을 수 있도록 시도 하나가 클라이언트 하나를 독점하고,
+    정상적으로 끝난 클라이언트는 돌려받아 다음 시도가 연결(keep-alive)을 재사용한다.
+    취소로 닫힌 클라이언트만 버리고 필요할 때 새로 만든다.
+    """
+
+    def __init__(self, max_idle: int = ABORTABLE_HTTP_CLIENTS):
+        self.max_idle = max_idle
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+
+        # 지표
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def checkout(self, client):
+        """빌려줄 HTTP 클라이언트 (지원하지 않는 클라이언트면 None)"""
+        if not hasattr(client, "with_options"):
+            return None
+        with self._lock:
+            while self._idle:
+                http_client = self._idle.pop()
+                if not http_client.is_closed:
+                    self.reused += 1
+                    return http_client
+        try:
+            from openai import DefaultHttpxClient
+        except ImportError:
+            return None
+        with self._lock:
+            self.created += 1
+        return DefaultHttpxClient()
+
+    def checkin(self, http_client) -> None:
+        """시도가 끝난 클라이언트 반환 (취소로 닫혔으면 버림)"""
+        with self._lock:
+            if http_client.is_closed:
+                self.discarded += 1
+                return
+            if len(self._idle) < self.max_idle:
+                self._idle.append(http_client)
+                return
+        http_client.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"idle": len(self._idle), "created": self.created, "reused": self.reused, "discarded": self.discarded}
+
+
+_http_clients = _AbortableHttpClients()
+
+
+def create_response(client, request_kwargs: Dict[str, Any], cache_key: Optional[str] = None,
+                    use_cache: bool = True, hedge: bool = False, stage: str = "default",
+                    module: Optional[str] = None):
+    """
+    Responses API 호출 (응답 캐시 + 동일 요청 병합 + 재시도/호출량 조절 적용)
+
+    call_scope 안에서 호출되면 작업 스레드에서 실행되며, 취소/마감 시간 초과 시
+    진행 중인 HTTP 요청을 끊고 CallCancelled(DeadlineExceeded)를 즉시 발생시킨다.
+
+    Args:
+        client: OpenAI 클라이언트
+        request_kwargs (dict): responses.create 인자
+        cache_key (str, optional): 요청 내용 키. 없으면 캐시/병합 사용 안함
+        use_cache (bool): False면 이번 호출은 캐시를 조회/저장하지 않음
+            (진행 중인 동일 요청과의 병합은 유지)
+        hedge (bool): True면 지연이 길어질 때 중복 요청(헤지)을 보냄
+        stage (str): 지연 시간 기록 구분용 단계 이름 (예: "evaluation")
+        module (str, optional): 평가 모듈 이름 (지표/추적 라벨)
+
+    Returns:
+        응답 객체 (캐시 적중 시 output_text와 from_cache=True를 가진 객체)
+    """
+    return run_steps(create_response_steps(client, request_kwargs, cache_key, use_cache, hedge, stage, module))
+
+
+def create_response_steps(client, request_kwargs: Dict[str, Any], cache_key: Optional[str] = None,
+                          use_cache: bool = True, hedge: bool = False, stage: str = "default",
+                          module: Optional[str] = None) -> Generator:
+    """
+    create_response의 단계 generator 버전 (인자 동일)
+
+    백그라운드 응답을 기다려야 할 때 BackgroundHandle을 yield하고, 실행기가 완료된 응답을 돌려보낸다.
+    `response = yield from create_response_steps(...)`로 쓰면 같은 코드가
+    run_steps(동기)와 run_steps_async(Gradio 이벤트 루프) 양쪽에서 동작한다.
+    """
+    # 단계에 로컬 등 다른 백엔드가 지정되어 있으면 먼저 그쪽으로 호출
+    route = backend_registry.route(stage, request_kwargs)
+    if route is None:
+        return (yield from _logged_execute(DEFAULT_BACKEND, client, request_kwargs, cache_key, use_cache, hedge, stage, module))
+
+    routed_client = route.backend.create_client()
+    routed_key = routed_cache_key(cache_key, route)
+    if routed_key:
+        _remember_routed_key(cache_key, routed_key)
+    try:
+        response = yield from _logged_execute(route.backend.name, routed_client, route.request_kwargs, routed_key,
+                                              use_cache, False, stage, module)
+        logger.debug("🔌 %s 백엔드 응답 (%s, %s)", route.backend.name, stage, route.request_kwargs.get('model'))
+        return response
+    except CallCancelled:
+        raise
+    except Exception as e:
+        if not LLM_BACKEND_FALLBACK:
+            raise
+        # 로컬 서버가 꺼져 있거나 오류면 기본 백엔드로 다시 호출
+        logger.warning("⚠️ %s 백엔드 호출 실패, openai로 대체 (%s): %s", route.backend.name, stage, e)
+        return (yield from _logged_execute(DEFAULT_BACKEND, client, request_kwargs, cache_key, use_cache, hedge, stage, module))
+
+
+def run_steps(steps: Generator) -> Any:
+    """단계 generator를 현재 스레드에서 끝까지 실행 (yield된 백그라운드 응답은 BackgroundHandle.wait로 대기)"""
+    send, value = steps.send, None
+    while True:
+        try:
+            handle = send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, send = handle.wait(), steps.send
+        except Exception as e:
+            value, send = e, steps.throw
+
+
+@asynccontextmanager
+async def _no_wait_hook():
+    yield
+
+
+async def run_steps_async(steps: Generator, lock=None, on_wait: Optional[Callable] = None,
+                          context: Optional[contextvars.Context] = None) -> Any:
+    """
+    단계 generator를 이벤트 루프에서 실행 (Gradio async 핸들러용)
+
+    - 각 단계(요청 구성, 제출, 응답 파싱 등)는 작업 스레드에서 lock(세션 잠금 등)을 잡고 실행
+    - yield된 백그라운드 응답은 BackgroundHandle.wait_async로 기다려 대기 중에는 스레드도 lock도 잡지 않음
+    - on_wait: 백그라운드 대기를 감쌀 async context manager 팩토리 (예: 이벤트 실행 슬롯 양보)
+    - context: 단계를 실행할 컨텍스트 (없으면 현재 컨텍스트의 복사본)
+    모든 단계가 같은 컨텍스트에서 실행되므로 call_scope, 추적 구간, 호출 기록이 단계 사이에 이어진다.
+    작업(task)이 취소되면 generator에 CancelledError를 던져 범위를 정리한 뒤 다시 발생시킨다.
+    """
+    context = context if context is not None else contextvars.copy_context()
+
+    def _step(send, value):
+        with lock if lock is not None else nullcontext():
+            try:
+                return False, context.run(send, value)
+            except StopIteration as stop:
+                return True, stop.value
+
+    send, value = steps.send, None
+    while True:
+        done, result = await to_thread.run_sync(_step, send, value)
+        if done:
+            return result
+        token = context.run(get_current_token)
+        try:
+            async with on_wait() if on_wait is not None else _no_wait_hook():
+                value, send = await result.wait_async(token), steps.send
+        except (Exception, asyncio.CancelledError) as e:
+            value, send = e, steps.throw
+
+
+def _logged_execute(backend: str, client, request_kwargs: Dict[str, Any], cache_key: Optional[str],
+                    use_cache: bool, hedge: bool, stage: str, module: Optional[str] = None):
+    """_execute + 호출 기록 (record_calls 범위 안에서만 기록) + 지표 + 추적 구간"""
+    model = request_kwargs.get("model")
+    started = time.monotonic()
+    with span("llm.call", stage=stage, module=module, backend=backend, model=model) as s:
+        try:
+            response = yield from _execute(client, request_kwargs, cache_key, use_cache, hedge, stage)
+        except Exception as e:
+            log_call(stage, backend, request_kwargs, started, error=e)
+            observe_llm_call(stage, model, module, time.monotonic() - started, error=e)
+            raise
+        log_call(stage, backend, request_kwargs, started, response=response)
+        observe_llm_call(stage, model, module, time.monotonic() - started, response=response)
+        s.set(**_call_attributes(response))
+    return response
+
+
+def _call_attributes(response) -> Dict[str, Any]:
+    """
+    llm.call 구간 속성 (토큰 사용량, 캐시 적중, file_search 도구 사용량)
+
+    스트리밍이 아닌 Responses API는 도구 실행 시간을 알려주지 않으므로 file_search는 호출/결과 수만 남긴다.
+    """
+    input_tokens, output_tokens, cached_tokens, reasoning_tokens = usage_counts(response)
+    attributes: Dict[str, Any] = {
+        "from_cache": bool(getattr(response, "from_cache", False)),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cached_tokens": cached_tokens,
+        "reasoning_tokens": reasoning_tokens,
+    }
+    calls = [item for item in getattr(response, "output", None) or [] if getattr(item, "type", None) == "file_search_call"]
+    if calls:
+        attributes["file_search_calls"] = len(calls)
+        attributes["file_search_queries"] = sum(len(getattr(item, "queries", None) or []) for item in calls)
+        attributes["file_search_results"] = sum(len(getattr(item, "results", None) or []) for item in calls)
+    return attributes
+
+
+# 에이전트가 아는 캐시 키 → 다른 백엔드로 보낸 호출의 캐시 키 (파싱 실패 시 함께 무효화)
+_routed_keys: "OrderedDict[str, str]" = OrderedDict()
+_ROUTED_KEYS_MAX = 1024
+_routed_keys_lock = threading.Lock()
+
+
+def _remember_routed_key(cache_key: str, routed_key: str) -> None:
+    with _routed_keys_lock:
+        _routed_keys[cache_key] = routed_key
+        _routed_keys.move_to_end(cache_key)
+        while len(_routed_keys) > _ROUTED_KEYS_MAX:
+            _routed_keys.popitem(last=False)
+
+
+def _execute(client, request_kwargs: Dict[str, Any], cache_key: Optional[str],
+             use_cache: bool, hedge: bool, stage: str):
+    """한 백엔드로 호출 (취소 범위면 작업 스레드에서 실행, 백그라운드 응답이면 핸들을 yield해 완료까지 대기)"""
+    token = get_current_token()
+
+    def _run():
+        if token is None:
+            return _create_response(client, request_kwargs, cache_key, use_cache, hedge, stage)
+        # 취소 범위 안에서는 작업 스레드에서 실행 → 취소/마감 시 호출 스레드 즉시 반환
+        return token.run(lambda: _create_response(client, request_kwargs, cache_key, use_cache, hedge, stage))
+
+    result = _run()
+    if not isinstance(result, BackgroundHandle):
+        return result
+
+    # 백그라운드 응답: 작업 스레드/호출 슬롯은 제출 직후 반환되고, 완료는 폴러가 알려줌
+    with span("llm.background_wait", response_id=result.response_id):
+        try:
+            return (yield result)
+        except CallCancelled:
+            if token is not None and token.cancelled:
+                raise
+            # 함께 기다리던 다른 세션이 취소한 응답이면 다시 제출
+            result = _run()
+            return (yield result) if isinstance(result, BackgroundHandle) else result
+
+
+def _create_response(client, request_kwargs: Dict[str, Any], cache_key: Optional[str],
+                     use_cache: bool, hedge: bool, stage: str):
+    cache = get_response_cache() if (use_cache and cache_key) else None
+
+    if cache is not None:
+        cached_text = cache.get(cache_key)
+        if cached_text is not None:
+            logger.debug("💾 응답 캐시 적중 (키: %s...)", cache_key[:8], extra=fields(stage=stage, sample="llm.cache_hit"))
+            return SimpleNamespace(output_text=cached_text, usage=None, from_cache=True)
+
+    key_pool = get_client_key_pool(client)
+    # 벡터스토어를 참조하는 요청은 벡터스토어를 만든 기본 키로 고정
+    pin_key = key_pool is not None and not key_pool.share_vector_stores and uses_vector_store(request_kwargs)
+
+    # 백그라운드 제출에 쓴 키 (폴링/취소도 같은 키로 해야 응답이 보임)
+    submitted = {"api_key": None}
+
+    def _send(pooled_key=None, background: bool = False):
+        """한 번의 시도 (pooled_key: 조절기가 이번 시도에 고른 서버 풀 키)"""
+        token = get_current_token()
+        kwargs = {**request_kwargs, "background": True, "store": True} if background else request_kwargs
+        # 재시도는 조절기가 담당하므로 이 호출에서는 SDK 재시도를 끔 (클라이언트 자체는 기본 재시도 유지)
+        options: Dict[str, Any] = {"max_retries": OPENAI_CLIENT_MAX_RETRIES}
+        http_client = None
+        headers = None
+
+        if token is not None:
+            token.raise_if_cancelled()
+        if pooled_key is not None:
+            options["api_key"] = pooled_key.api_key
+            submitted["api_key"] = pooled_key.api_key
+
+        try:
+            if token is not None:
+                # 취소 시 연결을 끊을 수 있도록 시도마다 HTTP 클라이언트를 독점 (끝나면 풀에 반환해 재사용)
+                http_client = _http_clients.checkout(client)
+                if http_client is not None:
+                    options["http_client"] = http_client
+                    token.add_abort(http_client.close)
+                remaining = token.remaining()
+                if remaining is not None:
+                    kwargs = {**kwargs, "timeout": remaining}
+
+            scoped_client = client.with_options(**options) if hasattr(client, "with_options") else client
+            # 시도(재시도/헤지 포함)마다 구간 하나
+            with span("llm.send", model=kwargs.get("model"), background=background):
+                # 가능하면 raw 응답으로 호출해 x-ratelimit-* 헤더를 조절기에 전달
+                raw_api = getattr(scoped_client.responses, "with_raw_response", None)
+                if raw_api is None:
+                    response = scoped_client.responses.create(**kwargs)
+                else:
+                    raw = raw_api.create(**kwargs)
+                    response, headers = raw.parse(), raw.headers
+        finally:
+            if http_client is not None:
+                token.remove_abort(http_client.close)
+                # 콜백을 뺀 뒤에도 취소 표시가 있으면 중단 콜백이 실행 중일 수 있으므로 재사용하지 않음
+                if token.cancelled:
+                    http_client.close()
+                _http_clients.checkin(http_client)
+        return response, headers
+
+    def _store(response):
+        if cache is not None:
+            output_text = getattr(response, "output_text", None)
+            if output_text:
+                try:
+                    cache.set(cache_key, output_text)
+                except Exception as e:
+                    logger.warning("⚠️ 응답 캐시 저장 실패: %s", e)
+
+    def _call_upstream():
+        if background_poller.should_use(request_kwargs):
+            handle = _submit_background()
+            if handle is not None:
+                return handle
+
+        # 호출 슬롯은 API key → 세션 순으로 공정 분배 (서버 키 풀이면 조절기가 시도마다 고른 키로 지정)
+        with scheduling_key(getattr(client, "api_key", None)):
+            if hedge:
+                latency_key = f"{stage}:{request_kwargs.get('model')}"
+                response = request_hedger.call(lambda: rate_governor.call(_send, key_pool, pin_key),
+                                               latency_key=latency_key)
+            else:
+                response = rate_governor.call(_send, key_pool, pin_key)
+
+        _store(response)
+        return response
+
+    def _submit_background() -> Optional[BackgroundHandle]:
+        """백그라운드로 제출 후 핸들 반환 (백그라운드 모드를 쓸 수 없으면 None → 일반 호출)"""
+        # 같은 내용의 백그라운드 응답이 이미 진행 중이면 새로 제출하지 않고 함께 대기
+        handle = background_poller.find(cache_key)
+        if handle is not None:
+            return handle
+
+        # 제출은 금방 끝나므로 헤지하지 않음 (긴 대기는 폴러가 담당)
+        try:
+            with scheduling_key(getattr(client, "api_key", None)):
+                response = rate_governor.call(lambda pooled_key: _send(pooled_key, background=True), key_pool, pin_key)
+        except Exception as e:
+            if _get_status_code(e) == 400 and ("background" in str(e) or "store" in str(e)):
+                background_poller.disable(str(e))
+                return None
+            raise
+
+        poll_client = client.with_options(api_key=submitted["api_key"]) if submitted["api_key"] else client
+        handle = background_poller.track(poll_client, response, key=cache_key)
+        logger.debug("🕓 백그라운드 응답 제출: %s (%s, %s)", handle.response_id, request_kwargs.get('model'), handle.status)
+        handle.add_done_callback(_store)
+        return handle
+
+    if not cache_key:
+        return _call_upstream()
+
+    # 같은 내용의 요청이 이미 진행 중이면 그 결과를 공유
+    try:
+        return agent_call_flight.do(cache_key, _call_upstream)
+    except CallCancelled:
+        token = get_current_token()
+        if token is not None and token.cancelled:
+            raise
+        # 다른 세션의 leader 요청이 취소된 경우 직접 다시 실행
+        return agent_call_flight.do(cache_key, _call_upstream)
+
+
+def invalidate_cached_response(cache_key: Optional[str]) -> None:
+    """캐시된 응답 무효화 (JSON 파싱 실패 응답이 재사용되지 않도록)"""
+    if not cache_key:
+        return
+    cache = get_response_cache()
+    if cache is not None:
+        cache.invalidate(cache_key)
+        with _routed_keys_lock:
+            routed_key = _routed_keys.pop(cache_key, None)
+        if routed_key:
+            cache.invalidate(routed_key)
+
+
+def get_governor_stats() -> Dict[str, Any]:
+    """재시도/대기 시간 지표 반환"""
+    return rate_governor.get_stats()
+
+
+def get_http_client_stats() -> Dict[str, int]:
+    """취소 가능한 호출용 HTTP 클라이언트 재사용 지표 반환"""
+    return _http_clients.get_stats()
+
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    """공정 스케줄러 대기열 깊이/대기 시간 지표 반환"""
+    return rate_governor.get_scheduler_stats()
+
+
+def get_key_pool_stats() -> Dict[str, Any]:
+    """서버 키 풀 상태 반환"""
+    key_pool = get_key_pool()
+    if key_pool is None:
+        return {"enabled": False}
+    return {"enabled": True, **key_pool.get_stats()}
+
+
+def get_background_stats() -> Dict[str, Any]:
+    """백그라운드 응답 지표 반환"""
+    return background_poller.get_stats()
+
+
+def get_backend_stats() -> Dict[str, Any]:
+    """설정된 LLM 백엔드와 단계별 라우팅 반환"""
+    return {
+        "backends": {name: backend.capabilities._asdict() for name, backend in backend_registry.backends.items()},
+        "stage_backends": dict(backend_registry.stage_backends),
+    }
+
+
+def get_hedging_stats() -> Dict[str, Any]:
+    """헤지 요청 지표 반환"""
+    return request_hedger.get_stats()
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    """동일 요청 병합 지표 반환"""
+    return agent_call_flight.get_stats()
+
+
+def get_response_cache_stats() -> Dict[str, Any]:
+    """응답 캐시 지표 반환"""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
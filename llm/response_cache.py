@@ -0,0 +1,210 @@
+"""
+에이전트 응답 캐시 (SQLite 기반)
+
+동일한 모델/프롬프트/이미지/대화 히스토리/피드백 조합에 대해
+Responses API를 다시 호출하지 않도록 응답 텍스트를 디스크에 저장한다.
+"""
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from config import (
+    RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_BYTES
+)
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(
+    model: str,
+    system_prompt: str,
+    base64_images: Optional[List[str]],
+    conversation_history: List[Dict[str, Any]],
+    user_feedback: str = "",
+    extra: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    요청 입력으로 캐시 키 생성
+
+    Args:
+        model (str): 사용 모델
+        system_prompt (str): 시스템 프롬프트 원문 (프롬프트 파일 내용 해시로 사용)
+        base64_images (list): data URL 형식 이미지 리스트 (내용 해시로 사용)
+        conversation_history (list): 재사용되는 대화 히스토리
+        user_feedback (str): 피드백 텍스트
+        extra (dict, optional): 에이전트 타입, 도구 설정 등 추가 입력
+
+    Returns:
+        str: sha256 캐시 키
+    """
+    payload = {
+        "model": model,
+        "prompt_hash": _sha256(system_prompt or ""),
+        "image_hashes": [_sha256(img) for img in (base64_images or []) if isinstance(img, str)],
+        "history": conversation_history,
+        "feedback": user_feedback or "",
+        "extra": extra or {},
+    }
+    serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return _sha256(serialized)
+
+
+class ResponseCache:
+    """SQLite 기반 응답 캐시 (TTL + 용량 기반 LRU 제거)"""
+
+    def __init__(self, db_path: str = RESPONSE_CACHE_PATH,
+                 ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS,
+                 max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS response_cache (
+                cache_key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_access ON response_cache(last_access)")
+        self._conn.commit()
+
+        # 적중률 지표
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """캐시된 응답 텍스트 반환 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM response_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (cache_key,))
+                self._conn.commit()
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE response_cache SET last_access = ? WHERE cache_key = ?", (now, cache_key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, cache_key: str, value: str) -> None:
+        """응답 텍스트 저장 후 용량 초과분 제거"""
+        now = time.time()
+        size_bytes = len(value.encode("utf-8"))
+        if self.max_bytes and size_bytes > self.max_bytes:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (cache_key, value, size_bytes, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cache_key, value, size_bytes, now, now)
+            )
+            self.writes += 1
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def invalidate(self, cache_key: str) -> None:
+        """특정 키 삭제 (파싱 실패 응답 등)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (cache_key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+
+    def _evict_locked(self, now: float) -> None:
+        """만료 항목 및 용량 초과 항목 제거 (lock 보유 상태에서 호출)"""
+        if self.ttl_seconds:
+            cursor = self._conn.execute(
+                "DELETE FROM response_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        if not self.max_bytes:
+            return
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM response_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # 가장 오래 사용되지 않은 항목부터 제거
+        rows = self._conn.execute(
+            "SELECT cache_key, size_bytes FROM response_cache ORDER BY last_access ASC"
+        ).fetchall()
+        for cache_key, size_bytes in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (cache_key,))
+            total -= size_bytes
+            self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """적중률 등 캐시 지표 반환"""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM response_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "entries": entries,
+            "total_bytes": total_bytes,
+        }
+
+
+# 프로세스 공용 캐시 인스턴스 (최초 사용 시 생성)
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """공용 응답 캐시 반환 (비활성화 또는 생성 실패 시 None)"""
+    global _response_cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            try:
+                _response_cache = ResponseCache()
+            except Exception as e:
+                logger.warning("⚠️ 응답 캐시 초기화 실패: %s", e)
+                return None
+        return _response_cache
@@ -0,0 +1,268 @@
+"""
+업스트림 호출 공정 스케줄러
+
+호출량 조절기(rate governor)의 동시 실행 슬롯을 도착 순서가 아니라
+가중 공정 큐(weighted fair queuing)로 나눠준다.
+- 1단계: API key별 공정 분배 (한 키의 작업이 다른 키의 호출을 막지 않음)
+- 2단계: 같은 키 안에서 세션별 공정 분배 (여러 모듈을 한꺼번에 돌리는 세션이 독점하지 않음)
+- 우선순위(interactive/standard/batch)는 가중치로 반영 (피드백 턴이 일괄 작업보다 먼저, 기아 없음)
+
+호출의 세션은 현재 취소 토큰에서, API key는 scheduling_key, 우선순위는 call_priority로 정한다.
+"""
+import contextvars
+import hashlib
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from llm.cancellation import get_current_token
+from config import SCHEDULER_PRIORITY_WEIGHTS, SCHEDULER_WAIT_HISTORY
+
+DEFAULT_PRIORITY = "standard"
+ANONYMOUS_SESSION = "anonymous"
+DEFAULT_KEY_ID = "default"
+
+# 현재 컨텍스트의 호출 우선순위와 API key 식별자
+_call_priority: contextvars.ContextVar = contextvars.ContextVar("call_priority", default=DEFAULT_PRIORITY)
+_call_key_id: contextvars.ContextVar = contextvars.ContextVar("call_key_id", default=DEFAULT_KEY_ID)
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """지표/로그에 원문이 남지 않도록 API key를 짧은 해시로 변환"""
+    if not api_key:
+        return DEFAULT_KEY_ID
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+
+
+@contextmanager
+def call_priority(priority: str):
+    """범위 안의 업스트림 호출 우선순위 지정 (interactive / standard / batch)"""
+    if priority not in SCHEDULER_PRIORITY_WEIGHTS:
+        raise ValueError(f"알 수 없는 우선순위: {priority}")
+    reset = _call_priority.set(priority)
+    try:
+        yield
+    finally:
+        _call_priority.reset(reset)
+
+
+@contextmanager
+def scheduling_key(api_key: Optional[str]):
+    """범위 안의 업스트림 호출이 사용하는 API key 지정 (공정 분배 단위)"""
+    reset = _call_key_id.set(key_fingerprint(api_key))
+    try:
+        yield
+    finally:
+        _call_key_id.reset(reset)
+
+
+class _Waiter:
+    __slots__ = ("seq", "key_id", "session_id", "priority", "weight", "enqueued_at")
+
+    def __init__(self, seq: int, key_id: str, session_id: str, priority: str):
+        self.seq = seq
+        self.key_id = key_id
+        self.session_id = session_id
+        self.priority = priority
+        self.weight = SCHEDULER_PRIORITY_WEIGHTS.get(priority, 1.0)
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def flow(self) -> Tuple[str, str]:
+        return self.key_id, self.session_id
+
+
+class FairScheduler:
+    """
+    런타임에 한도를 바꿀 수 있는 동시 실행 제한기 + 2단계 가중 공정 큐
+
+    호출량 조절기가 응답 헤더를 보고 shrink/grow로 한도를 조절한다.
+    각 키/세션은 받은 서비스량(1 / 가중치 누적)이 가장 적은 쪽부터 슬롯을 받고,
+    새로 대기하기 시작한 키/세션은 현재 대기 중인 것들의 최소 서비스량에서 시작해
+    쉬는 동안 몫을 쌓아두지 못하게 한다.
+    """
+
+    def __init__(self, limit: int, min_limit: int, max_limit: int,
+                 wait_history: int = SCHEDULER_WAIT_HISTORY):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        self.active = 0
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiters: List[_Waiter] = []
+        self._key_service: Dict[str, float] = {}
+        self._flow_service: Dict[Tuple[str, str], float] = {}
+
+        # 지표
+        self.dispatched: Dict[str, int] = {priority: 0 for priority in SCHEDULER_PRIORITY_WEIGHTS}
+        self.cancelled_waits = 0
+        self._wait_samples: Deque[Tuple[str, float]] = deque(maxlen=wait_history)
+        self.max_queue_depth = 0
+
+    # ----------------------
+    # 한도 조절 (곱셈 감소/덧셈 증가)
+    # ----------------------
+
+    def shrink(self) -> None:
+        """곱셈 감소 (절반)"""
+        with self._cond:
+            self.limit = max(self.min_limit, self.limit // 2)
+
+    def grow(self) -> None:
+        """덧셈 증가 (+1)"""
+        with self._cond:
+            if self.limit < self.max_limit:
+                self.limit += 1
+                self._cond.notify_all()
+
+    # ----------------------
+    # 슬롯 획득/반환
+    # ----------------------
+
+    def acquire(self) -> float:
+        """공정 순서에 따라 슬롯을 얻을 때까지 대기하고 대기한 시간(초)을 반환"""
+        token = get_current_token()
+        waiter = _Waiter(
+            next(self._seq),
+            _call_key_id.get(),
+            (token.session_id if token is not None and token.session_id else ANONYMOUS_SESSION),
+            _call_priority.get(),
+        )
+
+        def wake():
+            with self._cond:
+                self._cond.notify_all()
+
+        if token is not None:
+            token.add_abort(wake)
+        try:
+            with self._cond:
+                self._activate_locked(waiter)
+                self._waiters.append(waiter)
+                self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+                try:
+                    while not (self.active < self.limit and self._select_locked() is waiter):
+                        if token is not None and token.cancelled:
+                            self.cancelled_waits += 1
+                            token.raise_if_cancelled()
+                        self._cond.wait()
+                finally:
+                    self._waiters.remove(waiter)
+                    self._cond.notify_all()
+
+                self.active += 1
+                self._charge_locked(waiter)
+        finally:
+            if token is not None:
+                token.remove_abort(wake)
+
+        waited = time.monotonic() - waiter.enqueued_at
+        self._wait_samples.append((waiter.priority, waited))
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self.active = max(0, self.active - 1)
+            self._cond.notify_all()
+
+    # ----------------------
+    # 공정 큐 내부
+    # ----------------------
+
+    def _activate_locked(self, waiter: _Waiter) -> None:
+        """대기 중이 아니던 키/세션이 들어오면 현재 최소 서비스량에서 시작"""
+        waiting_keys = {w.key_id for w in self._waiters}
+        waiting_flows = {w.flow for w in self._waiters}
+
+        if waiter.key_id not in waiting_keys:
+            floor = min((self._key_service.get(k, 0.0) for k in waiting_keys), default=None)
+            if floor is not None:
+                self._key_service[waiter.key_id] = max(self._key_service.get(waiter.key_id, 0.0), floor)
+
+        if waiter.flow not in waiting_flows:
+            same_key = [f for f in waiting_flows if f[0] == waiter.key_id]
+            floor = min((self._flow_service.get(f, 0.0) for f in same_key), default=None)
+            if floor is not None:
+                self._flow_service[waiter.flow] = max(self._flow_service.get(waiter.flow, 0.0), floor)
+
+    def _select_locked(self) -> Optional[_Waiter]:
+        """다음에 슬롯을 받을 대기자 (서비스량이 가장 적은 키 → 세션 → 우선순위 → 도착 순)"""
+        if not self._waiters:
+            return None
+        key_id = min({w.key_id for w in self._waiters}, key=lambda k: (self._key_service.get(k, 0.0), k))
+        candidates = [w for w in self._waiters if w.key_id == key_id]
+        flow = min({w.flow for w in candidates}, key=lambda f: (self._flow_service.get(f, 0.0), f))
+        candidates = [w for w in candidates if w.flow == flow]
+        return min(candidates, key=lambda w: (-w.weight, w.seq))
+
+    def _charge_locked(self, waiter: _Waiter) -> None:
+        cost = 1.0 / waiter.weight
+        self._key_service[waiter.key_id] = self._key_service.get(waiter.key_id, 0.0) + cost
+        self._flow_service[waiter.flow] = self._flow_service.get(waiter.flow, 0.0) + cost
+        self.dispatched[waiter.priority] = self.dispatched.get(waiter.priority, 0) + 1
+        self._prune_locked()
+
+    def _prune_locked(self) -> None:
+        """대기 중이 아닌 키/세션 기록 정리 (다시 들어오면 최소 서비스량에서 시작하므로 잃는 정보 없음)"""
+        waiting_keys = {w.key_id for w in self._waiters}
+        waiting_flows = {w.flow for w in self._waiters}
+        if len(self._key_service) > len(waiting_keys) + 64:
+            self._key_service = {k: v for k, v in self._key_service.items() if k in waiting_keys}
+        if len(self._flow_service) > len(waiting_flows) + 256:
+            self._flow_service = {f: v for f, v in self._flow_service.items() if f in waiting_flows}
+
+    # ----------------------
+    # 지표
+    # ----------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """대기열 깊이/대기 시간 지표"""
+        return summarize_schedulers([self])
+
+
+def summarize_schedulers(schedulers: List[FairScheduler]) -> Dict[str, Any]:
+    """여러 스케줄러(키별 한도)의 대기열 깊이/대기 시간 지표 합계"""
+    waiters: List[_Waiter] = []
+    samples: List[Tuple[str, float]] = []
+    dispatched: Dict[str, int] = {priority: 0 for priority in SCHEDULER_PRIORITY_WEIGHTS}
+    cancelled_waits = 0
+    max_queue_depth = 0
+    for scheduler in schedulers:
+        with scheduler._cond:
+            waiters.extend(scheduler._waiters)
+            samples.extend(scheduler._wait_samples)
+            for priority, count in scheduler.dispatched.items():
+                dispatched[priority] = dispatched.get(priority, 0) + count
+            cancelled_waits += scheduler.cancelled_waits
+            max_queue_depth += scheduler.max_queue_depth
+
+    depth_by_priority: Dict[str, int] = {priority: 0 for priority in SCHEDULER_PRIORITY_WEIGHTS}
+    for w in waiters:
+        depth_by_priority[w.priority] = depth_by_priority.get(w.priority, 0) + 1
+    waiting_sessions = len({w.flow for w in waiters})
+    waiting_keys = len({w.key_id for w in waiters})
+
+    wait_by_priority = {}
+    for priority in SCHEDULER_PRIORITY_WEIGHTS:
+        waits = sorted(seconds for p, seconds in samples if p == priority)
+        if waits:
+            wait_by_priority[priority] = {
+                "avg": round(sum(waits) / len(waits), 3),
+                "p95": round(waits[min(len(waits) - 1, int(0.95 * (len(waits) - 1)))], 3),
+                "max": round(waits[-1], 3),
+            }
+
+    return {
+        "queue_depth": sum(depth_by_priority.values()),
+        "queue_depth_by_priority": depth_by_priority,
+        "max_queue_depth": max_queue_depth,
+        "waiting_sessions": waiting_sessions,
+        "waiting_keys": waiting_keys,
+        "dispatched": dispatched,
+        "cancelled_waits": cancelled_waits,
+        "wait_seconds": wait_by_priority,
+    }
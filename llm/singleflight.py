@@ -0,0 +1,96 @@
+"""
+동일 요청 병합 (single-flight)
+
+같은 내용 키를 가진 요청이 동시에 진행 중이면 첫 요청(leader)만 실제로 실행하고
+나머지(follower)는 leader의 결과를 기다렸다가 공유한다.
+여러 작업 스레드가 결과를 공유하므로 스레드 안전한 concurrent.futures.Future를 사용한다.
+follower는 leader를 기다리는 동안에도 자기 호출의 취소/마감을 주기적으로 확인한다.
+
+asyncio 코루틴에서 직접 기다리는 do_async는 두지 않는다 (처음 요구된 asyncio 직접 지원과 다른 점).
+follower 대기는 스레드를 막으므로 이벤트 루프에서 do()를 부르면 안 되며, Gradio async 핸들러는
+llm.pipeline.run_steps_async가 각 단계를 작업 스레드에서 실행해 이 대기가 이벤트 루프를 막지 않는다.
+오래 걸리는 백그라운드 응답은 병합된 BackgroundHandle을 이벤트 루프에서 await한다 (BackgroundHandle.wait_async).
+"""
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Tuple
+
+from llm.cancellation import get_current_token
+from config import SINGLEFLIGHT_POLL_SECONDS
+
+
+class SingleFlight:
+    """내용 키 기반 진행 중 요청 병합기"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+        # 지표
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """진행 중인 Future 반환 (새로 만들었으면 leader=True)"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+
+            future = Future()
+            self._inflight[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _wait(self, future: Future) -> Any:
+        """leader 결과 대기 (현재 호출이 취소되거나 마감이 지나면 CallCancelled)"""
+        token = get_current_token()
+        if token is None:
+            return future.result()
+
+        while True:
+            token.raise_if_cancelled()
+            try:
+                return future.result(timeout=SINGLEFLIGHT_POLL_SECONDS)
+            except FutureTimeoutError:
+                continue
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """동기 실행: leader면 fn 실행, follower면 leader 결과 대기"""
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return self._wait(future)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    def inflight_count(self) -> int:
+        """현재 진행 중인 고유 요청 수"""
+        with self._lock:
+            return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, int]:
+        """병합 지표 반환"""
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "inflight": self.inflight_count(),
+        }
+
+
+# 프로세스 공용 인스턴스 (에이전트 호출 공용)
+agent_call_flight = SingleFlight()
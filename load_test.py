@@ -0,0 +1,149 @@
+"""
+동시 세션 부하 테스트 CLI
+
+실행 중인 앱의 실제 Gradio 이벤트 엔드포인트를 세션 N개가 동시에 호출해
+처리량, 단계별 p50/p95/p99 지연, 대기열/입장 제어 대기 시간, 서버 RSS를 보고한다.
+LLM은 모의 서버(mock_server.py)를 가리키게 해서 OpenAI 비용/변동 없이 우리 쪽 한도와 오버헤드를 잰다.
+
+사용 예:
+    python load_test.py --spawn --sessions 16                       # 모의 서버 + 앱을 직접 띄워서 실행
+    python load_test.py --sessions 32 --server-pid 12345            # 이미 실행 중인 앱 (RSS 측정 포함)
+    python load_test.py --spawn --mock-args "--latency fixed:3000 --error-rate 0.02"
+    python load_test.py --spawn --report out/load.json --baseline out/load_baseline.json --tolerance 0.2
+
+--baseline을 주면 단계별 p95, 처리량, 최대 RSS가 허용 범위를 넘게 나빠졌을 때 종료 코드 1로 끝난다 (CI 회귀 확인용).
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import sys
+import tempfile
+import time
+
+from config import (
+    EVALUATION_MODULES, BATCH_IMAGE_EXTENSIONS, MOCK_LLM_PORT,
+    LOADTEST_APP_URL, LOADTEST_SESSIONS, LOADTEST_EVENT_TIMEOUT, LOADTEST_RSS_INTERVAL
+)
+from loadtest import (
+    STAGE_ORDER, LoadTestRunner, RssSampler, SpawnedStack, build_report, compare_with_baseline,
+    find_images, print_report, save_report, synthetic_images
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gradio 앱 동시 세션 부하 테스트 (모의 LLM 백엔드)")
+    parser.add_argument("--url", default=LOADTEST_APP_URL, help=f"앱 주소 (기본: {LOADTEST_APP_URL})")
+    parser.add_argument("--sessions", type=int, default=LOADTEST_SESSIONS,
+                        help=f"동시 세션 수 (기본: {LOADTEST_SESSIONS})")
+    parser.add_argument("--iterations", type=int, default=1, help="세션마다 전체 흐름 반복 횟수 (기본: 1)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="모든 세션이 시작될 때까지 걸리는 시간 (초)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="이벤트 사이 최대 사용자 대기 시간 (초, 0~값 균등)")
+    parser.add_argument("--modules", nargs="+", choices=EVALUATION_MODULES, default=EVALUATION_MODULES[:1],
+                        help=f"세션마다 평가할 모듈 (기본: {EVALUATION_MODULES[0]})")
+    parser.add_argument("--images", default=None, help="업로드할 스크린샷 디렉터리 (기본: 합성 이미지)")
+    parser.add_argument("--image-count", type=int, default=3, help="합성 이미지 수 (기본: 3)")
+    parser.add_argument("--no-final-report", action="store_true", help="최종 평가 논의 단계를 건너뜀")
+    parser.add_argument("--api-key", default="sk-loadtest", help="세션별 API 키 접두사 (모의 서버는 아무 값이나 허용)")
+    parser.add_argument("--timeout", type=float, default=LOADTEST_EVENT_TIMEOUT,
+                        help=f"이벤트 하나의 응답 대기 상한 (초, 기본: {LOADTEST_EVENT_TIMEOUT:g})")
+    parser.add_argument("--seed", type=int, default=None, help="사용자 대기 시간 난수 시드")
+    parser.add_argument("--server-pid", type=int, default=None, help="RSS를 측정할 앱 프로세스 PID")
+    parser.add_argument("--rss-interval", type=float, default=LOADTEST_RSS_INTERVAL,
+                        help=f"RSS 측정 주기 (초, 기본: {LOADTEST_RSS_INTERVAL:g})")
+    parser.add_argument("--spawn", action="store_true", help="모의 서버와 앱을 하위 프로세스로 실행 후 테스트")
+    parser.add_argument("--mock-port", type=int, default=MOCK_LLM_PORT, help=f"--spawn 모의 서버 포트 (기본: {MOCK_LLM_PORT})")
+    parser.add_argument("--mock-args", default="", help='--spawn 모의 서버 추가 인자 (예: "--latency fixed:500")')
+    parser.add_argument("--report", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="기준 대비 허용 악화 비율 (기본: 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.images:
+        if not os.path.isdir(args.images):
+            print(f"❌ 이미지 디렉터리가 없습니다: {args.images}")
+            return 2
+        image_paths = find_images(args.images, BATCH_IMAGE_EXTENSIONS)
+        if not image_paths:
+            print(f"❌ 이미지 파일이 없습니다: {args.images}")
+            return 2
+    else:
+        image_paths = synthetic_images(tempfile.mkdtemp(prefix="loadtest_images_"), args.image_count)
+
+    stack = None
+    server_pid = args.server_pid
+    if args.spawn:
+        stack = SpawnedStack(args.mock_port, shlex.split(args.mock_args), args.url)
+        try:
+            stack.start()
+        except RuntimeError as e:
+            print(f"❌ 실행 실패: {e}")
+            stack.stop()
+            return 1
+        server_pid = server_pid or stack.app_pid
+
+    runner = LoadTestRunner(
+        base_url=args.url,
+        sessions=args.sessions,
+        iterations=args.iterations,
+        modules=args.modules,
+        image_paths=image_paths,
+        api_key=args.api_key,
+        ramp_up=args.ramp_up,
+        think_time=args.think_time,
+        event_timeout=args.timeout,
+        final_report=not args.no_final_report,
+        seed=args.seed,
+    )
+    sampler = RssSampler(server_pid, args.rss_interval)
+
+    print(f"🏋️ 부하 테스트 시작: 세션 {args.sessions}개 × {args.iterations}회, 모듈 {', '.join(args.modules)}, "
+          f"이미지 {len(image_paths)}장")
+    sampler.start()
+    started = time.monotonic()
+    try:
+        duration = asyncio.run(runner.run())
+    except KeyboardInterrupt:
+        print("\n⏹️ 중단됨 - 지금까지의 결과로 보고합니다")
+        duration = time.monotonic() - started
+    finally:
+        rss = sampler.stop()
+        if stack is not None:
+            stack.stop()
+
+    report = build_report(
+        runner.results, duration, args.sessions, runner.workflows_completed, runner.workflows_started,
+        rss, STAGE_ORDER,
+        settings={
+            "url": args.url, "sessions": args.sessions, "iterations": args.iterations,
+            "modules": args.modules, "images": len(image_paths), "ramp_up": args.ramp_up,
+            "think_time": args.think_time, "final_report": not args.no_final_report,
+            "mock_args": args.mock_args if args.spawn else None,
+        },
+    )
+    print_report(report)
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        save_report(report, args.report)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n📉 기준 대비 회귀 {len(regressions)}건 (허용 {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print(f"\n✅ 기준 결과 대비 회귀 없음 (허용 {args.tolerance:.0%})")
+
+    return 0 if report["events"]["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""
+동시 세션 부하 테스트 모듈 (배포 규모 산정/성능 회귀 확인용)
+
+실제 Gradio 이벤트 엔드포인트(업로드 → DR → 확정 → 평가 → 다운로드 → 최종 보고)를
+세션 N개가 동시에 호출하고 단계별 지연 백분위수, 대기 시간, 처리량, 서버 RSS를 보고한다.
+- gradio_session: Gradio 3.x 이벤트 클라이언트 (/upload, /run/predict, /queue/join)
+- harness: 세션 시나리오와 동시 실행
+- report: 집계/출력/기준 결과 비교
+- processes: 서버 RSS 측정, 모의 서버 + 앱 실행
+
+LLM은 모의 서버(mock_server.py)를 쓰므로 결과는 우리 쪽 처리 오버헤드와 동시성 한도를 반영한다 (load_test.py).
+"""
+from loadtest.gradio_session import AppSchema, EventNotFound, EventResult, GradioSession
+from loadtest.harness import STAGE_ORDER, LoadTestRunner, find_images, synthetic_images
+from loadtest.processes import RssSampler, SpawnedStack, read_rss_mb
+from loadtest.report import build_report, compare_with_baseline, percentile, print_report, save_report
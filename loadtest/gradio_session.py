@@ -0,0 +1,193 @@
+"""
+Gradio 3.x 이벤트 클라이언트 (브라우저 한 탭과 같은 방식으로 호출)
+
+- /config 의 dependencies 에서 api_name → fn_index 를 찾음 (app.py 이벤트의 api_name)
+- 대기열을 거치는 이벤트: /queue/join 웹소켓 (send_hash → send_data → process_* 메시지)
+- queue=False 이벤트: POST /run/predict
+- 이미지: POST /upload 후 File 컴포넌트 입력 형식으로 전달
+
+세션은 session_hash 로 구분되므로 GradioSession 하나가 앱의 사용자 세션 하나다.
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+import websockets
+
+# admission_controlled 가 대기 중에 내보내는 안내 문구 접두사
+STATUS_PREFIX = "⏳"
+# 핸들러가 오류를 문자열로 돌려줄 때 쓰는 접두사 (business_logic 참고)
+ERROR_PREFIXES = ("❌", "🔒")
+
+
+class EventResult(NamedTuple):
+    """이벤트 한 번의 결과와 시간 측정 (초)"""
+    api_name: str
+    ok: bool
+    data: List[Any]
+    latency: float            # 요청 ~ 최종 출력
+    queue_wait: float         # Gradio 대기열 (join ~ process_starts), queue=False 이벤트는 0
+    admission_wait: float     # 입장 제어 대기 (process_starts ~ 마지막 대기 안내, 하한값)
+    error: str = ""
+
+
+class EventNotFound(Exception):
+    """앱 /config 에 해당 api_name 이벤트가 없음"""
+
+
+def _first_text(data: List[Any]) -> str:
+    for value in data:
+        if isinstance(value, str):
+            return value
+    return ""
+
+
+def _is_status(data: List[Any]) -> bool:
+    """대기 안내 출력인지 (Chatbot 출력은 마지막 답변에 안내 문구가 들어감)"""
+    for value in data:
+        if isinstance(value, str) and value.startswith(STATUS_PREFIX):
+            return True
+        if isinstance(value, list) and value and isinstance(value[-1], (list, tuple)):
+            reply = value[-1][-1] if value[-1] else None
+            if isinstance(reply, str) and reply.startswith(STATUS_PREFIX):
+                return True
+    return False
+
+
+def _failure_message(data: List[Any]) -> str:
+    """출력이 오류 안내면 그 문구 (정상이면 빈 문자열)"""
+    text = _first_text(data).lstrip()
+    if text.startswith(ERROR_PREFIXES) or text.startswith(STATUS_PREFIX):
+        return text.splitlines()[0][:200]
+    return ""
+
+
+class AppSchema:
+    """/config 에서 읽은 이벤트 목록"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.version = config.get("version", "")
+        self.fn_index: Dict[str, int] = {}
+        self.queued: Dict[str, bool] = {}
+        enable_queue = bool(config.get("enable_queue"))
+        for index, dependency in enumerate(config.get("dependencies", [])):
+            api_name = dependency.get("api_name")
+            if not api_name or api_name in self.fn_index:
+                continue
+            self.fn_index[api_name] = index
+            self.queued[api_name] = enable_queue and dependency.get("queue") is not False
+
+    @classmethod
+    async def fetch(cls, http: httpx.AsyncClient, base_url: str) -> "AppSchema":
+        response = await http.get(f"{base_url}/config")
+        response.raise_for_status()
+        return cls(response.json())
+
+    def index_of(self, api_name: str) -> int:
+        if api_name not in self.fn_index:
+            raise EventNotFound(f"앱 /config 에 '{api_name}' 이벤트가 없습니다 (app.py api_name 확인)")
+        return self.fn_index[api_name]
+
+
+class GradioSession:
+    """사용자 세션 하나 (session_hash 하나)"""
+
+    def __init__(self, base_url: str, http: httpx.AsyncClient, schema: AppSchema, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.ws_url = "ws" + self.base_url[len("http"):] + "/queue/join"
+        self.http = http
+        self.schema = schema
+        self.timeout = timeout
+        self.session_hash = uuid.uuid4().hex[:11]
+
+    async def upload(self, paths: List[str]) -> List[Dict[str, Any]]:
+        """이미지 업로드 → File(file_count="multiple") 입력값"""
+        files = []
+        handles = []
+        try:
+            for path in paths:
+                handle = open(path, "rb")
+                handles.append(handle)
+                files.append(("files", (path.rsplit("/", 1)[-1], handle, "application/octet-stream")))
+            response = await self.http.post(f"{self.base_url}/upload", files=files, timeout=self.timeout)
+            response.raise_for_status()
+        finally:
+            for handle in handles:
+                handle.close()
+        return [
+            {"name": temp_path, "data": None, "is_file": True, "orig_name": path.rsplit("/", 1)[-1]}
+            for temp_path, path in zip(response.json(), paths)
+        ]
+
+    async def call(self, api_name: str, data: List[Any]) -> EventResult:
+        """이벤트 실행 (대기열 여부는 /config 설정을 따름)"""
+        fn_index = self.schema.index_of(api_name)
+        started = time.monotonic()
+        try:
+            if self.schema.queued[api_name]:
+                return await asyncio.wait_for(self._queued(api_name, fn_index, data, started), self.timeout)
+            return await self._predict(api_name, fn_index, data, started)
+        except asyncio.TimeoutError:
+            return EventResult(api_name, False, [], time.monotonic() - started, 0.0, 0.0,
+                               f"{self.timeout:.0f}초 안에 응답 없음")
+        except (httpx.HTTPError, websockets.WebSocketException, OSError) as e:
+            return EventResult(api_name, False, [], time.monotonic() - started, 0.0, 0.0,
+                               f"{type(e).__name__}: {e}")
+
+    async def _predict(self, api_name: str, fn_index: int, data: List[Any], started: float) -> EventResult:
+        body = {"data": data, "fn_index": fn_index, "session_hash": self.session_hash, "event_data": None}
+        response = await self.http.post(f"{self.base_url}/run/predict", json=body, timeout=self.timeout)
+        latency = time.monotonic() - started
+        if response.status_code != 200:
+            return EventResult(api_name, False, [], latency, 0.0, 0.0,
+                               f"HTTP {response.status_code}: {response.text[:200]}")
+        output = response.json().get("data", [])
+        error = _failure_message(output)
+        return EventResult(api_name, not error, output, latency, 0.0, 0.0, error)
+
+    async def _queued(self, api_name: str, fn_index: int, data: List[Any], started: float) -> EventResult:
+        process_started: Optional[float] = None
+        last_status: Optional[float] = None
+        output: List[Any] = []
+
+        async with websockets.connect(self.ws_url, max_size=None, open_timeout=self.timeout) as ws:
+            async for raw in ws:
+                message = json.loads(raw)
+                kind = message.get("msg")
+                if kind == "send_hash":
+                    await ws.send(json.dumps({"fn_index": fn_index, "session_hash": self.session_hash}))
+                elif kind == "send_data":
+                    await ws.send(json.dumps({
+                        "data": data, "event_data": None,
+                        "fn_index": fn_index, "session_hash": self.session_hash
+                    }))
+                elif kind == "queue_full":
+                    return EventResult(api_name, False, [], time.monotonic() - started, 0.0, 0.0,
+                                       "Gradio 대기열 가득 참 (queue_full)")
+                elif kind == "process_starts":
+                    process_started = time.monotonic()
+                elif kind == "process_generating":
+                    generated = (message.get("output") or {}).get("data") or []
+                    if _is_status(generated):
+                        last_status = time.monotonic()
+                    else:
+                        output = generated
+                elif kind == "process_completed":
+                    finished = time.monotonic()
+                    payload = message.get("output") or {}
+                    if payload.get("data"):
+                        output = payload["data"]
+                    process_started = process_started or finished
+                    queue_wait = process_started - started
+                    admission_wait = (last_status - process_started) if last_status else 0.0
+                    if not message.get("success", False):
+                        return EventResult(api_name, False, output, finished - started, queue_wait, admission_wait,
+                                           str(payload.get("error") or "처리 실패"))
+                    error = _failure_message(output)
+                    return EventResult(api_name, not error, output, finished - started, queue_wait, admission_wait, error)
+
+        return EventResult(api_name, False, output, time.monotonic() - started, 0.0, 0.0,
+                           "process_completed 전에 연결이 끊김")
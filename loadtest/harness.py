@@ -0,0 +1,169 @@
+"""
+동시 세션 시나리오 실행
+
+세션 하나는 브라우저 사용자 한 명의 흐름을 그대로 따른다:
+    이미지 업로드 → API 키 입력 → 미리보기
+    → 모듈마다 [모듈 선택 → DR 생성 → DR 확정 → 평가 → 다운로드]
+    → 최종 평가 논의 시작 → 챗봇 메시지
+앞 단계가 실패하면 그 반복의 나머지 단계는 건너뛴다 (뒤 단계가 앞 단계 결과에 의존).
+"""
+import asyncio
+import os
+import random
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from loadtest.gradio_session import AppSchema, EventResult, GradioSession
+
+SETUP_STAGES = ["upload", "validate_api_key", "image_preview"]
+MODULE_STAGES = ["select_module", "dr_generation", "confirm_dr", "evaluation", "download"]
+REPORT_STAGES = ["final_report_start", "final_report_message"]
+STAGE_ORDER = SETUP_STAGES + MODULE_STAGES + REPORT_STAGES
+
+FINAL_REPORT_MESSAGE = "가장 심각한 UX 문제 세 가지를 요약해주세요."
+
+
+def _png_bytes(width: int, height: int, seed: int) -> bytes:
+    """단색 줄무늬 PNG (PIL 없이 생성, 세션마다 다른 이미지)"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(height // 16 + 1):
+        color = bytes(rng.randrange(256) for _ in range(3))
+        rows.extend([b"\x00" + color * width] * 16)
+    raw = b"".join(rows[:height])
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b"")
+
+
+def synthetic_images(directory: str, count: int, width: int = 1080, height: int = 2340) -> List[str]:
+    """휴대폰 화면 크기 합성 스크린샷 count장 생성 → 경로 목록"""
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"loadtest_screen_{index + 1}.png")
+        with open(path, "wb") as f:
+            f.write(_png_bytes(width, height, seed=index))
+        paths.append(path)
+    return paths
+
+
+def find_images(directory: str, extensions) -> List[str]:
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(tuple(extensions))
+    )
+
+
+class LoadTestRunner:
+    """세션 N개를 점진적으로 시작해 시나리오 반복 실행"""
+
+    def __init__(self, base_url: str, sessions: int, iterations: int, modules: List[str],
+                 image_paths: List[str], api_key: str, ramp_up: float, think_time: float,
+                 event_timeout: float, final_report: bool = True, seed: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.sessions = sessions
+        self.iterations = iterations
+        self.modules = modules
+        self.image_paths = image_paths
+        self.api_key = api_key
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.event_timeout = event_timeout
+        self.final_report = final_report
+        self._rng = random.Random(seed)
+
+        self.results: List[EventResult] = []
+        self.workflows_started = 0
+        self.workflows_completed = 0
+
+    def _record(self, session_id: int, result: EventResult) -> bool:
+        self.results.append(result)
+        if not result.ok:
+            print(f"   ❌ 세션 {session_id} {result.api_name}: {result.error}")
+        return result.ok
+
+    async def _think(self) -> None:
+        if self.think_time > 0:
+            await asyncio.sleep(self._rng.uniform(0, self.think_time))
+
+    async def _upload(self, session: GradioSession) -> Optional[List[Dict[str, Any]]]:
+        started = time.monotonic()
+        try:
+            files = await session.upload(self.image_paths)
+        except (httpx.HTTPError, OSError) as e:
+            self.results.append(EventResult("upload", False, [], time.monotonic() - started, 0.0, 0.0,
+                                            f"{type(e).__name__}: {e}"))
+            return None
+        self.results.append(EventResult("upload", True, [], time.monotonic() - started, 0.0, 0.0))
+        return files
+
+    async def _run_module(self, session_id: int, session: GradioSession,
+                          files: List[Dict[str, Any]], module: str) -> bool:
+        """모듈 하나의 DR → 평가 → 다운로드 (성공 여부)"""
+        if not self._record(session_id, await session.call("select_module", [module])):
+            return False
+        await self._think()
+
+        dr = await session.call("dr_generation", [files, module])
+        if not self._record(session_id, dr):
+            return False
+        await self._think()
+
+        confirm = await session.call("confirm_dr", [files, module, "", dr.data[0] if dr.data else ""])
+        if not self._record(session_id, confirm):
+            return False
+
+        # .then() 체인은 브라우저가 이어서 호출하므로 여기서도 바로 이어 호출
+        json_output = confirm.data[0] if confirm.data else ""
+        if not self._record(session_id, await session.call("evaluation", [files, json_output, module])):
+            return False
+        await self._think()
+
+        return self._record(session_id, await session.call("download", []))
+
+    async def _run_session(self, session_id: int, http: httpx.AsyncClient, schema: AppSchema) -> None:
+        await asyncio.sleep(self.ramp_up * session_id / max(1, self.sessions))
+        session = GradioSession(self.base_url, http, schema, self.event_timeout)
+
+        files = await self._upload(session)
+        if files is None:
+            return
+        if not self._record(session_id, await session.call("validate_api_key", [f"{self.api_key}-{session_id}"])):
+            return
+        self._record(session_id, await session.call("image_preview", [files]))
+
+        for _ in range(self.iterations):
+            self.workflows_started += 1
+            completed = True
+            for module in self.modules:
+                if not await self._run_module(session_id, session, files, module):
+                    completed = False
+                    break
+            if completed and self.final_report:
+                completed = self._record(session_id, await session.call("final_report_start", []))
+                if completed:
+                    await self._think()
+                    completed = self._record(
+                        session_id, await session.call("final_report_message", [FINAL_REPORT_MESSAGE, []])
+                    )
+            if completed:
+                self.workflows_completed += 1
+            await self._think()
+
+    async def run(self) -> float:
+        """전체 실행 후 소요 시간(초) 반환"""
+        limits = httpx.Limits(max_connections=self.sessions * 2 + 4)
+        async with httpx.AsyncClient(timeout=self.event_timeout, limits=limits) as http:
+            schema = await AppSchema.fetch(http, self.base_url)
+            for stage in STAGE_ORDER[1:]:
+                schema.index_of(stage)
+            print(f"🎯 대상 앱 {self.base_url} (Gradio {schema.version}, 이벤트 {len(schema.fn_index)}개)")
+            started = time.monotonic()
+            await asyncio.gather(*(self._run_session(i, http, schema) for i in range(self.sessions)))
+            return time.monotonic() - started
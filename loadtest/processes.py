@@ -0,0 +1,128 @@
+"""
+부하 테스트 대상 프로세스 관리 (서버 메모리 측정, 모의 서버 + 앱 실행)
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """프로세스 RSS (MB, 읽을 수 없으면 None)"""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class RssSampler:
+    """백그라운드 스레드로 주기적으로 서버 RSS 측정"""
+
+    def __init__(self, pid: Optional[int], interval: float):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.pid is None:
+            return
+        self._sample()
+        self._thread = threading.Thread(target=self._loop, name="loadtest-rss", daemon=True)
+        self._thread.start()
+
+    def _sample(self) -> None:
+        value = read_rss_mb(self.pid)
+        if value is not None:
+            self.samples.append(value)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def stop(self) -> Dict[str, Any]:
+        """측정 종료 후 {start, peak, end} (MB)"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=self.interval + 1)
+            self._sample()
+        if not self.samples:
+            return {"start": None, "peak": None, "end": None}
+        return {
+            "start": round(self.samples[0], 1),
+            "peak": round(max(self.samples), 1),
+            "end": round(self.samples[-1], 1),
+        }
+
+
+class SpawnedStack:
+    """모의 OpenAI 서버 + 앱을 하위 프로세스로 실행 (--spawn)"""
+
+    def __init__(self, mock_port: int, mock_args: List[str], app_url: str, startup_timeout: float = 120.0):
+        self.mock_port = mock_port
+        self.mock_args = mock_args
+        self.app_url = app_url
+        self.startup_timeout = startup_timeout
+        self.processes: List[subprocess.Popen] = []
+        self.app_pid: Optional[int] = None
+
+    def start(self) -> None:
+        mock_url = f"http://127.0.0.1:{self.mock_port}"
+        mock = subprocess.Popen(
+            [sys.executable, "mock_server.py", "--port", str(self.mock_port)] + self.mock_args,
+            cwd=PROJECT_ROOT
+        )
+        self.processes.append(mock)
+        self._wait_ready(f"{mock_url}/mock/stats", mock)
+
+        env = dict(os.environ)
+        env["OPENAI_BASE_URL"] = f"{mock_url}/v1"
+        env.setdefault("OPENAI_API_KEY", "sk-mock")
+        # 결과 파일/작업 DB가 실제 실행 기록과 섞이지 않도록 작업 API는 끔
+        env.setdefault("JOB_API_ENABLED", "0")
+        app = subprocess.Popen([sys.executable, "app.py"], cwd=PROJECT_ROOT, env=env)
+        self.processes.append(app)
+        self.app_pid = app.pid
+        self._wait_ready(f"{self.app_url}/config", app)
+        print(f"🚀 모의 서버({mock_url})와 앱({self.app_url}) 실행 완료 (앱 PID {app.pid})")
+
+    def _wait_ready(self, url: str, process: subprocess.Popen) -> None:
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"프로세스가 시작 중 종료됨 (exit {process.returncode}): {' '.join(process.args)}")
+            try:
+                if httpx.get(url, timeout=2.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f"{self.startup_timeout:.0f}초 안에 준비되지 않음: {url}")
+
+    def stop(self) -> None:
+        for process in reversed(self.processes):
+            if process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        self.processes.clear()
@@ -0,0 +1,127 @@
+"""
+부하 테스트 결과 집계 (단계별 백분위수, 처리량, 메모리) 및 기준 결과와 비교
+"""
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from loadtest.gradio_session import EventResult
+
+PERCENTILES = (50, 95, 99)
+# 이보다 작은 지연 변화는 측정 잡음으로 보고 회귀로 치지 않음 (초)
+MIN_LATENCY_DELTA = 0.05
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """pct 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _summary(values: List[float]) -> Dict[str, Optional[float]]:
+    summary: Dict[str, Optional[float]] = {
+        f"p{pct}": (round(value, 3) if value is not None else None)
+        for pct in PERCENTILES
+        for value in [percentile(values, pct)]
+    }
+    summary["mean"] = round(sum(values) / len(values), 3) if values else None
+    summary["max"] = round(max(values), 3) if values else None
+    return summary
+
+
+def build_report(results: List[EventResult], duration: float, sessions: int,
+                 workflows_completed: int, workflows_started: int,
+                 rss: Dict[str, Any], stage_order: List[str], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """이벤트 결과 목록 → 보고서 dict (JSON 저장/비교용)"""
+    stages: Dict[str, Dict[str, Any]] = {}
+    for stage in stage_order:
+        stage_results = [r for r in results if r.api_name == stage]
+        if not stage_results:
+            continue
+        ok = [r for r in stage_results if r.ok]
+        stages[stage] = {
+            "count": len(stage_results),
+            "errors": len(stage_results) - len(ok),
+            "latency": _summary([r.latency for r in ok]),
+            "queue_wait": _summary([r.queue_wait for r in stage_results]),
+            "admission_wait": _summary([r.admission_wait for r in stage_results]),
+        }
+
+    errors = Counter(f"{r.api_name}: {r.error}" for r in results if not r.ok)
+    return {
+        "settings": settings,
+        "duration_seconds": round(duration, 2),
+        "sessions": sessions,
+        "workflows": {"started": workflows_started, "completed": workflows_completed},
+        "throughput": {
+            "workflows_per_minute": round(workflows_completed / duration * 60, 2) if duration > 0 else 0.0,
+            "events_per_second": round(len(results) / duration, 2) if duration > 0 else 0.0,
+        },
+        "events": {"total": len(results), "errors": sum(errors.values())},
+        "stages": stages,
+        "rss_mb": rss,
+        "top_errors": errors.most_common(10),
+    }
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """보고서 표 출력"""
+    print("\n📊 부하 테스트 결과")
+    print(f"   세션 {report['sessions']}개, {report['duration_seconds']}초, "
+          f"워크플로 {report['workflows']['completed']}/{report['workflows']['started']} 완료")
+    print(f"   처리량: {report['throughput']['workflows_per_minute']} 워크플로/분, "
+          f"{report['throughput']['events_per_second']} 이벤트/초, "
+          f"오류 {report['events']['errors']}/{report['events']['total']}")
+
+    header = f"   {'단계':<22}{'횟수':>6}{'오류':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'대기열p95':>11}{'입장p95':>10}"
+    print(header)
+    for stage, stats in report["stages"].items():
+        latency = stats["latency"]
+        print(f"   {stage:<22}{stats['count']:>6}{stats['errors']:>6}"
+              f"{_fmt(latency['p50']):>9}{_fmt(latency['p95']):>9}{_fmt(latency['p99']):>9}"
+              f"{_fmt(stats['queue_wait']['p95']):>11}{_fmt(stats['admission_wait']['p95']):>10}")
+
+    rss = report.get("rss_mb") or {}
+    if rss.get("peak") is not None:
+        print(f"   서버 RSS(MB): 시작 {_fmt(rss.get('start'))}, 최대 {_fmt(rss.get('peak'))}, 종료 {_fmt(rss.get('end'))}")
+    for message, count in report.get("top_errors", []):
+        print(f"   ❌ {count}회 - {message}")
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 보고서 저장: {path}")
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """기준 결과 대비 회귀 목록 (단계별 p95 지연, 처리량, 최대 RSS)"""
+    regressions = []
+    for stage, stats in report["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        current, previous = stats["latency"]["p95"], base["latency"]["p95"]
+        if (current is not None and previous and current > previous * (1 + tolerance)
+                and current - previous > MIN_LATENCY_DELTA):
+            regressions.append(f"{stage} p95 {previous:.2f}s → {current:.2f}s")
+        if stats["errors"] > base.get("errors", 0):
+            regressions.append(f"{stage} 오류 {base.get('errors', 0)} → {stats['errors']}")
+
+    current_tp = report["throughput"]["workflows_per_minute"]
+    previous_tp = baseline.get("throughput", {}).get("workflows_per_minute")
+    if previous_tp and current_tp < previous_tp * (1 - tolerance):
+        regressions.append(f"처리량 {previous_tp} → {current_tp} 워크플로/분")
+
+    current_rss = (report.get("rss_mb") or {}).get("peak")
+    previous_rss = (baseline.get("rss_mb") or {}).get("peak")
+    if current_rss is not None and previous_rss and current_rss > previous_rss * (1 + tolerance):
+        regressions.append(f"최대 RSS {previous_rss:.0f}MB → {current_rss:.0f}MB")
+    return regressions
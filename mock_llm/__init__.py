@@ -0,0 +1,12 @@
+"""
+모의 OpenAI API 서버 모듈 (부하 테스트/벤치마크용)
+
+실제 OpenAI 호출 없이 우리 쪽 처리 오버헤드를 측정하기 위해
+프로젝트가 쓰는 엔드포인트(responses, files, vector_stores, models)를 흉내 낸다.
+- behavior: 지연 분포, 오류 주입, 고정/녹화 응답
+- server: FastAPI 앱
+
+앱 클라이언트는 OPENAI_BASE_URL=http://127.0.0.1:8765/v1 로 이 서버를 가리킨다 (mock_server.py).
+"""
+from mock_llm.behavior import ErrorInjector, LatencyModel, Reply, ResponseSource, request_fingerprint
+from mock_llm.server import MockState, create_app
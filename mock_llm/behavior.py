@@ -0,0 +1,149 @@
+"""
+모의 서버 동작 설정 (지연 분포, 오류 주입, 응답 내용)
+
+- LatencyModel: "fixed:ms", "uniform:min,max", "normal:mean,std", "lognormal:median,sigma" 형식 지연 분포
+- ErrorInjector: 비율만큼 429/500/503 등 OpenAI 형식 오류 응답
+- ResponseSource: 녹화된 응답(요청 지문 → 텍스트/지연/토큰 사용량) 우선, 없으면 요청 정보를 담은 고정 JSON
+"""
+import json
+import math
+import random
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from llm.call_log import request_fingerprint
+
+
+class Reply(NamedTuple):
+    """응답 내용 (녹화된 지연/사용량이 없으면 None)"""
+    text: str
+    latency: Optional[float]
+    usage: Optional[Dict[str, Any]]
+
+
+class LatencyModel:
+    """지연 분포 (밀리초 단위 설정, 샘플은 초 단위)"""
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, kind: str, params: Tuple[float, ...], rng: Optional[random.Random] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"알 수 없는 지연 분포: {kind} (지원: {', '.join(self.KINDS)})")
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}[kind]
+        if len(params) != expected:
+            raise ValueError(f"{kind} 분포는 인자 {expected}개가 필요합니다: {params}")
+        self.kind = kind
+        self.params = params
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, rng: Optional[random.Random] = None) -> "LatencyModel":
+        """"lognormal:1500,0.5" → LatencyModel"""
+        kind, _, args = spec.strip().partition(":")
+        params = tuple(float(value) for value in args.split(",") if value.strip())
+        return cls(kind.strip(), params, rng)
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                ms = self.params[0]
+            elif self.kind == "uniform":
+                ms = self._rng.uniform(*self.params)
+            elif self.kind == "normal":
+                ms = self._rng.gauss(*self.params)
+            else:
+                median, sigma = self.params
+                ms = self._rng.lognormvariate(math.log(max(median, 1e-3)), sigma)
+        return max(0.0, ms) / 1000.0
+
+    def describe(self) -> str:
+        return f"{self.kind}:{','.join(f'{p:g}' for p in self.params)}"
+
+
+# 상태 코드별 OpenAI 오류 형식 (type, code, message)
+ERROR_BODIES = {
+    400: ("invalid_request_error", None, "Mock injected bad request"),
+    429: ("requests", "rate_limit_exceeded", "Mock injected rate limit. Please try again in 1s."),
+    500: ("server_error", None, "Mock injected server error"),
+    502: ("server_error", None, "Mock injected bad gateway"),
+    503: ("server_error", None, "Mock injected overload"),
+}
+
+
+class ErrorInjector:
+    """비율만큼 오류 응답 선택"""
+
+    def __init__(self, rate: float = 0.0, codes: Optional[List[int]] = None, rng: Optional[random.Random] = None):
+        self.rate = max(0.0, min(1.0, rate))
+        self.codes = [code for code in (codes or [429, 500, 503]) if code in ERROR_BODIES] or [500]
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def pick(self) -> Optional[int]:
+        """이번 요청에 주입할 상태 코드 (없으면 None)"""
+        if self.rate <= 0:
+            return None
+        with self._lock:
+            if self._rng.random() >= self.rate:
+                return None
+            return self._rng.choice(self.codes)
+
+
+def error_payload(status_code: int) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """(OpenAI 형식 오류 본문, 응답 헤더)"""
+    error_type, code, message = ERROR_BODIES.get(status_code, ("server_error", None, "Mock injected error"))
+    headers = {"retry-after": "1", "x-ratelimit-remaining-requests": "0"} if status_code == 429 else {}
+    return {"error": {"message": message, "type": error_type, "param": None, "code": code}}, headers
+
+
+class ResponseSource:
+    """응답 텍스트 선택 (녹화 → 고정 JSON)"""
+
+    def __init__(self, recordings_path: str = "", output_chars: int = 2000):
+        self.output_chars = output_chars
+        self.recordings: Dict[str, Dict[str, Any]] = {}
+        if recordings_path:
+            self.load(recordings_path)
+
+    def load(self, path: str) -> None:
+        """녹화 파일 로드 (한 줄에 {"fingerprint", "output_text", "latency_ms"(선택), "usage"(선택)})"""
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self.recordings[record["fingerprint"]] = record
+        print(f"📼 녹화된 응답 {len(self.recordings)}개 로드: {path}")
+
+    def respond(self, body: Dict[str, Any]) -> Reply:
+        """녹화된 응답(지문 일치) 또는 고정 JSON"""
+        fingerprint = request_fingerprint(body)
+        record = self.recordings.get(fingerprint)
+        if record is not None:
+            latency_ms = record.get("latency_ms")
+            return Reply(record["output_text"], latency_ms / 1000.0 if latency_ms is not None else None,
+                         record.get("usage"))
+        return Reply(self.canned_text(body, fingerprint), None, None)
+
+    def canned_text(self, body: Dict[str, Any], fingerprint: str) -> str:
+        """요청 정보를 담은 고정 JSON (에이전트 JSON 파싱이 성공하도록 객체 하나)"""
+        images = 0
+        for message in body.get("input") or []:
+            content = message.get("content") if isinstance(message, dict) else None
+            if isinstance(content, list):
+                images += sum(1 for part in content if part.get("type") == "input_image")
+        payload = {
+            "mock": True,
+            "model": body.get("model"),
+            "request_fingerprint": fingerprint[:16],
+            "image_count": images,
+            "summary": "Mock response for load testing.",
+        }
+        text = json.dumps(payload, ensure_ascii=False)
+        # 실제 응답과 비슷한 크기가 되도록 채움
+        padding = self.output_chars - len(text)
+        if padding > 0:
+            payload["notes"] = ("lorem ipsum " * (padding // 12 + 1))[:padding]
+            text = json.dumps(payload, ensure_ascii=False)
+        return text
@@ -0,0 +1,478 @@
+"""
+모의 OpenAI API 서버 (FastAPI)
+
+프로젝트가 쓰는 엔드포인트만 흉내 낸다 (업스트림 호출 없음, 상태는 메모리에만 보관).
+- POST /v1/responses (일반/stream=True SSE/background=True), GET /v1/responses/{id}, POST /v1/responses/{id}/cancel
+- POST/GET/DELETE /v1/files, GET /v1/files/{id}/content
+- POST/GET/DELETE /v1/vector_stores, POST/GET /v1/vector_stores/{id}/files
+- GET /v1/models, GET /v1/models/{id}
+- GET /mock/stats, POST /mock/config, POST /mock/reset : 부하 테스트 중 지표 조회/동작 변경
+
+응답 지연은 asyncio.sleep으로 흉내 내므로 동시 요청 수백 개도 한 프로세스에서 처리한다.
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from config import AVAILABLE_MODELS
+from mock_llm.behavior import ErrorInjector, LatencyModel, ResponseSource, error_payload
+
+# 이미지 입력 하나를 토큰으로 셀 때 쓰는 값 (high detail 기준 근사)
+IMAGE_TOKENS = 765
+
+# 성공 응답에 붙이는 호출량 헤더 (조절기가 한도에 걸리지 않도록 넉넉한 값)
+RATE_LIMIT_HEADERS = {
+    "x-ratelimit-limit-requests": "10000",
+    "x-ratelimit-remaining-requests": "9999",
+    "x-ratelimit-limit-tokens": "30000000",
+    "x-ratelimit-remaining-tokens": "29990000",
+    "x-ratelimit-reset-requests": "6ms",
+}
+
+# 스트리밍 시 응답을 나눠 보내는 조각 수
+STREAM_CHUNKS = 20
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_mock_{uuid.uuid4().hex[:24]}"
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _input_tokens(body: Dict[str, Any]) -> int:
+    tokens = _count_tokens(body.get("instructions") or "")
+    source = body.get("input")
+    if isinstance(source, str):
+        return tokens + _count_tokens(source)
+    for message in source or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            tokens += _count_tokens(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "input_image":
+                tokens += IMAGE_TOKENS
+            else:
+                tokens += _count_tokens(part.get("text") or "")
+    return tokens
+
+
+class MockState:
+    """모의 서버 상태 (응답/파일/벡터스토어 + 지표)"""
+
+    def __init__(self, latency: LatencyModel, file_latency: LatencyModel,
+                 errors: ErrorInjector, source: ResponseSource):
+        self.latency = latency
+        self.file_latency = file_latency
+        self.errors = errors
+        self.source = source
+        self.reset()
+
+    def reset(self) -> None:
+        self.responses: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.file_contents: Dict[str, bytes] = {}
+        self.vector_stores: Dict[str, Dict[str, Any]] = {}
+        self.vector_store_files: Dict[str, List[str]] = {}
+        self.started_at = time.time()
+        self.requests: Dict[str, int] = {}
+        self.injected_errors: Dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.streamed = 0
+        self.background = 0
+
+    def count(self, endpoint: str) -> None:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        total = sum(self.requests.values())
+        return {
+            "uptime_seconds": round(elapsed, 1),
+            "requests": dict(self.requests),
+            "requests_per_second": round(total / elapsed, 2),
+            "injected_errors": dict(self.injected_errors),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "streamed": self.streamed,
+            "background": self.background,
+            "stored_responses": len(self.responses),
+            "files": len(self.files),
+            "vector_stores": len(self.vector_stores),
+            "config": {
+                "latency": self.latency.describe(),
+                "file_latency": self.file_latency.describe(),
+                "error_rate": self.errors.rate,
+                "error_codes": self.errors.codes,
+                "recordings": len(self.source.recordings),
+            },
+        }
+
+
+def _error(status_code: int, message: str, error_type: str = "invalid_request_error") -> JSONResponse:
+    body = {"error": {"message": message, "type": error_type, "param": None, "code": None}}
+    return JSONResponse(body, status_code=status_code)
+
+
+def _response_object(response_id: str, body: Dict[str, Any], status: str, text: Optional[str],
+                     file_search_ids: List[str], usage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Responses API 응답 객체 (SDK Response 모델과 같은 필드, usage를 주면 녹화된 사용량 사용)"""
+    output: List[Dict[str, Any]] = []
+    if file_search_ids and text is not None:
+        output.append({
+            "type": "file_search_call", "id": _new_id("fs"), "status": "completed",
+            "queries": ["mock query"], "results": None,
+        })
+    if text is not None:
+        output.append({
+            "type": "message", "id": _new_id("msg"), "status": "completed", "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        })
+    input_tokens = _input_tokens(body)
+    output_tokens = _count_tokens(text) if text else 0
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": status,
+        "model": body.get("model"),
+        "output": output,
+        "parallel_tool_calls": True,
+        "tool_choice": body.get("tool_choice", "auto"),
+        "tools": body.get("tools") or [],
+        "background": bool(body.get("background")),
+        "store": body.get("store", True),
+        "error": None,
+        "incomplete_details": None,
+        "metadata": body.get("metadata") or {},
+        "usage": usage or {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        } if text is not None else None,
+    }
+
+
+def create_app(state: MockState) -> FastAPI:
+    """모의 서버 앱 생성"""
+    app = FastAPI(title="Mock OpenAI API", docs_url=None, redoc_url=None)
+    app.state.mock = state
+
+    @app.middleware("http")
+    async def require_auth(request: Request, call_next):
+        # 실제 API처럼 키 헤더만 확인 (값은 아무거나 허용)
+        if request.url.path.startswith("/v1/") and not request.headers.get("authorization"):
+            return _error(401, "You didn't provide an API key.")
+        return await call_next(request)
+
+    async def _file_delay() -> None:
+        await asyncio.sleep(state.file_latency.sample())
+
+    # ----------------------
+    # Responses
+    # ----------------------
+
+    @app.post("/v1/responses")
+    async def create_response(request: Request):
+        state.count("responses.create")
+        body = await request.json()
+        if not body.get("model"):
+            return _error(400, "Missing required parameter: 'model'.")
+
+        file_search_ids = [
+            vs_id for tool in body.get("tools") or [] if tool.get("type") == "file_search"
+            for vs_id in tool.get("vector_store_ids") or []
+        ]
+        for vs_id in file_search_ids:
+            if vs_id not in state.vector_stores:
+                return _error(404, f"Vector store with id '{vs_id}' not found.")
+
+        injected = state.errors.pick()
+        reply = state.source.respond(body)
+        text = reply.text
+        latency = reply.latency if reply.latency is not None else state.latency.sample()
+        response_id = _new_id("resp")
+
+        if injected is not None:
+            state.injected_errors[str(injected)] = state.injected_errors.get(str(injected), 0) + 1
+
+        if body.get("background"):
+            # 응답 ID만 돌려주고, 조회 시 지연 시간이 지났으면 완료로 바꿈 (서버 오류는 failed 상태로)
+            if injected is not None and injected < 500:
+                payload, headers = error_payload(injected)
+                return JSONResponse(payload, status_code=injected, headers=headers)
+            state.background += 1
+            state.responses[response_id] = {
+                "body": body, "text": text, "usage": reply.usage, "file_search_ids": file_search_ids,
+                "ready_at": time.monotonic() + latency, "status": "queued", "fail_with": injected,
+            }
+            return JSONResponse(_response_object(response_id, body, "queued", None, []), headers=RATE_LIMIT_HEADERS)
+
+        if injected is not None:
+            # 과부하 오류는 실제처럼 잠시 기다린 뒤 실패
+            await asyncio.sleep(min(latency, 1.0) if injected >= 500 else 0.0)
+            payload, headers = error_payload(injected)
+            return JSONResponse(payload, status_code=injected, headers=headers)
+
+        if body.get("stream"):
+            state.streamed += 1
+            return StreamingResponse(
+                _stream_events(response_id, body, text, file_search_ids, latency, reply.usage),
+                media_type="text/event-stream", headers=RATE_LIMIT_HEADERS,
+            )
+
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            state.in_flight -= 1
+        response = _response_object(response_id, body, "completed", text, file_search_ids, reply.usage)
+        if body.get("store", True):
+            state.responses[response_id] = {"body": body, "text": text, "usage": reply.usage,
+                                            "file_search_ids": file_search_ids,
+                                            "ready_at": 0.0, "status": "completed", "fail_with": None}
+        return JSONResponse(response, headers=RATE_LIMIT_HEADERS)
+
+    async def _stream_events(response_id: str, body: Dict[str, Any], text: str, file_search_ids: List[str],
+                             latency: float, usage: Optional[Dict[str, Any]]) -> AsyncIterator[bytes]:
+        """Responses 스트리밍 이벤트 (첫 토큰까지 지연의 30%, 나머지는 조각마다 나눠서)"""
+        sequence = 0
+
+        def event(event_type: str, **data) -> bytes:
+            nonlocal sequence
+            payload = {"type": event_type, "sequence_number": sequence, **data}
+            sequence += 1
+            return f"event: {event_type}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            in_progress = _response_object(response_id, body, "in_progress", None, [])
+            yield event("response.created", response=in_progress)
+            yield event("response.in_progress", response=in_progress)
+            await asyncio.sleep(latency * 0.3)
+
+            item_id = _new_id("msg")
+            yield event("response.output_item.added", output_index=0,
+                        item={"type": "message", "id": item_id, "status": "in_progress", "role": "assistant", "content": []})
+            yield event("response.content_part.added", item_id=item_id, output_index=0, content_index=0,
+                        part={"type": "output_text", "text": "", "annotations": []})
+            size = max(1, len(text) // STREAM_CHUNKS + 1)
+            for start in range(0, len(text), size):
+                await asyncio.sleep(latency * 0.7 / STREAM_CHUNKS)
+                yield event("response.output_text.delta", item_id=item_id, output_index=0, content_index=0,
+                            delta=text[start:start + size])
+            yield event("response.output_text.done", item_id=item_id, output_index=0, content_index=0, text=text)
+            yield event("response.content_part.done", item_id=item_id, output_index=0, content_index=0,
+                        part={"type": "output_text", "text": text, "annotations": []})
+            yield event("response.output_item.done", output_index=0,
+                        item={"type": "message", "id": item_id, "status": "completed", "role": "assistant",
+                              "content": [{"type": "output_text", "text": text, "annotations": []}]})
+            yield event("response.completed",
+                        response=_response_object(response_id, body, "completed", text, file_search_ids, usage))
+        finally:
+            state.in_flight -= 1
+
+    def _stored_response(response_id: str) -> Dict[str, Any]:
+        entry = state.responses.get(response_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail=f"Response with id '{response_id}' not found.")
+        if entry["status"] in ("queued", "in_progress"):
+            if time.monotonic() >= entry["ready_at"]:
+                entry["status"] = "failed" if entry["fail_with"] else "completed"
+            else:
+                entry["status"] = "in_progress"
+
+        text = entry["text"] if entry["status"] == "completed" else None
+        response = _response_object(response_id, entry["body"], entry["status"], text, entry["file_search_ids"],
+                                    entry.get("usage"))
+        if entry["status"] == "failed":
+            response["error"] = {"code": "server_error", "message": "Mock injected background failure"}
+        return response
+
+    @app.get("/v1/responses/{response_id}")
+    async def retrieve_response(response_id: str):
+        state.count("responses.retrieve")
+        return JSONResponse(_stored_response(response_id), headers=RATE_LIMIT_HEADERS)
+
+    @app.post("/v1/responses/{response_id}/cancel")
+    async def cancel_response(response_id: str):
+        state.count("responses.cancel")
+        entry = state.responses.get(response_id)
+        if entry is None:
+            return _error(404, f"Response with id '{response_id}' not found.")
+        if not entry["body"].get("background"):
+            return _error(400, "Only background responses can be cancelled.")
+        if entry["status"] in ("queued", "in_progress") and time.monotonic() < entry["ready_at"]:
+            entry["status"] = "cancelled"
+        return JSONResponse(_stored_response(response_id))
+
+    # ----------------------
+    # Files
+    # ----------------------
+
+    @app.post("/v1/files")
+    async def create_file(file: UploadFile = File(...), purpose: str = Form(...)):
+        state.count("files.create")
+        await _file_delay()
+        content = await file.read()
+        file_id = _new_id("file")
+        state.file_contents[file_id] = content
+        state.files[file_id] = {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": file.filename, "purpose": purpose, "status": "processed",
+        }
+        return state.files[file_id]
+
+    @app.get("/v1/files/{file_id}")
+    async def retrieve_file(file_id: str):
+        state.count("files.retrieve")
+        if file_id not in state.files:
+            return _error(404, f"No such File object: {file_id}")
+        return state.files[file_id]
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        state.count("files.content")
+        if file_id not in state.file_contents:
+            return _error(404, f"No such File object: {file_id}")
+        return PlainTextResponse(state.file_contents[file_id].decode("utf-8", errors="replace"))
+
+    @app.delete("/v1/files/{file_id}")
+    async def delete_file(file_id: str):
+        state.count("files.delete")
+        deleted = state.files.pop(file_id, None) is not None
+        state.file_contents.pop(file_id, None)
+        return {"id": file_id, "object": "file", "deleted": deleted}
+
+    # ----------------------
+    # Vector stores
+    # ----------------------
+
+    def _vector_store(vs_id: str) -> Dict[str, Any]:
+        if vs_id not in state.vector_stores:
+            raise HTTPException(status_code=404, detail=f"Vector store with id '{vs_id}' not found.")
+        store = state.vector_stores[vs_id]
+        count = len(state.vector_store_files[vs_id])
+        store["file_counts"] = {"in_progress": 0, "completed": count, "failed": 0, "cancelled": 0, "total": count}
+        store["usage_bytes"] = sum(state.files.get(f, {}).get("bytes", 0) for f in state.vector_store_files[vs_id])
+        return store
+
+    @app.post("/v1/vector_stores")
+    async def create_vector_store(request: Request):
+        state.count("vector_stores.create")
+        await _file_delay()
+        body = await request.json()
+        vs_id = _new_id("vs")
+        state.vector_stores[vs_id] = {
+            "id": vs_id, "object": "vector_store", "name": body.get("name"), "status": "completed",
+            "created_at": int(time.time()), "metadata": body.get("metadata") or {},
+        }
+        state.vector_store_files[vs_id] = [f for f in body.get("file_ids") or [] if f in state.files]
+        return _vector_store(vs_id)
+
+    @app.get("/v1/vector_stores/{vs_id}")
+    async def retrieve_vector_store(vs_id: str):
+        state.count("vector_stores.retrieve")
+        return _vector_store(vs_id)
+
+    @app.delete("/v1/vector_stores/{vs_id}")
+    async def delete_vector_store(vs_id: str):
+        state.count("vector_stores.delete")
+        deleted = state.vector_stores.pop(vs_id, None) is not None
+        state.vector_store_files.pop(vs_id, None)
+        return {"id": vs_id, "object": "vector_store.deleted", "deleted": deleted}
+
+    def _vector_store_file(vs_id: str, file_id: str) -> Dict[str, Any]:
+        return {"id": file_id, "object": "vector_store.file", "status": "completed", "vector_store_id": vs_id,
+                "created_at": int(time.time()), "usage_bytes": state.files.get(file_id, {}).get("bytes", 0),
+                "last_error": None}
+
+    @app.post("/v1/vector_stores/{vs_id}/files")
+    async def create_vector_store_file(vs_id: str, request: Request):
+        state.count("vector_stores.files.create")
+        _vector_store(vs_id)
+        await _file_delay()
+        body = await request.json()
+        file_id = body.get("file_id")
+        if file_id not in state.files:
+            return _error(404, f"No such File object: {file_id}")
+        if file_id not in state.vector_store_files[vs_id]:
+            state.vector_store_files[vs_id].append(file_id)
+        return _vector_store_file(vs_id, file_id)
+
+    @app.get("/v1/vector_stores/{vs_id}/files")
+    async def list_vector_store_files(vs_id: str):
+        state.count("vector_stores.files.list")
+        _vector_store(vs_id)
+        data = [_vector_store_file(vs_id, file_id) for file_id in state.vector_store_files[vs_id]]
+        return {"object": "list", "data": data, "first_id": data[0]["id"] if data else None,
+                "last_id": data[-1]["id"] if data else None, "has_more": False}
+
+    # ----------------------
+    # Models
+    # ----------------------
+
+    def _model(model_id: str) -> Dict[str, Any]:
+        return {"id": model_id, "object": "model", "created": 0, "owned_by": "mock"}
+
+    @app.get("/v1/models")
+    async def list_models():
+        state.count("models.list")
+        await _file_delay()
+        return {"object": "list", "data": [_model(model_id) for model_id in AVAILABLE_MODELS]}
+
+    @app.get("/v1/models/{model_id}")
+    async def retrieve_model(model_id: str):
+        state.count("models.retrieve")
+        if model_id not in AVAILABLE_MODELS:
+            return _error(404, f"The model '{model_id}' does not exist")
+        return _model(model_id)
+
+    # ----------------------
+    # 부하 테스트용 관리 엔드포인트
+    # ----------------------
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return state.get_stats()
+
+    @app.post("/mock/config")
+    async def mock_config(request: Request):
+        """{"latency": "fixed:500", "file_latency": "...", "error_rate": 0.1, "error_codes": [429]} 중 일부"""
+        body = await request.json()
+        try:
+            if "latency" in body:
+                state.latency = LatencyModel.parse(body["latency"])
+            if "file_latency" in body:
+                state.file_latency = LatencyModel.parse(body["file_latency"])
+            if "error_rate" in body or "error_codes" in body:
+                state.errors = ErrorInjector(body.get("error_rate", state.errors.rate),
+                                             body.get("error_codes", state.errors.codes))
+        except ValueError as e:
+            return _error(400, str(e))
+        print(f"🔧 모의 서버 설정 변경: {body}")
+        return state.get_stats()["config"]
+
+    @app.post("/mock/reset")
+    async def mock_reset():
+        state.reset()
+        return {"reset": True}
+
+    @app.exception_handler(HTTPException)
+    async def openai_style_error(request: Request, exc: HTTPException):
+        # SDK가 오류 메시지를 읽을 수 있도록 OpenAI 오류 형식으로 응답
+        return _error(exc.status_code, str(exc.detail))
+
+    return app
@@ -0,0 +1,63 @@
+"""
+모의 OpenAI API 서버 실행 (부하 테스트/벤치마크용)
+
+실제 OpenAI 대신 지연/오류를 설정할 수 있는 로컬 서버로 파이프라인 전체를 실행한다.
+
+사용 예:
+    python mock_server.py                                   # 기본: lognormal 1.5초 지연, 오류 없음
+    python mock_server.py --latency fixed:200 --error-rate 0.05 --error-codes 429 503
+    python mock_server.py --recordings recordings.jsonl     # 녹화된 응답 재생 (요청 지문 일치 시)
+
+앱/일괄 평가는 다음처럼 이 서버를 가리킨다:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-mock python app.py
+
+실행 중 지표는 GET /mock/stats, 지연/오류 변경은 POST /mock/config 로 한다.
+"""
+import argparse
+import random
+
+from config import (
+    MOCK_LLM_HOST, MOCK_LLM_PORT, MOCK_LLM_LATENCY, MOCK_LLM_FILE_LATENCY,
+    MOCK_LLM_ERROR_RATE, MOCK_LLM_ERROR_CODES, MOCK_LLM_RECORDINGS, MOCK_LLM_OUTPUT_CHARS
+)
+from mock_llm import ErrorInjector, LatencyModel, MockState, ResponseSource, create_app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="모의 OpenAI API 서버 (responses, files, vector_stores, models)")
+    parser.add_argument("--host", default=MOCK_LLM_HOST, help=f"바인드 주소 (기본: {MOCK_LLM_HOST})")
+    parser.add_argument("--port", type=int, default=MOCK_LLM_PORT, help=f"포트 (기본: {MOCK_LLM_PORT})")
+    parser.add_argument("--latency", default=MOCK_LLM_LATENCY,
+                        help=f"응답 지연 분포 ms - fixed:N, uniform:a,b, normal:mean,std, lognormal:median,sigma (기본: {MOCK_LLM_LATENCY})")
+    parser.add_argument("--file-latency", default=MOCK_LLM_FILE_LATENCY,
+                        help=f"파일/벡터스토어/모델 엔드포인트 지연 분포 (기본: {MOCK_LLM_FILE_LATENCY})")
+    parser.add_argument("--error-rate", type=float, default=MOCK_LLM_ERROR_RATE,
+                        help=f"응답 요청 중 오류로 응답할 비율 0~1 (기본: {MOCK_LLM_ERROR_RATE:g})")
+    parser.add_argument("--error-codes", type=int, nargs="+", default=MOCK_LLM_ERROR_CODES,
+                        help="주입할 상태 코드 (400, 429, 500, 502, 503)")
+    parser.add_argument("--recordings", default=MOCK_LLM_RECORDINGS, help="녹화된 응답 JSONL 파일")
+    parser.add_argument("--output-chars", type=int, default=MOCK_LLM_OUTPUT_CHARS,
+                        help=f"고정 응답 크기 (문자, 기본: {MOCK_LLM_OUTPUT_CHARS})")
+    parser.add_argument("--seed", type=int, default=None, help="지연/오류 난수 시드 (재현 가능한 실행)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    import uvicorn
+
+    rng = random.Random(args.seed) if args.seed is not None else None
+    state = MockState(
+        latency=LatencyModel.parse(args.latency, rng),
+        file_latency=LatencyModel.parse(args.file_latency, rng),
+        errors=ErrorInjector(args.error_rate, args.error_codes, rng),
+        source=ResponseSource(args.recordings, args.output_chars),
+    )
+    print(f"🧪 모의 OpenAI API 서버: http://{args.host}:{args.port}/v1 "
+          f"(지연 {state.latency.describe()}, 오류 {state.errors.rate:g} {state.errors.codes})")
+    uvicorn.run(create_app(state), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,14 @@
+"""
+모델 지연 시간/품질 비교 모듈
+
+고정 골든 세트를 모든 모듈 × 모델 조합으로 평가해 지연 시간, 토큰, JSON 파싱 성공률,
+기준 평가와의 일치도를 비교한다 (compare_models.py).
+- golden: 골든 세트와 기준 평가 로드
+- agreement: 평가 결과 일치도
+- matrix: 조합별 실행, 호출 녹화
+- report: 요약 보고서
+"""
+from model_compare.golden import GoldenCase, find_case, load_golden_set
+from model_compare.agreement import agreement, extract_issues
+from model_compare.matrix import CallRecorder, ModelMatrix, load_recordings
+from model_compare.report import build_report, print_report, save_report, summarize
@@ -0,0 +1,62 @@
+"""
+평가 결과와 기준 평가의 일치도
+
+모듈마다 JSON 스키마가 다르지만 문제 항목은 모두 problem_description / heuristic_violated 를 가진다.
+- heuristic_f1: 위반 휴리스틱 문장(정규화) 다중집합의 F1
+- issue_f1: (위치, 휴리스틱) 쌍의 F1 - 위치는 element_id / icon_id / component_id / screen_id 중 처음 있는 값
+문제 수 자체가 다르면 둘 다 낮아지므로 issue_count 도 함께 남긴다.
+"""
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+LOCATION_FIELDS = ("element_id", "icon_id", "component_id", "screen_id")
+ISSUE_MARKERS = ("problem_description", "heuristic_violated")
+
+
+def extract_issues(result: Any) -> List[Dict[str, Any]]:
+    """평가 JSON 안의 문제 항목 (중첩 위치와 관계없이)"""
+    issues: List[Dict[str, Any]] = []
+    if isinstance(result, dict):
+        if any(marker in result for marker in ISSUE_MARKERS):
+            issues.append(result)
+        for value in result.values():
+            issues.extend(extract_issues(value))
+    elif isinstance(result, list):
+        for value in result:
+            issues.extend(extract_issues(value))
+    return issues
+
+
+def _normalize(text: Any) -> str:
+    return re.sub(r"[^0-9a-z가-힣]+", " ", str(text or "").lower()).strip()
+
+
+def _signature(issue: Dict[str, Any]) -> Tuple[str, str]:
+    location = next((issue[field] for field in LOCATION_FIELDS if issue.get(field)), "")
+    return _normalize(location), _normalize(issue.get("heuristic_violated"))
+
+
+def _f1(candidate: Counter, reference: Counter) -> Optional[float]:
+    if not candidate and not reference:
+        return 1.0
+    if not candidate or not reference:
+        return 0.0
+    matched = sum((candidate & reference).values())
+    precision = matched / sum(candidate.values())
+    recall = matched / sum(reference.values())
+    return 0.0 if matched == 0 else 2 * precision * recall / (precision + recall)
+
+
+def agreement(candidate: Any, reference: Any) -> Dict[str, Any]:
+    """후보 평가와 기준 평가의 일치도"""
+    candidate_issues = extract_issues(candidate)
+    reference_issues = extract_issues(reference)
+    candidate_signatures = [_signature(issue) for issue in candidate_issues]
+    reference_signatures = [_signature(issue) for issue in reference_issues]
+    return {
+        "heuristic_f1": _f1(Counter(h for _, h in candidate_signatures), Counter(h for _, h in reference_signatures)),
+        "issue_f1": _f1(Counter(candidate_signatures), Counter(reference_signatures)),
+        "issue_count": len(candidate_issues),
+        "reference_issue_count": len(reference_issues),
+    }
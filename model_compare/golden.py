@@ -0,0 +1,61 @@
+"""
+골든 세트 (고정 스크린샷 세트 + 모듈별 기준 평가)
+
+디렉터리 구조 (일괄 평가와 같은 세트 규칙):
+    golden/
+    ├── settings_app/
+    │   ├── 01.png, 02.png ...
+    │   └── references/
+    │       ├── Text_Legibility.json           # 기준 평가 (UI 다운로드 파일 또는 평가 JSON 그대로)
+    │       └── Icon_Representativeness.json
+    └── health_app/ ...
+기준 평가가 없는 (세트, 모듈)은 --reference-model 결과와 비교하거나 일치도를 생략한다.
+"""
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from batch.runner import discover_screenshot_sets
+
+REFERENCES_DIRNAME = "references"
+
+
+class GoldenCase(NamedTuple):
+    """골든 세트 하나 (세트 ID, 이미지 경로, 모듈 → 기준 평가)"""
+    set_id: str
+    image_paths: List[str]
+    references: Dict[str, Any]
+
+
+def reference_filename(module: str) -> str:
+    return f"{module.replace(' ', '_')}.json"
+
+
+def load_reference(path: str) -> Any:
+    """기준 평가 파일 (다운로드 파일이면 result 부분)"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "result" in data and "agent_type" in data:
+        return data["result"]
+    return data
+
+
+def load_golden_set(root_dir: str, modules: List[str]) -> List[GoldenCase]:
+    """골든 세트 디렉터리 → 세트 목록 (세트 ID 순)"""
+    cases = []
+    for screenshot_set in discover_screenshot_sets(root_dir):
+        set_dir = os.path.dirname(screenshot_set.image_paths[0])
+        references: Dict[str, Any] = {}
+        for module in modules:
+            path = os.path.join(set_dir, REFERENCES_DIRNAME, reference_filename(module))
+            if os.path.exists(path):
+                references[module] = load_reference(path)
+        cases.append(GoldenCase(screenshot_set.set_id, screenshot_set.image_paths, references))
+    return cases
+
+
+def find_case(cases: List[GoldenCase], set_id: str) -> Optional[GoldenCase]:
+    for case in cases:
+        if case.set_id == set_id:
+            return case
+    return None
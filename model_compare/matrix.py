@@ -0,0 +1,252 @@
+"""
+모듈 × 모델 비교 실행기
+
+골든 세트마다 (모듈, 모델) 조합으로 DR 생성 → 평가를 repeats번 실행하고 시도(trial)마다 남긴다:
+- 단계별 지연 시간과 입력/출력/캐시/추론 토큰 (llm.call_log 호출 기록)
+- DR/평가 JSON 파싱 성공 여부
+- 기준 평가(골든 파일 또는 --reference-model 첫 결과)와의 일치도
+
+응답 캐시를 건너뛰고 (use_cache=False) 같은 조합의 반복은 순서대로 실행해 동일 요청 병합이 측정을 가리지 않게 한다.
+CallRecorder 를 주면 호출마다 모의 서버 녹화 형식으로 저장해 나중에 그대로 재생할 수 있다.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.dr_generator_agent import create_dr_generator_agent
+from agents.evaluator_agent import create_evaluator_agent
+from config import MAX_IMAGES_PER_REQUEST
+from llm.call_log import CallRecord, record_calls, request_fingerprint
+from llm.cancellation import CallCancelled, call_scope, cancel_session_calls
+from llm.model_routing import PARSE_FAILURE_STATUSES
+from llm.scheduler import call_priority
+from model_compare.agreement import agreement
+from model_compare.golden import GoldenCase
+from ui.session_store import SessionState, use_session
+from utils import encode_image_file_to_base64
+
+STAGES = ("dr_generation", "evaluation")
+
+
+class CallRecorder:
+    """호출 기록 → 녹화 JSONL (mock_server.py --recordings 형식)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._seen = set()
+        self.written = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 이어서 녹화할 때 같은 지문이 중복 저장되지 않도록 기존 지문을 읽어 둠
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._seen = {json.loads(line)["fingerprint"] for line in f if line.strip()}
+
+    def write(self, records: List[CallRecord]) -> None:
+        lines = []
+        for record in records:
+            if record.error or record.from_cache or record.output_text is None:
+                continue
+            fingerprint = request_fingerprint(record.request)
+            if fingerprint in self._seen:
+                continue
+            self._seen.add(fingerprint)
+            lines.append(json.dumps({
+                "fingerprint": fingerprint,
+                "stage": record.stage,
+                "model": record.model,
+                "file_search": _uses_file_search(record.request),
+                "output_text": record.output_text,
+                "latency_ms": round(record.latency * 1000),
+                "usage": {
+                    "input_tokens": record.input_tokens,
+                    "input_tokens_details": {"cached_tokens": record.cached_tokens},
+                    "output_tokens": record.output_tokens,
+                    "output_tokens_details": {"reasoning_tokens": record.reasoning_tokens},
+                    "total_tokens": record.input_tokens + record.output_tokens,
+                },
+            }, ensure_ascii=False))
+        if not lines:
+            return
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self.written += len(lines)
+
+
+def _uses_file_search(request: Dict[str, Any]) -> bool:
+    return any(isinstance(tool, dict) and tool.get("type") == "file_search" for tool in request.get("tools") or [])
+
+
+def load_recordings(path: str) -> Tuple[set, bool]:
+    """녹화 파일 → (지문 집합, 참조 문서 검색 사용 여부)"""
+    fingerprints = set()
+    file_search = False
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            fingerprints.add(record["fingerprint"])
+            file_search = file_search or bool(record.get("file_search"))
+    return fingerprints, file_search
+
+
+def _stage_usage(records: List[CallRecord], stage: str) -> Dict[str, Any]:
+    stage_records = [r for r in records if r.stage == stage]
+    return {
+        "calls": len(stage_records),
+        "latency": round(sum(r.latency for r in stage_records), 3),
+        "input_tokens": sum(r.input_tokens for r in stage_records),
+        "output_tokens": sum(r.output_tokens for r in stage_records),
+        "cached_tokens": sum(r.cached_tokens for r in stage_records),
+        "reasoning_tokens": sum(r.reasoning_tokens for r in stage_records),
+        "backend": stage_records[-1].backend if stage_records else None,
+        "model": stage_records[-1].model if stage_records else None,  # 프로필이면 단계에서 실제로 쓴 모델
+    }
+
+
+def _parse_evaluation(text: str) -> Optional[Any]:
+    """평가 결과 문자열 → JSON (실패 안내 문자열이면 None)"""
+    if not text or text.startswith("❌"):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class ModelMatrix:
+    """골든 세트 × 모듈 × 모델 비교 실행"""
+
+    def __init__(self, cases: List[GoldenCase], modules: List[str], models: List[str], repeats: int = 1,
+                 max_workers: int = 1, vector_store_id: Optional[str] = None,
+                 reference_model: Optional[str] = None, recorder: Optional[CallRecorder] = None,
+                 replay_fingerprints: Optional[set] = None):
+        self.cases = cases
+        self.modules = modules
+        self.models = models
+        self.repeats = max(1, repeats)
+        self.max_workers = max(1, max_workers)
+        self.vector_store_id = vector_store_id
+        self.reference_model = reference_model
+        self.recorder = recorder
+        self.replay_fingerprints = replay_fingerprints
+        self.replay_misses = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def run(self) -> List[Dict[str, Any]]:
+        """모든 시도 실행 → 시도 기록 목록"""
+        combos = [(case, module, model) for case in self.cases for module in self.modules for model in self.models]
+        print(f"🧪 모델 비교 시작: 세트 {len(self.cases)}개 × 모듈 {len(self.modules)}개 × 모델 {len(self.models)}개 "
+              f"× 반복 {self.repeats}회 = 시도 {len(combos) * self.repeats}개 (동시 {self.max_workers}개)")
+        trials: List[Dict[str, Any]] = []
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="model-compare")
+        futures = {executor.submit(self._run_combo, case, module, model): (case, module, model)
+                   for case, module, model in combos}
+        try:
+            for future in as_completed(futures):
+                trials.extend(future.result())
+        except KeyboardInterrupt:
+            print("⏹ 중단 요청 - 진행 중 호출 취소, 지금까지의 시도로 보고합니다")
+            self._stopping.set()
+            for future in futures:
+                future.cancel()
+            for case in self.cases:
+                cancel_session_calls(self._session_id(case), "interrupted")
+        finally:
+            executor.shutdown(wait=True)
+
+        self._score_against_reference_model(trials)
+        return sorted(trials, key=lambda t: (t["set_id"], t["module"], t["model"], t["repeat"]))
+
+    @staticmethod
+    def _session_id(case: GoldenCase) -> str:
+        return f"model-compare:{case.set_id}"
+
+    def _run_combo(self, case: GoldenCase, module: str, model: str) -> List[Dict[str, Any]]:
+        trials = []
+        for repeat in range(self.repeats):
+            if self._stopping.is_set():
+                break
+            trial = self._run_trial(case, module, model, repeat)
+            trials.append(trial)
+            status = "✅" if trial["evaluation_parsed"] else "❌"
+            print(f"{status} {case.set_id} / {module} / {model} #{repeat + 1}: "
+                  f"DR {trial['stages']['dr_generation']['latency']:.1f}s, "
+                  f"평가 {trial['stages']['evaluation']['latency']:.1f}s"
+                  + (f" ({trial['error']})" if trial["error"] else ""))
+        return trials
+
+    def _run_trial(self, case: GoldenCase, module: str, model: str, repeat: int) -> Dict[str, Any]:
+        session_id = self._session_id(case)
+        state = SessionState(f"{session_id}:{module}:{model}:{repeat}")
+        state.current_model = model
+        state.current_agent_name = module
+
+        trial: Dict[str, Any] = {
+            "set_id": case.set_id, "module": module, "model": model, "repeat": repeat,
+            "dr_parsed": False, "evaluation_parsed": False, "error": "",
+            "agreement": None, "result": None,
+        }
+        images = [encode_image_file_to_base64(path) for path in case.image_paths[:MAX_IMAGES_PER_REQUEST]]
+        started = time.monotonic()
+
+        with record_calls() as records, use_session(state), call_priority("batch"):
+            try:
+                dr_agent = create_dr_generator_agent(module, vector_store_id=self.vector_store_id)
+                with call_scope(session_id, "dr_generation"):
+                    json_data = dr_agent.extract_json(images, use_cache=False)
+                trial["dr_parsed"] = isinstance(json_data, dict) and json_data.get("status") not in PARSE_FAILURE_STATUSES
+                if not trial["dr_parsed"]:
+                    trial["error"] = f"DR 파싱 실패: {json_data.get('status') if isinstance(json_data, dict) else json_data}"
+                else:
+                    eval_agent = create_evaluator_agent(module, vector_store_id=self.vector_store_id)
+                    with call_scope(session_id, "evaluation"):
+                        text = eval_agent.generate_guidelines(images, json_data, use_cache=False, hedge=False)
+                    result = _parse_evaluation(text)
+                    trial["evaluation_parsed"] = result is not None
+                    trial["result"] = result
+                    if result is None:
+                        trial["error"] = text[:200]
+            except CallCancelled as e:
+                trial["error"] = f"취소됨: {e}"
+            except Exception as e:
+                trial["error"] = f"{type(e).__name__}: {e}"
+
+        trial["wall_seconds"] = round(time.monotonic() - started, 3)
+        trial["stages"] = {stage: _stage_usage(records, stage) for stage in STAGES}
+        trial["call_errors"] = [r.error for r in records if r.error]
+
+        reference = case.references.get(module)
+        if reference is not None and trial["result"] is not None:
+            trial["agreement"] = agreement(trial["result"], reference)
+            trial["reference"] = "golden"
+
+        if self.recorder is not None:
+            self.recorder.write(records)
+        if self.replay_fingerprints is not None:
+            misses = sum(1 for r in records if request_fingerprint(r.request) not in self.replay_fingerprints)
+            trial["replay_misses"] = misses
+            with self._lock:
+                self.replay_misses += misses
+        return trial
+
+    def _score_against_reference_model(self, trials: List[Dict[str, Any]]) -> None:
+        """골든 기준이 없는 (세트, 모듈)은 기준 모델의 첫 성공 결과와 비교"""
+        if not self.reference_model:
+            return
+        baselines: Dict[Tuple[str, str], Any] = {}
+        for trial in sorted(trials, key=lambda t: t["repeat"]):
+            key = (trial["set_id"], trial["module"])
+            if trial["model"] == self.reference_model and trial["result"] is not None and key not in baselines:
+                baselines[key] = trial["result"]
+        for trial in trials:
+            key = (trial["set_id"], trial["module"])
+            if trial["agreement"] is None and trial["result"] is not None and key in baselines:
+                trial["agreement"] = agreement(trial["result"], baselines[key])
+                trial["reference"] = f"model:{self.reference_model}"
@@ -0,0 +1,153 @@
+"""
+모델 비교 보고서
+
+시도 기록을 (모듈, 모델)별로 모아 지연 시간 분포, 토큰, 파싱 성공률, 기준 일치도를 정리하고
+모듈마다 지연 시간 ↔ 일치도 파레토 최적 모델을 표시한다.
+comparison.json (원자료 포함)과 comparison.md (표)로 저장한다.
+"""
+import datetime
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from model_compare.matrix import STAGES
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """선형 보간 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def _latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95), "mean": _mean(values)}
+
+
+def summarize(trials: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """(모듈, 모델)별 요약 행"""
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for trial in trials:
+        groups.setdefault((trial["module"], trial["model"]), []).append(trial)
+
+    rows = []
+    for (module, model), group in sorted(groups.items()):
+        completed = [t for t in group if t["evaluation_parsed"]]
+        scored = [t["agreement"] for t in group if t["agreement"] is not None]
+        row: Dict[str, Any] = {
+            "module": module,
+            "model": model,
+            "trials": len(group),
+            "dr_parse_rate": sum(1 for t in group if t["dr_parsed"]) / len(group),
+            "evaluation_parse_rate": len(completed) / len(group),
+            "errors": sum(1 for t in group if t["error"]),
+            # 끝까지 성공한 시도만 (실패는 빨리 끝나 지연 시간을 낮춰 보이게 함)
+            "end_to_end": _latency_summary([t["wall_seconds"] for t in completed]),
+            "heuristic_f1": _mean([a["heuristic_f1"] for a in scored]),
+            "issue_f1": _mean([a["issue_f1"] for a in scored]),
+            "scored_trials": len(scored),
+        }
+        for stage in STAGES:
+            stats = [t["stages"][stage] for t in group if t["stages"][stage]["calls"]]
+            row[stage] = {
+                "latency": _latency_summary([s["latency"] for s in stats]),
+                "input_tokens": _mean([s["input_tokens"] for s in stats]),
+                "output_tokens": _mean([s["output_tokens"] for s in stats]),
+                "cached_tokens": _mean([s["cached_tokens"] for s in stats]),
+                "reasoning_tokens": _mean([s["reasoning_tokens"] for s in stats]),
+            }
+        rows.append(row)
+    _mark_pareto(rows)
+    return rows
+
+
+def _mark_pareto(rows: List[Dict[str, Any]]) -> None:
+    """모듈마다 더 빠르면서 일치도도 같거나 높은 다른 모델이 없는 행 표시"""
+    for row in rows:
+        row["pareto"] = False
+        latency, score = row["end_to_end"]["p50"], row["heuristic_f1"]
+        if latency is None or score is None:
+            continue
+        row["pareto"] = not any(
+            other is not row and other["module"] == row["module"]
+            and other["end_to_end"]["p50"] is not None and other["heuristic_f1"] is not None
+            and other["end_to_end"]["p50"] <= latency and other["heuristic_f1"] >= score
+            and (other["end_to_end"]["p50"] < latency or other["heuristic_f1"] > score)
+            for other in rows
+        )
+
+
+def _fmt(value: Optional[float], spec: str = ".1f", suffix: str = "") -> str:
+    return "-" if value is None else f"{value:{spec}}{suffix}"
+
+
+def _table_lines(rows: List[Dict[str, Any]]) -> List[str]:
+    lines = [
+        "| 모듈 | 모델 | 시도 | E2E p50 | E2E p95 | DR p50 | 평가 p50 | 입력 토큰 | 캐시 | 출력 토큰 | 추론 | DR 파싱 | 평가 파싱 | 휴리스틱 F1 | 문제 F1 | 파레토 |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        tokens = {
+            key: sum(row[stage][key] or 0 for stage in STAGES)
+            for key in ("input_tokens", "cached_tokens", "output_tokens", "reasoning_tokens")
+        }
+        lines.append(
+            f"| {row['module']} | {row['model']} | {row['trials']} "
+            f"| {_fmt(row['end_to_end']['p50'], '.1f', 's')} | {_fmt(row['end_to_end']['p95'], '.1f', 's')} "
+            f"| {_fmt(row['dr_generation']['latency']['p50'], '.1f', 's')} "
+            f"| {_fmt(row['evaluation']['latency']['p50'], '.1f', 's')} "
+            f"| {tokens['input_tokens']:.0f} | {tokens['cached_tokens']:.0f} "
+            f"| {tokens['output_tokens']:.0f} | {tokens['reasoning_tokens']:.0f} "
+            f"| {row['dr_parse_rate']:.0%} | {row['evaluation_parse_rate']:.0%} "
+            f"| {_fmt(row['heuristic_f1'], '.2f')} | {_fmt(row['issue_f1'], '.2f')} "
+            f"| {'⭐' if row['pareto'] else ''} |"
+        )
+    return lines
+
+
+def build_report(trials: List[Dict[str, Any]], settings: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "settings": settings,
+        "summary": summarize(trials),
+        "trials": [{key: value for key, value in trial.items() if key != "result"} for trial in trials],
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("\n📊 모델 비교 결과 (토큰은 시도당 평균, ⭐ = 모듈 내 지연 시간/일치도 파레토 최적)")
+    for line in _table_lines(report["summary"]):
+        print(line)
+
+
+def save_report(report: Dict[str, Any], output_dir: str) -> str:
+    """comparison.json / comparison.md 저장 후 JSON 경로 반환"""
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, "comparison.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    settings = report["settings"]
+    lines = [
+        "# 모델 비교 보고서",
+        "",
+        f"- 생성: {report['created_at']}",
+        f"- 골든 세트: {settings['golden_dir']} ({settings['sets']}개), 반복 {settings['repeats']}회",
+        f"- 모드: {settings['mode']}",
+        f"- 기준 모델: {settings.get('reference_model') or '-'}",
+        "",
+        "E2E는 DR 생성과 평가까지 모두 성공한 시도만 집계한다. 토큰은 시도당 평균(DR + 평가).",
+        "",
+    ] + _table_lines(report["summary"])
+    with open(os.path.join(output_dir, "comparison.md"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"💾 보고서 저장: {json_path}")
+    return json_path
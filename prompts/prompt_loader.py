@@ -6,6 +6,7 @@ from typing import Optional, Dict
 from openai import OpenAI
 
 from config import get_openai_client
+from telemetry.tracing import span, traced
 
 # 파일 읽기 라이브러리들
 try:
@@ -124,7 +125,8 @@ class SimplePromptLoader:
             else:
                 raise ValueError(f"알 수 없는 에이전트 타입: {agent_type}")
             
-            prompt_text = self._read_markdown_prompt(md_file)
+            with span("prompt.load", agent_type=agent_type, agent=agent_name):
+                prompt_text = self._read_markdown_prompt(md_file)
             
             # 프롬프트 원본 그대로 반환 (file_search가 벡터스토어에서 관련 내용 자동 검색)
             return prompt_text
@@ -192,6 +194,7 @@ class SimplePromptLoader:
             return f"[Markdown 파일 읽기 오류: {file_path.name}, {str(e)}]"
     
     
+    @traced("vector_store.create")
     def create_vector_store(self) -> str:
         """참조 파일들을 벡터스토어에 업로드하고 벡터스토어 ID 반환"""
         if not self.client:
@@ -228,7 +231,8 @@ class SimplePromptLoader:
                 if file_path.exists():
                     try:
                         print(f"파일 업로드 중: {filename}")
-                        with open(file_path, 'rb') as f:
+                        with span("vector_store.upload", file=filename, bytes=file_path.stat().st_size), \
+                                open(file_path, 'rb') as f:
                             # OpenAI에 파일 업로드
                             uploaded_file = self.client.files.create(
                                 file=f,
@@ -0,0 +1,91 @@
+"""
+마이크로 벤치마크 실행 CLI
+
+요청마다 네트워크 호출 전에 반복되는 CPU 작업(이미지 인코딩, JSON 파싱, 메시지 구성 등)의
+호출 1회당 시간을 재고 JSON으로 저장한다. 저장한 결과끼리 비교해 변화를 추적한다.
+
+사용 예:
+    python run_benchmarks.py                                   # 전체 실행, output/benchmarks/<시각>.json 저장
+    python run_benchmarks.py --filter images.encode             # 이름에 문자열이 들어간 것만
+    python run_benchmarks.py --list
+    python run_benchmarks.py --compare output/benchmarks/baseline.json --tolerance 0.1
+
+--compare 결과에서 중앙값이 허용 비율보다 느려진 항목이 있으면 종료 코드 1로 끝난다.
+측정 중에는 다른 무거운 작업을 멈추고, 비교는 같은 기계의 결과끼리 한다.
+"""
+import argparse
+import datetime
+import os
+import sys
+
+from config import BENCH_MIN_TIME, BENCH_REPEATS, BENCH_OUTPUT_DIR
+from benchmarks import (
+    Fixtures, collect_benchmarks, compare_results, format_seconds, load_results, run_benchmarks, save_results
+)
+
+# 프롬프트 로더 등이 프로젝트 루트 기준 상대 경로를 쓰므로 루트에서 실행
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CPU 핫패스 마이크로 벤치마크")
+    parser.add_argument("--filter", nargs="+", default=None, help="이름에 이 문자열 중 하나가 들어간 벤치마크만 실행")
+    parser.add_argument("--list", action="store_true", help="벤치마크 이름만 출력")
+    parser.add_argument("--min-time", type=float, default=BENCH_MIN_TIME,
+                        help=f"반복 1회의 최소 측정 시간 (초, 기본: {BENCH_MIN_TIME:g})")
+    parser.add_argument("--repeats", type=int, default=BENCH_REPEATS, help=f"반복 횟수 (기본: {BENCH_REPEATS})")
+    parser.add_argument("--output", default=None,
+                        help=f"결과 JSON 경로 (기본: {BENCH_OUTPUT_DIR}/<시각>.json)")
+    parser.add_argument("--compare", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="느려짐 허용 비율 (기본: 0.1)")
+    return parser.parse_args(argv)
+
+
+def print_comparison(rows, tolerance: float) -> int:
+    """비교 표 출력 후 느려진 항목 수 반환"""
+    marks = {"slower": "🔺", "faster": "🔻", "same": "  "}
+    print(f"\n📊 기준 결과 대비 (허용 {tolerance:.0%}, 사분위 범위 이내 차이는 같음으로 판정)")
+    for name, old, new, ratio, verdict in rows:
+        print(f"   {marks[verdict]} {name:<62} {format_seconds(old):>10} → {format_seconds(new):>10} ({ratio:.2f}x)")
+    return sum(1 for row in rows if row[4] == "slower")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.chdir(PROJECT_ROOT)
+
+    fixtures = Fixtures()
+    benchmarks = collect_benchmarks(fixtures)
+    if args.filter:
+        benchmarks = [b for b in benchmarks if any(term in b.name for term in args.filter)]
+    if args.list:
+        for benchmark in benchmarks:
+            print(benchmark.name)
+        return 0
+    if not benchmarks:
+        print("❌ 조건에 맞는 벤치마크가 없습니다 (--list 로 이름 확인)")
+        return 2
+
+    print(f"🏁 벤치마크 {len(benchmarks)}개 실행 (반복 {args.repeats}회, 반복당 최소 {args.min_time:g}초)")
+    try:
+        results = run_benchmarks(benchmarks, args.min_time, args.repeats)
+    finally:
+        fixtures.cleanup()
+
+    output = args.output or os.path.join(
+        BENCH_OUTPUT_DIR, datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + ".json"
+    )
+    save_results(results, output)
+
+    if args.compare:
+        slower = print_comparison(compare_results(results, load_results(args.compare), args.tolerance),
+                                  args.tolerance)
+        if slower:
+            print(f"\n📉 느려진 벤치마크 {slower}개")
+            return 1
+        print("\n✅ 느려진 벤치마크 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+세션/산출물 외부 저장소 모듈
+
+SESSION_BACKEND 설정에 따라 공용 저장소를 반환한다.
+- memory: 저장소 없음 (세션은 프로세스 메모리에만 존재)
+- sqlite: SQLite + 파일시스템 (LocalSessionBackend)
+"""
+import threading
+from typing import Optional
+
+from storage.base import SessionBackend
+from config import SESSION_BACKEND
+
+_session_backend: Optional[SessionBackend] = None
+_session_backend_lock = threading.Lock()
+
+
+def get_session_backend() -> Optional[SessionBackend]:
+    """공용 세션 저장소 반환 (memory 모드 또는 생성 실패 시 None)"""
+    global _session_backend
+    if SESSION_BACKEND == "memory":
+        return None
+
+    with _session_backend_lock:
+        if _session_backend is None:
+            try:
+                if SESSION_BACKEND == "sqlite":
+                    from storage.local_backend import LocalSessionBackend
+                    _session_backend = LocalSessionBackend()
+                else:
+                    print(f"⚠️ 알 수 없는 SESSION_BACKEND: {SESSION_BACKEND} (메모리 모드로 동작)")
+                    return None
+                print(f"🗄️ 세션 저장소 연결: {SESSION_BACKEND}")
+            except Exception as e:
+                print(f"⚠️ 세션 저장소 초기화 실패: {e}")
+                return None
+        return _session_backend
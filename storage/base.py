@@ -0,0 +1,65 @@
+"""
+세션/산출물 저장소 인터페이스
+
+구현체는 여러 워커 프로세스가 같은 저장소를 바라볼 수 있어야 한다.
+- 세션 레코드: JSON 직렬화 가능한 dict (revision으로 최신 여부 판단)
+- 산출물(artifact): 인코딩된 이미지 등 큰 바이트 데이터 (내용 해시 참조)
+- 공유 값: 벡터스토어 ID처럼 프로세스 간에 공유할 작은 문자열
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SessionBackend:
+    """세션/산출물 저장소 기본 클래스"""
+
+    def load_session(self, session_id: str, newer_than: Optional[int] = None) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        세션 레코드 조회
+
+        Args:
+            session_id (str): 세션 ID
+            newer_than (int, optional): 이 revision보다 새로운 경우만 반환
+
+        Returns:
+            (revision, 레코드) 또는 None
+        """
+        raise NotImplementedError
+
+    def save_session(self, session_id: str, record: Dict[str, Any]) -> int:
+        """세션 레코드 저장 후 새 revision 반환"""
+        raise NotImplementedError
+
+    def delete_session(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def list_sessions(self) -> List[str]:
+        raise NotImplementedError
+
+    def purge_expired(self, ttl_seconds: float) -> int:
+        """마지막 저장 후 ttl_seconds가 지난 세션 삭제 후 삭제 수 반환"""
+        raise NotImplementedError
+
+    def put_artifact(self, data: bytes, key: Optional[str] = None) -> str:
+        """
+        산출물 저장 후 참조 반환
+
+        Args:
+            data (bytes): 저장할 데이터
+            key (str, optional): 고정 키. 없으면 내용 해시(sha256)를 키로 사용
+        """
+        raise NotImplementedError
+
+    def get_artifact(self, ref: str) -> Optional[bytes]:
+        """산출물 조회 (없으면 None)"""
+        raise NotImplementedError
+
+    def get_shared(self, key: str) -> Optional[str]:
+        """프로세스 간 공유 값 조회"""
+        raise NotImplementedError
+
+    def set_shared(self, key: str, value: Optional[str]) -> None:
+        """프로세스 간 공유 값 저장 (None이면 삭제)"""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
@@ -0,0 +1,198 @@
+"""
+로컬 세션/산출물 저장소 (SQLite + 파일시스템)
+
+외부 서비스 없이 여러 워커 프로세스가 같은 디렉터리를 공유해
+세션을 이어받을 수 있게 한다.
+- 세션 레코드/공유 값: SQLite (WAL 모드, 프로세스 간 잠금은 SQLite가 처리)
+- 산출물: ARTIFACT_DIR/<앞 2글자>/<참조> 파일 (임시 파일 작성 후 교체)
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage.base import SessionBackend
+from config import SESSION_DB_PATH, ARTIFACT_DIR
+
+# 산출물 참조 형식 (경로 조작 방지)
+_ARTIFACT_REF_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+class LocalSessionBackend(SessionBackend):
+    """SQLite + 파일시스템 기반 세션/산출물 저장소"""
+
+    def __init__(self, db_path: str = SESSION_DB_PATH, artifact_dir: str = ARTIFACT_DIR):
+        self.db_path = db_path
+        self.artifact_dir = artifact_dir
+        os.makedirs(self.artifact_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                revision INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shared_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at)")
+        self._conn.commit()
+
+        # 지표
+        self.loads = 0
+        self.saves = 0
+        self.artifact_writes = 0
+        self.artifact_hits = 0
+
+    # ----------------------
+    # 세션 레코드
+    # ----------------------
+
+    def load_session(self, session_id: str, newer_than: Optional[int] = None) -> Optional[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            if newer_than is None:
+                row = self._conn.execute(
+                    "SELECT revision, data FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT revision, data FROM sessions WHERE session_id = ? AND revision > ?",
+                    (session_id, newer_than)
+                ).fetchone()
+        if row is None:
+            return None
+
+        revision, data = row
+        self.loads += 1
+        return revision, json.loads(data)
+
+    def save_session(self, session_id: str, record: Dict[str, Any]) -> int:
+        data = json.dumps(record, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            # 다른 프로세스와 revision이 겹치지 않도록 쓰기 잠금 후 증가
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT revision FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                revision = (row[0] if row else 0) + 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, data, revision, updated_at) VALUES (?, ?, ?, ?)",
+                    (session_id, data, revision, now)
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        self.saves += 1
+        return revision
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def list_sessions(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT session_id FROM sessions ORDER BY updated_at DESC").fetchall()
+        return [row[0] for row in rows]
+
+    def purge_expired(self, ttl_seconds: float) -> int:
+        if not ttl_seconds:
+            return 0
+        cutoff = time.time() - ttl_seconds
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+            self._conn.commit()
+        return cursor.rowcount or 0
+
+    # ----------------------
+    # 산출물
+    # ----------------------
+
+    def _artifact_path(self, ref: str) -> str:
+        if not _ARTIFACT_REF_PATTERN.match(ref):
+            raise ValueError(f"잘못된 산출물 참조: {ref}")
+        return os.path.join(self.artifact_dir, ref[:2], ref)
+
+    def put_artifact(self, data: bytes, key: Optional[str] = None) -> str:
+        ref = key or hashlib.sha256(data).hexdigest()
+        path = self._artifact_path(ref)
+
+        # 내용 해시 참조는 이미 있으면 다시 쓰지 않음
+        if key is None and os.path.exists(path):
+            return ref
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.artifact_writes += 1
+        return ref
+
+    def get_artifact(self, ref: str) -> Optional[bytes]:
+        try:
+            with open(self._artifact_path(ref), "rb") as f:
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        self.artifact_hits += 1
+        return data
+
+    # ----------------------
+    # 공유 값
+    # ----------------------
+
+    def get_shared(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM shared_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_shared(self, key: str, value: Optional[str]) -> None:
+        with self._lock:
+            if value is None:
+                self._conn.execute("DELETE FROM shared_state WHERE key = ?", (key,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO shared_state (key, value, updated_at) VALUES (?, ?, ?)",
+                    (key, value, time.time())
+                )
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            session_count = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "stored_sessions": session_count,
+            "loads": self.loads,
+            "saves": self.saves,
+            "artifact_writes": self.artifact_writes,
+            "artifact_hits": self.artifact_hits,
+        }
@@ -0,0 +1,15 @@
+"""
+관측(telemetry) 모듈
+
+- tracing: 요청 처리 구간(span) 추적, JSONL 기록 및 OTLP 내보내기
+- metrics: Prometheus/OpenMetrics 지표 (지연 시간, 토큰, 캐시 적중, 대기열)
+- metrics_api: Gradio 서버에 붙이는 /metrics 엔드포인트
+- log: 구조화 로그 (수준 제한, 빈번한 이벤트 샘플링, 큐 + 별도 출력 스레드)
+- profiling / profiling_api: 관리자 전용 tracemalloc 스냅샷 비교, 객체 수, 샘플링 CPU 프로파일 (/debug/profile)
+"""
+from telemetry.tracing import (
+    Span, TraceContext, collect_spans, current_span, current_trace_id, ensure_trace, new_trace, span, trace_exporter, trace_scope, traced
+)
+from telemetry.log import fields, get_log_stats, get_logger
+from telemetry.metrics import metrics_registry, observe_llm_call
+from telemetry.profiling import count_objects, cpu_sampler, memory_profiler
@@ -0,0 +1,28 @@
+"""
+관리용 HTTP 엔드포인트 공통 인증 (Authorization: Bearer <토큰>)
+
+작업 API(/jobs), 지표(/metrics), 프로파일링(/debug/profile) 라우터가 함께 쓴다.
+토큰은 UTF-8 바이트로 비교하므로 ASCII가 아닌 값이 와도 500이 아니라 401로 거절한다
+(hmac.compare_digest는 ASCII가 아닌 str끼리 비교하면 TypeError).
+"""
+import hmac
+from typing import Callable, Optional
+
+from fastapi import Header, HTTPException
+
+
+def token_matches(presented: str, expected: str) -> bool:
+    """상수 시간 토큰 비교 (설정된 토큰이 없으면 항상 False)"""
+    if not expected:
+        return False
+    return hmac.compare_digest(presented.encode("utf-8"), expected.encode("utf-8"))
+
+
+def bearer_token_guard(expected: str, detail: str) -> Callable:
+    """expected 토큰을 요구하는 FastAPI 의존성 (라우터 dependencies에 사용, 실패 시 401 detail)"""
+    def _require_token(authorization: Optional[str] = Header(None)) -> None:
+        # 토큰이 없으면 등록하지 않지만, 라우터를 직접 붙인 경우에도 열리지 않도록 다시 확인
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not token_matches(token.strip(), expected):
+            raise HTTPException(status_code=401, detail=detail)
+    return _require_token
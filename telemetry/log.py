@@ -0,0 +1,147 @@
+"""
+구조화 로그
+
+요청 경로의 print를 대신하는 로거. 요청 스레드는 기록을 큐에 넣기만 하고(QueueHandler)
+별도 스레드(QueueListener)가 stdout에 쓰므로 출력 I/O가 요청을 막지 않는다.
+- LOG_LEVEL로 수준 제한 (수준 미달 호출은 메시지를 만들지도 않음)
+- LOG_FORMAT=json이면 한 줄 JSON (시각, 수준, 로거, 메시지, 필드)
+- 빈번한 이벤트는 fields(sample="<종류>")로 표시하면 종류마다 LOG_SAMPLE_EVERY번에 한 번만 남김
+- 큐가 가득 차면 버리고 개수만 셈 (get_log_stats()의 dropped)
+
+사용 예:
+    logger = get_logger(__name__)
+    logger.debug("이미지 로드 성공: %s", name, extra=fields(size=image.size, mode=image.mode))
+"""
+import atexit
+import datetime
+import json
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLE_EVERY
+
+LOGGER_NAME = "uxeval"
+
+
+def fields(sample: Optional[str] = None, **values: Any) -> Dict[str, Any]:
+    """logging 호출의 extra 인자 (구조화 필드 + 샘플링 종류)"""
+    return {"fields": values, "sample": sample}
+
+
+class SamplingFilter(logging.Filter):
+    """sample 종류가 붙은 기록은 종류마다 every번에 한 번만 통과 (첫 기록은 항상 통과)"""
+
+    def __init__(self, every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = max(1, every)
+        self.suppressed = 0
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample", None)
+        if not key or self.every == 1:
+            return True
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+            if count % self.every:
+                self.suppressed += 1
+                return False
+        if count:
+            record.fields = {**(getattr(record, "fields", None) or {}), "sampled": f"1/{self.every}"}
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """큐가 가득 차면 기다리지 않고 버림"""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    """시각 수준 로거: 메시지 key=value ..."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extra = getattr(record, "fields", None)
+        if extra:
+            line += " " + " ".join(f"{key}={value}" for key, value in extra.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON (수집기에서 필드별로 검색)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_configure_lock = threading.Lock()
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_sampling_filter: Optional[SamplingFilter] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT) -> None:
+    """uxeval 로거에 큐 핸들러를 붙이고 출력 스레드 시작 (여러 번 불러도 한 번만)"""
+    global _queue_handler, _sampling_filter, _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+        log_queue: "queue.Queue" = queue.Queue(maxsize=max(1, LOG_QUEUE_SIZE))
+        _sampling_filter = SamplingFilter()
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        _queue_handler.addFilter(_sampling_filter)
+
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(getattr(logging, level, logging.INFO))
+        logger.addHandler(_queue_handler)
+        logger.propagate = False
+
+        _listener = QueueListener(log_queue, output)
+        _listener.start()
+        # 종료 시 큐에 남은 기록까지 출력
+        atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """uxeval.<모듈> 로거 (처음 부를 때 설정)"""
+    configure_logging()
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def get_log_stats() -> Dict[str, Any]:
+    return {
+        "level": logging.getLevelName(logging.getLogger(LOGGER_NAME).getEffectiveLevel()),
+        "format": LOG_FORMAT,
+        "queue_depth": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "sampled_out": _sampling_filter.suppressed if _sampling_filter else 0,
+    }
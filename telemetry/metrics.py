@@ -0,0 +1,278 @@
+"""
+Prometheus/OpenMetrics 지표
+
+- 호출마다 기록: 단계(dr_generation/evaluation/final_report) × 모델 × 모듈별 지연 시간 히스토그램,
+  response.usage 토큰 수(입력/출력/캐시된 입력/추론), 호출 결과(ok/error/cache_hit)
+- 수집 시 계산: 이미지/응답 캐시 적중률, 재시도, 헤지, 활성 세션 수, 대기열 깊이 (각 모듈의 get_stats)
+외부 라이브러리 없이 텍스트 형식으로 내보낸다 (GET /metrics, telemetry/metrics_api.py).
+"""
+import threading
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import METRICS_PREFIX, METRICS_LATENCY_BUCKETS
+from llm.call_log import usage_counts
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+TOKEN_TYPES = ("input", "output", "cached_input", "reasoning")
+
+
+class Sample(NamedTuple):
+    """지표 한 줄 (이름 접미사, 라벨, 값)"""
+    suffix: str
+    labels: Dict[str, str]
+    value: float
+
+
+class MetricFamily(NamedTuple):
+    """같은 이름의 지표 묶음 (수집 시 계산하는 지표용)"""
+    name: str
+    kind: str   # counter / gauge / histogram
+    help: str
+    samples: List[Sample]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """라벨별 누적 값"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            items = list(self._values.items())
+        samples = [Sample("_total", dict(zip(self.label_names, key)), value) for key, value in items]
+        return MetricFamily(self.name, "counter", self.help, samples)
+
+
+class Histogram:
+    """라벨별 누적 구간 분포 (_bucket, _sum, _count)"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Iterable[float]):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = sorted(buckets) + [float("inf")]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # 구간별 개수 + [합계]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 1)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        samples: List[Sample] = []
+        for key, series in items:
+            labels = dict(zip(self.label_names, key))
+            for bound, count in zip(self.buckets, series):
+                samples.append(Sample("_bucket", {**labels, "le": _format_value(bound)}, count))
+            samples.append(Sample("_sum", labels, series[-1]))
+            samples.append(Sample("_count", labels, series[len(self.buckets) - 1]))
+        return MetricFamily(self.name, "histogram", self.help, samples)
+
+
+class MetricsRegistry:
+    """호출마다 기록하는 지표 + 수집 시 계산하는 지표를 텍스트로 내보냄"""
+
+    def __init__(self, prefix: str = METRICS_PREFIX):
+        self.prefix = prefix
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], List[MetricFamily]]] = []
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                  buckets: Iterable[float] = METRICS_LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[MetricFamily]]) -> None:
+        """수집 시 호출할 함수 등록 (실패해도 다른 지표는 내보냄)"""
+        self._collectors.append(collector)
+
+    def collect(self) -> List[MetricFamily]:
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                print(f"⚠️ 지표 수집 실패 ({getattr(collector, '__name__', collector)}): {e}")
+        return families
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Prometheus 텍스트 형식 (openmetrics=True면 OpenMetrics 1.0)"""
+        lines: List[str] = []
+        for family in self.collect():
+            # 카운터 메타데이터 이름: Prometheus 형식은 _total 포함, OpenMetrics는 제외
+            meta_name = f"{family.name}_total" if family.kind == "counter" and not openmetrics else family.name
+            lines.append(f"# HELP {meta_name} {_escape(family.help)}")
+            lines.append(f"# TYPE {meta_name} {family.kind}")
+            for sample in family.samples:
+                label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in sample.labels.items())
+                name = f"{family.name}{sample.suffix}"
+                lines.append(f"{name}{{{label_text}}} {_format_value(sample.value)}" if label_text
+                             else f"{name} {_format_value(sample.value)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스 공용 지표
+metrics_registry = MetricsRegistry()
+
+stage_latency = metrics_registry.histogram(
+    "stage_latency_seconds", "단계 호출 지연 시간 (응답 캐시 적중 제외)", ("stage", "model", "module")
+)
+llm_calls = metrics_registry.counter(
+    "llm_calls", "단계 호출 수 (outcome: ok/error/cache_hit)", ("stage", "model", "module", "outcome")
+)
+llm_tokens = metrics_registry.counter(
+    "llm_tokens", "response.usage 토큰 수 (type: input/output/cached_input/reasoning)", ("stage", "model", "module", "type")
+)
+
+
+def observe_llm_call(stage: str, model: Optional[str], module: Optional[str], seconds: float,
+                     response: Any = None, error: Optional[BaseException] = None) -> None:
+    """create_response 호출 하나 기록"""
+    labels = {"stage": stage, "model": model or "", "module": module or ""}
+    if error is not None:
+        llm_calls.inc(outcome="error", **labels)
+        return
+    if getattr(response, "from_cache", False):
+        llm_calls.inc(outcome="cache_hit", **labels)
+        return
+    llm_calls.inc(outcome="ok", **labels)
+    stage_latency.observe(seconds, **labels)
+    for token_type, count in zip(TOKEN_TYPES, usage_counts(response)):
+        if count:
+            llm_tokens.inc(count, type=token_type, **labels)
+
+
+def _gauge(name: str, help_text: str, value: float, labels: Optional[Dict[str, str]] = None) -> MetricFamily:
+    return MetricFamily(f"{METRICS_PREFIX}_{name}", "gauge", help_text, [Sample("", labels or {}, value)])
+
+
+def _counter(name: str, help_text: str, value: float) -> MetricFamily:
+    return MetricFamily(f"{METRICS_PREFIX}_{name}", "counter", help_text, [Sample("_total", {}, value)])
+
+
+def _ratio(hits: int, misses: int) -> float:
+    lookups = hits + misses
+    return hits / lookups if lookups else 0.0
+
+
+def collect_cache_metrics() -> List[MetricFamily]:
+    """이미지 base64 캐시와 응답 캐시 적중"""
+    from llm.pipeline import get_response_cache_stats
+    from utils import get_cache_info
+
+    image = get_cache_info()
+    families = [
+        _counter("image_cache_hits", "이미지 base64 캐시 적중", image["hits"]),
+        _counter("image_cache_misses", "이미지 base64 캐시 미스 (새로 인코딩)", image["misses"]),
+        _gauge("image_cache_hit_ratio", "이미지 base64 캐시 적중률", _ratio(image["hits"], image["misses"])),
+        _gauge("image_cache_entries", "캐시된 이미지 수", image["cached_images"]),
+    ]
+    response = get_response_cache_stats()
+    if response.get("enabled"):
+        families += [
+            _counter("response_cache_hits", "응답 캐시 적중", response["hits"]),
+            _counter("response_cache_misses", "응답 캐시 미스", response["misses"]),
+            _gauge("response_cache_hit_ratio", "응답 캐시 적중률", response["hit_rate"]),
+            _gauge("response_cache_bytes", "응답 캐시 크기 (바이트)", response["total_bytes"]),
+        ]
+    return families
+
+
+def collect_upstream_metrics() -> List[MetricFamily]:
+    """재시도, 헤지, 병합, 업스트림 대기열"""
+    from llm.pipeline import (
+        get_background_stats, get_governor_stats, get_hedging_stats, get_scheduler_stats, get_singleflight_stats
+    )
+
+    governor = get_governor_stats()
+    hedging = get_hedging_stats()
+    singleflight = get_singleflight_stats()
+    scheduler = get_scheduler_stats()
+    background = get_background_stats()
+    queue_depth = MetricFamily(
+        f"{METRICS_PREFIX}_upstream_queue_depth", "gauge", "업스트림 호출 슬롯 대기 수 (우선순위별)",
+        [Sample("", {"priority": priority}, depth) for priority, depth in scheduler["queue_depth_by_priority"].items()]
+    )
+    return [
+        _counter("upstream_calls", "업스트림 호출 수 (재시도는 upstream_retries)", governor["calls"]),
+        _counter("upstream_retries", "일시적 오류 재시도", governor["retries"]),
+        _counter("upstream_failures", "재시도 후에도 실패한 호출", governor["failures"]),
+        _counter("upstream_throttle_seconds", "호출량 조절로 기다린 시간 (초)", governor["throttle_seconds"]),
+        _gauge("upstream_active", "진행 중인 업스트림 호출", governor["active"]),
+        _gauge("upstream_concurrency_limit", "업스트림 동시 호출 상한", governor["concurrency_limit"]),
+        queue_depth,
+        _counter("hedged_requests", "헤지 요청 수", hedging["hedges"]),
+        _counter("coalesced_requests", "진행 중 동일 요청에 병합된 호출", singleflight["coalesced"]),
+        _gauge("background_pending", "완료를 기다리는 백그라운드 응답", background["pending"]),
+    ]
+
+
+def collect_session_metrics() -> List[MetricFamily]:
+    """활성 세션, Gradio 이벤트 대기열, 작업 API 대기열"""
+    from ui.admission import get_admission_stats
+    from ui.session_store import session_store
+
+    families = [_gauge("active_sessions", "메모리에 있는 세션 수", session_store.count())]
+    admission = get_admission_stats()
+    families.append(MetricFamily(
+        f"{METRICS_PREFIX}_event_queue_depth", "gauge", "입장을 기다리는 Gradio 이벤트 (이벤트 종류별)",
+        [Sample("", {"event_class": event_class}, stats["waiting"]) for event_class, stats in admission.items()]
+    ))
+    families.append(MetricFamily(
+        f"{METRICS_PREFIX}_event_active", "gauge", "실행 중인 Gradio 이벤트 (이벤트 종류별)",
+        [Sample("", {"event_class": event_class}, stats["active"]) for event_class, stats in admission.items()]
+    ))
+
+    # 작업 API는 워커를 시작한 프로세스에서만 (대기열 DB를 새로 만들지 않도록)
+    from jobs import get_job_queue, get_job_worker_pool
+    if get_job_worker_pool() is not None:
+        counts = get_job_queue().get_stats()
+        families.append(MetricFamily(
+            f"{METRICS_PREFIX}_jobs", "gauge", "작업 API 작업 수 (상태별)",
+            [Sample("", {"status": status}, count) for status, count in counts.items()]
+        ))
+    return families
+
+
+for _collector in (collect_cache_metrics, collect_upstream_metrics, collect_session_metrics):
+    metrics_registry.add_collector(_collector)
@@ -0,0 +1,38 @@
+"""
+지표 엔드포인트 (GET /metrics)
+
+Gradio 서버(FastAPI)에 Prometheus 수집 엔드포인트를 추가한다.
+Accept 헤더에 application/openmetrics-text가 있으면 OpenMetrics 1.0 형식으로 응답한다.
+METRICS_ENABLED=1이고 METRICS_TOKEN이 설정된 경우에만 등록되며, Authorization: Bearer <토큰> 헤더가 필요하다.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, FastAPI, Header
+from fastapi.responses import Response
+
+from config import METRICS_TOKEN
+from telemetry.api_auth import bearer_token_guard
+from telemetry.metrics import OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE, metrics_registry
+
+
+_require_token = bearer_token_guard(METRICS_TOKEN, "유효한 지표 토큰이 필요합니다.")
+
+router = APIRouter(tags=["metrics"], dependencies=[Depends(_require_token)])
+
+
+@router.get("/metrics")
+def get_metrics(accept: Optional[str] = Header(None)) -> Response:
+    openmetrics = "application/openmetrics-text" in (accept or "")
+    return Response(
+        content=metrics_registry.render(openmetrics=openmetrics),
+        media_type=OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+def register_metrics_api(app: FastAPI) -> bool:
+    """Gradio 서버 앱에 /metrics 등록 (토큰이 없으면 등록하지 않음)"""
+    if not METRICS_TOKEN:
+        print("⚠️ METRICS_ENABLED=1이지만 METRICS_TOKEN이 없어 지표 엔드포인트를 등록하지 않습니다.")
+        return False
+    app.include_router(router)
+    return True
@@ -0,0 +1,305 @@
+"""
+운영 중 프로파일링 (관리자 전용)
+
+실행 중인 서버 프로세스의 메모리/CPU 사용을 들여다보는 도구. 엔드포인트는 telemetry/profiling_api.py.
+- MemoryProfiler: tracemalloc 시작/중지, 스냅샷 보관(PROFILING_MAX_SNAPSHOTS개), 두 스냅샷 비교
+- count_objects(): PIL 이미지, 에이전트 인스턴스, 대화 히스토리 메시지 수 (세션이 참조하지 않는 객체도 gc로 찾음)
+- CpuSampler: N초 동안 모든 스레드의 호출 스택을 주기적으로 샘플링 (함수별 self/누적 샘플, flamegraph용 접힌 스택)
+"""
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from config import (
+    PROFILING_TRACEMALLOC_FRAMES, PROFILING_MAX_SNAPSHOTS, PROFILING_MAX_CPU_SECONDS, PROFILING_SAMPLE_INTERVAL
+)
+
+# tracemalloc 자체와 임포트 기계의 할당은 결과에서 뺌
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+SNAPSHOT_GROUP_BY = ("lineno", "filename", "traceback")
+AGENT_CLASSES = ("DRGeneratorAgent", "EvaluatorAgent", "FinalReportAgent")
+
+
+class SnapshotInfo(NamedTuple):
+    """보관 중인 tracemalloc 스냅샷"""
+    snapshot_id: int
+    label: str
+    taken_at: float
+    traced_bytes: int
+    peak_bytes: int
+
+
+class ProfilingError(Exception):
+    """프로파일링 요청을 처리할 수 없음 (tracemalloc 꺼짐, 없는 스냅샷, CPU 프로파일 중복 등)"""
+
+
+def _frame_label(frame) -> str:
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _stat_record(stat, group_by: str) -> Dict[str, Any]:
+    record = {
+        "location": _frame_label(stat.traceback[0]),
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if group_by == "traceback":
+        record["traceback"] = [_frame_label(frame) for frame in stat.traceback]
+    return record
+
+
+def _diff_record(stat, group_by: str) -> Dict[str, Any]:
+    record = _stat_record(stat, group_by)
+    record["size_diff_bytes"] = stat.size_diff
+    record["count_diff"] = stat.count_diff
+    return record
+
+
+class MemoryProfiler:
+    """tracemalloc 스냅샷 관리 (스레드 안전)"""
+
+    def __init__(self, max_snapshots: int = PROFILING_MAX_SNAPSHOTS):
+        self.max_snapshots = max(1, max_snapshots)
+        self._lock = threading.Lock()
+        self._snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+        self._infos: Dict[int, SnapshotInfo] = {}
+        self._next_id = 1
+        self._started_here = False
+
+    def start(self, frames: int = PROFILING_TRACEMALLOC_FRAMES) -> Dict[str, Any]:
+        """할당 추적 시작 (이미 켜져 있으면 그대로). 켜는 동안은 할당마다 비용이 들어 필요할 때만 켠다."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(1, frames))
+                self._started_here = True
+                print(f"🩺 tracemalloc 시작 (스택 {max(1, frames)}단계)")
+        return self.get_stats()
+
+    def stop(self) -> Dict[str, Any]:
+        """할당 추적 중지 (보관 중인 스냅샷은 남김)"""
+        with self._lock:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+                print("🩺 tracemalloc 중지")
+            self._started_here = False
+        return self.get_stats()
+
+    def take_snapshot(self, label: str = "", limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        """스냅샷을 찍어 보관하고 할당 상위 위치를 반환"""
+        if group_by not in SNAPSHOT_GROUP_BY:
+            raise ProfilingError(f"group_by는 {', '.join(SNAPSHOT_GROUP_BY)} 중 하나여야 합니다.")
+        if not tracemalloc.is_tracing():
+            raise ProfilingError("tracemalloc이 꺼져 있습니다. 먼저 추적을 시작하세요.")
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        traced, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            info = SnapshotInfo(self._next_id, label, time.time(), traced, peak)
+            self._next_id += 1
+            self._snapshots[info.snapshot_id] = snapshot
+            self._infos[info.snapshot_id] = info
+            while len(self._snapshots) > self.max_snapshots:
+                dropped, _ = self._snapshots.popitem(last=False)
+                self._infos.pop(dropped, None)
+        top = snapshot.statistics(group_by)[:max(1, limit)]
+        return {**info._asdict(), "top": [_stat_record(stat, group_by) for stat in top]}
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [info._asdict() for info in self._infos.values()]
+
+    def _get(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            raise ProfilingError(f"스냅샷 {snapshot_id}이(가) 없습니다 (보관 중: {list(self._snapshots)}).")
+        return snapshot
+
+    def diff(self, base_id: int, target_id: Optional[int] = None, limit: int = 20,
+             group_by: str = "lineno") -> Dict[str, Any]:
+        """두 스냅샷 비교 (target_id가 없으면 가장 최근 스냅샷), 증가량이 큰 위치부터"""
+        if group_by not in SNAPSHOT_GROUP_BY:
+            raise ProfilingError(f"group_by는 {', '.join(SNAPSHOT_GROUP_BY)} 중 하나여야 합니다.")
+        with self._lock:
+            if target_id is None:
+                if not self._snapshots:
+                    raise ProfilingError("보관 중인 스냅샷이 없습니다.")
+                target_id = next(reversed(self._snapshots))
+            base, target = self._get(base_id), self._get(target_id)
+        stats = target.compare_to(base, group_by)
+        return {
+            "base": base_id,
+            "target": target_id,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "count_diff": sum(stat.count_diff for stat in stats),
+            "top": [_diff_record(stat, group_by) for stat in stats[:max(1, limit)]],
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        traced, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with self._lock:
+            return {
+                "tracing": tracing,
+                "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+                "traced_bytes": traced,
+                "peak_bytes": peak,
+                "overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+                "snapshots": len(self._snapshots),
+                "started_here": self._started_here,
+            }
+
+
+def _history_bytes(history) -> int:
+    from ui.session_store import _estimate_history_bytes
+    return _estimate_history_bytes(history)
+
+
+def count_objects() -> Dict[str, Any]:
+    """
+    메모리를 많이 쓰는 객체 수
+
+    gc가 추적하는 모든 객체를 훑으므로 세션이 더 이상 참조하지 않는(새는) 객체도 잡힌다.
+    객체 수에 비례해 시간이 걸리므로 자주 호출하지 않는다.
+    """
+    from ui.session_store import session_store
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+
+    started = time.perf_counter()
+    images = 0
+    image_pixel_bytes = 0
+    agents: Counter = Counter()
+    agent_objects = []
+    for obj in gc.get_objects():
+        # isinstance는 __class__를 읽어 지연 임포트 프록시(openai 등)를 깨우므로 type()으로 판별
+        obj_type = type(obj)
+        if Image is not None and issubclass(obj_type, Image.Image):
+            images += 1
+            width, height = obj.size
+            image_pixel_bytes += width * height * len(obj.getbands())
+        elif obj_type.__name__ in AGENT_CLASSES:
+            agents[obj_type.__name__] += 1
+            agent_objects.append(obj)
+
+    history_messages = sum(len(getattr(agent, "conversation_history", None) or []) for agent in agent_objects)
+    history_bytes = sum(_history_bytes(getattr(agent, "conversation_history", None)) for agent in agent_objects)
+
+    # 세션이 잡고 있는 것 (gc 결과와의 차이가 새는 객체)
+    states = session_store.all_states()
+    session_agents = [
+        agent for state in states
+        for agent in (state.current_dr_agent, state.current_eval_agent, state.final_report_agent)
+        if agent is not None
+    ]
+    session_images = sum(len(state.current_images or []) for state in states)
+    return {
+        "pil_images": {
+            "total": images,
+            "held_by_sessions": session_images,
+            "estimated_pixel_bytes": image_pixel_bytes,
+        },
+        "agents": {
+            "total": sum(agents.values()),
+            "by_class": dict(agents),
+            "held_by_sessions": len(session_agents),
+        },
+        "history_messages": {
+            "total": history_messages,
+            "estimated_bytes": history_bytes,
+            "held_by_sessions": sum(len(agent.conversation_history or []) for agent in session_agents),
+        },
+        "sessions": len(states),
+        "gc_objects": len(gc.get_objects()),
+        "gc_counts": list(gc.get_count()),
+        "scan_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _function_label(code) -> str:
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class CpuSampler:
+    """
+    샘플링 CPU 프로파일러
+
+    sys._current_frames()로 모든 스레드의 현재 스택을 interval마다 읽는다. 프로파일러를 거는 방식이 아니어서
+    요청 처리 속도에 거의 영향을 주지 않는다. 대기(락, 소켓, sleep) 중인 스레드도 샘플에 잡히므로
+    top_self의 맨 안쪽 함수로 어디서 기다리는지도 알 수 있다. 동시에 하나만 실행한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float, interval: float = PROFILING_SAMPLE_INTERVAL, limit: int = 30) -> Dict[str, Any]:
+        seconds = min(max(seconds, interval), PROFILING_MAX_CPU_SECONDS)
+        interval = max(interval, 0.001)
+        if not self._lock.acquire(blocking=False):
+            raise ProfilingError("CPU 프로파일이 이미 실행 중입니다.")
+        try:
+            return self._sample(seconds, interval, limit)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, limit: int) -> Dict[str, Any]:
+        # 샘플링하는 스레드(요청 처리 스레드)는 기다리기만 하므로 뺌
+        own_thread = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        stacks: Counter = Counter()
+        threads: Counter = Counter()
+        samples = 0
+        process_cpu_started = time.process_time()
+        started = time.perf_counter()
+        deadline = started + seconds
+        print(f"🩺 CPU 샘플링 시작 ({seconds:.1f}초, 간격 {interval * 1000:.1f}ms)")
+
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if not codes:
+                    continue
+                labels = [_function_label(code) for code in reversed(codes)]
+                thread_name = names.get(thread_id) or str(thread_id)
+                self_counts[labels[-1]] += 1
+                for label in set(labels):
+                    total_counts[label] += 1
+                stacks[";".join([thread_name] + labels)] += 1
+                threads[thread_name] += 1
+            samples += 1
+            time.sleep(interval)
+
+        wall = time.perf_counter() - started
+        print(f"🩺 CPU 샘플링 완료 ({samples}회)")
+        return {
+            "seconds": round(wall, 3),
+            "interval": interval,
+            "samples": samples,
+            # 프로세스 CPU 시간 / 경과 시간 (1.0 = 코어 하나를 꽉 씀, 샘플링 스레드 자체 비용 포함)
+            "process_cpu_ratio": round((time.process_time() - process_cpu_started) / wall, 3) if wall else 0.0,
+            "threads": dict(threads.most_common()),
+            "top_self": [{"function": label, "samples": count} for label, count in self_counts.most_common(limit)],
+            "top_total": [{"function": label, "samples": count} for label, count in total_counts.most_common(limit)],
+            # flamegraph.pl / speedscope에 바로 넣을 수 있는 접힌 스택 ("스레드;바깥;...;안쪽 횟수")
+            "collapsed": [f"{stack} {count}" for stack, count in stacks.most_common()],
+        }
+
+
+memory_profiler = MemoryProfiler()
+cpu_sampler = CpuSampler()
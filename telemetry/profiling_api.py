@@ -0,0 +1,91 @@
+"""
+관리자 전용 프로파일링 엔드포인트 (/debug/profile)
+
+PROFILING_ENABLED=1이고 PROFILING_TOKEN이 설정된 경우에만 등록되며, 모든 요청에 Authorization: Bearer <토큰>이 필요하다.
+- GET  /debug/profile/memory                : tracemalloc 상태 (추적 중 여부, 추적 중인 메모리, 보관 스냅샷 수)
+- POST /debug/profile/memory/start?frames=N : 할당 추적 시작
+- POST /debug/profile/memory/stop           : 할당 추적 중지
+- POST /debug/profile/memory/snapshots      : 스냅샷을 찍어 보관하고 할당 상위 위치 반환
+- GET  /debug/profile/memory/snapshots      : 보관 중인 스냅샷 목록
+- GET  /debug/profile/memory/diff?base=1&target=2 : 두 스냅샷 비교 (target 생략 시 최근 스냅샷)
+- GET  /debug/profile/objects               : PIL 이미지, 에이전트, 대화 히스토리 메시지 수
+- POST /debug/profile/cpu?seconds=N         : N초 동안 샘플링 CPU 프로파일 (format=collapsed면 flamegraph용 텍스트)
+"""
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from config import PROFILING_TOKEN, PROFILING_TRACEMALLOC_FRAMES, PROFILING_MAX_CPU_SECONDS, PROFILING_SAMPLE_INTERVAL
+from telemetry.api_auth import bearer_token_guard
+from telemetry.profiling import ProfilingError, count_objects, cpu_sampler, memory_profiler
+
+
+_require_token = bearer_token_guard(PROFILING_TOKEN, "유효한 프로파일링 토큰이 필요합니다.")
+
+router = APIRouter(prefix="/debug/profile", tags=["profiling"], dependencies=[Depends(_require_token)])
+
+
+@router.get("/memory")
+def get_memory_status() -> Dict[str, Any]:
+    return memory_profiler.get_stats()
+
+
+@router.post("/memory/start")
+def start_memory_tracing(frames: int = Query(PROFILING_TRACEMALLOC_FRAMES, ge=1, le=100)) -> Dict[str, Any]:
+    return memory_profiler.start(frames)
+
+
+@router.post("/memory/stop")
+def stop_memory_tracing() -> Dict[str, Any]:
+    return memory_profiler.stop()
+
+
+@router.post("/memory/snapshots")
+def take_memory_snapshot(label: str = "", limit: int = Query(20, ge=1, le=500),
+                         group_by: str = "lineno") -> Dict[str, Any]:
+    try:
+        return memory_profiler.take_snapshot(label, limit, group_by)
+    except ProfilingError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/memory/snapshots")
+def list_memory_snapshots() -> List[Dict[str, Any]]:
+    return memory_profiler.list_snapshots()
+
+
+@router.get("/memory/diff")
+def diff_memory_snapshots(base: int, target: Optional[int] = None, limit: int = Query(20, ge=1, le=500),
+                          group_by: str = "lineno") -> Dict[str, Any]:
+    try:
+        return memory_profiler.diff(base, target, limit, group_by)
+    except ProfilingError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/objects")
+def get_object_counts() -> Dict[str, Any]:
+    return count_objects()
+
+
+@router.post("/cpu")
+def profile_cpu(seconds: float = Query(10.0, gt=0, le=PROFILING_MAX_CPU_SECONDS),
+                interval: float = Query(PROFILING_SAMPLE_INTERVAL, ge=0.001, le=1.0),
+                limit: int = Query(30, ge=1, le=500), format: str = "json"):
+    try:
+        result = cpu_sampler.sample(seconds, interval, limit)
+    except ProfilingError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "collapsed":
+        return PlainTextResponse("\n".join(result["collapsed"]) + "\n")
+    return result
+
+
+def register_profiling_api(app: FastAPI) -> bool:
+    """Gradio 서버 앱에 /debug/profile 등록 (토큰이 없으면 등록하지 않음)"""
+    if not PROFILING_TOKEN:
+        print("⚠️ PROFILING_ENABLED=1이지만 PROFILING_TOKEN이 없어 프로파일링 엔드포인트를 등록하지 않습니다.")
+        return False
+    app.include_router(router)
+    return True
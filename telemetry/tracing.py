@@ -0,0 +1,351 @@
+"""
+구간(span) 추적
+
+요청 처리 경로(이미지 변환/인코딩, 프롬프트 로드, 요청 구성, 모델 호출, JSON 파싱, 파일 저장,
+벡터스토어 작업)를 중첩 구간으로 기록한다.
+- 추적 ID: 세션의 요청(Gradio 이벤트, 일괄 작업 하나)마다 새로 발급, 구간에 세션 ID와 함께 남김
+- 부모 구간은 contextvars 로 전달 (call_scope/헤지 작업 스레드도 컨텍스트를 복사하므로 이어짐)
+- 기록은 큐에 넣기만 하고 백그라운드 스레드가 JSONL 파일(크기 순환)과 OTLP 수집기로 내보냄
+TRACING_ENABLED=0이면 span()은 아무것도 하지 않는 객체를 돌려준다 (collect_spans() 범위 안은 예외, 세션 성능 패널용).
+"""
+import atexit
+import contextvars
+import datetime
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from config import (
+    TRACING_ENABLED, TRACE_FILE, TRACE_MAX_BYTES, TRACE_BACKUP_COUNT, TRACE_QUEUE_SIZE,
+    TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME
+)
+
+FLUSH_INTERVAL = 1.0  # 초
+OTLP_BATCH_SIZE = 512
+
+
+class TraceContext(NamedTuple):
+    """요청 하나의 상관관계 ID"""
+    trace_id: str
+    session_id: Optional[str]
+
+
+class Span:
+    """진행 중 또는 끝난 구간"""
+
+    __slots__ = ("name", "trace_id", "session_id", "span_id", "parent_id", "start_time", "_started",
+                 "duration", "attributes", "error")
+
+    def __init__(self, name: str, trace: TraceContext, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace.trace_id
+        self.session_id = trace.session_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.error = ""
+
+    def set(self, **attributes: Any) -> None:
+        """속성 추가 (모델, 토큰 수, 캐시 적중 등)"""
+        self.attributes.update(attributes)
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "session_id": self.session_id,
+            "name": self.name,
+            "start": datetime.datetime.fromtimestamp(self.start_time).isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": "error" if self.error else "ok",
+            "error": self.error or None,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """추적이 꺼져 있을 때의 구간 (속성 설정을 무시)"""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_trace: contextvars.ContextVar = contextvars.ContextVar("trace_context", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_span_collectors: contextvars.ContextVar = contextvars.ContextVar("span_collectors", default=())
+
+
+def new_trace(session_id: Optional[str] = None) -> TraceContext:
+    """현재 컨텍스트에 새 추적 ID 연결 (요청 시작 시)"""
+    trace = TraceContext(uuid.uuid4().hex, session_id)
+    _trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def ensure_trace(session_id: Optional[str] = None) -> TraceContext:
+    """이 컨텍스트에 같은 세션의 추적이 없으면 새로 시작 (Gradio 이벤트마다 컨텍스트가 새로 만들어짐)"""
+    trace = _trace.get()
+    if trace is None or trace.session_id != session_id:
+        trace = new_trace(session_id)
+    return trace
+
+
+@contextmanager
+def trace_scope(session_id: Optional[str] = None) -> Iterator[TraceContext]:
+    """범위 안을 새 추적으로 묶음 (일괄 작업 등 Gradio 밖의 요청)"""
+    trace_reset = _trace.set(TraceContext(uuid.uuid4().hex, session_id))
+    span_reset = _current_span.set(None)
+    try:
+        yield _trace.get()
+    finally:
+        _current_span.reset(span_reset)
+        _trace.reset(trace_reset)
+
+
+def current_span():
+    """진행 중인 구간 (없거나 추적이 꺼져 있으면 속성 설정을 무시하는 객체)"""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+@contextmanager
+def collect_spans() -> Iterator[List[Span]]:
+    """범위 안에서 끝난 구간 목록 (TRACING_ENABLED와 무관하게 수집, 중첩 가능)"""
+    spans: List[Span] = []
+    reset = _span_collectors.set(_span_collectors.get() + (spans,))
+    try:
+        yield spans
+    finally:
+        _span_collectors.reset(reset)
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """
+    구간 기록
+
+    사용 예:
+        with span("llm.call", stage="evaluation") as s:
+            response = ...
+            s.set(output_tokens=...)
+    """
+    collectors = _span_collectors.get()
+    if not TRACING_ENABLED and not collectors:
+        yield _NOOP_SPAN
+        return
+    trace = _trace.get()
+    if trace is None:
+        # 요청 밖(앱 시작 시 벡터스토어 준비 등)이면 이 구간부터 새 추적
+        trace = TraceContext(uuid.uuid4().hex, None)
+        trace_reset = _trace.set(trace)
+    else:
+        trace_reset = None
+    parent = _current_span.get()
+    current = Span(name, trace, parent.span_id if parent is not None else None, attributes)
+    span_reset = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - current._started
+        _current_span.reset(span_reset)
+        if trace_reset is not None:
+            _trace.reset(trace_reset)
+        for spans in collectors:
+            spans.append(current)
+        if TRACING_ENABLED:
+            trace_exporter.submit(current)
+
+
+def traced(name: str, **attributes: Any) -> Callable:
+    """함수 전체를 구간으로 기록하는 데코레이터 (generator 함수는 끝까지 실행되는 동안을 기록)"""
+    def decorator(fn: Callable) -> Callable:
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def steps_wrapper(*args, **kwargs):
+                if not TRACING_ENABLED and not _span_collectors.get():
+                    return (yield from fn(*args, **kwargs))
+                with span(name, **attributes):
+                    return (yield from fn(*args, **kwargs))
+            return steps_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED and not _span_collectors.get():
+                return fn(*args, **kwargs)
+            with span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp_span(record_span: Span) -> Dict[str, Any]:
+    """구간 → OTLP/JSON span"""
+    start_ns = int(record_span.start_time * 1e9)
+    attributes = dict(record_span.attributes)
+    if record_span.session_id:
+        attributes["session.id"] = record_span.session_id
+    otlp = {
+        "traceId": record_span.trace_id,
+        "spanId": record_span.span_id,
+        "name": record_span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(start_ns + int((record_span.duration or 0) * 1e9)),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None],
+        "status": {"code": 2, "message": record_span.error} if record_span.error else {"code": 1},
+    }
+    if record_span.parent_id:
+        otlp["parentSpanId"] = record_span.parent_id
+    return otlp
+
+
+class TraceExporter:
+    """끝난 구간을 큐에 모아 백그라운드 스레드에서 JSONL 파일/OTLP 수집기로 내보냄"""
+
+    def __init__(self, path: str = TRACE_FILE, max_bytes: int = TRACE_MAX_BYTES, backup_count: int = TRACE_BACKUP_COUNT,
+                 queue_size: int = TRACE_QUEUE_SIZE, otlp_endpoint: str = TRACE_OTLP_ENDPOINT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.otlp_endpoint = otlp_endpoint
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._otlp_client = None
+        self.exported = 0
+        self.dropped = 0
+        self.otlp_failures = 0
+
+    def submit(self, finished: Span) -> None:
+        """요청 스레드에서 호출 (막지 않음, 큐가 가득 차면 버림)"""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="trace-exporter", daemon=True)
+                self._thread.start()
+                # 데몬 스레드라 종료 시 남은 구간을 기록하고 끝나도록
+                atexit.register(self.flush)
+
+    def _loop(self) -> None:
+        while True:
+            batch: List[Span] = []
+            try:
+                batch.append(self._queue.get(timeout=FLUSH_INTERVAL))
+                while len(batch) < OTLP_BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self._export(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+    def _export(self, batch: List[Span]) -> None:
+        try:
+            self._write_jsonl(batch)
+        except OSError as e:
+            print(f"⚠️ 추적 기록 실패: {e}")
+        if self.otlp_endpoint:
+            self._send_otlp(batch)
+        self.exported += len(batch)
+
+    def _write_jsonl(self, batch: List[Span]) -> None:
+        lines = "".join(json.dumps(s.to_record(), ensure_ascii=False, default=str) + "\n" for s in batch)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.max_bytes > 0 and os.path.exists(self.path) and os.path.getsize(self.path) + len(lines) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def _rotate(self) -> None:
+        """spans.jsonl → spans.jsonl.1 → ... → spans.jsonl.<backup_count> (가장 오래된 것 삭제)"""
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _send_otlp(self, batch: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "telemetry.tracing"}, "spans": [to_otlp_span(s) for s in batch]}],
+            }]
+        }
+        try:
+            if self._otlp_client is None:
+                import httpx
+                self._otlp_client = httpx.Client(timeout=5.0)
+            response = self._otlp_client.post(self.otlp_endpoint, json=payload)
+            response.raise_for_status()
+        except Exception as e:
+            self.otlp_failures += 1
+            # 수집기가 꺼져 있을 때 로그가 넘치지 않도록 처음과 100번마다만 알림
+            if self.otlp_failures == 1 or self.otlp_failures % 100 == 0:
+                print(f"⚠️ OTLP 추적 전송 실패 ({self.otlp_failures}회): {e}")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """대기 중인 구간을 모두 내보낼 때까지 대기 (종료 시 자동 호출)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return not self._queue.unfinished_tasks
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": TRACING_ENABLED,
+            "file": self.path,
+            "otlp_endpoint": self.otlp_endpoint or None,
+            "exported": self.exported,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "otlp_failures": self.otlp_failures,
+        }
+
+
+# 프로세스 공용 내보내기
+trace_exporter = TraceExporter()
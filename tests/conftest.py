@@ -0,0 +1,84 @@
+"""
+pytest 공용 설정
+
+config는 import 시점에 환경변수를 읽으므로 저장소 모듈을 import하기 전에
+캐시/세션/산출물/배치 경로를 임시 디렉터리로 돌리고 실제 API 키 대신 모의 키를 쓴다.
+OpenAI 클라이언트는 mock_llm_server 픽스처가 띄우는 모의 서버를 가리킨다.
+"""
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+_WORK_DIR = tempfile.mkdtemp(prefix="design-review-tests-")
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+MOCK_PORT = _free_port()
+
+os.environ.update({
+    "RESPONSE_CACHE_PATH": os.path.join(_WORK_DIR, "response_cache.sqlite3"),
+    "SESSION_BACKEND": "memory",
+    "SESSION_DB_PATH": os.path.join(_WORK_DIR, "session_store.sqlite3"),
+    "ARTIFACT_DIR": os.path.join(_WORK_DIR, "artifacts"),
+    "TRACE_FILE": os.path.join(_WORK_DIR, "traces", "spans.jsonl"),
+    "DEFERRED_LOCAL_DIR": os.path.join(_WORK_DIR, "local_batches"),
+    "JOB_DB_PATH": os.path.join(_WORK_DIR, "jobs.sqlite3"),
+    "JOB_DATA_DIR": os.path.join(_WORK_DIR, "jobs"),
+    "OPENAI_BASE_URL": f"http://127.0.0.1:{MOCK_PORT}/v1",
+    "OPENAI_API_KEY": "sk-mock",
+    "OPENAI_API_KEY_POOL": "",
+    "OPENAI_API_KEY_POOL_FILE": "",
+})
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def screenshot_dir(tmp_path):
+    """작은 PNG 2장을 담은 스크린샷 세트 하나 (입력 루트 반환)"""
+    from PIL import Image
+
+    set_dir = tmp_path / "screens" / "settings_app"
+    set_dir.mkdir(parents=True)
+    for index, color in enumerate(("white", "black"), start=1):
+        Image.new("RGB", (8, 8), color).save(set_dir / f"{index:02d}.png")
+    return str(tmp_path / "screens")
+
+
+@pytest.fixture(scope="session")
+def mock_llm_server():
+    """모의 OpenAI 서버를 작업 스레드에서 실행하고 MockState 반환 (응답 원본은 state.source로 교체 가능)"""
+    import uvicorn
+    from mock_llm import ErrorInjector, LatencyModel, MockState, ResponseSource, create_app
+
+    state = MockState(
+        latency=LatencyModel.parse("fixed:5"),
+        file_latency=LatencyModel.parse("fixed:0"),
+        errors=ErrorInjector(0.0),
+        source=ResponseSource(output_chars=200),
+    )
+    server = uvicorn.Server(uvicorn.Config(create_app(state), host="127.0.0.1", port=MOCK_PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="mock-llm", daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("모의 OpenAI 서버를 시작하지 못했습니다.")
+        time.sleep(0.01)
+    yield state
+
+    server.should_exit = True
+    thread.join(timeout=5)
@@ -0,0 +1,73 @@
+"""지연 일괄 평가: LocalBatchBackend로 제출 → 상태 확인 → 결과 반영까지"""
+import json
+import os
+
+from batch.batch_api import LocalBatchBackend
+from batch.checkpoint import task_key
+from batch.deferred import STATE_FILENAME, DeferredBatchRun
+from batch.runner import read_result_file
+
+MODULE = "Text Legibility"
+
+
+def _run(screenshot_dir, tmp_path, backend, **kwargs):
+    return DeferredBatchRun(screenshot_dir, [MODULE], str(tmp_path / "out"), backend, **kwargs)
+
+
+def test_deferred_run_completes_both_stages(screenshot_dir, tmp_path):
+    requests = []
+
+    def responder(custom_id, body):
+        requests.append(custom_id)
+        return json.dumps({"custom_id": custom_id, "model": body["model"]})
+
+    backend = LocalBatchBackend(str(tmp_path / "batches"), responder=responder)
+    summary = _run(screenshot_dir, tmp_path, backend).run(wait=True, poll_interval=0)
+
+    assert summary["finished"]
+    assert summary["total"] == 1
+    assert summary["completed"] == 1
+    assert summary["failed"] == 0
+    # DR 배치가 끝난 뒤에 평가 배치를 따로 제출
+    assert [custom_id.split("-")[0] for custom_id in requests] == ["dr_generation", "evaluation"]
+
+    set_dir = tmp_path / "out" / "settings_app"
+    names = sorted(os.listdir(set_dir))
+    assert [name.split("_")[0] for name in names] == ["dr", "evaluation"]
+    dr_result = read_result_file(str(set_dir / names[0]))
+    assert dr_result["custom_id"].startswith("dr_generation-")
+
+    with open(tmp_path / "out" / STATE_FILENAME, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    assert len(state["batches"]) == 2
+    assert all(info["reconciled"] for info in state["batches"].values())
+
+
+def test_deferred_run_resumes_without_resubmitting(screenshot_dir, tmp_path):
+    backend = LocalBatchBackend(str(tmp_path / "batches"))
+    first = _run(screenshot_dir, tmp_path, backend)
+    first.advance()  # DR 제출만 하고 프로세스가 끝난 상황
+    assert first.advance()["in_flight"] == 1
+
+    resumed = _run(screenshot_dir, tmp_path, backend)
+    summary = resumed.run(wait=True, poll_interval=0)
+
+    assert summary["finished"] and summary["completed"] == 1
+    assert len(resumed.state["batches"]) == 2
+    assert resumed.state["attempts"] == {
+        f"dr_generation|{task_key('settings_app', MODULE)}": 1,
+        f"evaluation|{task_key('settings_app', MODULE)}": 1,
+    }
+
+
+def test_deferred_run_gives_up_after_max_attempts(screenshot_dir, tmp_path):
+    def responder(custom_id, body):
+        raise RuntimeError("upstream failure")
+
+    backend = LocalBatchBackend(str(tmp_path / "batches"), responder=responder)
+    summary = _run(screenshot_dir, tmp_path, backend, max_attempts=2).run(wait=True, poll_interval=0)
+
+    assert summary["finished"]
+    assert summary["completed"] == 0
+    assert summary["failed"] == 1
+    assert len(os.listdir(tmp_path / "batches" / "batches")) == 2
@@ -0,0 +1,87 @@
+"""헤지 요청: 지연이 백분위수를 넘으면 두 번째 요청, 먼저 끝난 쪽 사용 + 진 쪽 취소"""
+import threading
+
+import pytest
+
+from llm.cancellation import CallCancelled, call_scope, get_current_token
+from llm.hedging import Hedger
+
+LATENCY_KEY = "evaluation:test"
+
+
+def _hedger(samples=3, max_hedge_rate=1.0):
+    """최근 지연 기록이 쌓여 있어 바로 헤지할 수 있는 실행기"""
+    hedger = Hedger(percentile=0.9, min_samples=samples, max_hedge_rate=max_hedge_rate,
+                    history_size=20, min_delay=0.05, max_workers=4)
+    for _ in range(samples):
+        hedger._tracker(LATENCY_KEY).record(0.01)
+    return hedger
+
+
+class _SlowThenFast:
+    """첫 시도는 취소될 때까지 멈춰 있고, 이후 시도는 바로 성공"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.tokens = []
+
+    def __call__(self):
+        with self._lock:
+            self.attempts += 1
+            attempt = self.attempts
+        token = get_current_token()
+        self.tokens.append(token)
+        if attempt == 1:
+            token.wait(5)
+            token.raise_if_cancelled()
+            return "primary"
+        return "hedge"
+
+
+def test_no_hedge_without_latency_history():
+    hedger = Hedger(min_samples=5)
+    calls = []
+    assert hedger.call(lambda: calls.append(1) or "ok", LATENCY_KEY) == "ok"
+    assert calls == [1]
+    assert hedger.hedge_delay(LATENCY_KEY) is None
+    assert hedger.get_stats()["hedges"] == 0
+
+
+def test_hedge_wins_and_losing_attempt_is_cancelled():
+    hedger = _hedger()
+    fn = _SlowThenFast()
+
+    with call_scope("session-a", "evaluation") as parent:
+        assert hedger.call(fn, LATENCY_KEY) == "hedge"
+
+    assert fn.attempts == 2
+    primary_token, hedge_token = fn.tokens
+    assert primary_token.parent is parent and hedge_token.parent is parent
+    assert primary_token.cancelled and primary_token.reason == "hedge_lost"
+    assert not hedge_token.cancelled
+    assert not parent.cancelled
+
+    stats = hedger.get_stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = _hedger()
+    assert hedger.call(lambda: "primary", LATENCY_KEY) == "primary"
+    assert hedger.get_stats()["hedges"] == 0
+
+
+def test_hedge_rate_cap_blocks_extra_requests():
+    hedger = _hedger(max_hedge_rate=0.0)
+    fn = _SlowThenFast()
+
+    # 헤지 없이 느린 첫 시도만 기다리다가 사용자 취소로 끝남
+    with call_scope("session-a", "evaluation") as parent:
+        threading.Timer(0.2, parent.cancel).start()
+        with pytest.raises(CallCancelled):
+            hedger.call(fn, LATENCY_KEY)
+
+    assert fn.attempts == 1
+    assert hedger.get_stats()["hedges"] == 0
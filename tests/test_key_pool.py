@@ -0,0 +1,115 @@
+"""API key 풀: 최소 부하 키 선택, 429/한도 소진 쿨다운, 인증 실패 키 제외"""
+import httpx
+import openai
+import pytest
+
+from llm.key_pool import ApiKeyPool, KeyPoolExhausted, load_pool_keys
+
+KEYS = ["sk-first", "sk-second"]
+
+
+def _status_error(error_class, status_code, headers=None, body=None):
+    request = httpx.Request("POST", "http://127.0.0.1/v1/responses")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_class("upstream error", response=response, body=body)
+
+
+def _pool(**kwargs):
+    return ApiKeyPool(KEYS, rate_limit_cooldown=30, quota_cooldown=3600, **kwargs)
+
+
+def test_least_loaded_key_is_chosen():
+    pool = _pool()
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first.api_key, second.api_key} == set(KEYS)
+
+    pool.release(second)
+    assert pool.acquire() is second
+
+
+def test_rate_limited_key_cools_down_for_retry_after():
+    pool = _pool()
+    key = pool.acquire()
+    pool.release(key, error=_status_error(openai.RateLimitError, 429, {"retry-after": "12"}))
+
+    stats = {k["key_id"]: k for k in pool.get_stats()["keys"]}[key.key_id]
+    assert not stats["available"]
+    assert stats["last_reason"] == "rate_limited"
+    assert 10 < stats["cooldown_seconds"] <= 12
+
+    # 쿨다운 중인 키는 건너뜀
+    assert pool.available_count() == 1
+    assert all(pool.acquire() is not key for _ in range(3))
+
+
+def test_exhausted_remaining_requests_header_cools_down_key():
+    pool = _pool()
+    key = pool.acquire()
+    pool.release(key, headers={
+        "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "6m0s",
+    })
+
+    assert pool.available_count() == 1
+    assert key.last_reason == "rate_limit_exhausted"
+    assert key.cooldown_until - key.last_used == pytest.approx(360, abs=1)
+
+
+def test_all_keys_cooling_raises_with_shortest_wait():
+    pool = _pool()
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first, error=_status_error(openai.RateLimitError, 429, {"retry-after": "5"}))
+    pool.release(second, error=_status_error(openai.RateLimitError, 429, {"retry-after": "20"}))
+
+    with pytest.raises(KeyPoolExhausted) as exc_info:
+        pool.acquire()
+    assert 3 < exc_info.value.retry_after <= 5
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.response.headers["retry-after"] == str(exc_info.value.retry_after)
+
+
+def test_insufficient_quota_uses_quota_cooldown():
+    pool = _pool()
+    key = pool.acquire()
+    body = {"code": "insufficient_quota", "message": "You exceeded your current quota."}
+    pool.release(key, error=_status_error(openai.RateLimitError, 429, body=body))
+
+    assert key.last_reason == "insufficient_quota"
+    assert key.cooldown_until - key.last_used == pytest.approx(3600, abs=1)
+
+
+def test_auth_failure_disables_key():
+    pool = _pool()
+    key = pool.acquire()
+    pool.release(key, error=_status_error(openai.AuthenticationError, 401))
+
+    assert key.disabled
+    assert pool.available_count() == 1
+    other = pool.acquire()
+    assert other is not key
+    pool.release(other, error=_status_error(openai.PermissionDeniedError, 403))
+
+    # 모두 비활성이면 할당량 쿨다운만큼 기다리라고 알림
+    with pytest.raises(KeyPoolExhausted) as exc_info:
+        pool.acquire()
+    assert exc_info.value.retry_after == 3600
+
+
+def test_pinned_requests_use_primary_key_only():
+    pool = _pool()
+    busy = pool.acquire(pinned=True)
+    assert busy is pool.primary
+    assert pool.acquire(pinned=True) is pool.primary
+
+    pool.release(pool.primary, error=_status_error(openai.RateLimitError, 429, {"retry-after": "30"}))
+    with pytest.raises(KeyPoolExhausted):
+        pool.acquire(pinned=True)
+    assert pool.acquire() is not pool.primary
+
+
+def test_load_pool_keys_merges_env_and_file(tmp_path):
+    path = tmp_path / "keys.txt"
+    path.write_text("# 조직 키\nsk-second\nsk-third\n\n", encoding="utf-8")
+    assert load_pool_keys(" sk-first, sk-second ,", str(path)) == ["sk-first", "sk-second", "sk-third"]
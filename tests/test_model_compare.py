@@ -0,0 +1,82 @@
+"""모델 비교: 모의 서버로 녹화 → 녹화 재생 (지문 일치)"""
+import json
+
+import pytest
+
+from batch.runner import discover_screenshot_sets
+from mock_llm import ResponseSource
+from model_compare.golden import GoldenCase
+from model_compare.matrix import CallRecorder, ModelMatrix, load_recordings
+
+MODULE = "Text Legibility"
+MODEL = "gpt-4o"
+REPLAYED_EVALUATION = {"overall_score": 4, "issues": ["replayed from recording"]}
+
+
+@pytest.fixture
+def golden_cases(screenshot_dir):
+    return [GoldenCase(s.set_id, s.image_paths, {MODULE: REPLAYED_EVALUATION}) for s in discover_screenshot_sets(screenshot_dir)]
+
+
+@pytest.fixture
+def restore_source(mock_llm_server):
+    source = mock_llm_server.source
+    yield mock_llm_server
+    mock_llm_server.source = source
+
+
+def _read_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_record_then_replay(golden_cases, restore_source, tmp_path):
+    mock_state = restore_source
+    recordings = str(tmp_path / "recordings.jsonl")
+
+    # 1) 녹화: 모의 서버의 고정 응답으로 DR → 평가
+    recorder = CallRecorder(recordings)
+    trials = ModelMatrix(golden_cases, [MODULE], [MODEL], recorder=recorder).run()
+    assert [(t["dr_parsed"], t["evaluation_parsed"], t["error"]) for t in trials] == [(True, True, "")]
+    assert trials[0]["result"]["mock"] is True
+
+    records = _read_records(recordings)
+    assert [(r["stage"], r["model"]) for r in records] == [("dr_generation", MODEL), ("evaluation", MODEL)]
+    assert recorder.written == 2
+
+    # 2) 녹화된 평가 응답을 바꿔 두고 재생 서버로 전환
+    records[1]["output_text"] = json.dumps(REPLAYED_EVALUATION)
+    with open(recordings, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    mock_state.source = ResponseSource(recordings)
+
+    # 3) 재생: 모든 요청 지문이 녹화와 일치하고 결과는 녹화된 응답
+    fingerprints, file_search = load_recordings(recordings)
+    assert not file_search
+    matrix = ModelMatrix(golden_cases, [MODULE], [MODEL], replay_fingerprints=fingerprints)
+    trials = matrix.run()
+
+    assert matrix.replay_misses == 0
+    assert trials[0]["replay_misses"] == 0
+    assert trials[0]["result"] == REPLAYED_EVALUATION
+    assert trials[0]["reference"] == "golden"
+
+
+def test_replay_counts_requests_missing_from_recording(golden_cases, mock_llm_server):
+    matrix = ModelMatrix(golden_cases, [MODULE], [MODEL], replay_fingerprints=set())
+    trials = matrix.run()
+
+    assert trials[0]["evaluation_parsed"]
+    assert trials[0]["replay_misses"] == 2
+    assert matrix.replay_misses == 2
+
+
+def test_recorder_skips_fingerprints_already_recorded(golden_cases, mock_llm_server, tmp_path):
+    recordings = str(tmp_path / "recordings.jsonl")
+    ModelMatrix(golden_cases, [MODULE], [MODEL], recorder=CallRecorder(recordings)).run()
+
+    # 이어서 녹화: 같은 요청은 다시 저장하지 않음
+    recorder = CallRecorder(recordings)
+    ModelMatrix(golden_cases, [MODULE], [MODEL], recorder=recorder).run()
+    assert recorder.written == 0
+    assert len(_read_records(recordings)) == 2
@@ -0,0 +1,112 @@
+"""공정 스케줄러: 키 → 세션 → 우선순위 순으로 슬롯 배분"""
+import threading
+import time
+
+import pytest
+
+from llm.cancellation import CallCancelled, call_scope, cancel_session_calls
+from llm.scheduler import FairScheduler, call_priority, scheduling_key
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "조건을 기다리다 시간 초과"
+        time.sleep(0.01)
+
+
+class _Queue:
+    """한도 1인 스케줄러의 슬롯을 잡아 둔 채 대기자를 순서대로 넣고, 슬롯을 받은 순서를 기록"""
+
+    def __init__(self):
+        self.scheduler = FairScheduler(limit=1, min_limit=1, max_limit=1)
+        self.order = []
+        self.errors = []
+        self.threads = []
+        self.scheduler.acquire()
+
+    def depth(self) -> int:
+        return self.scheduler.get_stats()["queue_depth"]
+
+    def enqueue(self, label, session_id, priority="standard", api_key=None):
+        def run():
+            with call_scope(session_id, "evaluation"), call_priority(priority), scheduling_key(api_key):
+                try:
+                    self.scheduler.acquire()
+                except CallCancelled as e:
+                    self.errors.append((label, e))
+                    return
+                self.order.append(label)
+                self.scheduler.release()
+
+        expected = self.depth() + 1
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.threads.append(thread)
+        _wait_until(lambda: self.depth() == expected)
+
+    def drain(self):
+        self.scheduler.release()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        return self.order
+
+
+def test_new_session_is_not_stuck_behind_another_sessions_backlog():
+    queue = _Queue()
+    for index in range(1, 4):
+        queue.enqueue(f"A{index}", "session-a")
+    queue.enqueue("B1", "session-b")
+
+    assert queue.drain() == ["A1", "B1", "A2", "A3"]
+
+
+def test_interactive_call_goes_before_batch_in_same_session():
+    queue = _Queue()
+    queue.enqueue("batch", "session-a", priority="batch")
+    queue.enqueue("standard", "session-a", priority="standard")
+    queue.enqueue("interactive", "session-a", priority="interactive")
+
+    assert queue.drain() == ["interactive", "standard", "batch"]
+
+
+def test_keys_are_served_before_sessions():
+    queue = _Queue()
+    queue.enqueue("X1", "session-a", api_key="sk-x")
+    queue.enqueue("X2", "session-b", api_key="sk-x")
+    queue.enqueue("X3", "session-c", api_key="sk-x")
+    queue.enqueue("Y1", "session-d", api_key="sk-y")
+
+    # 동률인 두 키 중 어느 쪽이 먼저든, 키 y는 키 x의 대기열 뒤로 밀리지 않음
+    order = queue.drain()
+    assert sorted(order[:2]) == ["X1", "Y1"]
+    assert order[2:] == ["X2", "X3"]
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        with call_priority("urgent"):
+            pass
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    queue = _Queue()
+    queue.enqueue("cancelled", "session-a")
+    queue.enqueue("kept", "session-b")
+
+    cancel_session_calls("session-a")
+    _wait_until(lambda: queue.depth() == 1)
+    assert queue.drain() == ["kept"]
+    assert [label for label, _ in queue.errors] == ["cancelled"]
+    assert queue.scheduler.get_stats()["cancelled_waits"] == 1
+
+
+def test_shrink_and_grow_change_concurrency():
+    scheduler = FairScheduler(limit=4, min_limit=1, max_limit=8)
+    scheduler.shrink()
+    assert scheduler.limit == 2
+    scheduler.shrink()
+    scheduler.shrink()
+    assert scheduler.limit == 1
+    scheduler.grow()
+    assert scheduler.limit == 2
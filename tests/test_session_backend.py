@@ -0,0 +1,114 @@
+"""세션 외부 저장: LocalSessionBackend로 저장 → 다른 워커에서 복원"""
+import sqlite3
+
+from agents.dr_generator_agent import create_dr_generator_agent
+from storage.local_backend import LocalSessionBackend
+from ui.session_store import SessionStore
+
+MODULE = "Text Legibility"
+IMAGE = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg=="
+IMAGE_URL = f"data:image/png;base64,{IMAGE}"
+
+
+def _worker(tmp_path):
+    """같은 DB/산출물 디렉터리를 쓰는 워커 하나 (프로세스마다 저장소 연결을 따로 엶)"""
+    backend = LocalSessionBackend(str(tmp_path / "sessions.sqlite3"), str(tmp_path / "artifacts"))
+    return SessionStore(backend=backend)
+
+
+def _dr_agent(module=MODULE):
+    return create_dr_generator_agent(module, client=object())
+
+
+def _fill(state):
+    state.current_agent_name = MODULE
+    state.current_model = "gpt-5-mini"
+    state.current_step = "dr_generated"
+    state.current_json_data = {"screens": ["settings"]}
+    state.current_base64_images = [IMAGE]
+
+    agent = _dr_agent()
+    agent.conversation_history = [
+        {"role": "user", "content": [{"type": "input_text", "text": "DR 생성"},
+                                     {"type": "input_image", "image_url": IMAGE_URL}]},
+        {"role": "assistant", "content": [{"type": "output_text", "text": '{"screens": ["settings"]}'}]},
+    ]
+    agent.last_valid_json = {"screens": ["settings"]}
+    state.current_dr_agent = agent
+    return agent
+
+
+def test_session_restores_on_another_worker(tmp_path):
+    first, second = _worker(tmp_path), _worker(tmp_path)
+    state = first.get("session-1")
+    agent = _fill(state)
+    first.save(state)
+    assert state.revision == 1
+
+    restored = second.get("session-1")
+    assert restored.revision == 1
+    assert restored.current_agent_name == MODULE
+    assert restored.current_model == "gpt-5-mini"
+    assert restored.current_step == "dr_generated"
+    assert restored.current_json_data == {"screens": ["settings"]}
+    assert restored.current_base64_images == [IMAGE]
+
+    # 에이전트는 다시 만들어질 때 대화 히스토리를 적용
+    assert restored.current_dr_agent is None
+    new_agent = _dr_agent()
+    assert restored.restore_agent("dr", new_agent, second.backend)
+    assert new_agent.conversation_history == agent.conversation_history
+    assert new_agent.last_valid_json == {"screens": ["settings"]}
+
+
+def test_images_are_stored_as_artifacts(tmp_path):
+    store = _worker(tmp_path)
+    state = store.get("session-1")
+    _fill(state)
+    store.save(state)
+
+    with sqlite3.connect(str(tmp_path / "sessions.sqlite3")) as conn:
+        (data,) = conn.execute("SELECT data FROM sessions WHERE session_id = ?", ("session-1",)).fetchone()
+    assert IMAGE not in data
+    assert "artifact:" in data
+    assert store.backend.artifact_writes == 2  # base64 원본 + 히스토리의 data URL
+
+
+def test_unchanged_state_is_not_saved_again(tmp_path):
+    store = _worker(tmp_path)
+    state = store.get("session-1")
+    _fill(state)
+    store.save(state)
+    store.save(state)
+    assert state.revision == 1
+    assert store.backend.saves == 1
+
+    state.current_step = "evaluated"
+    store.save(state)
+    assert state.revision == 2
+
+
+def test_newer_revision_from_other_worker_is_reloaded(tmp_path):
+    first, second = _worker(tmp_path), _worker(tmp_path)
+    state = first.get("session-1")
+    _fill(state)
+    first.save(state)
+    assert second.get("session-1").current_step == "dr_generated"
+
+    state.current_step = "evaluated"
+    first.save(state)
+    reloaded = second.get("session-1")
+    assert reloaded.revision == 2
+    assert reloaded.current_step == "evaluated"
+
+
+def test_restore_skips_agent_of_other_module(tmp_path):
+    first, second = _worker(tmp_path), _worker(tmp_path)
+    state = first.get("session-1")
+    _fill(state)
+    first.save(state)
+
+    restored = second.get("session-1")
+    other = _dr_agent("Icon Representativeness")
+    assert not restored.restore_agent("dr", other, second.backend)
+    assert other.conversation_history == []
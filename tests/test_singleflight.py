@@ -0,0 +1,98 @@
+"""동일 요청 병합: leader 한 번 실행, follower는 결과 공유 + 자기 취소 확인"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm.cancellation import CallCancelled, call_scope, cancel_session_calls
+from llm.singleflight import SingleFlight
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "조건을 기다리다 시간 초과"
+        time.sleep(0.01)
+
+
+def _blocking_leader(flight, key, release, result="leader-result"):
+    """release가 설정될 때까지 실행 중인 leader 호출을 작업 스레드에서 시작"""
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def fn():
+        release.wait(5)
+        return result
+
+    future = executor.submit(flight.do, key, fn)
+    _wait_until(lambda: flight.inflight_count() == 1)
+    executor.shutdown(wait=False)
+    return future
+
+
+def test_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = _blocking_leader(flight, "same-request", release)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        followers = [executor.submit(flight.do, "same-request", lambda: "not called") for _ in range(3)]
+        _wait_until(lambda: flight.coalesced == 3)
+        release.set()
+        results = [future.result(timeout=5) for future in followers]
+
+    assert leader.result(timeout=5) == "leader-result"
+    assert results == ["leader-result"] * 3
+    assert flight.get_stats() == {"leaders": 1, "coalesced": 3, "inflight": 0}
+
+
+def test_cancelled_follower_stops_waiting_while_leader_continues():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = _blocking_leader(flight, "same-request", release)
+    outcome = {}
+
+    def follower():
+        with call_scope("follower-session", "evaluation"):
+            try:
+                outcome["result"] = flight.do("same-request", lambda: "not called")
+            except CallCancelled as e:
+                outcome["error"] = e
+                outcome["at"] = time.monotonic()
+
+    thread = threading.Thread(target=follower)
+    thread.start()
+    _wait_until(lambda: flight.coalesced == 1)
+
+    cancelled_at = time.monotonic()
+    assert cancel_session_calls("follower-session") == 1
+    thread.join(timeout=5)
+
+    assert isinstance(outcome.get("error"), CallCancelled)
+    assert outcome["at"] - cancelled_at < 2.0  # 폴링 간격(SINGLEFLIGHT_POLL_SECONDS) 안에 확인
+    assert not leader.done()
+
+    release.set()
+    assert leader.result(timeout=5) == "leader-result"
+
+
+def test_leader_error_is_shared_with_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("upstream failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "same-request", failing)
+        _wait_until(lambda: flight.inflight_count() == 1)
+        follower = executor.submit(flight.do, "same-request", lambda: "not called")
+        _wait_until(lambda: flight.coalesced == 1)
+        release.set()
+
+        with pytest.raises(ValueError):
+            leader.result(timeout=5)
+        with pytest.raises(ValueError):
+            follower.result(timeout=5)
+    assert flight.inflight_count() == 0
@@ -0,0 +1,276 @@
+"""
+이벤트 입장 제어 (동시 실행 한도 + 대기열 + 재시도 안내)
+
+LLM 호출이 있는 이벤트는 종류별 동시 실행 한도 안에서 도착 순서대로 실행한다.
+- 대기 중에는 현재 순서와 예상 대기 시간을 출력 컴포넌트에 표시
+- 대기열이 가득 차면 예상 재시도 시간과 함께 즉시 거절
+- 가벼운 UI 이벤트는 이 제어를 거치지 않음 (app.py에서 queue=False로 실행)
+- async 핸들러는 백그라운드 응답을 기다리는 동안(admission_released 범위) 슬롯을 다음 대기자에게 양보
+"""
+import functools
+import inspect
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Optional
+
+from anyio import to_thread
+
+from config import (
+    EVENT_CONCURRENCY, LLM_QUEUE_MAX_WAITING,
+    LLM_QUEUE_STATUS_INTERVAL, LLM_EVENT_DEFAULT_SECONDS
+)
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+# 처리 시간 지수 이동 평균 가중치
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class QueueFull(Exception):
+    """대기열이 가득 차 요청을 받을 수 없음"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"대기열이 가득 찼습니다. 약 {int(math.ceil(retry_after))}초 후 다시 시도해주세요.")
+
+
+class AdmissionController:
+    """동시 실행 한도 + 도착 순서 대기열"""
+
+    def __init__(self, name: str, limit: int, max_waiting: int,
+                 default_service_seconds: float = LLM_EVENT_DEFAULT_SECONDS):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_waiting = max(0, max_waiting)
+        self.active = 0
+        self.suspended = 0
+        self._waiting: Deque[int] = deque()
+        self._tickets = itertools.count(1)
+        self._cond = threading.Condition()
+        self._avg_service_seconds = default_service_seconds
+
+        # 지표
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+
+    def _estimate_wait(self, position: int) -> float:
+        """position번째 대기자의 예상 대기 시간 (초)"""
+        return self._avg_service_seconds * math.ceil(position / self.limit)
+
+    def enter(self) -> int:
+        """대기열에 들어가 번호표 반환 (가득 찼으면 QueueFull)"""
+        with self._cond:
+            if self.active >= self.limit and len(self._waiting) >= self.max_waiting:
+                self.rejected += 1
+                raise QueueFull(self._estimate_wait(len(self._waiting) + 1))
+            ticket = next(self._tickets)
+            self._waiting.append(ticket)
+            return ticket
+
+    def position(self, ticket: int) -> int:
+        """대기 순서 (1부터, 대기열에 없으면 0)"""
+        with self._cond:
+            try:
+                return self._waiting.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def estimated_wait(self, ticket: int) -> float:
+        return self._estimate_wait(max(1, self.position(ticket)))
+
+    def wait(self, ticket: int, timeout: Optional[float]) -> bool:
+        """차례가 오면 실행 슬롯을 차지하고 True, timeout까지 차례가 안 오면 False"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while not (self._waiting and self._waiting[0] == ticket and self.active < self.limit):
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self._waiting.popleft()
+            self.active += 1
+            self.admitted += 1
+            self._cond.notify_all()
+            return True
+
+    def leave(self, ticket: int) -> None:
+        """실행하지 않고 대기열에서 나감 (클라이언트 연결 종료 등, 차례를 받은 직후 취소되었으면 슬롯 반환)"""
+        with self._cond:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+            else:
+                self.active = max(0, self.active - 1)
+            self._cond.notify_all()
+
+    def suspend(self) -> None:
+        """실행 중인 이벤트가 외부 작업(백그라운드 응답)을 기다리는 동안 슬롯을 양보"""
+        with self._cond:
+            self.active = max(0, self.active - 1)
+            self.suspended += 1
+            self._cond.notify_all()
+
+    def resume(self) -> None:
+        """양보했던 이벤트가 이어서 실행 (남은 후처리가 짧아 대기열을 거치지 않으므로 잠시 한도를 넘을 수 있음)"""
+        with self._cond:
+            self.active += 1
+            self.suspended = max(0, self.suspended - 1)
+
+    def release(self, service_seconds: float, wait_seconds: float = 0.0) -> None:
+        """실행 슬롯 반환 및 처리 시간 기록"""
+        with self._cond:
+            self.active = max(0, self.active - 1)
+            self._avg_service_seconds += SERVICE_TIME_SMOOTHING * (service_seconds - self._avg_service_seconds)
+            self.total_wait_seconds += wait_seconds
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "suspended": self.suspended,
+                "waiting": len(self._waiting),
+                "max_waiting": self.max_waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "avg_service_seconds": round(self._avg_service_seconds, 2),
+                "avg_wait_seconds": round(self.total_wait_seconds / self.admitted, 2) if self.admitted else 0.0,
+            }
+
+
+# 이벤트 종류별 입장 제어기
+event_admission: Dict[str, AdmissionController] = {
+    event_class: AdmissionController(event_class, limit, LLM_QUEUE_MAX_WAITING)
+    for event_class, limit in EVENT_CONCURRENCY.items()
+}
+
+
+class _ActiveEvent:
+    """실행 중인 이벤트 하나 (양보한 시간은 처리 시간 평균에서 뺌)"""
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+        self.started_at = time.monotonic()
+        self.suspended_seconds = 0.0
+
+    def service_seconds(self) -> float:
+        return time.monotonic() - self.started_at - self.suspended_seconds
+
+
+_active_event: ContextVar[Optional[_ActiveEvent]] = ContextVar("admission_active_event", default=None)
+
+
+@asynccontextmanager
+async def admission_released():
+    """범위 안에서는 현재 이벤트의 실행 슬롯을 대기 중인 다른 이벤트에 양보 (입장 제어 밖이면 아무것도 안함)"""
+    event = _active_event.get()
+    if event is None:
+        yield
+        return
+    event.controller.suspend()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        event.controller.resume()
+        event.suspended_seconds += time.monotonic() - started
+
+
+def admission_controlled(fn: Callable, event_class: str = "llm",
+                         status_output: Optional[Callable[[str, tuple], Any]] = None,
+                         status_interval: float = LLM_QUEUE_STATUS_INTERVAL) -> Callable:
+    """
+    이벤트 핸들러에 입장 제어를 적용한 generator 핸들러 반환 (async 핸들러면 async generator)
+
+    Gradio가 gr.Request 인자를 찾을 수 있도록 원래 함수의 시그니처를 유지한다.
+    async 핸들러는 이벤트 루프에서 실행되며, 차례를 기다리는 동안에만 작업 스레드를 잠깐씩 쓴다.
+
+    Args:
+        fn: 원래 이벤트 핸들러
+        event_class (str): EVENT_CONCURRENCY 키
+        status_output: (안내 메시지, 핸들러 인자) → 출력값. 없으면 메시지를 그대로 출력
+        status_interval (float): 대기 순서 표시 갱신 주기 (초)
+    """
+    controller = event_admission[event_class]
+    status_output = status_output or (lambda message, args: message)
+
+    def _rejected(e: QueueFull, args: tuple) -> Any:
+        logger.warning("🚦 %s 대기열 가득 참 - 요청 거절 (재시도 안내 %.0f초)", event_class, e.retry_after)
+        return status_output(f"⏳ 요청이 많아 {e}", args)
+
+    def _waiting(ticket: int, args: tuple) -> Any:
+        position = controller.position(ticket)
+        eta = controller.estimated_wait(ticket)
+        return status_output(f"⏳ 대기 중: {position}번째 순서 (예상 대기 약 {int(math.ceil(eta))}초)", args)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                ticket = controller.enter()
+            except QueueFull as e:
+                yield _rejected(e, args)
+                return
+
+            queued_at = time.monotonic()
+            admitted = False
+            try:
+                while not await to_thread.run_sync(controller.wait, ticket, status_interval):
+                    yield _waiting(ticket, args)
+                admitted = True
+            finally:
+                # 대기 중 연결이 끊겨 작업이 취소되면 여기로 옴
+                if not admitted:
+                    controller.leave(ticket)
+
+            event = _ActiveEvent(controller)
+            reset = _active_event.set(event)
+            try:
+                result = await fn(*args, **kwargs)
+            finally:
+                _active_event.reset(reset)
+                controller.release(event.service_seconds(), event.started_at - queued_at)
+            yield result
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            ticket = controller.enter()
+        except QueueFull as e:
+            yield _rejected(e, args)
+            return
+
+        queued_at = time.monotonic()
+        admitted = False
+        try:
+            while not controller.wait(ticket, status_interval):
+                yield _waiting(ticket, args)
+            admitted = True
+        finally:
+            # 대기 중 연결이 끊기면 generator가 닫히면서 여기로 옴
+            if not admitted:
+                controller.leave(ticket)
+
+        started_at = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            controller.release(time.monotonic() - started_at, started_at - queued_at)
+        yield result
+
+    return wrapper
+
+
+def get_admission_stats() -> Dict[str, Dict[str, Any]]:
+    """이벤트 종류별 대기열 지표"""
+    return {event_class: controller.get_stats() for event_class, controller in event_admission.items()}
@@ -3,90 +3,79 @@
 """
 import os
 import json
+import asyncio
+import contextvars
 import datetime
 import time
 import atexit
 import tempfile
+import weakref
 from PIL import Image
 from typing import List, Dict, Any, Optional
 import gradio as gr
+from anyio import to_thread
 
 from agents.dr_generator_agent import create_dr_generator_agent
 from agents.evaluator_agent import create_evaluator_agent
 from agents.final_report_agent import FinalReportAgent
-from utils import encode_images_to_base64
-
-# 🔒 세션 기반 상태 관리 (보안 강화)
-session_data = {}  # 세션별 데이터 저장
-
-# 전역 상태 변수들 (세션 무관)
+from utils import encode_images_to_base64, build_result_record
+from llm.cancellation import CallCancelled, call_scope, cancel_session_calls
+from llm.scheduler import call_priority
+from llm.key_pool import is_key_pool_enabled
+from llm.pipeline import run_steps_async
+from ui.admission import admission_released
+from ui.session_store import session_store, bind_session, get_active_session
+from ui.perf_panel import profile_run, render_panel
+from storage import get_session_backend
+from telemetry.log import fields, get_logger
+from telemetry.tracing import traced
+
+logger = get_logger(__name__)
+
+# 전역 상태 변수들 (세션 무관 - 참조 문서 벡터스토어는 프로세스 공용)
 vector_store_id = None
 
 # 기본값들
-DEFAULT_AGENT_NAME = "Text Legibility"
-DEFAULT_MODE = "evaluation"
 DEFAULT_MODEL = "gpt-4o"
 
-def get_session_id():
-    """현재 Gradio 세션 ID 가져오기"""
-    try:
-        import gradio as gr
-        # Gradio의 현재 세션 정보를 가져오는 방법이 제한적이므로
-        # 임시로 요청 기반 식별자 사용
-        import time
-        import hashlib
-        
-        # 현재 시간 기반 세션 식별 (임시 방법)
-        # 실제로는 Gradio의 세션 관리 API를 사용해야 함
-        current_time = str(time.time())
-        session_id = hashlib.md5(current_time.encode()).hexdigest()[:8]
-        return f"session_{session_id}"
-    except:
-        return "default_session"
-
-def init_session_data(session_id=None):
-    """세션 데이터 초기화"""
-    if session_id is None:
-        session_id = get_session_id()
-    
-    if session_id not in session_data:
-        session_data[session_id] = {
-            'current_images': None,
-            'current_json_data': None,
-            'current_agent_name': DEFAULT_AGENT_NAME,
-            'current_base64_images': None,
-            'current_json_output': None,
-            'current_evaluation_output': None,
-            'current_dr_agent': None,
-            'current_eval_agent': None,
-            'current_step': "initial",
-            'downloaded_files': [],
-            'current_mode': DEFAULT_MODE,
-            'final_report_agent': None,
-            'current_api_key': None,
-            'api_key_timestamp': None,
-            'current_model': DEFAULT_MODEL,
-            'model_locked': False
-        }
-    return session_id
-
-# 호환성을 위한 전역 변수들 (기본 세션 사용)
-current_images = None
-current_json_data = None
-current_agent_name = DEFAULT_AGENT_NAME
-current_base64_images = None
-current_json_output = None
-current_evaluation_output = None
-current_dr_agent = None
-current_eval_agent = None
-current_step = "initial"
-downloaded_files = []
-current_mode = DEFAULT_MODE
-final_report_agent = None
-current_api_key = None  # 사용자가 입력한 API 키
-api_key_timestamp = None  # API key 입력 시간 추적 (보안용)
-current_model = DEFAULT_MODEL  # 현재 선택된 모델
-model_locked = False  # 모델 변경 잠금 상태
+def get_session_state(request=None):
+    """🔒 요청의 세션 상태 반환 (Gradio session_hash로 세션 분리)"""
+    return bind_session(request)
+
+def get_call_session_id(state):
+    """진행 중 에이전트 호출의 취소 단위 (세션 ID)"""
+    return state.session_id
+
+def persist_session(state):
+    """세션 상태를 외부 저장소에 기록 (SESSION_BACKEND=memory면 아무것도 하지 않음)"""
+    session_store.save(state)
+
+# 세션별 LLM 작업 순서 (이벤트 루프에서 기다리므로 대기 중에도 스레드를 잡지 않음)
+_session_turns: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+async def run_session_turn(request, turn):
+    """
+    세션의 LLM 작업 실행 (async 핸들러용)
+
+    같은 세션의 작업은 순서대로 처리하고(다른 세션과는 독립), turn(state)가 돌려준 단계 generator의
+    각 단계는 작업 스레드에서 세션 잠금을 잡고 실행한다. 백그라운드 응답을 기다리는 동안에는
+    스레드와 세션 잠금, 이벤트 실행 슬롯을 모두 내려놓는다.
+    """
+    context = contextvars.copy_context()
+    state = await to_thread.run_sync(context.run, get_session_state, request)
+    order = _session_turns.get(state)
+    if order is None:
+        order = _session_turns[state] = asyncio.Lock()
+    async with order:
+        return await run_steps_async(turn(state), lock=state.lock, on_wait=admission_released, context=context)
+
+def cancel_pending_calls(request: gr.Request = None):
+    """⏹ 현재 세션의 진행 중 에이전트 호출 취소 (HTTP 요청 중단, 워커 즉시 반환)"""
+    state = get_session_state(request)
+    cancelled = cancel_session_calls(get_call_session_id(state))
+    if cancelled:
+        return f"⏹ 진행 중인 요청 {cancelled}건을 중지했습니다."
+    return "진행 중인 요청이 없습니다."
 
 # 🌟 환경 감지: Hugging Face Spaces 여부 확인
 def is_hugging_face_space():
@@ -95,21 +84,34 @@ def is_hugging_face_space():
 
 IS_HF_SPACE = is_hugging_face_space()
 if IS_HF_SPACE:
-    print("🌟 Hugging Face Spaces 환경 감지됨 - 클라우드 최적화 모드")
+    logger.info("🌟 Hugging Face Spaces 환경 감지됨 - 클라우드 최적화 모드")
 else:
-    print("💻 로컬 환경 감지됨 - 로컬 파일 저장 모드")
+    logger.info("💻 로컬 환경 감지됨 - 로컬 파일 저장 모드")
 
 def set_vector_store_id(vs_id):
     global vector_store_id
     vector_store_id = vs_id
+    
+    # 다른 워커 프로세스도 같은 벡터스토어를 사용하도록 공유
+    backend = get_session_backend()
+    if backend is not None and vs_id:
+        backend.set_shared("vector_store_id", vs_id)
 
+def get_vector_store_id():
+    """참조 문서 벡터스토어 ID (없으면 외부 저장소의 공유 값 확인)"""
+    global vector_store_id
+    if vector_store_id is None:
+        backend = get_session_backend()
+        if backend is not None:
+            vector_store_id = backend.get_shared("vector_store_id")
+    return vector_store_id
+
+@traced("vector_store.ensure")
 def ensure_vector_store_with_api_key(api_key):
     """벡터스토어가 없으면 API 키로 새로 생성, 있으면 그대로 사용"""
-    global vector_store_id
-    
-    # 이미 벡터스토어가 있으면 그냥 사용
-    if vector_store_id:
-        print(f"✅ 기존 벡터스토어 사용: {vector_store_id}")
+    # 이미 벡터스토어가 있으면 그냥 사용 (다른 워커가 만든 것 포함)
+    if get_vector_store_id():
+        logger.info("✅ 기존 벡터스토어 사용: %s", vector_store_id)
         return vector_store_id
     
     # 벡터스토어가 없으면 API 키로 새로 생성
@@ -122,18 +124,19 @@ def ensure_vector_store_with_api_key(api_key):
         
         vs_id = loader.create_vector_store()
         if vs_id:
-            vector_store_id = vs_id
-            print(f"✅ 새 벡터스토어 생성 완료: {vs_id}")
+            set_vector_store_id(vs_id)
+            logger.info("✅ 새 벡터스토어 생성 완료: %s", vs_id)
             return vs_id
         else:
-            print("❌ 벡터스토어 생성 실패")
+            logger.error("❌ 벡터스토어 생성 실패")
             return None
     except Exception as e:
-        print(f"❌ 벡터스토어 생성 오류: {e}")
+        logger.error("❌ 벡터스토어 생성 오류: %s", e)
         return None
 
 
 
+@traced("image.convert")
 def convert_files_to_images(files_input):
     """Gradio 파일 객체를 PIL Image로 변환"""
     if not files_input:
@@ -142,28 +145,21 @@ def convert_files_to_images(files_input):
     images = []
     for i, file_obj in enumerate(files_input):
         try:
-            print(f"파일 {i+1} 처리 중: {type(file_obj)}")
-            
-            # 단순화된 이미지 로드
-            if hasattr(file_obj, 'name'):
-                print(f"  파일명: {file_obj.name}")
-                image = Image.open(file_obj.name)
-                print(f"  이미지 정보: 크기={image.size}, 모드={image.mode}")
-                images.append(image)
-                print(f"  이미지 로드 성공: {file_obj.name}")
-            else:
-                print(f"  파일 객체 타입: {type(file_obj)}")
-                image = Image.open(file_obj)
-                print(f"  이미지 정보: 크기={image.size}, 모드={image.mode}")
-                images.append(image)
-                print(f"  이미지 로드 성공: {type(file_obj)}")
-                
+            # 단순화된 이미지 로드 (파일 경로가 있으면 경로로)
+            source = file_obj.name if hasattr(file_obj, 'name') else file_obj
+            image = Image.open(source)
+            images.append(image)
+            logger.debug("이미지 로드 성공: 파일 %d", i + 1, extra=fields(
+                file=file_obj.name if hasattr(file_obj, 'name') else type(file_obj).__name__,
+                file_type=type(file_obj).__name__, size=image.size, mode=image.mode
+            ))
         except Exception as e:
-            print(f"  이미지 변환 오류: {e}")
+            logger.warning("이미지 변환 오류: 파일 %d: %s", i + 1, e)
             continue
     
     return images
 
+@traced("file.save", target="download")
 def create_temp_file_for_download(result_data, result_type, agent_name, is_feedback=False, feedback_text=""):
     """🌟 HF Spaces 호환: 임시 파일을 생성하여 다운로드 가능하게 함"""
     try:
@@ -173,13 +169,7 @@ def create_temp_file_for_download(result_data, result_type, agent_name, is_feedb
         filename = f"{result_type}_{agent_name_clean}_{timestamp}.json"
         
         # JSON 데이터 구성
-        data = {
-            "agent_type": agent_name,
-            "timestamp": timestamp,
-            "is_feedback": is_feedback,
-            "feedback": feedback_text,
-            "result": result_data
-        }
+        data = build_result_record(result_data, agent_name, is_feedback, feedback_text, timestamp)
         
         # 임시 파일 생성 (Gradio가 자동으로 정리함)
         temp_file = tempfile.NamedTemporaryFile(
@@ -193,14 +183,15 @@ def create_temp_file_for_download(result_data, result_type, agent_name, is_feedb
         json.dump(data, temp_file, ensure_ascii=False, indent=2)
         temp_file.close()
         
-        print(f"🌟 {result_type} 임시 파일 생성: {filename}")
+        logger.info("🌟 %s 임시 파일 생성: %s", result_type, filename)
         return temp_file.name
         
     except Exception as e:
-        print(f"❌ {result_type} 임시 파일 생성 오류: {e}")
+        logger.error("❌ %s 임시 파일 생성 오류: %s", result_type, e)
         return None
 
 # 기존 함수는 호환성을 위해 유지 (로컬 개발용)
+@traced("file.save", target="output")
 def save_result_to_file(result_data, result_type, agent_name, is_feedback=False, feedback_text=""):
     """결과를 파일로 저장하는 공통 함수 (로컬 개발용, 호환성 유지)"""
     try:
@@ -223,28 +214,22 @@ def save_result_to_file(result_data, result_type, agent_name, is_feedback=False,
         file_path = os.path.join(output_dir, filename)
         
         # JSON 데이터 구성
-        data = {
-            "agent_type": agent_name,
-            "timestamp": timestamp,
-            "is_feedback": is_feedback,
-            "feedback": feedback_text,
-            "result": result_data
-        }
+        data = build_result_record(result_data, agent_name, is_feedback, feedback_text, timestamp)
         
         # 파일 저장
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         
-        print(f"{result_type} 결과 저장: {file_path}")
+        logger.info("%s 결과 저장: %s", result_type, file_path)
         return file_path
         
     except Exception as e:
-        print(f"{result_type} 결과 저장 오류: {e}")
+        logger.warning("%s 결과 저장 오류: %s", result_type, e)
         return False
 
-def confirm_dr_generation(images_input, selected_agent, user_feedback="", json_input=""):
+def confirm_dr_generation(images_input, selected_agent, user_feedback="", json_input="", request: gr.Request = None):
     """DR 확정 버튼용 함수"""
-    global current_images, current_agent_name, current_base64_images, current_json_output, current_dr_agent, current_step
+    state = get_session_state(request)
     
     if not images_input:
         return "이미지를 업로드해주세요."
@@ -252,21 +237,21 @@ def confirm_dr_generation(images_input, selected_agent, user_feedback="", json_i
     if not selected_agent:
         return "분석할 에이전트를 선택해주세요."
     
-    current_agent_name = selected_agent
-    print(f"=== {selected_agent} DR 확정 시작 ===")
+    state.current_agent_name = selected_agent
+    logger.debug("=== %s DR 확정 시작 ===", selected_agent)
     
     # JSON 소스 결정
     json_to_use = None
     should_save = False
     
-    if current_json_output:
-        json_to_use = current_json_output
+    if state.current_json_output:
+        json_to_use = state.current_json_output
         should_save = True
-        print("=== DR 확정: 기존 캐시된 결과 사용 ===")
+        logger.debug("=== DR 확정: 기존 캐시된 결과 사용 ===")
     elif json_input and json_input.strip():
         json_to_use = json_input.strip()
         should_save = False
-        print("=== DR 확정: textbox 값 사용 (저장 안함) ===")
+        logger.debug("=== DR 확정: textbox 값 사용 (저장 안함) ===")
     else:
         return "❌ DR 생성 결과가 없습니다. 먼저 DR을 생성하거나 JSON을 입력해주세요."
     
@@ -279,11 +264,12 @@ def confirm_dr_generation(images_input, selected_agent, user_feedback="", json_i
             result = json.loads(json_to_use)
             is_feedback_generation = bool(user_feedback and user_feedback.strip())
             save_result_to_file(result, "dr_generation", selected_agent, is_feedback_generation, user_feedback)
-            print("=== DR 결과 저장 완료 ===")
+            logger.debug("=== DR 결과 저장 완료 ===")
         else:
-            print("=== DR 결과 저장 건너뜀 (textbox 값 사용) ===")
+            logger.debug("=== DR 결과 저장 건너뜀 (textbox 값 사용) ===")
         
-        current_step = "generated"
+        state.current_step = "generated"
+        persist_session(state)
         
         save_status = "저장되었습니다" if should_save else "저장하지 않았습니다 (textbox 값 사용)"
         dr_message = f"=== {selected_agent} DR 확정 완료 ===\\n\\n📋 추출된 JSON:\\n{json_to_use}\\n\\n✅ DR Generator 결과가 {save_status}."
@@ -295,21 +281,31 @@ def confirm_dr_generation(images_input, selected_agent, user_feedback="", json_i
     except Exception as e:
         return f"❌ DR 확정 중 오류 발생: {str(e)}"
 
-def run_dr_generation(images_input, selected_agent, user_feedback=""):
+async def run_dr_generation(images_input, selected_agent, user_feedback="", request: gr.Request = None):
     """디자인 참조 생성 에이전트 실행"""
-    global current_images, current_agent_name, current_base64_images, current_json_output, current_dr_agent, current_step, current_api_key
-    
+    # 🔒 같은 세션의 LLM 작업은 순서대로 처리 (다른 세션과는 독립)
+    def turn(state):
+        try:
+            feedback_turn = bool(user_feedback and user_feedback.strip())
+            with profile_run(state, "dr_generation", selected_agent, feedback_turn):
+                return (yield from _run_dr_generation(state, images_input, selected_agent, user_feedback))
+        finally:
+            persist_session(state)
+
+    return await run_session_turn(request, turn)
+
+def _run_dr_generation(state, images_input, selected_agent, user_feedback=""):
     # 🔒 보안: API key 타임아웃 체크
-    if check_api_key_timeout():
+    if check_api_key_timeout(state):
         return "🔒 보안: API key가 타임아웃되었습니다. 다시 입력해주세요."
     
-    # API 키 확인
-    if not current_api_key:
+    # API 키 확인 (서버 키 풀이 있으면 사용자 키 없이도 진행)
+    if not has_api_access(state):
         return "❌ OpenAI API 키를 먼저 입력해주세요."
     
     import time
     execution_id = f"dr_gen_{int(time.time() * 1000)}"
-    print(f"=== {selected_agent} 디자인 참조 생성 시작 (ID: {execution_id}) ===")
+    logger.info("=== %s 디자인 참조 생성 시작 (ID: %s) ===", selected_agent, execution_id)
     
     is_feedback_generation = bool(user_feedback and user_feedback.strip())
     
@@ -319,56 +315,66 @@ def run_dr_generation(images_input, selected_agent, user_feedback=""):
     if not selected_agent:
         return "분석할 에이전트를 선택해주세요."
     
-    current_agent_name = selected_agent
+    state.current_agent_name = selected_agent
     
     # Gradio 파일 객체를 PIL Image로 변환
     images = convert_files_to_images(images_input)
-    current_images = images
+    state.current_images = images
     
     if not images:
         return "이미지 변환에 실패했습니다."
     
     try:
         # 🤖 DR 생성 시작 시 모델 잠금
-        lock_model()
+        lock_model(state)
         
         # 에이전트 재사용 또는 생성
-        if current_dr_agent is None or current_agent_name != selected_agent:
+        if state.current_dr_agent is None or state.current_agent_name != selected_agent:
             try:
-                current_dr_agent = create_dr_generator_agent(selected_agent, vector_store_id=vector_store_id, api_key=current_api_key)
-                print(f"새로운 디자인 참조 에이전트 생성: {selected_agent}")
+                state.current_dr_agent = create_dr_generator_agent(selected_agent, vector_store_id=get_vector_store_id(), api_key=state.current_api_key)
+                state.restore_agent("dr", state.current_dr_agent)
+                logger.debug("새로운 디자인 참조 에이전트 생성: %s", selected_agent)
             except Exception as e:
-                print(f"DR 에이전트 생성 오류: {e}")
+                logger.error("DR 에이전트 생성 오류: %s", e)
                 return f"=== {selected_agent} DR 에이전트 생성 실패 ===\\n오류: {str(e)}"
         else:
-            print("기존 디자인 참조 에이전트 재사용")
+            logger.debug("기존 디자인 참조 에이전트 재사용")
         
         # base64 이미지가 캐시되어 있지 않으면 변환
-        if current_base64_images is None:
-            current_base64_images = encode_images_to_base64(images)
-            if not current_base64_images:
+        if state.current_base64_images is None:
+            state.current_base64_images = encode_images_to_base64(images)
+            if not state.current_base64_images:
                 return f"=== {selected_agent} 오류 ===\\n이미지 인코딩에 실패했습니다."
+            if not session_store.enforce_memory_cap(state):
+                state.current_base64_images = None
+                return f"=== {selected_agent} 오류 ===\\n세션 메모리 한도를 초과했습니다. 이미지 수나 크기를 줄여주세요."
         else:
-            print("캐시된 base64 이미지 재사용")
+            logger.debug("캐시된 base64 이미지 재사용")
         
-        # 디자인 참조 생성 실행
-        result = current_dr_agent.extract_json(current_base64_images, user_feedback)
+        # 디자인 참조 생성 실행 (중지 버튼/초기화 시 취소, 단계 마감 시간 적용)
+        # 피드백 턴은 사용자가 결과를 기다리는 대화형 호출이므로 우선 배정
+        priority = "interactive" if is_feedback_generation else "standard"
+        with call_scope(get_call_session_id(state), "dr_generation"), call_priority(priority):
+            result = yield from state.current_dr_agent.extract_json_steps(state.current_base64_images, user_feedback)
         
         if isinstance(result, dict):
             json_output = json.dumps(result, ensure_ascii=False, indent=2)
-            current_json_output = json_output
+            state.current_json_output = json_output
             
             if is_feedback_generation:
-                current_step = "feedback"
+                state.current_step = "feedback"
             else:
-                current_step = "generated"
+                state.current_step = "generated"
             
             return f"=== {selected_agent} 디자인 참조 생성 완료 ===\\n\\n📋 추출된 JSON:\\n{json_output}\\n\\n💬 추가 수정이 필요하면 피드백을 입력하거나 'DR 확정' 버튼을 클릭하세요."
         else:
             return f"=== {selected_agent} 오류 ===\\n{str(result)}"
             
+    except CallCancelled as e:
+        logger.warning("DR 생성 중단 (%s): %s", selected_agent, e)
+        return f"=== {selected_agent} DR 생성 중단 ===\\n{str(e)}"
     except Exception as e:
-        print(f"에이전트 실행 오류 ({selected_agent}): {e}")
+        logger.error("에이전트 실행 오류 (%s): %s", selected_agent, e)
         return f"=== {selected_agent} 오류 ===\\n{str(e)}"
 
 def extract_json_from_result(result_text):
@@ -384,32 +390,42 @@ def extract_json_from_result(result_text):
         else:
             return None
     except Exception as e:
-        print(f"JSON 추출 오류: {e}")
+        logger.warning("JSON 추출 오류: %s", e)
         return None
 
-def generate_evaluation(images_input, json_input, selected_agent, evaluation_feedback=""):
+async def generate_evaluation(images_input, json_input, selected_agent, evaluation_feedback="", request: gr.Request = None):
     """평가 에이전트 실행"""
-    global current_images, current_base64_images, current_json_output, current_eval_agent, current_agent_name, current_step, current_evaluation_output, current_api_key
-    
+    # 🔒 같은 세션의 LLM 작업은 순서대로 처리 (다른 세션과는 독립)
+    def turn(state):
+        try:
+            feedback_turn = bool(evaluation_feedback and evaluation_feedback.strip())
+            with profile_run(state, "evaluation", selected_agent or state.current_agent_name, feedback_turn):
+                return (yield from _generate_evaluation(state, images_input, json_input, selected_agent, evaluation_feedback))
+        finally:
+            persist_session(state)
+
+    return await run_session_turn(request, turn)
+
+def _generate_evaluation(state, images_input, json_input, selected_agent, evaluation_feedback=""):
     # 🔒 보안: API key 타임아웃 체크
-    if check_api_key_timeout():
+    if check_api_key_timeout(state):
         return "🔒 보안: API key가 타임아웃되었습니다. 다시 입력해주세요."
     
-    # API 키 확인
-    if not current_api_key:
+    # API 키 확인 (서버 키 풀이 있으면 사용자 키 없이도 진행)
+    if not has_api_access(state):
         return "❌ OpenAI API 키를 먼저 입력해주세요."
     
     is_feedback_evaluation = bool(evaluation_feedback and evaluation_feedback.strip())
     
-    print(f"=== 평가 함수 호출 ===")
-    print(f"selected_agent: {selected_agent}")
-    print(f"current_agent_name: {current_agent_name}")
-    print(f"is_feedback_evaluation: {is_feedback_evaluation}")
+    logger.debug("=== 평가 함수 호출 ===", extra=fields(
+        selected_agent=selected_agent, current_agent_name=state.current_agent_name,
+        is_feedback_evaluation=is_feedback_evaluation
+    ))
     
     # 캐시된 JSON 결과 사용
-    if current_json_output:
-        json_input = current_json_output
-        print("캐시된 JSON 결과 사용")
+    if state.current_json_output:
+        json_input = state.current_json_output
+        logger.debug("캐시된 JSON 결과 사용")
     
     if not images_input:
         return "이미지를 업로드해주세요."
@@ -419,13 +435,13 @@ def generate_evaluation(images_input, json_input, selected_agent, evaluation_fee
     
     # selected_agent가 None이면 캐시된 에이전트 이름 사용
     if not selected_agent or selected_agent.strip() == "":
-        if current_agent_name:
-            selected_agent = current_agent_name
-            print(f"캐시된 에이전트 이름 사용: {selected_agent}")
+        if state.current_agent_name:
+            selected_agent = state.current_agent_name
+            logger.debug("캐시된 에이전트 이름 사용: %s", selected_agent)
         else:
             return "분석할 에이전트를 선택해주세요."
     
-    current_agent_name = selected_agent
+    state.current_agent_name = selected_agent
     
     try:
         json_str = extract_json_from_result(json_input)
@@ -435,185 +451,187 @@ def generate_evaluation(images_input, json_input, selected_agent, evaluation_fee
         json_data = json.loads(json_str)
         
         # base64 이미지가 캐시되어 있으면 재사용, 없으면 새로 변환
-        if current_base64_images is None:
+        if state.current_base64_images is None:
             images = convert_files_to_images(images_input)
             if not images:
                 return "이미지 변환에 실패했습니다."
             
-            current_base64_images = encode_images_to_base64(images)
-            if not current_base64_images:
+            state.current_base64_images = encode_images_to_base64(images)
+            if not state.current_base64_images:
                 return f"=== {selected_agent} 오류 ===\\n이미지 인코딩에 실패했습니다."
+            if not session_store.enforce_memory_cap(state):
+                state.current_base64_images = None
+                return f"=== {selected_agent} 오류 ===\\n세션 메모리 한도를 초과했습니다. 이미지 수나 크기를 줄여주세요."
         else:
-            print("캐시된 base64 이미지 재사용")
+            logger.debug("캐시된 base64 이미지 재사용")
         
         # 평가 에이전트 재사용 또는 생성
-        if current_eval_agent is None or current_agent_name != selected_agent:
+        if state.current_eval_agent is None or state.current_agent_name != selected_agent:
             try:
-                current_eval_agent = create_evaluator_agent(selected_agent, vector_store_id=vector_store_id, api_key=current_api_key)
-                print(f"새로운 평가 에이전트 생성: {selected_agent}")
+                state.current_eval_agent = create_evaluator_agent(selected_agent, vector_store_id=get_vector_store_id(), api_key=state.current_api_key)
+                state.restore_agent("eval", state.current_eval_agent)
+                logger.debug("새로운 평가 에이전트 생성: %s", selected_agent)
             except Exception as e:
-                print(f"Evaluator 에이전트 생성 오류: {e}")
+                logger.error("Evaluator 에이전트 생성 오류: %s", e)
                 return f"=== {selected_agent} 평가 에이전트 생성 실패 ===\\n오류: {str(e)}"
         else:
-            print("기존 평가 에이전트 재사용")
+            logger.debug("기존 평가 에이전트 재사용")
         
         try:
-            result = current_eval_agent.generate_guidelines(current_base64_images, json_data, evaluation_feedback)
-            current_evaluation_output = result
+            priority = "interactive" if is_feedback_evaluation else "standard"
+            with call_scope(get_call_session_id(state), "evaluation"), call_priority(priority):
+                result = yield from state.current_eval_agent.generate_guidelines_steps(state.current_base64_images, json_data, evaluation_feedback)
+            state.current_evaluation_output = result
             
             if is_feedback_evaluation:
-                current_step = "evaluated"
+                state.current_step = "evaluated"
             else:
-                current_step = "evaluated"
+                state.current_step = "evaluated"
             
             return f"=== {selected_agent} 평가 생성 완료 ===\\n\\n💡 평가 결과:\\n{result}"
+        except CallCancelled as e:
+            logger.warning("평가 생성 중단 (%s): %s", selected_agent, e)
+            return f"=== {selected_agent} 평가 생성 중단 ===\\n{str(e)}"
         except Exception as e:
-            print(f"평가 에이전트 실행 오류: {e}")
-            import traceback
-            print(f"상세 오류: {traceback.format_exc()}")
+            logger.error("평가 에이전트 실행 오류: %s", e, exc_info=True)
             return f"평가 생성 중 오류가 발생했습니다: {str(e)}"
         
     except json.JSONDecodeError:
         return "JSON 형식이 올바르지 않습니다. 디자인 참조 생성을 다시 실행해주세요."
     except Exception as e:
-        print(f"평가 생성 오류 ({selected_agent}): {e}")
+        logger.error("평가 생성 오류 (%s): %s", selected_agent, e)
         return f"=== {selected_agent} 평가 생성 오류 ===\\n{str(e)}"
 
-def get_cache_status():
-    """캐시 상태 정보 반환"""
-    cached_images_count = len(current_images) if current_images else 0
-    base64_status = "있음" if current_base64_images else "없음"
-    images_status = "있음" if current_images else "없음"
-    mode_status = f"현재 모드: {current_mode}"
-    
-    # 🔒 보안: API key 상태 표시
-    api_status = "없음"
-    if current_api_key and api_key_timestamp:
-        elapsed_hours = (time.time() - api_key_timestamp) / 3600
-        if elapsed_hours < 2:  # 2시간 미만
-            api_status = f"있음 ({2 - elapsed_hours:.1f}시간 남음)"
-        else:
-            api_status = "타임아웃됨"
-    
-    return f"캐시된 이미지: {cached_images_count}개 ({images_status})\\nBase64 이미지 캐시: {base64_status}\\n{mode_status}\\n🔒 API key: {api_status}"
+def get_performance_panel(request: gr.Request = None):
+    """⚡ 세션 성능 패널 (마지막 실행의 구간별 시간, 호출별 토큰/예상 비용, 캐시 적중, 업로드/히스토리 크기)"""
+    state = get_session_state(request)
+    return render_panel(state)
 
 # 모드 관리 함수들
-def get_current_mode():
+def get_current_mode(state=None):
     """현재 모드 반환"""
-    return current_mode
+    state = state or get_active_session() or get_session_state()
+    return state.current_mode
 
-def set_current_mode(mode):
+def set_current_mode(mode, state=None):
     """현재 모드 설정"""
-    global current_mode
-    current_mode = mode
+    state = state or get_active_session() or get_session_state()
+    state.current_mode = mode
+    persist_session(state)
 
 # 🤖 모델 관리 함수들
-def get_current_model():
-    """현재 선택된 모델 반환"""
-    return current_model
-
-def set_current_model(model):
+def get_current_model(state=None):
+    """현재 선택된 모델 반환 (요청 처리 중인 세션 기준)"""
+    state = state or get_active_session()
+    if state is None:
+        return DEFAULT_MODEL
+    return state.current_model
+
+def set_current_model(model, state):
     """현재 모델 설정 (잠금되지 않은 경우만)"""
-    global current_model, model_locked
     
-    if model_locked:
-        print(f"⚠️ 모델 변경 잠금됨: 현재 세션에서는 {current_model} 고정")
-        return False, f"모델이 {current_model}로 잠금되어 있습니다. 세션을 초기화해야 변경 가능합니다."
+    if state.model_locked:
+        logger.warning("⚠️ 모델 변경 잠금됨: 현재 세션에서는 %s 고정", state.current_model)
+        return False, f"모델이 {state.current_model}로 잠금되어 있습니다. 세션을 초기화해야 변경 가능합니다."
     
-    current_model = model
-    print(f"🤖 모델 변경: {model}")
+    state.current_model = model
+    persist_session(state)
+    logger.info("🤖 모델 변경: %s", model)
     return True, f"모델이 {model}로 변경되었습니다."
 
-def lock_model():
+def lock_model(state):
     """모델 변경을 잠금 (DR 생성 시작 시 호출)"""
-    global model_locked
-    model_locked = True
-    print(f"🔒 모델 잠금: {current_model} 고정")
+    state.model_locked = True
+    logger.info("🔒 모델 잠금: %s 고정", state.current_model)
 
-def unlock_model():
+def unlock_model(state):
     """모델 변경 잠금 해제 (초기화 시 호출)"""
-    global model_locked
-    model_locked = False
-    print("🔓 모델 잠금 해제")
+    state.model_locked = False
+    logger.info("🔓 모델 잠금 해제")
 
-def is_model_locked():
+def is_model_locked(state):
     """모델이 잠금 상태인지 확인"""
-    return model_locked
+    return state.model_locked
 
-def set_api_key(api_key):
+def set_api_key(api_key, state):
     """🔒 보안: API key 설정 (타임스탬프와 함께)"""
-    global current_api_key, api_key_timestamp
-    current_api_key = api_key
-    api_key_timestamp = time.time()
-    print(f"🔒 API key 설정됨 (시간: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
+    state.current_api_key = api_key
+    state.api_key_timestamp = time.time()
+    logger.info("🔒 API key 설정됨 (시간: %s)", datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+def has_api_access(state):
+    """세션이 LLM을 호출할 수 있는지 (사용자 키 또는 서버 키 풀)"""
+    return bool(state.current_api_key) or is_key_pool_enabled()
 
-def check_api_key_timeout(timeout_hours=2):
+def check_api_key_timeout(state, timeout_hours=2):
     """🔒 보안: API key 타임아웃 체크 (기본 2시간)"""
-    global current_api_key, api_key_timestamp
     
-    if not current_api_key or not api_key_timestamp:
+    if not state.current_api_key or not state.api_key_timestamp:
         return False
     
-    elapsed_hours = (time.time() - api_key_timestamp) / 3600
+    elapsed_hours = (time.time() - state.api_key_timestamp) / 3600
     if elapsed_hours > timeout_hours:
-        print(f"🔒 보안: API key 타임아웃 ({elapsed_hours:.1f}시간 경과) - 자동 정리")
-        clear_api_key()
+        logger.info("🔒 보안: API key 타임아웃 (%.1f시간 경과) - 자동 정리", elapsed_hours)
+        clear_api_key(state)
         return True
     return False
 
-def clear_api_key():
-    """🔒 보안: API key 완전 초기화"""
-    global current_api_key, api_key_timestamp, final_report_agent, current_dr_agent, current_eval_agent
+def clear_api_key(state=None):
+    """🔒 보안: API key 완전 초기화 (state가 없으면 모든 세션 정리)"""
+    if state is None:
+        for session_state in session_store.all_states():
+            clear_api_key(session_state)
+        return
     
-    print("🔒 보안: API key 및 관련 에이전트 정리 시작...")
+    logger.info("🔒 보안: API key 및 관련 에이전트 정리 시작...")
     
     # API key 초기화
-    current_api_key = None
-    api_key_timestamp = None
+    state.current_api_key = None
+    state.api_key_timestamp = None
     
     # 🤖 모델 잠금 해제 (새 세션에서 모델 변경 가능)
-    unlock_model()
+    unlock_model(state)
     
     # API key를 포함한 에이전트들 정리
-    if final_report_agent:
+    if state.final_report_agent:
         try:
-            final_report_agent.clear_all()
+            state.final_report_agent.clear_all()
         except Exception as e:
-            print(f"Final Report Agent 정리 오류: {e}")
-        final_report_agent = None
+            logger.warning("Final Report Agent 정리 오류: %s", e)
+        state.final_report_agent = None
     
-    if current_dr_agent:
+    if state.current_dr_agent:
         try:
-            current_dr_agent.clear_json_cache()
+            state.current_dr_agent.clear_json_cache()
         except Exception as e:
-            print(f"DR Agent 정리 오류: {e}")
-        current_dr_agent = None
+            logger.warning("DR Agent 정리 오류: %s", e)
+        state.current_dr_agent = None
     
-    if current_eval_agent:
+    if state.current_eval_agent:
         try:
-            current_eval_agent.clear_json_cache()
+            state.current_eval_agent.clear_json_cache()
         except Exception as e:
-            print(f"Evaluator Agent 정리 오류: {e}")
-        current_eval_agent = None
+            logger.warning("Evaluator Agent 정리 오류: %s", e)
+        state.current_eval_agent = None
     
-    print("🔒 보안: API key 및 관련 에이전트 정리 완료")
+    logger.info("🔒 보안: API key 및 관련 에이전트 정리 완료")
 
 # 🔒 보안: 앱 종료 시 자동 정리
 def cleanup_on_exit():
     """앱 종료 시 API key 자동 정리"""
-    print("🔒 보안: 앱 종료 - API key 자동 정리")
+    logger.info("🔒 보안: 앱 종료 - API key 자동 정리")
     clear_api_key()
 
 # 종료 시 정리 함수 등록
 atexit.register(cleanup_on_exit)
 
 # Final Report 모드 관련 함수들
-def switch_to_final_report_mode():
+def switch_to_final_report_mode(request: gr.Request = None):
     """Final Report 모드로 전환"""
-    global current_mode, final_report_agent
+    state = get_session_state(request)
     
     try:
-        if not downloaded_files:
+        if not state.downloaded_files:
             return (
                 "❌ 평가 결과 파일이 없습니다. 먼저 각 에이전트별 평가를 완료하고 결과를 다운로드해주세요.",
                 gr.update(visible=False),
@@ -625,12 +643,17 @@ def switch_to_final_report_mode():
             )
         
         # Final Report Agent 초기화
-        if not final_report_agent:
-            final_report_agent = FinalReportAgent(api_key=current_api_key)
+        if not state.final_report_agent:
+            state.final_report_agent = FinalReportAgent(api_key=state.current_api_key)
+        
+        # 다른 워커에서 다운로드한 평가 파일은 저장소에서 다시 꺼내옴
+        restore_downloaded_files(state)
         
         # 평가 파일들로 Agent 초기화
-        initialization_result = final_report_agent.initialize_with_files(downloaded_files)
-        current_mode = "comprehensive_chatbot"
+        with profile_run(state, "final_report_setup"):
+            initialization_result = state.final_report_agent.initialize_with_files(state.downloaded_files)
+        state.current_mode = "comprehensive_chatbot"
+        persist_session(state)
         
         # 챗봇의 첫 환영 메시지 
         welcome_message = """안녕하세요! 👋
@@ -668,10 +691,11 @@ def switch_to_final_report_mode():
             gr.update(interactive=False)
         )
 
-def switch_to_evaluation_mode():
+def switch_to_evaluation_mode(request: gr.Request = None):
     """평가 모드로 돌아가기"""
-    global current_mode
-    current_mode = "evaluation"
+    state = get_session_state(request)
+    state.current_mode = "evaluation"
+    persist_session(state)
     
     return (
         "평가 모드로 돌아왔습니다.",
@@ -684,23 +708,24 @@ def switch_to_evaluation_mode():
         gr.update(interactive=False)
     )
 
-def send_final_report_message(user_message, current_chat_history=None):
+async def send_final_report_message(user_message, current_chat_history=None, request: gr.Request = None):
     """종합 챗봇과 대화"""
-    global final_report_agent
-    
     if current_chat_history is None:
         current_chat_history = []
     
-    if not final_report_agent:
-        current_chat_history.append((user_message, "❌ 종합 챗봇이 초기화되지 않았습니다."))
-        return current_chat_history, ""
-    
-    if not user_message.strip():
-        return current_chat_history, ""
+    def turn(state):
+        if not state.final_report_agent:
+            return "❌ 종합 챗봇이 초기화되지 않았습니다."
+        if not user_message.strip():
+            return None
+        with profile_run(state, "final_report"), \
+                call_scope(get_call_session_id(state), "final_report"), call_priority("interactive"):
+            return (yield from state.final_report_agent.chat_steps(user_message))
     
     try:
-        ai_response = final_report_agent.chat(user_message)
-        current_chat_history.append((user_message, ai_response))
+        ai_response = await run_session_turn(request, turn)
+        if ai_response is not None:
+            current_chat_history.append((user_message, ai_response))
         return current_chat_history, ""
         
     except Exception as e:
@@ -708,66 +733,109 @@ def send_final_report_message(user_message, current_chat_history=None):
         current_chat_history.append((user_message, error_msg))
         return current_chat_history, ""
 
-def clear_final_report_chat():
+def clear_final_report_chat(request: gr.Request = None):
     """종합 챗봇 대화 초기화"""
-    global final_report_agent
-    if final_report_agent:
-        final_report_agent.reset_conversation()
+    state = get_session_state(request)
+    if state.final_report_agent:
+        state.final_report_agent.reset_conversation()
     return [], "종합 챗봇 대화가 초기화되었습니다."
 
-def download_evaluation_json():
+def record_downloaded_artifact(state, file_path):
+    """다운로드한 평가 파일 내용을 외부 저장소에 보관 (다른 워커에서 Final Report 생성용)"""
+    backend = get_session_backend()
+    if backend is None:
+        return
+    try:
+        with open(file_path, "rb") as f:
+            state.downloaded_artifacts[file_path] = backend.put_artifact(f.read())
+        persist_session(state)
+    except Exception as e:
+        logger.warning("⚠️ 평가 파일 보관 실패: %s", e)
+
+def restore_downloaded_files(state):
+    """이 워커에 없는 다운로드 파일을 저장소 산출물로 임시 파일에 복원"""
+    backend = get_session_backend()
+    if backend is None:
+        return
+    
+    restored = []
+    for file_path in state.downloaded_files:
+        ref = state.downloaded_artifacts.get(file_path)
+        if os.path.exists(file_path) or not ref:
+            restored.append(file_path)
+            continue
+        data = backend.get_artifact(ref)
+        if data is None:
+            logger.warning("⚠️ 평가 파일을 찾을 수 없음: %s", file_path)
+            continue
+        
+        # 원래 파일 이름을 유지해야 Final Report에서 모듈 이름을 알아볼 수 있음
+        temp_dir = tempfile.mkdtemp()
+        local_path = os.path.join(temp_dir, os.path.basename(file_path))
+        with open(local_path, "wb") as f:
+            f.write(data)
+        state.downloaded_artifacts.pop(file_path, None)
+        state.downloaded_artifacts[local_path] = ref
+        restored.append(local_path)
+        logger.info("♻️ 평가 파일 복원: %s", os.path.basename(file_path))
+    
+    state.downloaded_files = restored
+
+def download_evaluation_json(request: gr.Request = None):
     """🌟 HF Spaces 호환: 평가 결과를 JSON 파일로 다운로드"""
-    global current_evaluation_output, current_agent_name, downloaded_files
+    state = get_session_state(request)
     
-    if not current_evaluation_output:
+    if not state.current_evaluation_output:
         return None
     
     try:
-        evaluation_result = current_evaluation_output
+        evaluation_result = state.current_evaluation_output
         try:
-            if current_evaluation_output.startswith('{') and current_evaluation_output.endswith('}'):
-                parsed_result = json.loads(current_evaluation_output)
+            if state.current_evaluation_output.startswith('{') and state.current_evaluation_output.endswith('}'):
+                parsed_result = json.loads(state.current_evaluation_output)
                 evaluation_result = parsed_result
         except:
             pass
         
         if IS_HF_SPACE:
             # 🌟 HF Spaces: 임시 파일 생성으로 즉시 다운로드 가능
-            temp_file_path = create_temp_file_for_download(evaluation_result, "evaluation", current_agent_name, False, "")
+            temp_file_path = create_temp_file_for_download(evaluation_result, "evaluation", state.current_agent_name, False, "")
             
             if temp_file_path:
                 # 다운로드 이력에 추가 (Final Report용)
-                if temp_file_path not in downloaded_files:
-                    downloaded_files.append(temp_file_path)
-                    print(f"🌟 새 평가 파일 준비 (HF Spaces): {current_agent_name}")
+                if temp_file_path not in state.downloaded_files:
+                    state.downloaded_files.append(temp_file_path)
+                    record_downloaded_artifact(state, temp_file_path)
+                    logger.info("🌟 새 평가 파일 준비 (HF Spaces): %s", state.current_agent_name)
                 
                 return temp_file_path
             else:
                 return None
         else:
             # 💻 로컬: 기존 방식 + 임시 파일 생성
-            saved_file_path = save_result_to_file(evaluation_result, "evaluation", current_agent_name, False, "")
-            temp_file_path = create_temp_file_for_download(evaluation_result, "evaluation", current_agent_name, False, "")
+            saved_file_path = save_result_to_file(evaluation_result, "evaluation", state.current_agent_name, False, "")
+            temp_file_path = create_temp_file_for_download(evaluation_result, "evaluation", state.current_agent_name, False, "")
             
             if temp_file_path:
                 # 다운로드 이력에 추가 (Final Report용 - 로컬 파일 경로 사용)
-                if saved_file_path and saved_file_path not in downloaded_files:
-                    downloaded_files.append(saved_file_path)
-                    print(f"💻 새 평가 파일 준비 (로컬): {current_agent_name}")
+                if saved_file_path and saved_file_path not in state.downloaded_files:
+                    state.downloaded_files.append(saved_file_path)
+                    record_downloaded_artifact(state, saved_file_path)
+                    logger.info("💻 새 평가 파일 준비 (로컬): %s", state.current_agent_name)
                 
                 return temp_file_path
             else:
                 return None
             
     except Exception as e:
-        print(f"❌ JSON 다운로드 파일 생성 오류: {e}")
+        logger.error("❌ JSON 다운로드 파일 생성 오류: %s", e)
         return None
 
-def save_discussion_dialog():
+def save_discussion_dialog(request: gr.Request = None):
     """🌟 HF Spaces 호환: 종합 챗봇 대화 내용을 파일로 다운로드"""
-    global final_report_agent
+    state = get_session_state(request)
     
-    if not final_report_agent or not final_report_agent.conversation_history:
+    if not state.final_report_agent or not state.final_report_agent.conversation_history:
         return "❌ 저장할 대화 내용이 없습니다.", None
     
     try:
@@ -784,13 +852,13 @@ def save_discussion_dialog():
         # 대화 내용 구조화
         discussion_data = {
             "timestamp": timestamp,
-            "total_turns": len(final_report_agent.conversation_history) // 2,  # user-assistant 쌍으로 계산
-            "evaluation_files": final_report_agent.evaluation_files,
+            "total_turns": len(state.final_report_agent.conversation_history) // 2,  # user-assistant 쌍으로 계산
+            "evaluation_files": state.final_report_agent.evaluation_files,
             "conversation_history": []
         }
         
         # 대화 히스토리 변환 (Responses API 형식 → 읽기 쉬운 형식)
-        for i, message in enumerate(final_report_agent.conversation_history):
+        for i, message in enumerate(state.final_report_agent.conversation_history):
             if message["role"] == "user":
                 content = message["content"][0]["text"] if message["content"] else ""
                 discussion_data["conversation_history"].append({
@@ -810,7 +878,7 @@ def save_discussion_dialog():
         if not IS_HF_SPACE:
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(discussion_data, f, ensure_ascii=False, indent=2)
-            print(f"💻 로컬 대화 파일 저장: {file_path}")
+            logger.info("💻 로컬 대화 파일 저장: %s", file_path)
         
         # 🌟 임시 파일 생성으로 즉시 다운로드 가능
         temp_file = tempfile.NamedTemporaryFile(
@@ -825,9 +893,9 @@ def save_discussion_dialog():
         temp_file.close()
         
         env_msg = "HF Spaces" if IS_HF_SPACE else "로컬"
-        print(f"🌟 대화 내용 파일 준비 ({env_msg}): {filename}")
+        logger.info("🌟 대화 내용 파일 준비 (%s): %s", env_msg, filename)
         return f"✅ 대화 내용이 준비되었습니다: {filename}", temp_file.name
         
     except Exception as e:
-        print(f"❌ 대화 내용 파일 생성 오류: {e}")
+        logger.error("❌ 대화 내용 파일 생성 오류: %s", e)
         return f"❌ 대화 내용 저장 실패: {str(e)}", None
\ No newline at end of file
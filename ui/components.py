@@ -52,20 +52,18 @@ def create_agent_selector():
 def create_control_buttons():
     """제어 버튼들 생성"""
     initial_extract_btn = gr.Button("📋 DR 생성", variant="primary", interactive=True)
-    cache_status_btn = gr.Button("캐시 상태 조회", variant="secondary")
+    cache_status_btn = gr.Button("세션 성능 조회", variant="secondary")
     clear_btn = gr.Button("초기화", variant="stop", interactive=True)
     final_report_btn = gr.Button("최종 평가 결과 논의 시작", variant="primary", interactive=False)
     
     return initial_extract_btn, cache_status_btn, clear_btn, final_report_btn
 
-def create_cache_status_display():
-    """캐시 상태 표시 컴포넌트 생성"""
-    return gr.Textbox(
-        label="Cache",
-        lines=2,
-        interactive=False,
-        scale=2
-    )
+def create_performance_panel():
+    """⚡ 세션 성능 패널 생성 (마지막 실행의 구간별 시간, 호출별 토큰/예상 비용, 캐시 적중)"""
+    with gr.Accordion("⚡ 세션 성능", open=False):
+        perf_panel = gr.Markdown("아직 실행 기록이 없습니다.")
+        perf_refresh_btn = gr.Button("성능 새로고침", variant="secondary", size="sm")
+    return perf_panel, perf_refresh_btn
 
 def create_clear_confirm_dialog():
     """초기화 확인 다이얼로그 생성"""
@@ -90,32 +90,33 @@ def save_result_to_file(result_data, result_type, agent_name, is_feedback=False,
         print(f"{result_type} 결과 저장 오류: {e}")
         return False
 
-def get_cache_status():
-    """캐시 상태 정보 반환 - business_logic에서 처리"""
-    return bl.get_cache_status()
+def get_performance_panel():
+    """세션 성능 패널 반환 - business_logic에서 처리"""
+    return bl.get_performance_panel()
 
-# 상태 설정 함수들 - business_logic의 변수들을 사용
+# 상태 설정 함수들 - business_logic의 세션 상태를 사용
 def set_vector_store_id(vs_id):
-    bl.vector_store_id = vs_id
+    bl.set_vector_store_id(vs_id)
 
 def get_vector_store_id():
-    return bl.vector_store_id
+    return bl.get_vector_store_id()
 
-def get_downloaded_files():
-    return bl.downloaded_files
+def get_downloaded_files(request=None):
+    return bl.get_session_state(request).downloaded_files
 
-def add_downloaded_file(file_path):
-    if file_path and file_path not in bl.downloaded_files:
-        bl.downloaded_files.append(file_path)
+def add_downloaded_file(file_path, request=None):
+    state = bl.get_session_state(request)
+    if file_path and file_path not in state.downloaded_files:
+        state.downloaded_files.append(file_path)
 
-def get_current_mode():
-    return bl.get_current_mode()
+def get_current_mode(request=None):
+    return bl.get_current_mode(bl.get_session_state(request))
 
-def set_current_mode(mode):
-    bl.set_current_mode(mode)
+def set_current_mode(mode, request=None):
+    bl.set_current_mode(mode, bl.get_session_state(request))
 
-def get_final_report_agent():
-    return bl.final_report_agent
+def get_final_report_agent(request=None):
+    return bl.get_session_state(request).final_report_agent
 
-def set_final_report_agent(agent):
-    bl.final_report_agent = agent
\ No newline at end of file
+def set_final_report_agent(agent, request=None):
+    bl.get_session_state(request).final_report_agent = agent
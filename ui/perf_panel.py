@@ -0,0 +1,264 @@
+"""
+세션 성능 패널
+
+DR 생성/평가/종합 챗봇 실행 하나를 profile_run()으로 감싸 구간별 시간(추적 구간), 호출별 토큰/예상 비용,
+업로드 크기, 다시 보내는 대화 히스토리 크기, 캐시 적중을 모아 세션에 보관하고 Markdown으로 보여준다.
+피드백 턴이 느린 이유(히스토리 재전송, 재시도, 캐시 미스 등)를 리뷰어가 직접 확인하는 용도.
+"""
+import datetime
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from config import MODEL_PRICES
+from llm.call_log import CallRecord, record_calls
+from telemetry.tracing import Span, collect_spans
+
+RUN_LABELS = {
+    "dr_generation": "DR 생성",
+    "evaluation": "평가",
+    "final_report": "종합 챗봇",
+    "final_report_setup": "종합 챗봇 준비",
+}
+
+
+class CallSummary(NamedTuple):
+    """create_response 호출 하나"""
+    stage: str
+    model: str
+    latency: float
+    input_tokens: int
+    cached_tokens: int
+    output_tokens: int
+    reasoning_tokens: int
+    cost: Optional[float]       # USD (가격표에 없는 모델이면 None)
+    from_cache: bool
+    request_bytes: int          # 이번 요청 입력 전체 (시스템 프롬프트 + 히스토리 + 현재 메시지)
+    history_messages: int       # 다시 보낸 이전 대화 메시지 수
+    history_bytes: int
+    error: str
+
+
+class StageTiming(NamedTuple):
+    """같은 위치(부모 구간 경로)의 구간 합계"""
+    name: str
+    depth: int
+    seconds: float
+    count: int
+
+
+class RunProfile(NamedTuple):
+    """실행 하나 (버튼 한 번)"""
+    kind: str
+    module: Optional[str]
+    feedback_turn: bool
+    started_at: float
+    total_seconds: float
+    stages: List[StageTiming]
+    calls: List[CallSummary]
+    image_cache_hits: int
+    image_cache_misses: int
+
+    @property
+    def tokens(self) -> Tuple[int, int]:
+        return sum(c.input_tokens for c in self.calls), sum(c.output_tokens for c in self.calls)
+
+    @property
+    def cost(self) -> Optional[float]:
+        costs = [c.cost for c in self.calls if not c.from_cache]
+        return None if any(cost is None for cost in costs) else sum(costs)
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, cached_tokens: int, output_tokens: int) -> Optional[float]:
+    """MODEL_PRICES 기준 예상 비용 (USD, 추론 토큰은 출력 토큰에 포함)"""
+    prices = MODEL_PRICES.get(model or "")
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    return ((input_tokens - cached_tokens) * input_price + cached_tokens * cached_price
+            + output_tokens * output_price) / 1_000_000
+
+
+def _content_bytes(messages: List[Dict[str, Any]]) -> int:
+    """Responses API 입력 메시지의 텍스트/이미지 data URL 크기 합"""
+    total = 0
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            total += len(content)
+            continue
+        for part in content or []:
+            for key in ("text", "image_url"):
+                value = part.get(key) if isinstance(part, dict) else None
+                if isinstance(value, str):
+                    total += len(value)
+    return total
+
+
+def summarize_call(record: CallRecord) -> CallSummary:
+    messages = record.request.get("input")
+    messages = messages if isinstance(messages, list) else []
+    # 시스템 메시지와 이번 사용자 메시지를 뺀 나머지가 다시 보낸 히스토리
+    history = [m for m in messages[:-1] if not (isinstance(m, dict) and m.get("role") == "system")]
+    return CallSummary(
+        stage=record.stage,
+        model=record.model or "",
+        latency=record.latency,
+        input_tokens=record.input_tokens,
+        cached_tokens=record.cached_tokens,
+        output_tokens=record.output_tokens,
+        reasoning_tokens=record.reasoning_tokens,
+        cost=estimate_cost(record.model, record.input_tokens, record.cached_tokens, record.output_tokens),
+        from_cache=record.from_cache,
+        request_bytes=_content_bytes(messages),
+        history_messages=len(history),
+        history_bytes=_content_bytes(history),
+        error=record.error,
+    )
+
+
+def summarize_spans(spans: List[Span]) -> List[StageTiming]:
+    """구간을 부모 경로별로 합산 (처음 시작한 순서)"""
+    by_id = {s.span_id: s for s in spans}
+
+    def path(s: Span) -> Tuple[str, ...]:
+        names = [s.name]
+        parent = by_id.get(s.parent_id)
+        while parent is not None:
+            names.append(parent.name)
+            parent = by_id.get(parent.parent_id)
+        return tuple(reversed(names))
+
+    totals: Dict[Tuple[str, ...], List[float]] = {}
+    first_start: Dict[Tuple[str, ...], float] = {}
+    for s in spans:
+        key = path(s)
+        entry = totals.setdefault(key, [0.0, 0])
+        entry[0] += s.duration or 0.0
+        entry[1] += 1
+        first_start[key] = min(first_start.get(key, s.start_time), s.start_time)
+
+    # 부모 다음에 자식이 오도록 경로의 시작 시각 순으로 정렬
+    def sort_key(key: Tuple[str, ...]):
+        return tuple(first_start.get(key[:i + 1], 0.0) for i in range(len(key)))
+
+    return [
+        StageTiming(key[-1], len(key) - 1, totals[key][0], int(totals[key][1]))
+        for key in sorted(totals, key=sort_key)
+    ]
+
+
+@contextmanager
+def profile_run(state, kind: str, module: Optional[str] = None, feedback_turn: bool = False):
+    """
+    범위 안의 구간/호출을 모아 state.run_profiles에 추가 (추적/호출이 하나도 없으면 남기지 않음)
+
+    사용 예:
+        with profile_run(state, "evaluation", selected_agent, feedback_turn=True):
+            result = _generate_evaluation(...)
+    """
+    started_at = time.time()
+    started = time.perf_counter()
+    with record_calls() as records, collect_spans() as spans:
+        try:
+            yield
+        finally:
+            if records or spans:
+                encodes = [s for s in spans if s.name == "image.encode"]
+                state.run_profiles.append(RunProfile(
+                    kind=kind,
+                    module=module,
+                    feedback_turn=feedback_turn,
+                    started_at=started_at,
+                    total_seconds=time.perf_counter() - started,
+                    stages=summarize_spans(spans),
+                    calls=[summarize_call(record) for record in records],
+                    image_cache_hits=sum(1 for s in encodes if s.attributes.get("cache_hit")),
+                    image_cache_misses=sum(1 for s in encodes if s.attributes.get("cache_hit") is False),
+                ))
+
+
+def _seconds(value: float) -> str:
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.2f}s"
+
+
+def _bytes(value: int) -> str:
+    if value < 1024:
+        return f"{value} B"
+    if value < 1024 * 1024:
+        return f"{value / 1024:.1f} KB"
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+def _cost(value: Optional[float]) -> str:
+    return "-" if value is None else f"${value:.4f}"
+
+
+def _run_title(profile: RunProfile) -> str:
+    parts = [RUN_LABELS.get(profile.kind, profile.kind)]
+    if profile.module:
+        parts.append(profile.module)
+    if profile.feedback_turn:
+        parts.append("피드백 턴")
+    return " · ".join(parts)
+
+
+def render_panel(state) -> str:
+    """세션 성능 패널 Markdown"""
+    cached_images = len(state.current_images) if state.current_images else 0
+    base64_status = "있음" if state.current_base64_images else "없음"
+    cache_line = f"📁 세션 이미지 {cached_images}개, Base64 캐시 {base64_status}"
+    if not state.run_profiles:
+        return f"아직 실행 기록이 없습니다. DR 생성이나 평가를 실행하면 구간별 시간과 토큰이 표시됩니다.\n\n{cache_line}"
+
+    last = state.run_profiles[-1]
+    input_tokens, output_tokens = last.tokens
+    cached_tokens = sum(c.cached_tokens for c in last.calls)
+    lines = [
+        f"#### ⚡ 마지막 실행: {_run_title(last)}",
+        f"{datetime.datetime.fromtimestamp(last.started_at).strftime('%H:%M:%S')} · 총 {_seconds(last.total_seconds)} · "
+        f"호출 {len(last.calls)}회 · 입력 {input_tokens:,} (캐시 {cached_tokens:,}) / 출력 {output_tokens:,} 토큰 · "
+        f"예상 {_cost(last.cost)}",
+        "",
+        "| 구간 | 시간 | 횟수 |",
+        "|---|---:|---:|",
+    ]
+    for stage in last.stages:
+        indent = "&nbsp;&nbsp;" * stage.depth + ("└ " if stage.depth else "")
+        lines.append(f"| {indent}{stage.name} | {_seconds(stage.seconds)} | {stage.count} |")
+
+    if last.calls:
+        lines += [
+            "",
+            "| 단계 | 모델 | 지연 | 입력 (캐시) | 출력 (추론) | 예상 비용 | 요청 크기 | 다시 보낸 히스토리 |",
+            "|---|---|---:|---:|---:|---:|---:|---:|",
+        ]
+        for call in last.calls:
+            if call.error:
+                model = f"{call.model} ❌"
+            elif call.from_cache:
+                model = f"{call.model} 💾"
+            else:
+                model = call.model
+            lines.append(
+                f"| {call.stage} | {model} | {_seconds(call.latency)} | {call.input_tokens:,} ({call.cached_tokens:,}) | "
+                f"{call.output_tokens:,} ({call.reasoning_tokens:,}) | {_cost(None if call.from_cache else call.cost)} | "
+                f"{_bytes(call.request_bytes)} | {call.history_messages}개 · {_bytes(call.history_bytes)} |"
+            )
+
+    response_hits = sum(1 for c in last.calls if c.from_cache)
+    lines += [
+        "",
+        f"💾 응답 캐시 적중 {response_hits} / 미스 {len(last.calls) - response_hits} · "
+        f"이미지 base64 캐시 적중 {last.image_cache_hits} / 미스 {last.image_cache_misses} · {cache_line}",
+    ]
+
+    if len(state.run_profiles) > 1:
+        lines += ["", "| 최근 실행 | 시각 | 총 시간 | 토큰 (입력/출력) | 예상 비용 |", "|---|---|---:|---:|---:|"]
+        for profile in reversed(state.run_profiles):
+            profile_input, profile_output = profile.tokens
+            lines.append(
+                f"| {_run_title(profile)} | {datetime.datetime.fromtimestamp(profile.started_at).strftime('%H:%M:%S')} | "
+                f"{_seconds(profile.total_seconds)} | {profile_input:,} / {profile_output:,} | {_cost(profile.cost)} |"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,454 @@
+"""
+세션별 상태 저장소
+
+Gradio 요청의 session_hash를 키로 세션 상태를 분리 보관한다.
+- 세션마다 잠금(RLock)을 두어 같은 세션의 LLM 작업이 서로 덮어쓰지 않게 함
+- 마지막 접근 후 SESSION_TTL_SECONDS가 지나면 세션 정리 (API key, 에이전트, 진행 중 호출)
+- 세션당 메모리 사용량 추정치가 SESSION_MAX_BYTES를 넘으면 재생성 가능한 캐시부터 정리
+- 외부 저장소(SESSION_BACKEND)가 있으면 세션 레코드를 저장/복원해 다른 워커에서도 이어서 작업
+"""
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+from config import (
+    DEFAULT_MODEL, SESSION_TTL_SECONDS, SESSION_MAX_BYTES,
+    SESSION_SWEEP_INTERVAL, MAX_SESSIONS, PERF_PANEL_HISTORY
+)
+from storage import get_session_backend
+from telemetry.tracing import new_trace, trace_scope
+from telemetry.log import get_logger
+
+logger = get_logger(__name__)
+
+
+# 기본값들
+DEFAULT_AGENT_NAME = "Text Legibility"
+DEFAULT_MODE = "evaluation"
+DEFAULT_SESSION_ID = "default_session"
+
+# 저장소 레코드에 포함하는 단순 필드 (API key는 보안상 저장하지 않음)
+PERSISTED_FIELDS = (
+    "current_json_data", "current_agent_name", "current_json_output", "current_evaluation_output",
+    "current_step", "downloaded_files", "downloaded_artifacts", "current_mode", "current_model", "model_locked",
+)
+
+# 대화 히스토리의 이미지를 산출물 참조로 바꿀 때 쓰는 접두사
+ARTIFACT_URL_PREFIX = "artifact:"
+
+
+class SessionState:
+    """한 리뷰어 세션의 상태"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.lock = threading.RLock()
+        self.created_at = time.time()
+        self.last_access = self.created_at
+
+        self.current_images = None
+        self.current_json_data = None
+        self.current_agent_name = DEFAULT_AGENT_NAME
+        self.current_base64_images = None
+        self.current_json_output = None
+        self.current_evaluation_output = None
+        self.current_dr_agent = None
+        self.current_eval_agent = None
+        self.current_step = "initial"
+        self.downloaded_files: List[str] = []
+        self.downloaded_artifacts: Dict[str, str] = {}  # 다운로드 파일 경로 → 산출물 참조
+        self.current_mode = DEFAULT_MODE
+        self.final_report_agent = None
+        self.current_api_key = None
+        self.api_key_timestamp = None
+        self.current_model = DEFAULT_MODEL
+        self.model_locked = False
+        # 최근 실행의 구간별 시간/토큰 (성능 패널용, 이 프로세스에만 보관)
+        self.run_profiles: Deque[Any] = deque(maxlen=PERF_PANEL_HISTORY)
+
+        # 외부 저장소 동기화 상태
+        self.revision = 0
+        self.restored_agents: Dict[str, Dict[str, Any]] = {}
+        self._saved_digest: Optional[str] = None
+        self._artifact_refs: Dict[str, str] = {}
+
+    def touch(self) -> None:
+        self.last_access = time.time()
+
+    def reset_work(self) -> None:
+        """작업 상태 초기화 (API key, 모델 설정, 다운로드 이력은 유지)"""
+        self.current_images = None
+        self.current_json_data = None
+        self.current_base64_images = None
+        self.current_json_output = None
+        self.current_evaluation_output = None
+        self.current_dr_agent = None
+        self.current_eval_agent = None
+        self.current_step = "initial"
+        self.restored_agents = {}
+        self._artifact_refs = {}
+
+    def to_record(self, backend) -> Dict[str, Any]:
+        """저장소 레코드 생성 (이미지는 산출물로 저장하고 참조만 기록)"""
+        record = {field: getattr(self, field) for field in PERSISTED_FIELDS}
+        record["base64_image_refs"] = (
+            [self._artifact_ref(backend, image) for image in self.current_base64_images]
+            if self.current_base64_images else None
+        )
+
+        agents = {}
+        for kind, agent in (("dr", self.current_dr_agent), ("eval", self.current_eval_agent)):
+            if agent is not None:
+                agents[kind] = {
+                    "agent_type": agent.agent_type,
+                    "conversation_history": self._externalize_history(backend, agent.conversation_history),
+                    "last_valid_json": agent.last_valid_json,
+                }
+            elif kind in self.restored_agents:
+                # 아직 에이전트가 다시 만들어지지 않은 복원 상태는 그대로 유지
+                agents[kind] = self.restored_agents[kind]
+        record["agents"] = agents
+        return record
+
+    def apply_record(self, record: Dict[str, Any], backend) -> None:
+        """저장소 레코드로 상태 복원 (에이전트는 API key 입력 후 다시 만들어질 때 히스토리 적용)"""
+        for field in PERSISTED_FIELDS:
+            if field in record:
+                setattr(self, field, record[field])
+        self.downloaded_files = list(self.downloaded_files or [])
+        self.downloaded_artifacts = dict(self.downloaded_artifacts or {})
+
+        refs = record.get("base64_image_refs")
+        images = [_load_artifact_text(backend, ref) for ref in refs] if refs else None
+        self.current_base64_images = images if images and all(images) else None
+        self.current_images = None
+
+        self.current_dr_agent = None
+        self.current_eval_agent = None
+        self.restored_agents = dict(record.get("agents") or {})
+
+    def restore_agent(self, kind: str, agent, backend=None) -> bool:
+        """
+        복원된 대화 히스토리를 새로 만든 에이전트에 적용
+
+        Args:
+            kind (str): "dr" 또는 "eval"
+            agent: 새로 생성한 에이전트
+
+        Returns:
+            bool: 적용 여부 (에이전트 타입이 다르면 적용하지 않음)
+        """
+        saved = self.restored_agents.pop(kind, None)
+        if not saved or saved.get("agent_type") != agent.agent_type:
+            return False
+        backend = backend or get_session_backend()
+        agent.conversation_history = _internalize_history(backend, saved.get("conversation_history") or [])
+        agent.last_valid_json = saved.get("last_valid_json")
+        logger.debug("♻️ 에이전트 대화 복원 (%s, %s, %s개 메시지)", kind, agent.agent_type, len(agent.conversation_history))
+        return True
+
+    def _artifact_ref(self, backend, text: str) -> str:
+        ref = self._artifact_refs.get(text)
+        if ref is None:
+            ref = backend.put_artifact(text.encode("utf-8"))
+            self._artifact_refs[text] = ref
+        return ref
+
+    def _externalize_history(self, backend, history) -> List[Dict[str, Any]]:
+        """대화 히스토리의 data URL 이미지를 산출물 참조로 교체한 사본"""
+        result = []
+        for message in history or []:
+            content = []
+            for part in message.get("content", []):
+                image_url = part.get("image_url")
+                if isinstance(image_url, str) and image_url.startswith("data:"):
+                    part = {**part, "image_url": ARTIFACT_URL_PREFIX + self._artifact_ref(backend, image_url)}
+                content.append(part)
+            result.append({**message, "content": content})
+        return result
+
+    def estimate_bytes(self) -> int:
+        """세션이 잡고 있는 메모리 추정치 (이미지, base64, 대화 히스토리 위주)"""
+        total = 0
+        for image in self.current_images or []:
+            try:
+                total += image.size[0] * image.size[1] * len(image.getbands())
+            except Exception:
+                pass
+        for encoded in self.current_base64_images or []:
+            if isinstance(encoded, str):
+                total += len(encoded)
+        for text in (self.current_json_output, self.current_evaluation_output):
+            if isinstance(text, str):
+                total += len(text)
+        for agent in (self.current_dr_agent, self.current_eval_agent, self.final_report_agent):
+            total += _estimate_history_bytes(getattr(agent, "conversation_history", None))
+        return total
+
+
+def _load_artifact_text(backend, ref: str) -> Optional[str]:
+    data = backend.get_artifact(ref) if backend is not None else None
+    return data.decode("utf-8") if data is not None else None
+
+
+def _internalize_history(backend, history) -> List[Dict[str, Any]]:
+    """산출물 참조를 data URL 이미지로 되돌린 대화 히스토리"""
+    result = []
+    for message in history or []:
+        content = []
+        for part in message.get("content", []):
+            image_url = part.get("image_url")
+            if isinstance(image_url, str) and image_url.startswith(ARTIFACT_URL_PREFIX):
+                part = {**part, "image_url": _load_artifact_text(backend, image_url[len(ARTIFACT_URL_PREFIX):])}
+            content.append(part)
+        result.append({**message, "content": content})
+    return result
+
+
+def _estimate_history_bytes(history) -> int:
+    """Responses API 형식 대화 히스토리의 텍스트/이미지 크기 합"""
+    total = 0
+    for message in history or []:
+        for part in message.get("content", []):
+            for key in ("text", "image_url"):
+                value = part.get(key)
+                if isinstance(value, str):
+                    total += len(value)
+    return total
+
+
+class SessionStore:
+    """세션 ID → SessionState (TTL 정리 + 메모리 상한 + 외부 저장소 동기화)"""
+
+    def __init__(self, ttl_seconds: float = SESSION_TTL_SECONDS, max_bytes: int = SESSION_MAX_BYTES,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL, max_sessions: int = MAX_SESSIONS,
+                 backend=None):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, SessionState] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def get(self, session_id: str) -> SessionState:
+        """세션 상태 반환 (없으면 생성)"""
+        self._maybe_sweep()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState(session_id)
+                self._sessions[session_id] = state
+                evicted = self._evict_oldest_locked() if len(self._sessions) > self.max_sessions else []
+            else:
+                evicted = []
+            state.touch()
+
+        # 메모리에서만 내보낸 세션은 저장소에 남아 있어 다시 접근하면 복원됨
+        for old in evicted:
+            _cleanup_session(old)
+        self._refresh_from_backend(state)
+        return state
+
+    def _refresh_from_backend(self, state: SessionState) -> None:
+        """저장소에 더 새로운 revision이 있으면 (다른 워커가 갱신) 상태를 다시 불러옴"""
+        if self.backend is None:
+            return
+        # 이 프로세스에서 작업 중인 세션은 로컬 상태가 최신
+        if not state.lock.acquire(blocking=False):
+            return
+        try:
+            loaded = self.backend.load_session(state.session_id, newer_than=state.revision)
+            if loaded is None:
+                return
+            revision, record = loaded
+            state.apply_record(record, self.backend)
+            state.revision = revision
+            state._saved_digest = _record_digest(record)
+            logger.info("♻️ 저장소에서 세션 복원: %s (revision %s)", state.session_id, revision)
+        except Exception as e:
+            logger.warning("⚠️ 세션 복원 실패 (%s): %s", state.session_id, e)
+        finally:
+            state.lock.release()
+
+    def save(self, state: SessionState) -> None:
+        """세션 상태를 저장소에 기록 (저장소가 없거나 변경이 없으면 생략)"""
+        if self.backend is None:
+            return
+        try:
+            with state.lock:
+                record = state.to_record(self.backend)
+                digest = _record_digest(record)
+                if digest == state._saved_digest:
+                    return
+                state.revision = self.backend.save_session(state.session_id, record)
+                state._saved_digest = digest
+        except Exception as e:
+            logger.warning("⚠️ 세션 저장 실패 (%s): %s", state.session_id, e)
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+        if state is not None:
+            _cleanup_session(state)
+        if self.backend is not None:
+            self.backend.delete_session(session_id)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions.keys())
+
+    def all_states(self) -> List[SessionState]:
+        """모든 세션 상태 (접근 시간 갱신 없음)"""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def _evict_oldest_locked(self) -> List[SessionState]:
+        """세션 수 상한 초과 시 가장 오래 쓰지 않은 세션 제거 (lock 보유 상태에서 호출)"""
+        evicted = []
+        while len(self._sessions) > self.max_sessions:
+            oldest_id = min(self._sessions, key=lambda sid: self._sessions[sid].last_access)
+            evicted.append(self._sessions.pop(oldest_id))
+        return evicted
+
+    def _maybe_sweep(self) -> None:
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self.sweep(now)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """TTL이 지난 세션 정리 후 정리한 세션 수 반환"""
+        now = now or time.time()
+        with self._lock:
+            self._last_sweep = now
+            expired = [
+                sid for sid, state in self._sessions.items()
+                if self.ttl_seconds and now - state.last_access > self.ttl_seconds
+            ]
+            states = [self._sessions.pop(sid) for sid in expired]
+
+        for state in states:
+            _cleanup_session(state)
+        if states:
+            logger.info("🧹 만료 세션 정리: %s개", len(states))
+
+        # 저장소는 마지막 저장 시각 기준으로 정리 (다른 워커에서 사용 중인 세션은 유지)
+        if self.backend is not None:
+            try:
+                purged = self.backend.purge_expired(self.ttl_seconds)
+                if purged:
+                    logger.info("🧹 저장소 만료 세션 삭제: %s개", purged)
+            except Exception as e:
+                logger.warning("⚠️ 저장소 세션 정리 오류: %s", e)
+        return len(states)
+
+    def enforce_memory_cap(self, state: SessionState) -> bool:
+        """
+        세션 메모리 상한 적용
+
+        재생성 가능한 PIL 이미지 캐시부터 정리하고, 그래도 상한을 넘으면 False 반환
+        """
+        if not self.max_bytes:
+            return True
+        if state.estimate_bytes() <= self.max_bytes:
+            return True
+
+        # base64가 있으면 PIL 이미지는 다시 필요하지 않음
+        if state.current_base64_images and state.current_images:
+            state.current_images = None
+            logger.warning("🧹 세션 메모리 상한 초과 - 이미지 캐시 정리 (%s)", state.session_id)
+
+        return state.estimate_bytes() <= self.max_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            states = list(self._sessions.values())
+        stats = {
+            "active_sessions": len(states),
+            "total_estimated_bytes": sum(state.estimate_bytes() for state in states),
+        }
+        if self.backend is not None:
+            stats["backend"] = self.backend.get_stats()
+        return stats
+
+
+def _record_digest(record: Dict[str, Any]) -> str:
+    serialized = json.dumps(record, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def _cleanup_session(state: SessionState) -> None:
+    """만료/제거된 세션의 진행 중 호출, API key, 에이전트 정리"""
+    try:
+        from llm.cancellation import cancel_session_calls
+        cancel_session_calls(state.session_id, reason="session_expired")
+    except Exception as e:
+        logger.warning("세션 호출 취소 오류: %s", e)
+
+    with state.lock:
+        for agent_attr in ("current_dr_agent", "current_eval_agent"):
+            agent = getattr(state, agent_attr)
+            if agent:
+                try:
+                    agent.clear_json_cache()
+                except Exception as e:
+                    logger.warning("세션 에이전트 정리 오류: %s", e)
+        if state.final_report_agent:
+            try:
+                state.final_report_agent.clear_all()
+            except Exception as e:
+                logger.warning("Final Report Agent 정리 오류: %s", e)
+        state.reset_work()
+        state.final_report_agent = None
+        state.current_api_key = None
+        state.api_key_timestamp = None
+
+
+# 프로세스 공용 세션 저장소
+session_store = SessionStore(backend=get_session_backend())
+
+# 현재 요청을 처리 중인 세션 (에이전트의 모델 라우팅 등에서 사용)
+_active_session: contextvars.ContextVar = contextvars.ContextVar("active_session", default=None)
+
+
+def get_session_id_from_request(request=None) -> str:
+    """Gradio 요청에서 세션 ID 추출 (없으면 기본 세션)"""
+    session_hash = getattr(request, "session_hash", None) if request is not None else None
+    if session_hash:
+        return f"session_{session_hash}"
+    return DEFAULT_SESSION_ID
+
+
+def bind_session(request=None) -> SessionState:
+    """요청의 세션 상태를 가져와 현재 컨텍스트에 연결 (요청마다 새 추적 ID)"""
+    state = session_store.get(get_session_id_from_request(request))
+    _active_session.set(state)
+    new_trace(state.session_id)
+    return state
+
+
+def get_active_session() -> Optional[SessionState]:
+    """현재 컨텍스트에 연결된 세션 상태 (없으면 None)"""
+    return _active_session.get()
+
+
+@contextmanager
+def use_session(state: SessionState):
+    """요청 없이 만든 세션 상태(일괄 작업 등)를 범위 안의 현재 세션으로 연결 (범위가 하나의 추적)"""
+    reset = _active_session.set(state)
+    try:
+        with trace_scope(state.session_id):
+            yield state
+    finally:
+        _active_session.reset(reset)
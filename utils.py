@@ -1,38 +1,53 @@
 import base64
+import datetime
 import io
+import os
 from typing import List, Union
 from PIL import Image
 import hashlib
+from telemetry.log import fields, get_logger
+from telemetry.tracing import span, traced
+
+logger = get_logger(__name__)
 
 # 이미지 캐시 (메모리 기반)
 _image_cache = {}
+# 이미지 캐시 조회 결과 (지표용, 캐시를 비워도 유지)
+_image_cache_stats = {"hits": 0, "misses": 0}
 
 def encode_image_to_base64(image: Image.Image) -> str:
     """이미지를 base64로 인코딩 (캐시 적용)"""
     if image is None:
-        print("encode_image_to_base64: 이미지가 None입니다")
+        logger.debug("encode_image_to_base64: 이미지가 None입니다")
         return None
     
     try:
-        # 이미지 해시 생성 (캐시 키)
-        image_bytes = io.BytesIO()
-        image.save(image_bytes, format="PNG")
-        image_hash = hashlib.md5(image_bytes.getvalue()).hexdigest()
-        
-        # 캐시에 있으면 반환
-        if image_hash in _image_cache:
-            print(f"encode_image_to_base64: 캐시에서 이미지 반환 (해시: {image_hash[:8]}...)")
-            return _image_cache[image_hash]
-        
-        # 없으면 인코딩하고 캐시에 저장
-        base64_image = base64.b64encode(image_bytes.getvalue()).decode('utf-8')
-        result = f"data:image/png;base64,{base64_image}"
-        _image_cache[image_hash] = result
-        
-        print(f"encode_image_to_base64: 새 이미지 인코딩 완료 (해시: {image_hash[:8]}..., 길이: {len(result)})")
-        return result
+        with span("image.encode", width=image.width, height=image.height) as s:
+            # 이미지 해시 생성 (캐시 키)
+            image_bytes = io.BytesIO()
+            image.save(image_bytes, format="PNG")
+            image_hash = hashlib.md5(image_bytes.getvalue()).hexdigest()
+            
+            # 캐시에 있으면 반환
+            if image_hash in _image_cache:
+                _image_cache_stats["hits"] += 1
+                s.set(cache_hit=True)
+                logger.debug("encode_image_to_base64: 캐시에서 이미지 반환 (해시: %s...)", image_hash[:8],
+                             extra=fields(sample="image.encode.cache_hit"))
+                return _image_cache[image_hash]
+            
+            # 없으면 인코딩하고 캐시에 저장
+            _image_cache_stats["misses"] += 1
+            base64_image = base64.b64encode(image_bytes.getvalue()).decode('utf-8')
+            result = f"data:image/png;base64,{base64_image}"
+            _image_cache[image_hash] = result
+            s.set(cache_hit=False, encoded_bytes=len(result))
+            
+            logger.debug("encode_image_to_base64: 새 이미지 인코딩 완료 (해시: %s..., 길이: %d)", image_hash[:8], len(result),
+                         extra=fields(sample="image.encode.miss"))
+            return result
     except Exception as e:
-        print(f"이미지 인코딩 오류: {e}")
+        logger.error("이미지 인코딩 오류: %s", e)
         return None
 
 def encode_images_to_base64(images: Union[Image.Image, List[Image.Image]]) -> Union[str, List[str]]:
@@ -54,9 +69,37 @@ def encode_images_to_base64(images: Union[Image.Image, List[Image.Image]]) -> Un
         else:
             raise ValueError("images must be PIL.Image or list of PIL.Image")
     except Exception as e:
-        print(f"이미지 인코딩 오류: {e}")
+        logger.error("이미지 인코딩 오류: %s", e)
         return None
 
+# 파일 확장자별 data URL MIME 타입
+_IMAGE_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+}
+
+@traced("image.encode_file")
+def encode_image_file_to_base64(path: str) -> str:
+    """이미지 파일을 다시 인코딩하지 않고 data URL로 변환 (일괄 평가용, 캐시 없음)"""
+    mime_type = _IMAGE_MIME_TYPES.get(os.path.splitext(path)[1].lower())
+    if mime_type is None:
+        raise ValueError(f"지원하지 않는 이미지 형식: {path}")
+    with open(path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode('utf-8')
+    return f"data:{mime_type};base64,{encoded}"
+
+def build_result_record(result_data, agent_name, is_feedback=False, feedback_text="", timestamp=None):
+    """결과 저장 파일의 JSON 구조 (UI 다운로드/일괄 평가 공용)"""
+    return {
+        "agent_type": agent_name,
+        "timestamp": timestamp or datetime.datetime.now().strftime("%Y%m%d_%H%M%S"),
+        "is_feedback": is_feedback,
+        "feedback": feedback_text,
+        "result": result_data
+    }
+
 def clear_image_cache():
     """이미지 캐시 초기화"""
     global _image_cache
@@ -66,5 +109,7 @@ def get_cache_info():
     """캐시 정보 반환"""
     return {
         "cached_images": len(_image_cache),
-        "cache_keys": list(_image_cache.keys())
+        "cache_keys": list(_image_cache.keys()),
+        "hits": _image_cache_stats["hits"],
+        "misses": _image_cache_stats["misses"],
     } 
\ No newline at end of file